@@ -6,13 +6,18 @@ Multi-layer caching, cache warming, invalidation strategies
 import time
 import hashlib
 import json
-import pickle
-from typing import Any, Dict, List, Optional, Callable
+import bisect
+import fnmatch
+from typing import Any, Dict, List, Optional, Callable, Set
 from datetime import datetime, timedelta
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 import sqlite3
 
+from cache_codec import CacheCodec
+from cache_manager import CacheManager
+from single_flight import get_single_flight, SQLiteLockStore
+
 class CacheLayer:
     """Base cache layer interface"""
     
@@ -36,6 +41,35 @@ class MemoryCache(CacheLayer):
         self.cache = OrderedDict()
         self.max_size = max_size
         self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        # Tag and prefix indexes
+        self._tag_index: Dict[str, Set[str]] = defaultdict(set)
+        self._key_tags: Dict[str, Set[str]] = {}
+        self._sorted_keys: List[str] = []
+    
+    def _index_add(self, key: str, tags: Optional[List[str]]):
+        if key not in self._key_tags:
+            bisect.insort(self._sorted_keys, key)
+        self._unindex_tags(key)
+        self._key_tags[key] = set(tags or [])
+        for tag in self._key_tags[key]:
+            self._tag_index[tag].add(key)
+    
+    def _unindex_tags(self, key: str):
+        for tag in self._key_tags.get(key, ()):
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+    
+    def _index_remove(self, key: str):
+        if key not in self._key_tags:
+            return
+        self._unindex_tags(key)
+        del self._key_tags[key]
+        i = bisect.bisect_left(self._sorted_keys, key)
+        if i < len(self._sorted_keys) and self._sorted_keys[i] == key:
+            del self._sorted_keys[i]
     
     def get(self, key: str) -> Optional[Any]:
         if key in self.cache:
@@ -49,15 +83,17 @@ class MemoryCache(CacheLayer):
             else:
                 # Expired
                 del self.cache[key]
+                self._index_remove(key)
         
         self.stats['misses'] += 1
         return None
     
-    def set(self, key: str, value: Any, ttl: int = 300):
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[List[str]] = None):
         # Check size limit
         if len(self.cache) >= self.max_size and key not in self.cache:
             # Evict oldest
-            self.cache.popitem(last=False)
+            evicted, _ = self.cache.popitem(last=False)
+            self._index_remove(evicted)
             self.stats['evictions'] += 1
         
         self.cache[key] = {
@@ -66,13 +102,44 @@ class MemoryCache(CacheLayer):
             'created_at': datetime.now()
         }
         self.cache.move_to_end(key)
+        self._index_add(key, tags)
     
     def delete(self, key: str):
         if key in self.cache:
             del self.cache[key]
+        self._index_remove(key)
+    
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        """Keys starting with prefix (range scan on the sorted key index)"""
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        end = bisect.bisect_left(self._sorted_keys, prefix + '\uffff')
+        return self._sorted_keys[start:end]
+    
+    def invalidate_tags(self, tags: List[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._tag_index.get(tag, set())
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        keys = self.keys_with_prefix(prefix)
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+    
+    def invalidate_glob(self, pattern: str) -> int:
+        keys = [k for k in self.cache if fnmatch.fnmatchcase(k, pattern)]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
     
     def clear(self):
         self.cache.clear()
+        self._tag_index.clear()
+        self._key_tags.clear()
+        self._sorted_keys.clear()
     
     def get_stats(self) -> Dict:
         total = self.stats['hits'] + self.stats['misses']
@@ -92,8 +159,10 @@ class MemoryCache(CacheLayer):
 class DiskCache(CacheLayer):
     """Persistent disk-based cache"""
     
-    def __init__(self, db_path: str = "disk_cache.db"):
+    def __init__(self, db_path: str = "disk_cache.db", codec: Optional[CacheCodec] = None):
         self.db_path = Path(db_path)
+        # Arbitrary Python values -> pickle; large payloads are compressed
+        self.codec = codec or CacheCodec(serializer='pickle')
         self.ensure_table()
         self.stats = {"hits": 0, "misses": 0}
     
@@ -108,6 +177,14 @@ class DiskCache(CacheLayer):
                 )
             """)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_expires ON cache_entries(expires_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entry_tags (
+                    tag TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    PRIMARY KEY (tag, cache_key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entry_tags_key ON cache_entry_tags(cache_key)")
             conn.commit()
     
     def get(self, key: str) -> Optional[Any]:
@@ -120,24 +197,41 @@ class DiskCache(CacheLayer):
                 
                 if result:
                     self.stats['hits'] += 1
-                    return pickle.loads(result[0])
+                    return self.codec.decode(result[0], legacy='pickle')
                 
                 self.stats['misses'] += 1
                 return None
         except Exception:
             return None
     
-    def set(self, key: str, value: Any, ttl: int = 300):
+    def peek(self, key: str) -> Optional[Any]:
+        """Get without touching hit/miss stats (for polling waiters)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                result = conn.execute("""
+                    SELECT value FROM cache_entries
+                    WHERE cache_key = ? AND expires_at > ?
+                """, (key, datetime.now())).fetchone()
+                return self.codec.decode(result[0], legacy='pickle') if result else None
+        except Exception:
+            return None
+    
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[List[str]] = None):
         try:
             expires_at = datetime.now() + timedelta(seconds=ttl)
-            pickled_value = pickle.dumps(value)
+            encoded_value = self.codec.encode(value)
             
             with sqlite3.connect(self.db_path) as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO cache_entries
                     (cache_key, value, expires_at)
                     VALUES (?, ?, ?)
-                """, (key, pickled_value, expires_at))
+                """, (key, encoded_value, expires_at))
+                conn.execute("DELETE FROM cache_entry_tags WHERE cache_key = ?", (key,))
+                if tags:
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO cache_entry_tags (tag, cache_key) VALUES (?, ?)
+                    """, [(tag, key) for tag in set(tags)])
                 conn.commit()
         except Exception as e:
             print(f"Disk cache set error: {e}")
@@ -146,14 +240,72 @@ class DiskCache(CacheLayer):
         try:
             with sqlite3.connect(self.db_path) as conn:
                 conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (key,))
+                conn.execute("DELETE FROM cache_entry_tags WHERE cache_key = ?", (key,))
                 conn.commit()
         except Exception:
             pass
     
+    def get_tags(self, key: str) -> List[str]:
+        """Tags registered for key"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return [row[0] for row in conn.execute(
+                    "SELECT tag FROM cache_entry_tags WHERE cache_key = ?", (key,)
+                )]
+        except Exception:
+            return []
+    
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """Delete entries registered under any of the tags (tag index lookup)"""
+        if not tags:
+            return 0
+        placeholders = ','.join('?' * len(tags))
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                keys = [row[0] for row in conn.execute(f"""
+                    SELECT DISTINCT cache_key FROM cache_entry_tags WHERE tag IN ({placeholders})
+                """, tuple(tags))]
+                conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", [(k,) for k in keys])
+                conn.executemany("DELETE FROM cache_entry_tags WHERE cache_key = ?", [(k,) for k in keys])
+                conn.commit()
+                return len(keys)
+        except Exception:
+            return 0
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Delete entries whose key starts with prefix (range scan on the primary key)"""
+        upper = prefix + '\uffff'
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    DELETE FROM cache_entry_tags WHERE cache_key >= ? AND cache_key < ?
+                """, (prefix, upper))
+                result = conn.execute("""
+                    DELETE FROM cache_entries WHERE cache_key >= ? AND cache_key < ?
+                """, (prefix, upper))
+                conn.commit()
+                return result.rowcount
+        except Exception:
+            return 0
+    
+    def invalidate_glob(self, pattern: str) -> int:
+        """Delete entries whose key matches a glob pattern (full scan)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    DELETE FROM cache_entry_tags WHERE cache_key GLOB ?
+                """, (pattern,))
+                result = conn.execute("DELETE FROM cache_entries WHERE cache_key GLOB ?", (pattern,))
+                conn.commit()
+                return result.rowcount
+        except Exception:
+            return 0
+    
     def clear(self):
         try:
             with sqlite3.connect(self.db_path) as conn:
                 conn.execute("DELETE FROM cache_entries")
+                conn.execute("DELETE FROM cache_entry_tags")
                 conn.commit()
         except Exception:
             pass
@@ -165,6 +317,10 @@ class DiskCache(CacheLayer):
                 result = conn.execute("""
                     DELETE FROM cache_entries WHERE expires_at < ?
                 """, (datetime.now(),))
+                conn.execute("""
+                    DELETE FROM cache_entry_tags
+                    WHERE cache_key NOT IN (SELECT cache_key FROM cache_entries)
+                """)
                 conn.commit()
                 return result.rowcount
         except Exception:
@@ -188,7 +344,8 @@ class DiskCache(CacheLayer):
                     "expired_entries": expired,
                     "hits": self.stats['hits'],
                     "misses": self.stats['misses'],
-                    "hit_rate": round(hit_rate, 2)
+                    "hit_rate": round(hit_rate, 2),
+                    "codec": self.codec.get_stats()
                 }
         except Exception:
             return {"type": "disk", "error": "Stats unavailable"}
@@ -217,20 +374,21 @@ class MultiLayerCache:
         # Try L2 (disk)
         value = self.l2_cache.get(key)
         if value is not None:
-            # Promote to L1
-            self.l1_cache.set(key, value)
+            # Promote to L1 (keep tags so L1 invalidation still finds it)
+            self.l1_cache.set(key, value, tags=self.l2_cache.get_tags(key))
             return value
         
         return None
     
-    def set(self, key: str, value: Any, ttl: int = 300, persist: bool = True):
-        """Set value in cache layers"""
+    def set(self, key: str, value: Any, ttl: int = 300, persist: bool = True,
+            tags: Optional[List[str]] = None):
+        """Set value in cache layers (tags: e.g. ['team:645', 'league:203:2025'])"""
         # Always set in L1
-        self.l1_cache.set(key, value, ttl)
+        self.l1_cache.set(key, value, ttl, tags=tags)
         
         # Optionally persist to L2
         if persist:
-            self.l2_cache.set(key, value, ttl)
+            self.l2_cache.set(key, value, ttl, tags=tags)
     
     def delete(self, key: str):
         """Delete from all layers"""
@@ -243,16 +401,41 @@ class MultiLayerCache:
         self.l2_cache.clear()
     
     def invalidate_pattern(self, pattern: str):
-        """Invalidate cache entries matching pattern"""
-        # For memory cache
-        keys_to_delete = [k for k in self.l1_cache.cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            self.l1_cache.delete(key)
+        """
+        Invalidate cache entries matching pattern on both layers
         
-        # For disk cache - would need pattern matching in SQL
-        # Simplified: clear all if pattern is '*'
+        '*' clears everything, 'prefix*' uses the prefix index, other glob
+        patterns scan; a plain string matches as a substring ('*text*').
+        """
         if pattern == '*':
             self.clear()
+            return
+        
+        if not any(ch in pattern for ch in '*?['):
+            pattern = f"*{pattern}*"
+        
+        body = pattern[:-1]
+        if pattern.endswith('*') and not any(ch in body for ch in '*?['):
+            self.invalidate_prefix(body)
+            return
+        
+        self.l1_cache.invalidate_glob(pattern)
+        self.l2_cache.invalidate_glob(pattern)
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Invalidate entries whose key starts with prefix on both layers"""
+        self.l1_cache.invalidate_prefix(prefix)
+        return self.l2_cache.invalidate_prefix(prefix)
+    
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """Invalidate entries registered under any of the tags on both layers"""
+        l1_count = self.l1_cache.invalidate_tags(tags)
+        l2_count = self.l2_cache.invalidate_tags(tags)
+        return max(l1_count, l2_count)
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Invalidate entries registered under tag on both layers"""
+        return self.invalidate_tags([tag])
     
     def register_warmup(self, cache_key: str, func: Callable):
         """Register function to warm up cache"""
@@ -341,8 +524,13 @@ class CacheInvalidator:
     
     @staticmethod
     def tag_based(cache: MultiLayerCache, tag: str):
-        """Tag-based invalidation"""
-        cache.invalidate_pattern(f"*{tag}*")
+        """Tag-based invalidation (tag index on both layers)"""
+        return cache.invalidate_tag(tag)
+    
+    @staticmethod
+    def prefix_based(cache: MultiLayerCache, prefix: str):
+        """Prefix-based invalidation (key range scan on both layers)"""
+        return cache.invalidate_prefix(prefix)
     
     @staticmethod
     def dependency_based(
@@ -350,10 +538,21 @@ class CacheInvalidator:
         primary_key: str,
         dependent_keys: List[str]
     ):
-        """Dependency-based invalidation"""
+        """
+        Dependency-based invalidation
+        
+        Entries tagged with the primary key (tags=[primary_key]) are treated
+        as its dependents and evicted together with the explicit list.
+        """
         cache.delete(primary_key)
         for dep_key in dependent_keys:
             cache.delete(dep_key)
+        cache.invalidate_tag(primary_key)
+    
+    @staticmethod
+    def fixture_finished(cache: MultiLayerCache, fixture: Dict):
+        """Evict fixture, team and league-season entries of a finished API fixture"""
+        return cache.invalidate_tags(CacheManager.tags_for_fixture(fixture))
 
 
 def cache_key_generator(*args, **kwargs) -> str:
@@ -362,13 +561,21 @@ def cache_key_generator(*args, **kwargs) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cached(ttl: int = 300, persist: bool = True):
-    """Decorator for caching function results"""
+def cached(ttl: int = 300, persist: bool = True,
+           tags: Optional[Callable[..., List[str]]] = None):
+    """
+    Decorator for caching function results
+    
+    Args:
+        tags: Optional function called with the wrapped call's arguments that
+              returns tags for the entry, e.g. lambda team_id, **kw: [f"team:{team_id}"]
+    """
     def decorator(func: Callable):
         def wrapper(*args, **kwargs):
             # Get or create cache instance
             if not hasattr(wrapper, '_cache'):
                 wrapper._cache = MultiLayerCache()
+                wrapper._lock_store = SQLiteLockStore(wrapper._cache.l2_cache.db_path) if persist else None
             
             # Generate cache key
             cache_key = f"{func.__name__}:{cache_key_generator(*args, **kwargs)}"
@@ -378,10 +585,19 @@ def cached(ttl: int = 300, persist: bool = True):
             if result is not None:
                 return result
             
-            # Compute and cache
-            result = func(*args, **kwargs)
-            wrapper._cache.set(cache_key, result, ttl, persist)
-            return result
+            # Compute and cache - concurrent misses share one computation
+            def compute():
+                value = func(*args, **kwargs)
+                entry_tags = tags(*args, **kwargs) if tags else None
+                wrapper._cache.set(cache_key, value, ttl, persist, tags=entry_tags)
+                return value
+            
+            return get_single_flight().do(
+                cache_key,
+                compute,
+                cache_lookup=lambda: wrapper._cache.l2_cache.peek(cache_key),
+                lock_store=wrapper._lock_store
+            )
         
         return wrapper
     return decorator
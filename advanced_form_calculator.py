@@ -49,6 +49,7 @@ class AdvancedFormCalculator:
         Args:
             matches: Maç listesi [{'goals_for': 2, 'goals_against': 1, 'location': 'home', ...}]
             opponent_strengths: Her maç için rakip gücü listesi (Elo veya benzeri) [1500, 1600, ...]
+                (None ise maçlardaki 'opponent_strength' alanı kullanılır)
             location_filter: 'home', 'away' veya None (tüm maçlar)
             num_matches: Kaç maç geriye bakılacak
             
@@ -71,6 +72,13 @@ class AdvancedFormCalculator:
         if not filtered_matches:
             return self._get_default_form()
         
+        # Rakip güçleri verilmediyse maçlara eklenmiş 'opponent_strength' kullanılır
+        # (OpponentStrengthService.annotate_matches - lig tablosundan, ek istek yok)
+        if opponent_strengths is None:
+            annotated = [m.get('opponent_strength') for m in filtered_matches]
+            if all(s is not None for s in annotated):
+                opponent_strengths = annotated
+        
         # 1. Result Score (Sonuç skoru)
         result_score = self._calculate_result_score(filtered_matches)
         
@@ -190,6 +198,8 @@ class AdvancedFormCalculator:
         
         # Ortalama rakip gücü (normalizasyon için)
         avg_opponent_strength = sum(opponent_strengths) / len(opponent_strengths)
+        if avg_opponent_strength <= 0:
+            return self._calculate_result_score(matches)
         
         for idx, match in enumerate(matches):
             # Maç ağırlığı (yeni maçlar daha önemli)
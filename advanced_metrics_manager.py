@@ -11,6 +11,14 @@ Modüller:
 4. Pressing Metrics Calculator
 5. Progressive Metrics Calculator
 6. Expected Assists Calculator
+
+Takıma ait (rakipten bağımsız) metrikler (form, ev sahibi avantajı, progressive,
+xA) (takım, lig, sezon, hafta) anahtarıyla cache'lenir; sadece rakibe bağlı
+xG ve pressing her analizde yeniden hesaplanır.
+
+Ligin maç arşivi varsa xG / xA / pressing / progressive hesaplayıcıları
+team_profiles'taki önceden hesaplanmış lig profillerini (gerçek maç başı
+istatistikler + lig yüzdelikleri) kullanır.
 """
 
 from typing import Dict, List, Optional, Any
@@ -59,12 +67,84 @@ except ImportError:
     XA_CALC_AVAILABLE = False
     ExpectedAssistsCalculator = None
 
+try:
+    from team_profiles import TeamProfileStore, get_profile_store
+    PROFILE_STORE_AVAILABLE = True
+except ImportError:
+    PROFILE_STORE_AVAILABLE = False
+    TeamProfileStore = None
+    get_profile_store = None
+
+try:
+    from cache_manager import CacheManager, get_cache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+    CacheManager = None
+    get_cache = None
+
+# Takım bağlamı cache kategorileri
+TEAM_CONTEXT_CATEGORY = 'advanced_team_context'
+TEAM_CONTEXT_GENERATION_CATEGORY = 'advanced_team_context_gen'
+TEAM_CONTEXT_TTL = 604800  # 7 gün - hafta anahtarı zaten yeni maçta değişir
+
+FINISHED_STATUSES = ('FT', 'AET', 'PEN')
+
+
+def get_current_season(now: Optional[datetime] = None) -> int:
+    """Sezon yılı (Temmuz'dan itibaren yeni sezon)"""
+    now = now or datetime.now()
+    return now.year if now.month >= 7 else now.year - 1
+
+
+def get_matchday_marker(recent_matches: Optional[List[Dict]]) -> str:
+    """
+    Takımın bitmiş son maçından hafta işareti üret
+    
+    Yeni bir bitmiş maç geldiğinde işaret değişir, dolayısıyla eski
+    cache kaydı bir daha okunmaz.
+    """
+    if not recent_matches:
+        return 'none'
+    dates = [m.get('date') or '' for m in recent_matches]
+    return f"{max(dates)}|{len(recent_matches)}"
+
+
+def build_team_stats_from_location(loc_stats: Dict, stability_default: float = 50.0) -> Dict[str, Any]:
+    """
+    calculate_general_stats_v2 konum istatistiklerinden advanced metrics girdisi
+    
+    Args:
+        loc_stats: calculate_general_stats_v2()['home'] veya ['away']
+        stability_default: Istikrar_Puani yoksa kullanılacak değer
+    """
+    return {
+        'shots_on_target': 5,  # TODO: API coverage expansion
+        'total_shots': 12,
+        'goals_scored': loc_stats.get('Ort. Gol ATILAN', 1.5),
+        'goals_conceded': loc_stats.get('Ort. Gol YENEN', 1.2),
+        'possession': 50,  # TODO
+        'total_passes': 450,  # TODO
+        'key_passes': 10,  # TODO
+        'assists': 1,  # TODO
+        'matches_played': 10,
+        'stability_score': loc_stats.get('Istikrar_Puani', stability_default)
+    }
+
 
 class AdvancedMetricsManager:
     """Tüm gelişmiş metrikleri yöneten merkezi sınıf"""
     
-    def __init__(self):
-        """Initialize all available calculators"""
+    def __init__(self, cache: Optional['CacheManager'] = None, use_cache: bool = True,
+                 profile_store: Optional['TeamProfileStore'] = None):
+        """
+        Initialize all available calculators
+        
+        Args:
+            cache: Takım bağlamı için CacheManager (None = global cache)
+            use_cache: False ise her analiz baştan hesaplanır
+            profile_store: Lig takım profilleri (None = global store)
+        """
         self.form_calc = AdvancedFormCalculator() if FORM_CALC_AVAILABLE else None
         self.home_adv_calc = DynamicHomeAdvantageCalculator() if HOME_ADV_CALC_AVAILABLE else None
         self.xg_calc = ExpectedGoalsCalculator() if XG_CALC_AVAILABLE else None
@@ -72,6 +152,16 @@ class AdvancedMetricsManager:
         self.progressive_calc = ProgressiveMetricsCalculator() if PROGRESSIVE_CALC_AVAILABLE else None
         self.xa_calc = ExpectedAssistsCalculator() if XA_CALC_AVAILABLE else None
         
+        # Takım bağlamı cache'i
+        if cache is None and use_cache and CACHE_AVAILABLE:
+            cache = get_cache()
+        self.cache = cache if use_cache else None
+        
+        # Önceden hesaplanmış lig profilleri (arşiv yoksa profil bulunmaz)
+        if profile_store is None and PROFILE_STORE_AVAILABLE:
+            profile_store = get_profile_store()
+        self.profile_store = profile_store
+        
         # Availability check
         self.available_modules = self._check_availability()
     
@@ -96,11 +186,18 @@ class AdvancedMetricsManager:
         recent_matches: Optional[List[Dict]] = None,
         home_stats: Optional[Dict] = None,
         away_stats: Optional[Dict] = None,
-        is_home: bool = True
+        is_home: bool = True,
+        season: Optional[int] = None,
+        matchday: Optional[str] = None,
+        opponent_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Kapsamlı takım analizi - tüm metrikleri birleştir
         
+        Takım bağlamı (form, ev avantajı, progressive, xA) get_team_context
+        üzerinden cache'den okunur; xG ve pressing rakibe göre hesaplanır.
+        opponent_id verilirse rakibin lig profili de xG / pressing'e girer.
+        
         Returns:
             {
                 'form_analysis': {...},
@@ -114,43 +211,37 @@ class AdvancedMetricsManager:
                 'weaknesses': [...]
             }
         """
+        context = self.get_team_context(
+            team_id=team_id,
+            team_name=team_name,
+            league_id=league_id,
+            team_stats=team_stats,
+            recent_matches=recent_matches,
+            home_stats=home_stats,
+            away_stats=away_stats,
+            is_home=is_home,
+            season=season,
+            matchday=matchday
+        )
+        
+        profile = self.get_team_profile(team_id, league_id, season)
+        opponent_profile = self.get_team_profile(opponent_id, league_id, season)
+        
+        # 1-2. Form & Home Advantage (takım bağlamından)
         analysis = {}
+        for key in ('form_analysis', 'home_advantage'):
+            if key in context:
+                analysis[key] = context[key]
         
-        # 1. Form Analysis
-        if self.form_calc and recent_matches:
-            try:
-                form_result = self.form_calc.calculate_advanced_form(
-                    matches=recent_matches,
-                    location_filter='home' if is_home else 'away',
-                    num_matches=10
-                )
-                analysis['form_analysis'] = form_result
-            except Exception as e:
-                print(f"⚠️ Form analysis error: {e}")
-                analysis['form_analysis'] = None
-        
-        # 2. Home Advantage (if home team)
-        if self.home_adv_calc and is_home:
-            try:
-                home_adv_result = self.home_adv_calc.calculate_home_advantage(
-                    team_id=team_id,
-                    team_name=team_name,
-                    league_id=league_id,
-                    home_stats=home_stats,
-                    away_stats=away_stats
-                )
-                analysis['home_advantage'] = home_adv_result
-            except Exception as e:
-                print(f"⚠️ Home advantage error: {e}")
-                analysis['home_advantage'] = None
-        
-        # 3. Expected Goals
+        # 3. Expected Goals (rakibe bağlı)
         if self.xg_calc:
             try:
                 if is_home:
                     xg_result = self.xg_calc.calculate_match_xg(
                         home_team_stats=team_stats,
-                        away_team_stats=opponent_stats
+                        away_team_stats=opponent_stats,
+                        home_profile=profile,
+                        away_profile=opponent_profile
                     )
                     analysis['expected_goals'] = {
                         'team_xG': xg_result['home_xG'],
@@ -160,7 +251,9 @@ class AdvancedMetricsManager:
                 else:
                     xg_result = self.xg_calc.calculate_match_xg(
                         home_team_stats=opponent_stats,
-                        away_team_stats=team_stats
+                        away_team_stats=team_stats,
+                        home_profile=opponent_profile,
+                        away_profile=profile
                     )
                     analysis['expected_goals'] = {
                         'team_xG': xg_result['away_xG'],
@@ -176,19 +269,122 @@ class AdvancedMetricsManager:
             try:
                 pressing_result = self.pressing_calc.estimate_ppda_from_stats(
                     team_stats=team_stats,
-                    opponent_stats=opponent_stats
+                    opponent_stats=opponent_stats,
+                    profile=profile,
+                    opponent_profile=opponent_profile
                 )
                 analysis['pressing'] = pressing_result
             except Exception as e:
                 print(f"⚠️ Pressing metrics error: {e}")
                 analysis['pressing'] = None
         
+        # 5-6. Progressive & Expected Assists (takım bağlamından)
+        for key in ('progressive', 'chance_creation'):
+            if key in context:
+                analysis[key] = context[key]
+        
+        # 7. Overall Rating & SWOT Analysis
+        analysis['overall_rating'] = self._calculate_overall_rating(analysis)
+        analysis['strengths'] = self._identify_strengths(analysis)
+        analysis['weaknesses'] = self._identify_weaknesses(analysis)
+        
+        return analysis
+    
+    def get_team_context(
+        self,
+        team_id: int,
+        team_name: str,
+        league_id: int,
+        team_stats: Dict,
+        recent_matches: Optional[List[Dict]] = None,
+        home_stats: Optional[Dict] = None,
+        away_stats: Optional[Dict] = None,
+        is_home: bool = True,
+        season: Optional[int] = None,
+        matchday: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Rakipten bağımsız takım metrikleri - (takım, lig, sezon, hafta) cache'li
+        
+        Args:
+            season: Sezon yılı (None = güncel sezon)
+            matchday: Hafta işareti (None = son bitmiş maçtan türetilir)
+            
+        Returns:
+            {'form_analysis', 'home_advantage', 'progressive', 'chance_creation'}
+            (ilgili hesaplayıcı yoksa anahtar bulunmaz)
+        """
+        key_params = None
+        if self.cache is not None:
+            key_params = self._team_context_key(team_id, league_id, season, matchday, recent_matches, is_home)
+            cached = self.cache.get(TEAM_CONTEXT_CATEGORY, **key_params)
+            if cached is not None:
+                return cached
+        
+        context = self._compute_team_context(
+            team_id, team_name, league_id, team_stats,
+            recent_matches, home_stats, away_stats, is_home,
+            self.get_team_profile(team_id, league_id, season)
+        )
+        
+        if key_params is not None:
+            try:
+                self.cache.set(TEAM_CONTEXT_CATEGORY, context, TEAM_CONTEXT_TTL, **key_params)
+            except (TypeError, ValueError) as e:
+                print(f"⚠️ Team context cache error: {e}")
+        
+        return context
+    
+    def _compute_team_context(
+        self,
+        team_id: int,
+        team_name: str,
+        league_id: int,
+        team_stats: Dict,
+        recent_matches: Optional[List[Dict]],
+        home_stats: Optional[Dict],
+        away_stats: Optional[Dict],
+        is_home: bool,
+        profile: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Takım bağlamını hesaplayıcılarla baştan hesapla (profile: lig profili kaydı)"""
+        analysis = {}
+        
+        # 1. Form Analysis
+        if self.form_calc and recent_matches:
+            try:
+                form_result = self.form_calc.calculate_advanced_form(
+                    matches=recent_matches,
+                    location_filter='home' if is_home else 'away',
+                    num_matches=10
+                )
+                analysis['form_analysis'] = form_result
+            except Exception as e:
+                print(f"⚠️ Form analysis error: {e}")
+                analysis['form_analysis'] = None
+        
+        # 2. Home Advantage (if home team)
+        if self.home_adv_calc and is_home:
+            try:
+                home_adv_result = self.home_adv_calc.calculate_home_advantage(
+                    team_id=team_id,
+                    team_name=team_name,
+                    league_id=league_id,
+                    home_stats=home_stats,
+                    away_stats=away_stats
+                )
+                analysis['home_advantage'] = home_adv_result
+            except Exception as e:
+                print(f"⚠️ Home advantage error: {e}")
+                analysis['home_advantage'] = None
+        
         # 5. Progressive Metrics
         if self.progressive_calc:
             try:
                 progressive_result = self.progressive_calc.estimate_progressive_metrics_from_stats(
                     team_stats=team_stats,
-                    match_count=1
+                    match_count=1,
+                    profile=profile
                 )
                 analysis['progressive'] = progressive_result
             except Exception as e:
@@ -200,20 +396,89 @@ class AdvancedMetricsManager:
             try:
                 xa_result = self.xa_calc.estimate_team_xa_from_stats(
                     team_stats=team_stats,
-                    match_count=1
+                    match_count=1,
+                    profile=profile
                 )
                 analysis['chance_creation'] = xa_result
             except Exception as e:
                 print(f"⚠️ xA calculation error: {e}")
                 analysis['chance_creation'] = None
         
-        # 7. Overall Rating & SWOT Analysis
-        analysis['overall_rating'] = self._calculate_overall_rating(analysis)
-        analysis['strengths'] = self._identify_strengths(analysis)
-        analysis['weaknesses'] = self._identify_weaknesses(analysis)
-        
         return analysis
     
+    def get_team_profile(self, team_id: Optional[int], league_id: int,
+                         season: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Takımın önceden hesaplanmış lig profili (arşivde yoksa None)"""
+        if self.profile_store is None or team_id is None:
+            return None
+        try:
+            return self.profile_store.get_profile(
+                team_id, league_id, season if season is not None else get_current_season()
+            )
+        except Exception as e:
+            print(f"⚠️ Team profile error: {e}")
+            return None
+    
+    def _team_context_key(
+        self,
+        team_id: int,
+        league_id: int,
+        season: Optional[int],
+        matchday: Optional[str],
+        recent_matches: Optional[List[Dict]],
+        is_home: bool
+    ) -> Dict[str, Any]:
+        """Takım bağlamı cache anahtarı parametreleri"""
+        return {
+            'team_id': team_id,
+            'league_id': league_id,
+            'season': season if season is not None else get_current_season(),
+            'matchday': matchday if matchday is not None else get_matchday_marker(recent_matches),
+            'is_home': is_home,
+            'generation': self._get_generation(team_id, league_id)
+        }
+    
+    def _get_generation(self, team_id: int, league_id: int) -> int:
+        """Takımın cache neslini oku (invalidate ile artar)"""
+        generation = self.cache.get(TEAM_CONTEXT_GENERATION_CATEGORY, team_id=team_id, league_id=league_id)
+        return generation or 0
+    
+    def invalidate_team_context(self, team_id: int, league_id: int):
+        """
+        Takımın cache'lenmiş bağlamını geçersiz kıl
+        
+        Kayıtlar hash anahtarlı olduğu için silinmez; nesil sayacı artırılır
+        ve eski kayıtlar TTL ile düşer.
+        """
+        if self.cache is None:
+            return
+        generation = self._get_generation(team_id, league_id) + 1
+        self.cache.set(TEAM_CONTEXT_GENERATION_CATEGORY, generation, CacheManager.TTL_STATIC_DATA,
+                       team_id=team_id, league_id=league_id)
+    
+    def on_fixtures_finished(self, fixtures: List[Dict]) -> int:
+        """
+        Yeni bitmiş maçlar geldiğinde iki takımın bağlamını da geçersiz kıl
+        
+        Args:
+            fixtures: API fixture listesi (fixture/teams/league alanlarıyla)
+            
+        Returns:
+            Geçersiz kılınan takım sayısı
+        """
+        invalidated = set()
+        for fixture in fixtures:
+            status = fixture.get('fixture', {}).get('status', {}).get('short', '')
+            if status not in FINISHED_STATUSES:
+                continue
+            league_id = fixture.get('league', {}).get('id')
+            for side in ('home', 'away'):
+                team_id = fixture.get('teams', {}).get(side, {}).get('id')
+                if team_id is not None and (team_id, league_id) not in invalidated:
+                    self.invalidate_team_context(team_id, league_id)
+                    invalidated.add((team_id, league_id))
+        return len(invalidated)
+    
     def _calculate_overall_rating(self, analysis: Dict) -> float:
         """Calculate overall team rating (0-100) from all metrics"""
         scores = []
@@ -6,6 +6,8 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import api_utils
 import elo_utils
+import request_planner
+from odds_normalizer import OddsIndex
 
 # Yeni gelişmiş sistemler
 try:
@@ -36,6 +38,34 @@ except ImportError:
     ADVANCED_METRICS_MANAGER_AVAILABLE = False
     AdvancedMetricsManager = None
 
+try:
+    from fixture_archive import get_archive as get_fixture_archive, row_to_fixture
+    FIXTURE_ARCHIVE_AVAILABLE = True
+except ImportError:
+    FIXTURE_ARCHIVE_AVAILABLE = False
+    get_fixture_archive = row_to_fixture = None
+
+try:
+    from form_engine import get_form_engine
+    FORM_ENGINE_AVAILABLE = True
+except ImportError:
+    FORM_ENGINE_AVAILABLE = False
+    get_form_engine = None
+
+# Arşivde bu kadar maç varsa lig ortalamaları API'ye gitmeden hesaplanır
+ARCHIVE_MIN_BASELINE_SAMPLE = 30
+
+# run_core_analysis'in ayarlanabilir sabitleri (model_params ile ezilir; backtest_runner bunları tarar)
+CORE_MODEL_DEFAULTS = {
+    'injury_impact': 0.85,         # kilit oyuncu sakatsa hücum çarpanı (savunma: 1 / impact)
+    'max_goals': 2.5,              # lambda üst sınırı
+    'form_weight': 0.80,           # güncel form / sezon harmanı (sezon = 1 - form_weight)
+    # (Elo farkı eşiği, favori çarpanı, sürpriz takım çarpanı); büyük eşik önce
+    'elo_tiers': ((200, 1.08, 0.94), (100, 1.05, 0.96), (50, 1.03, 0.98)),
+    'home_advantage_min': 1.02,
+    'home_advantage_max': 1.20,
+}
+
 # Machine Learning sistemi
 try:
     from ml_predictor import ml_system
@@ -145,6 +175,36 @@ def process_h2h_data(h2h_matches: List[Dict], team_a_id: int) -> Optional[Dict]:
         "recent_matches": recent_matches_display
     }
 
+def get_h2h_summary(api_key: str, base_url: str, team_a_id: int, team_b_id: int, limit: int = 10,
+                    as_of: Optional[int] = None, league_info: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    H2H özeti: güncel maç arşivinde çiftin karşılaşması varsa önceden toplanmış H2H
+    indeksinden, yoksa /fixtures/headtohead + process_h2h_data ile.
+
+    Arşiv çoğunlukla sadece güncel sezonları kapsar; limit'ten az karşılaşma varsa özet
+    'partial': True ile döner (limit en fazla h2h_index.H2H_KEEP_MATCHES).
+
+    league_info: Maçın ligi; arşivin bu partition'ı güncel olmalı (verilmezse tüm arşiv).
+    as_of verilirse (geçmiş maç replay'i) sadece o andan önce oynanmış arşiv maçları kullanılır.
+    """
+    if as_of is not None:
+        if not FIXTURE_ARCHIVE_AVAILABLE:
+            return None
+        rows = get_fixture_archive().head_to_head(team_a_id, team_b_id, limit=limit, before=as_of)
+        return process_h2h_data([row_to_fixture(row) for row in rows], team_a_id)
+    if FIXTURE_ARCHIVE_AVAILABLE:
+        try:
+            league = (league_info['league_id'], league_info['season']) if league_info else ()
+            if get_fixture_archive().is_fresh(*league):
+                from h2h_index import get_h2h_index
+                summary = get_h2h_index().summary(team_a_id, team_b_id, limit=limit)
+                if summary is not None:
+                    return summary
+        except Exception as e:
+            print(f"⚠️ H2H indeksi okunamadı: {e}")
+    h2h_matches, _ = api_utils.get_h2h_matches(api_key, base_url, team_a_id, team_b_id, limit)
+    return process_h2h_data(h2h_matches, team_a_id)
+
 def process_referee_data(referee_data: Optional[Dict]) -> Optional[Dict]:
     """API'den gelen hakem verisini işler."""
     if not referee_data or not referee_data.get('fixtures'):
@@ -163,32 +223,66 @@ def process_referee_data(referee_data: Optional[Dict]) -> Optional[Dict]:
     except (KeyError, TypeError):
         return None
 
+def _archived_league_scores(league_info: Dict, last: int, until: Optional[int] = None) -> List[tuple]:
+    """Arşivdeki son maç skorları (until: bu unix zamanından öncekiler; arşiv yok / yetersizse boş liste)"""
+    if not FIXTURE_ARCHIVE_AVAILABLE:
+        return []
+    try:
+        rows = get_fixture_archive().league_window(league_info['league_id'], league_info['season'],
+                                                   last=last, until=until)
+    except Exception as e:
+        print(f"⚠️ Maç arşivi okunamadı: {e}")
+        return []
+    if len(rows) < ARCHIVE_MIN_BASELINE_SAMPLE:
+        return []
+    return [(row['home_goals'], row['away_goals']) for row in rows]
+
+
+def _archived_team_form(team_id: int, league_info: Dict, as_of: Optional[int] = None) -> Optional[Dict]:
+    """
+    Takımın maç günü sonunda önceden hesaplanmış form vektörü (arşiv güncel değil / yetersizse None;
+    as_of replay'inde tablo o andan önceki maçlardan kurulur, canlı analizle aynı form yolu)
+    """
+    if not (FORM_ENGINE_AVAILABLE and FIXTURE_ARCHIVE_AVAILABLE):
+        return None
+    try:
+        if as_of is None and not get_fixture_archive().is_fresh(league_info['league_id'], league_info['season']):
+            return None
+        return get_form_engine().get_team_form(team_id, league_info['league_id'], league_info['season'], until=as_of)
+    except Exception as e:
+        print(f"⚠️ Form motoru okunamadı: {e}")
+        return None
+
+
 @st.cache_data(ttl=86400)
-def get_league_goal_baselines(api_key: str, base_url: str, league_info: Dict, default_avg: float, skip_api_limit: bool = False) -> Dict[str, float]:
-    params = {
-        'league': league_info['league_id'],
-        'season': league_info['season'],
-        'status': 'FT',
-        'last': 250,
-    }
-    fixtures, _ = api_utils.make_api_request(api_key, base_url, "fixtures", params, skip_limit=skip_api_limit)
-    totals: List[int] = []
-    home_goals = 0
-    away_goals = 0
-    if fixtures:
-        for item in fixtures:
+def get_league_goal_baselines(api_key: str, base_url: str, league_info: Dict, default_avg: float, skip_api_limit: bool = False, allow_fetch: bool = True, as_of: Optional[int] = None) -> Dict[str, float]:
+    scores = _archived_league_scores(league_info, last=250, until=as_of)
+    # API son 250 maçı bugünden geriye döndürür; geçmiş replay'inde kullanılamaz
+    if not scores and allow_fetch and as_of is None:
+        params = {
+            'league': league_info['league_id'],
+            'season': league_info['season'],
+            'status': 'FT',
+            'last': 250,
+        }
+        fixtures, _ = api_utils.make_api_request(api_key, base_url, "fixtures", params, skip_limit=skip_api_limit)
+        for item in fixtures or []:
             try:
                 score = item['score']['fulltime']
-                home_score = score.get('home')
-                away_score = score.get('away')
-                if home_score is None or away_score is None:
-                    continue
-                home_goals += home_score
-                away_goals += away_score
-                totals.append(home_score + away_score)
+                scores.append((score.get('home'), score.get('away')))
             except (KeyError, TypeError):
                 continue
 
+    totals: List[int] = []
+    home_goals = 0
+    away_goals = 0
+    for home_score, away_score in scores:
+        if home_score is None or away_score is None:
+            continue
+        home_goals += home_score
+        away_goals += away_score
+        totals.append(home_score + away_score)
+
     match_count = len(totals)
     if match_count == 0:
         fallback_home = default_avg * 0.55
@@ -220,6 +314,22 @@ def get_dynamic_league_average(api_key: str, base_url: str, league_info: Dict, d
     baselines = get_league_goal_baselines(api_key, base_url, league_info, default_avg)
     return baselines['total_avg']
 
+def default_general_stats() -> Dict:
+    """Sezon istatistiği alınamadığında (veya kota planı atladığında) kullanılan değerler"""
+    return {
+        'home': {
+            'Ort. Gol ATILAN': 1.2,
+            'Ort. Gol YENEN': 1.2,
+            'Istikrar_Puani': 50.0
+        },
+        'away': {
+            'Ort. Gol ATILAN': 1.0,
+            'Ort. Gol YENEN': 1.3,
+            'Istikrar_Puani': 45.0
+        },
+        'team_specific_home_adv': 1.12
+    }
+
 @st.cache_data(ttl=86400)
 def calculate_general_stats_v2(api_key: str, base_url: str, team_id: int, league_id: int, season: int, skip_api_limit: bool = False) -> Dict:
     """
@@ -229,19 +339,7 @@ def calculate_general_stats_v2(api_key: str, base_url: str, team_id: int, league
     stats_data, error = api_utils.get_team_statistics(api_key, base_url, team_id, league_id, season, skip_limit=skip_api_limit)
     if error or not stats_data:
         # Varsayılan değerler döndür - sistem yine de çalışabilsin
-        return {
-            'home': {
-                'Ort. Gol ATILAN': 1.2,
-                'Ort. Gol YENEN': 1.2,
-                'Istikrar_Puani': 50.0
-            },
-            'away': {
-                'Ort. Gol ATILAN': 1.0,
-                'Ort. Gol YENEN': 1.3,
-                'Istikrar_Puani': 45.0
-            },
-            'team_specific_home_adv': 1.12
-        }
+        return default_general_stats()
 
     def get_stats_and_ppg(data, location_key):
         fixtures = data['fixtures']['played'][location_key]
@@ -474,179 +572,70 @@ def get_form_string(matches: Optional[List[Dict]], limit: int = 5) -> str:
     return ''.join(form_chars)
 
 def process_odds_data(odds_response: List[Dict]) -> Optional[Dict]:
-    if not odds_response or not odds_response[0].get('bookmakers'): return None
-    home_odds, draw_odds, away_odds = [], [], []
-    bookmakers = odds_response[0]['bookmakers']
-    for bookmaker in bookmakers:
-        try:
-            match_winner_bet = next(bet for bet in bookmaker['bets'] if bet['name'] == 'Match Winner')
-            values = match_winner_bet['values']
-            h = float(next(val['odd'] for val in values if val['value'] == 'Home'))
-            d = float(next(val['odd'] for val in values if val['value'] == 'Draw'))
-            a = float(next(val['odd'] for val in values if val['value'] == 'Away'))
-            home_odds.append(h); draw_odds.append(d); away_odds.append(a)
-        except (StopIteration, KeyError, IndexError, ValueError): continue
-    if not all([home_odds, draw_odds, away_odds]): return None
-    avg_home_odd, avg_draw_odd, avg_away_odd = sum(home_odds) / len(home_odds), sum(draw_odds) / len(draw_odds), sum(away_odds) / len(away_odds)
+    if isinstance(odds_response, OddsIndex):
+        odds_index = odds_response
+    else:
+        if not odds_response or not odds_response[0].get('bookmakers'): return None
+        odds_index = OddsIndex.from_response(odds_response)
+    # Sadece üç sonucu da fiyatlayan bookmaker'ların ortalaması (piyasa konsensüsü)
+    books, matrix = odds_index.book_matrix('match_winner', ('home', 'draw', 'away'))
+    if not books: return None
+    avg_home_odd, avg_draw_odd, avg_away_odd = (float(x) for x in matrix.mean(axis=0))
     return {'home': {'odd': avg_home_odd, 'prob': (1 / avg_home_odd) * 100}, 'draw': {'odd': avg_draw_odd, 'prob': (1 / avg_draw_odd) * 100}, 'away': {'odd': avg_away_odd, 'prob': (1 / avg_away_odd) * 100}}
 
+def _odds_entry(odds_index: OddsIndex, market: str, outcome: str, line: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """Index'teki konsensüs fiyatı process_detailed_odds formatına çevir"""
+    consensus = odds_index.consensus(market, outcome, line)
+    if not consensus:
+        return None
+    odd = round(consensus['odd'], 2)
+    return {'odd': odd, 'prob': round((1 / odd) * 100, 1)}
+
+def _odds_group(odds_index: OddsIndex, market: str, outcomes: Dict[str, str], line: Optional[float] = None) -> Optional[Dict[str, Dict]]:
+    group = {}
+    for key, outcome in outcomes.items():
+        entry = _odds_entry(odds_index, market, outcome, line)
+        if entry:
+            group[key] = entry
+    return group or None
+
 def process_detailed_odds(categorized_odds: Optional[Dict]) -> Dict[str, Any]:
     """
     Detaylı bahis oranlarını işler ve model ile karşılaştırılabilir formata getirir.
+    
+    categorized_odds: get_fixture_detailed_odds çıktısı veya hazır bir OddsIndex.
+    Her market için bookmaker konsensüs (ortalama) fiyatı kullanılır.
     """
     if not categorized_odds:
         return {}
     
-    processed = {
-        'over_under_2.5': None,
-        'btts': None,
-        'handicap': {},
-        'first_half_winner': None,
+    if isinstance(categorized_odds, OddsIndex):
+        odds_index = categorized_odds
+    else:
+        odds_index = OddsIndex.from_categorized(categorized_odds)
+    
+    handicap = {}
+    for key, line in (('home_minus_0.5', -0.5), ('home_minus_1.5', -1.5)):
+        entry = _odds_entry(odds_index, 'handicap', 'home', line)
+        if entry:
+            handicap[key] = entry
+    
+    cards_over = None
+    for line in (3.5, 4.5):
+        cards_over = _odds_entry(odds_index, 'cards', 'over', line)
+        if cards_over:
+            break
+    
+    return {
+        'over_under_2.5': _odds_group(odds_index, 'over_under', {'over': 'over', 'under': 'under'}, 2.5),
+        'btts': _odds_group(odds_index, 'btts', {'yes': 'yes', 'no': 'no'}),
+        'handicap': handicap,
+        'first_half_winner': _odds_group(odds_index, 'first_half', {'home': 'home', 'draw': 'draw', 'away': 'away'}),
         'first_half_over_1.5': None,
-        'corners_9.5': None,
-        'corners_10.5': None,
-        'cards_over_3.5': None,
+        'corners_9.5': _odds_group(odds_index, 'corners', {'over': 'over', 'under': 'under'}, 9.5),
+        'corners_10.5': _odds_group(odds_index, 'corners', {'over': 'over', 'under': 'under'}, 10.5),
+        'cards_over_3.5': cards_over,
     }
-    
-    # 2.5 Üst/Alt işleme
-    if categorized_odds.get('over_under'):
-        for bet_data in categorized_odds['over_under']:
-            bet_name = bet_data.get('bet_name', '').lower()
-            if '2.5' in bet_name:
-                values = bet_data.get('values', [])
-                for val in values:
-                    label = val.get('value', '').lower()
-                    odd = float(val.get('odd', 0))
-                    if 'over' in label and odd > 0:
-                        if not processed['over_under_2.5']:
-                            processed['over_under_2.5'] = {}
-                        processed['over_under_2.5']['over'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-                    elif 'under' in label and odd > 0:
-                        if not processed['over_under_2.5']:
-                            processed['over_under_2.5'] = {}
-                        processed['over_under_2.5']['under'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-    
-    # BTTS işleme
-    if categorized_odds.get('btts'):
-        for bet_data in categorized_odds['btts']:
-            values = bet_data.get('values', [])
-            for val in values:
-                label = val.get('value', '').lower()
-                odd = float(val.get('odd', 0))
-                if 'yes' in label and odd > 0:
-                    if not processed['btts']:
-                        processed['btts'] = {}
-                    processed['btts']['yes'] = {
-                        'odd': odd,
-                        'prob': round((1/odd) * 100, 1)
-                    }
-                elif 'no' in label and odd > 0:
-                    if not processed['btts']:
-                        processed['btts'] = {}
-                    processed['btts']['no'] = {
-                        'odd': odd,
-                        'prob': round((1/odd) * 100, 1)
-                    }
-    
-    # Handikap işleme (Ev sahibi -0.5, -1.5, -2.5)
-    if categorized_odds.get('handicap'):
-        for bet_data in categorized_odds['handicap']:
-            bet_name = bet_data.get('bet_name', '').lower()
-            values = bet_data.get('values', [])
-            for val in values:
-                label = val.get('value', '')
-                odd = float(val.get('odd', 0))
-                if odd > 0:
-                    # Handikap değerini parse et (örn: "Home -0.5")
-                    if '-0.5' in label or '-0:1' in label:
-                        processed['handicap']['home_minus_0.5'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-                    elif '-1.5' in label or '-1:2' in label:
-                        processed['handicap']['home_minus_1.5'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-    
-    # İlk yarı winner işleme
-    if categorized_odds.get('first_half'):
-        for bet_data in categorized_odds['first_half']:
-            bet_name = bet_data.get('bet_name', '').lower()
-            if 'winner' in bet_name or '1x2' in bet_name:
-                values = bet_data.get('values', [])
-                for val in values:
-                    label = val.get('value', '').lower()
-                    odd = float(val.get('odd', 0))
-                    if 'home' in label and odd > 0:
-                        if not processed['first_half_winner']:
-                            processed['first_half_winner'] = {}
-                        processed['first_half_winner']['home'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-                    elif 'draw' in label and odd > 0:
-                        if not processed['first_half_winner']:
-                            processed['first_half_winner'] = {}
-                        processed['first_half_winner']['draw'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-                    elif 'away' in label and odd > 0:
-                        if not processed['first_half_winner']:
-                            processed['first_half_winner'] = {}
-                        processed['first_half_winner']['away'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-    
-    # Korner oranları
-    if categorized_odds.get('corners'):
-        for bet_data in categorized_odds['corners']:
-            bet_name = bet_data.get('bet_name', '').lower()
-            values = bet_data.get('values', [])
-            if '9.5' in bet_name or '10.5' in bet_name:
-                for val in values:
-                    label = val.get('value', '').lower()
-                    odd = float(val.get('odd', 0))
-                    if odd > 0:
-                        key = 'corners_9.5' if '9.5' in bet_name else 'corners_10.5'
-                        if not processed[key]:
-                            processed[key] = {}
-                        if 'over' in label:
-                            processed[key]['over'] = {
-                                'odd': odd,
-                                'prob': round((1/odd) * 100, 1)
-                            }
-                        elif 'under' in label:
-                            processed[key]['under'] = {
-                                'odd': odd,
-                                'prob': round((1/odd) * 100, 1)
-                            }
-    
-    # Kart oranları
-    if categorized_odds.get('cards'):
-        for bet_data in categorized_odds['cards']:
-            bet_name = bet_data.get('bet_name', '').lower()
-            if '3.5' in bet_name or '4.5' in bet_name:
-                values = bet_data.get('values', [])
-                for val in values:
-                    label = val.get('value', '').lower()
-                    odd = float(val.get('odd', 0))
-                    if odd > 0 and 'over' in label:
-                        processed['cards_over_3.5'] = {
-                            'odd': odd,
-                            'prob': round((1/odd) * 100, 1)
-                        }
-                        break
-    
-    return processed
 
 def calculate_odds_based_adjustment(odds_data: Optional[Dict], model_win_a: float, model_draw: float, model_win_b: float) -> Dict[str, float]:
     """Bahis oranlarını model tahminleriyle birleştir (70% model + 30% odds)"""
@@ -1326,22 +1315,80 @@ def generate_prediction_reasons(analysis_data: Dict, team_names: Dict) -> List[s
 
     return reasons[:5]  # 3'ten 5'e çıkardık - daha fazla faktör göster
 
+def _shared_input(inputs: Optional[Dict], key: str, load):
+    """Toplanan girdiyi inputs sözlüğünde sakla (aynı maçın parametre taramasında tekrar çekilmez)"""
+    if inputs is None:
+        return load()
+    if key not in inputs:
+        inputs[key] = load()
+    return inputs[key]
+
+
+def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info, model_params, default_avg, skip_api_limit=False, request_budget=None, as_of=None, inputs=None):
+    """
+    Args:
+        model_params: CORE_MODEL_DEFAULTS anahtarlarını ezer
+        as_of: Geçmiş maç replay'i için unix zamanı; arşivden sadece bu andan önceki maçlar
+               okunur (form motoru tablosu da o ana kadar kurulur), bugüne ait tablolar
+               (H2H indeksi, ML ayarları) kullanılmaz
+        inputs: Maç başına toplanan girdiler (plan, lig ortalamaları, son maçlar, Elo, ...);
+                aynı sözlükle tekrar çağrılınca yeniden çekilmez. Önceden konmuş 'ratings'
+                (ör. as_of anındaki Elo tablosu) elo_ratings.json yerine kullanılır.
+                Verilirse sonuç Streamlit cache'ine girmez
+
+    İstek planı bu kullanıcının kotasıyla cache dışında kurulur; seçilen gruplar cache
+    anahtarına girer (kotası az kullanıcının eksik analizi başkasına dönmez)
+    """
+    # Kalan kotaya göre hangi verilerin çekileceğini önceden planla
+    plan = _shared_input(inputs, 'plan', lambda: request_planner.plan_core_analysis(
+        id_a, id_b, fixture_id, league_info, skip_api_limit, request_budget, as_of=as_of))
+    allowed_groups = frozenset(plan.selected)
+
+    if inputs is None:
+        analysis = _cached_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info,
+                                         model_params, default_avg, skip_api_limit, allowed_groups, as_of)
+    else:
+        analysis = _core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info,
+                                  model_params, default_avg, skip_api_limit, allowed_groups, as_of, inputs)
+    if not analysis:
+        return analysis
+
+    analysis['request_plan'] = plan.to_dict()
+    if as_of is None:
+        request_planner.record_fetched(plan)
+    return analysis
+
+
 @st.cache_data(ttl=300)  # 5 dakika - Elo güncellemeleri için kısa cache
-def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info, model_params, default_avg, skip_api_limit=False):
-    baselines = get_league_goal_baselines(api_key, base_url, league_info, default_avg, skip_api_limit)
+def _cached_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info, model_params, default_avg, skip_api_limit, allowed_groups, as_of):
+    return _core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info,
+                          model_params, default_avg, skip_api_limit, allowed_groups, as_of)
+
+
+def _core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id, league_info, model_params, default_avg, skip_api_limit, allowed_groups, as_of=None, inputs=None):
+    """run_core_analysis gövdesi; allowed_groups: istek planının çekmeye izin verdiği gruplar"""
+    params = {**CORE_MODEL_DEFAULTS, **(model_params or {})}
+
+    baselines = _shared_input(inputs, 'baselines', lambda: get_league_goal_baselines(
+        api_key, base_url, league_info, default_avg, skip_api_limit,
+        allow_fetch='league_baselines' in allowed_groups, as_of=as_of))
     avg_goals = baselines['total_avg'] or default_avg
     avg_home_goals = baselines['home_avg'] or (avg_goals * 0.55)
     avg_away_goals = baselines['away_avg'] or max(0.4, avg_goals - avg_home_goals)
 
-    stats_a = calculate_general_stats_v2(api_key, base_url, id_a, league_info['league_id'], league_info['season'], skip_api_limit)
-    stats_b = calculate_general_stats_v2(api_key, base_url, id_b, league_info['league_id'], league_info['season'], skip_api_limit)
+    if 'season_stats' in allowed_groups:
+        stats_a, stats_b = _shared_input(inputs, 'season_stats', lambda: (
+            calculate_general_stats_v2(api_key, base_url, id_a, league_info['league_id'], league_info['season'], skip_api_limit),
+            calculate_general_stats_v2(api_key, base_url, id_b, league_info['league_id'], league_info['season'], skip_api_limit)))
+    else:
+        stats_a, stats_b = default_general_stats(), default_general_stats()
     # Artık her zaman varsayılan değerler dönüyor, None kontrolü gereksiz
 
     team_home_adv = stats_a.get('team_specific_home_adv', 1.12)
     league_bias = avg_home_goals / max(0.5, avg_away_goals)
     
     # Ev sahibi avantajını takım kalitesine göre ayarla
-    ratings = elo_utils.read_ratings()
+    ratings = _shared_input(inputs, 'ratings', elo_utils.read_ratings)
     rating_home = elo_utils.get_team_rating(id_a, ratings)
     rating_away = elo_utils.get_team_rating(id_b, ratings)
     
@@ -1358,20 +1405,30 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
         quality_adjust = 1.0
     
     home_advantage = team_home_adv * max(0.96, min(1.12, league_bias)) * quality_adjust
-    home_advantage = max(1.02, min(1.20, home_advantage))
+    home_advantage = max(params['home_advantage_min'], min(params['home_advantage_max'], home_advantage))
 
     # Güncel performansa odaklan - sadece son 6 maç
-    last_matches_a = api_utils.get_team_last_matches_stats(api_key, base_url, id_a, limit=6, skip_limit=skip_api_limit)
-    last_matches_b = api_utils.get_team_last_matches_stats(api_key, base_url, id_b, limit=6, skip_limit=skip_api_limit)
-    weighted_stats_a = calculate_weighted_stats(last_matches_a) if last_matches_a else {}
-    weighted_stats_b = calculate_weighted_stats(last_matches_b) if last_matches_b else {}
+    # Arşiv güncelse form vektörleri form motorundan (lig için maç günü sonunda bir kez hesaplanır)
+    team_form_a, team_form_b = _shared_input(inputs, 'team_form', lambda: (
+        _archived_team_form(id_a, league_info, as_of), _archived_team_form(id_b, league_info, as_of)))
+    last_matches_a = last_matches_b = None
+    if 'recent_form' in allowed_groups:
+        if team_form_a is None:
+            last_matches_a = _shared_input(inputs, 'last_matches_a', lambda: api_utils.get_team_last_matches_stats(
+                api_key, base_url, id_a, limit=6, skip_limit=skip_api_limit, as_of=as_of))
+        if team_form_b is None:
+            last_matches_b = _shared_input(inputs, 'last_matches_b', lambda: api_utils.get_team_last_matches_stats(
+                api_key, base_url, id_b, limit=6, skip_limit=skip_api_limit, as_of=as_of))
+    weighted_stats_a = team_form_a['weighted'] if team_form_a else calculate_weighted_stats(last_matches_a) if last_matches_a else {}
+    weighted_stats_b = team_form_b['weighted'] if team_form_b else calculate_weighted_stats(last_matches_b) if last_matches_b else {}
     
     # Form string'lerini hesapla (görsel için)
-    form_string_a = get_form_string(last_matches_a, limit=5)
-    form_string_b = get_form_string(last_matches_b, limit=5)
+    form_string_a = team_form_a['form_string'] if team_form_a else get_form_string(last_matches_a, limit=5)
+    form_string_b = team_form_b['form_string'] if team_form_b else get_form_string(last_matches_b, limit=5)
 
     # Güncel form daha önemli - gerçek performansa odaklan
-    FORM_WEIGHT, SEASON_WEIGHT = 0.80, 0.20
+    FORM_WEIGHT = params['form_weight']
+    SEASON_WEIGHT = 1.0 - FORM_WEIGHT
 
     def get_blended_stat(s_stats, w_stats, loc, s_key, w_key):
         season_val = s_stats.get(loc, {}).get(s_key, 0)
@@ -1405,16 +1462,18 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     home_def_idx = clamp(home_def / max(0.3, avg_away_goals))
     away_def_idx = clamp(away_def / max(0.3, avg_home_goals))
 
-    injuries, _ = api_utils.get_fixture_injuries(api_key, base_url, fixture_id)
+    injuries = p_stats_a = p_stats_b = None
+    if 'key_player_injuries' in allowed_groups:
+        injuries, p_stats_a, p_stats_b = _shared_input(inputs, 'key_player_injuries', lambda: (
+            api_utils.get_fixture_injuries(api_key, base_url, fixture_id)[0],
+            api_utils.get_squad_player_stats(api_key, base_url, id_a, league_info['season'])[0],
+            api_utils.get_squad_player_stats(api_key, base_url, id_b, league_info['season'])[0]))
     injured_ids = {p['player']['id'] for p in injuries} if injuries else set()
-
-    p_stats_a, _ = api_utils.get_squad_player_stats(api_key, base_url, id_a, league_info['season'])
-    p_stats_b, _ = api_utils.get_squad_player_stats(api_key, base_url, id_b, league_info['season'])
     key_a = get_key_players(p_stats_a) if p_stats_a else {}
     key_b = get_key_players(p_stats_b) if p_stats_b else {}
 
-    injury_impact = model_params['injury_impact']
-    max_goals = model_params['max_goals']
+    injury_impact = params['injury_impact']
+    max_goals = params['max_goals']
 
     att_mult_a = injury_impact if any(pid in injured_ids for pid in key_a.get('top_scorer_ids', [])) else 1.0
     def_mult_a = (1 / injury_impact) if any(pid in injured_ids for pid in key_a.get('most_minutes_ids', [])) else 1.0
@@ -1422,8 +1481,9 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     def_mult_b = (1 / injury_impact) if any(pid in injured_ids for pid in key_b.get('most_minutes_ids', [])) else 1.0
 
     # Güncel form faktörüne daha fazla ağırlık ver
-    form_factor_a = calculate_form_factor(last_matches_a, 'home')
-    form_factor_b = calculate_form_factor(last_matches_b, 'away')
+    # Form motorunda rakip ayarlı skor lig tablosundaki rakip gücüyle hesaplanır
+    form_factor_a = team_form_a['form']['home']['form_factor'] if team_form_a else calculate_form_factor(last_matches_a, 'home')
+    form_factor_b = team_form_b['form']['away']['form_factor'] if team_form_b else calculate_form_factor(last_matches_b, 'away')
     
     # Form faktörünü güçlendir (daha etkili olsun)
     if form_factor_a > 1.1:
@@ -1440,28 +1500,16 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     elo_diff = rating_home - rating_away
     
     # ELO etkilerini minimal seviyeye indir - gerçek performansa odaklan
-    # Sadece çok büyük kalite farklarında minimal etki yapalım
-    if elo_diff < -200:  # Sadece çok büyük farklarda
-        elo_boost_away = 1.08  # Çok azaltıldı (1.25 → 1.08)
-        elo_nerf_home = 0.94   # Çok azaltıldı (0.80 → 0.94)
-    elif elo_diff < -100:
-        elo_boost_away = 1.05  # Çok azaltıldı (1.20 → 1.05)
-        elo_nerf_home = 0.96   # Çok azaltıldı (0.85 → 0.96)
-    elif elo_diff < -50:  # Normal farklarda minimal etki
-        elo_boost_away = 1.03  # Çok azaltıldı (1.15 → 1.03)
-        elo_nerf_home = 0.98   # Çok azaltıldı (0.90 → 0.98)
-    elif elo_diff > 200:  # Sadece çok büyük farklarda
-        elo_boost_away = 0.94  # Çok azaltıldı (0.80 → 0.94)
-        elo_nerf_home = 1.08   # Çok azaltıldı (1.25 → 1.08)
-    elif elo_diff > 100:
-        elo_boost_away = 0.96  # Çok azaltıldı (0.85 → 0.96)
-        elo_nerf_home = 1.05   # Çok azaltıldı (1.20 → 1.05)
-    elif elo_diff > 50:  # Normal farklarda minimal etki
-        elo_boost_away = 0.98  # Çok azaltıldı (0.90 → 0.98)
-        elo_nerf_home = 1.03   # Çok azaltıldı (1.15 → 1.03)
-    else:  # -50 ile +50 arası: ELO etkisini tamamen yok say
-        elo_boost_away = 1.0
-        elo_nerf_home = 1.0
+    # Sadece büyük kalite farklarında minimal etki (eski çarpanlar 1.25 / 0.80 idi);
+    # eşiği aşan ilk kademe: favori takımın lambda'sı artar, diğerininki azalır
+    elo_boost_away = elo_nerf_home = 1.0  # kademe yoksa ELO etkisini tamamen yok say
+    for threshold, favourite_mult, underdog_mult in sorted(params['elo_tiers'], reverse=True):
+        if abs(elo_diff) > threshold:
+            if elo_diff > 0:
+                elo_nerf_home, elo_boost_away = favourite_mult, underdog_mult
+            else:
+                elo_nerf_home, elo_boost_away = underdog_mult, favourite_mult
+            break
 
     base_lambda_a = avg_home_goals * home_attack_idx * away_def_idx * elo_nerf_home
     base_lambda_b = avg_away_goals * away_attack_idx * home_def_idx * elo_boost_away
@@ -1491,8 +1539,8 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     lambda_b *= value_mult_b
     
     # Momentum faktörü (son 5 maçtaki trend)
-    momentum_a = calculate_momentum_factor(last_matches_a, 'home')
-    momentum_b = calculate_momentum_factor(last_matches_b, 'away')
+    momentum_a = team_form_a['momentum'] if team_form_a else calculate_momentum_factor(last_matches_a, 'home')
+    momentum_b = team_form_b['momentum'] if team_form_b else calculate_momentum_factor(last_matches_b, 'away')
     lambda_a *= momentum_a
     lambda_b *= momentum_b
     
@@ -1503,37 +1551,48 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     lambda_b *= rest_factor_b
     
     # H2H faktörü
-    h2h_matches, _ = api_utils.get_h2h_matches(api_key, base_url, id_a, id_b, 10)
-    h2h_data = process_h2h_data(h2h_matches, id_a)
+    h2h_data = _shared_input(inputs, 'h2h', lambda: get_h2h_summary(
+        api_key, base_url, id_a, id_b, request_planner.H2H_LIMIT, as_of=as_of,
+        league_info=league_info)) if 'h2h' in allowed_groups else None
     h2h_factor = calculate_h2h_factor(h2h_data, id_a)
     lambda_a *= h2h_factor
     lambda_b *= (2.0 - h2h_factor)  # Ters oran
     
     # Hakem faktörü
-    fixture_details, _ = api_utils.get_fixture_details(api_key, base_url, fixture_id)
+    def load_referee_stats():
+        fixture_details, _ = api_utils.get_fixture_details(api_key, base_url, fixture_id)
+        if fixture_details:
+            referee_info = fixture_details.get('fixture', {}).get('referee')
+            if isinstance(referee_info, dict):
+                referee_id = referee_info.get('id')
+                if referee_id:
+                    referee_data, _ = api_utils.get_referee_stats(api_key, base_url, referee_id, league_info['season'])
+                    return process_referee_data(referee_data)
+        return None
+
     referee_stats_processed = None
-    if fixture_details:
-        referee_info = fixture_details.get('fixture', {}).get('referee')
-        if isinstance(referee_info, dict):
-            referee_id = referee_info.get('id')
-            if referee_id:
-                referee_data, _ = api_utils.get_referee_stats(api_key, base_url, referee_id, league_info['season'])
-                referee_stats_processed = process_referee_data(referee_data)
+    if 'referee' in allowed_groups:
+        referee_stats_processed = _shared_input(inputs, 'referee', load_referee_stats)
     
     referee_factor = calculate_referee_factor(referee_stats_processed)
     lambda_a *= referee_factor
     lambda_b *= referee_factor
     
     # Sakatlık & Ceza faktörü
-    injuries_a, _ = api_utils.get_team_injuries(api_key, base_url, id_a, fixture_id)
-    injuries_b, _ = api_utils.get_team_injuries(api_key, base_url, id_b, fixture_id)
+    injuries_a = injuries_b = None
+    if 'team_injuries' in allowed_groups:
+        injuries_a, injuries_b = _shared_input(inputs, 'team_injuries', lambda: (
+            api_utils.get_team_injuries(api_key, base_url, id_a, fixture_id)[0],
+            api_utils.get_team_injuries(api_key, base_url, id_b, fixture_id)[0]))
     injury_factor_a = calculate_injury_factor(injuries_a, id_a)
     injury_factor_b = calculate_injury_factor(injuries_b, id_b)
     lambda_a *= injury_factor_a
     lambda_b *= injury_factor_b
     
     # 🤖 MACHINE LEARNING ADAPTASYONU (Geçmiş maçlardan öğrenme)
-    if ML_AVAILABLE:
+    # Öğrenilmiş ayarlar bugünkü sonuçları içerdiğinden geçmiş replay'inde (as_of) kullanılmaz
+    use_ml = ML_AVAILABLE and as_of is None
+    if use_ml:
         # Takım bazlı ML ayarlamaları
         home_ml_adj = ml_system.get_team_learning_adjustment(id_a, id_b, "home")
         away_ml_adj = ml_system.get_team_learning_adjustment(id_b, id_a, "away")
@@ -1586,7 +1645,10 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     probs = calculate_match_probabilities(score_a, score_b)
     
     # 🆕 Bahis oranlarıyla model tahminini birleştir (%70 model + %30 odds)
-    odds_response, _ = api_utils.get_fixture_odds(api_key, base_url, fixture_id)
+    odds_response = None
+    if 'odds' in allowed_groups:
+        odds_response = _shared_input(inputs, 'odds', lambda: api_utils.get_fixture_odds(
+            api_key, base_url, fixture_id, skip_limit=skip_api_limit)[0])
     odds_data = process_odds_data(odds_response) if odds_response else None
     
     if odds_data:
@@ -1616,7 +1678,7 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
     confidence_multiplier = stability_component * (0.75 + 0.25 * sample_factor) * (1 - 0.25 * volatility_ratio) * (1 + 0.5 * elo_signal)
     
     # 🤖 ML ile güven skorunu ayarla
-    if ML_AVAILABLE:
+    if use_ml:
         ml_confidence_adj = ml_system.get_prediction_confidence_multiplier({
             'elo_diff': elo_diff,
             'form_factor_a': form_factor_a,
@@ -1803,6 +1865,8 @@ def run_core_analysis(api_key, base_url, id_a, id_b, name_a, name_b, fixture_id,
             'value_category': value_category,
         },
         'stats': {'a': stats_a, 'b': stats_b},
+        # Piyasa konsensüs 1X2 oranları (tahmin defteri ROI backtest'i için)
+        'odds_1x2': {side: round(odds_data[side]['odd'], 3) for side in ('home', 'draw', 'away')} if odds_data else None,
     }
 
     reasons = generate_prediction_reasons(analysis_result, {'a': name_a, 'b': name_b})
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+API Record / Replay
+===================
+api_utils.make_api_request ve APIFootballV3._make_request altındaki HTTP katmanı.
+
+- off:    istek doğrudan API-Football'a gider (varsayılan)
+- record: gerçek yanıt döner ve korpusa yazılır
+- replay: yanıt korpustan okunur, ağ kullanılmaz; istenirse yapay gecikme eklenir
+
+off / record modunda istekler upstream_rate_limiter kovasından token alır;
+replay ağa çıkmadığı için kotayı tüketmez.
+
+Korpus: <dir>/<endpoint>/<sha1(endpoint + sıralı parametreler)>.json
+Her dosyada status kodu, rate-limit başlıkları ve JSON gövde bulunur.
+API anahtarı başlıkta gider, korpusa yazılmaz.
+
+Ortam değişkenleri:
+    API_REPLAY_MODE        off | record | replay
+    API_REPLAY_DIR         korpus klasörü (varsayılan ./api_fixtures)
+    API_REPLAY_LATENCY_MS  replay'de istek başına sabit gecikme
+    API_REPLAY_JITTER_MS   sabit gecikmeye eklenen rastgele (0..jitter) gecikme
+
+Usage:
+    import api_replay
+
+    with api_replay.configured(mode='replay', latency_ms=120):
+        analysis_logic.run_core_analysis(...)
+        print(api_replay.get_stats())   # {'calls': 9, 'by_endpoint': {...}, ...}
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import upstream_rate_limiter
+
+MODES = ('off', 'record', 'replay')
+RATELIMIT_HEADERS = (
+    'x-ratelimit-requests-limit',
+    'x-ratelimit-requests-remaining',
+    'x-ratelimit-requests-reset',
+)
+
+_config: Dict[str, Any] = {
+    'mode': os.environ.get('API_REPLAY_MODE', 'off').lower(),
+    'directory': os.environ.get(
+        'API_REPLAY_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_fixtures')
+    ),
+    'latency_ms': float(os.environ.get('API_REPLAY_LATENCY_MS', 0) or 0),
+    'jitter_ms': float(os.environ.get('API_REPLAY_JITTER_MS', 0) or 0),
+}
+_rng = random.Random(0)
+_lock = threading.Lock()
+_stats: Dict[str, Any] = {}
+
+
+class ReplayMiss(requests.exceptions.ConnectionError):
+    """Replay modunda korpusta olmayan istek (çağıranlar bağlantı hatası gibi işler)"""
+
+
+class RecordedResponse:
+    """requests.Response'un çağıranların kullandığı alt kümesi"""
+
+    def __init__(self, status_code: int, payload: Any, headers: Optional[Dict[str, str]] = None, url: str = ''):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.url = url
+        self._payload = payload
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error (recorded) for url: {self.url}", response=self
+            )
+
+
+# ----------------------------------------------------------------------
+# Ayarlar
+# ----------------------------------------------------------------------
+
+def configure(mode: Optional[str] = None, directory: Optional[str] = None,
+              latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None,
+              seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Modu / korpus klasörünü / gecikmeyi değiştir
+
+    Returns:
+        Önceki ayarlar (configure(**previous) ile geri yüklenebilir)
+    """
+    global _rng
+    previous = dict(_config)
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Geçersiz replay modu: {mode} ({', '.join(MODES)})")
+        _config['mode'] = mode
+    if directory is not None:
+        _config['directory'] = directory
+    if latency_ms is not None:
+        _config['latency_ms'] = float(latency_ms)
+    if jitter_ms is not None:
+        _config['jitter_ms'] = float(jitter_ms)
+    if seed is not None:
+        _rng = random.Random(seed)
+    return previous
+
+
+@contextmanager
+def configured(**overrides) -> Iterator[Dict[str, Any]]:
+    """Blok boyunca geçici ayarlar + sıfırlanmış sayaçlar"""
+    previous = configure(**overrides)
+    reset_stats()
+    try:
+        yield dict(_config)
+    finally:
+        configure(**previous)
+
+
+def get_config() -> Dict[str, Any]:
+    return dict(_config)
+
+
+def get_mode() -> str:
+    return _config['mode']
+
+
+def is_replaying() -> bool:
+    return _config['mode'] == 'replay'
+
+
+# ----------------------------------------------------------------------
+# Korpus
+# ----------------------------------------------------------------------
+
+def request_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Endpoint + parametrelerden sıra bağımsız anahtar"""
+    canonical = json.dumps(
+        {'endpoint': endpoint.strip('/'), 'params': {str(k): str(v) for k, v in (params or {}).items()}},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def fixture_path(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    folder = endpoint.strip('/').replace('/', '__') or '_root'
+    return os.path.join(_config['directory'], folder, f"{request_key(endpoint, params)}.json")
+
+
+def save_response(endpoint: str, params: Optional[Dict[str, Any]], status_code: int,
+                  payload: Any, headers: Optional[Dict[str, str]] = None) -> str:
+    """Yanıtı korpusa atomik olarak yaz"""
+    path = fixture_path(endpoint, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    record = {
+        'endpoint': endpoint.strip('/'),
+        'params': {str(k): str(v) for k, v in (params or {}).items()},
+        'status_code': status_code,
+        'headers': {k: headers[k] for k in RATELIMIT_HEADERS if headers and headers.get(k) is not None},
+        'recorded_at': int(time.time()),
+        'payload': payload,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_response(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    try:
+        with open(fixture_path(endpoint, params), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ----------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------
+
+def _count(endpoint: str, outcome: Optional[str] = None):
+    endpoint = endpoint.strip('/')
+    with _lock:
+        _stats['calls'] = _stats.get('calls', 0) + 1
+        by_endpoint = _stats.setdefault('by_endpoint', {})
+        by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + 1
+        if outcome:
+            _stats[outcome] = _stats.get(outcome, 0) + 1
+
+
+def _sleep():
+    delay = _config['latency_ms']
+    if _config['jitter_ms'] > 0:
+        delay += _rng.uniform(0, _config['jitter_ms'])
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+
+
+def http_get(getter: Callable[..., Any], url: str, endpoint: str,
+             params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """
+    getter(url, params=params, **kwargs) yerine çağrılır (requests.get / session.get)
+
+    Replay modunda korpusta olmayan istek ReplayMiss fırlatır; mevcut
+    RequestException / ConnectionError yakalayıcıları bunu bağlantı hatası olarak döndürür.
+    Kota dolduysa istek gönderilmez, UpstreamRateLimited fırlatılır.
+    """
+    mode = _config['mode']
+    if mode == 'replay':
+        record = load_response(endpoint, params)
+        if record is None:
+            _count(endpoint, 'misses')
+            raise ReplayMiss(f"Kayıtlı yanıt yok: {endpoint} {params or {}}")
+        _count(endpoint, 'hits')
+        _sleep()
+        return RecordedResponse(record['status_code'], record['payload'], record.get('headers'), url)
+
+    limiter = upstream_rate_limiter.get_rate_limiter()
+    limiter.acquire(upstream_rate_limiter.current_priority(params))
+    response = getter(url, params=params, **kwargs)
+    limiter.observe(response.status_code, response.headers)
+    if mode == 'record':
+        try:
+            payload = response.json()
+        except ValueError:
+            _count(endpoint)
+        else:
+            save_response(endpoint, params, response.status_code, payload, response.headers)
+            _count(endpoint, 'recorded')
+    else:
+        _count(endpoint)
+    return response
+
+
+def get_stats() -> Dict[str, Any]:
+    """Son reset_stats()'tan beri yapılan istekler (endpoint bazında)"""
+    with _lock:
+        stats = {'calls': 0, 'hits': 0, 'misses': 0, 'recorded': 0}
+        stats.update({k: v for k, v in _stats.items() if k != 'by_endpoint'})
+        stats['by_endpoint'] = dict(_stats.get('by_endpoint', {}))
+        stats['mode'] = _config['mode']
+        return stats
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -8,6 +8,9 @@ import json
 import os
 import yaml
 
+from odds_normalizer import OddsIndex
+import api_replay
+
 # Streamlit compatibility check
 try:
     import streamlit as st
@@ -419,33 +422,33 @@ def set_user_tier(username: str, tier: str) -> Tuple[bool, Optional[str]]:
 
     return True, f"Kullanıcı {username} başarıyla {tier} seviyesine geçirildi ve limiti {new_limit} olarak ayarlandı."
 
-def check_api_limit() -> Tuple[bool, Optional[str]]:
-    """API isteği yapmadan önce limiti kontrol eder. SAYACI ARTIRMAZ - sadece kontrol eder."""
+def _api_quota() -> Tuple[Optional[int], Optional[str]]:
+    """Kullanıcının kalan API isteği ve limit dolduysa mesajı (None = limitsiz)"""
     try:
         if not HAS_STREAMLIT:
-            return True, None  # GitHub Actions için bypass
+            return None, None  # GitHub Actions için bypass
         
         # Localhost development mode bypass
         import os
         if os.getenv('STREAMLIT_SERVER_ADDRESS') == 'localhost' or 'localhost' in os.environ.get('STREAMLIT_SERVER_ADDRESS', ''):
-            return True, None  # Localhost için bypass
+            return None, None  # Localhost için bypass
             
         if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
-            return False, "API isteği yapmak için giriş yapmalısınız."
+            return 0, "API isteği yapmak için giriş yapmalısınız."
     except Exception:
         # Eğer session_state erişimi başarısız olursa (ön yükleme sırasında), isteği geçir
-        return True, None
+        return None, None
 
     username = st.session_state.get('username')
     admin_users = st.session_state.get('admin_users', [])
     
     # Development user için sınırsız API erişimi
     if username == 'dev_user':
-        return True, None
+        return None, None
     
     # Admin kullanıcılar için sınırsız erişim
     if username and username in admin_users:
-        return True, None
+        return None, None
     
     tier = st.session_state.get('tier', 'ücretsiz')
     
@@ -464,14 +467,28 @@ def check_api_limit() -> Tuple[bool, Optional[str]]:
 
     user_usage = get_current_usage(username)
 
-    if user_usage['count'] >= limit:
-        return False, f"Günlük API istek limitinize ({limit}) ulaştınız. Yarın tekrar deneyin."
+    remaining = limit - user_usage['count']
+    if remaining <= 0:
+        return 0, f"Günlük API istek limitinize ({limit}) ulaştınız. Yarın tekrar deneyin."
 
-    if monthly_limit is not None and user_usage.get('monthly_count', 0) >= monthly_limit:
-        return False, f"Aylık API istek limitinize ({monthly_limit}) ulaştınız. Sonraki ay tekrar deneyin."
+    if monthly_limit is not None:
+        remaining = min(remaining, monthly_limit - user_usage.get('monthly_count', 0))
+        if remaining <= 0:
+            return 0, f"Aylık API istek limitinize ({monthly_limit}) ulaştınız. Sonraki ay tekrar deneyin."
 
-    # SADECE KONTROL ET, ARTIRMA!
-    return True, None
+    return remaining, None
+
+def check_api_limit() -> Tuple[bool, Optional[str]]:
+    """API isteği yapmadan önce limiti kontrol eder. SAYACI ARTIRMAZ - sadece kontrol eder."""
+    remaining, error_message = _api_quota()
+    return remaining is None or remaining > 0, error_message
+
+def get_remaining_api_quota() -> Optional[int]:
+    """
+    Kullanıcının bugün (ve bu ay) yapabileceği kalan API isteği.
+    check_api_limit ile aynı hesap (_api_quota); None = limitsiz.
+    """
+    return _api_quota()[0]
 
 def increment_api_usage() -> None:
     """API kullanım sayacını artırır - sadece gerçek HTTP isteği yapıldığında çağrılmalı."""
@@ -521,10 +538,10 @@ def make_api_request(api_key: str, base_url: str, endpoint: str, params: Dict[st
     headers = {'x-rapidapi-key': api_key, 'x-rapidapi-host': "v3.football.api-sports.io"}
     url = f"{base_url}/{endpoint}"
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=20)
+        response = api_replay.http_get(requests.get, url, endpoint, params=params, headers=headers, timeout=20)
         
-        # GERÇEK HTTP İSTEĞİ YAPILDI - SAYACI ARTIR
-        if not skip_limit:
+        # GERÇEK HTTP İSTEĞİ YAPILDI - SAYACI ARTIR (replay'de ağ kullanılmadı)
+        if not skip_limit and not api_replay.is_replaying():
             increment_api_usage()
         
         response.raise_for_status()
@@ -565,17 +582,71 @@ def get_team_statistics(api_key: str, base_url: str, team_id: int, league_id: in
     params = {'team': team_id, 'league': league_id, 'season': season}
     return make_api_request(api_key, base_url, "teams/statistics", params, skip_limit=skip_limit)
 
+def _archived_team_fixtures(team_id: int, limit: int, before: Optional[int] = None,
+                            latest: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    Takımın son bitmiş maçları arşivden (API /fixtures biçiminde, en yeni başta)
+
+    Canlıda latest (takımın API'deki son bitmiş maçının unix zamanı) verilir: arşivdeki son maç
+    ondan eskiyse (ingest gecikmesi, arşivde olmayan kupa/Avrupa maçı) veya maçların
+    partition'ları güncel değilse None döner.
+    before verilirse (geçmiş maç replay'i) o andan önceki maçlar okunur; tazelik aranmaz.
+    """
+    try:
+        import fixture_archive
+        archive = fixture_archive.get_archive()
+        rows = archive.team_history(team_id, limit=limit, before=before)
+        if before is None and rows:
+            if latest is None or rows[0]['timestamp'] < latest:
+                return None
+            if not all(archive.is_fresh(league, season) for league, season in
+                       {(row['league_id'], row['season']) for row in rows}):
+                return None
+    except Exception:
+        return None
+    if len(rows) < limit:
+        return None
+    return [fixture_archive.row_to_fixture(row, archive.get_details(row['fixture_id'])) for row in rows]
+
+
+def _split_fixture_statistics(statistics: Optional[List[Dict]], team_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """/fixtures?ids= 'statistics' listesini (takım, rakip) {tip: değer} sözlüklerine ayır"""
+    own: Dict[str, Any] = {}
+    opponent: Dict[str, Any] = {}
+    for block in statistics or []:
+        try:
+            values = {item['type']: item['value'] for item in block.get('statistics') or []}
+            target = own if block['team']['id'] == team_id else opponent
+        except (KeyError, TypeError):
+            continue
+        for stat_type, value in values.items():
+            # Kart görmeyen takım için API None döner
+            target[stat_type] = 0 if value is None and 'Cards' in stat_type else value
+    return own, opponent
+
+
 @st.cache_data(ttl=3600)
-def get_team_last_matches_stats(api_key: str, base_url: str, team_id: int, limit: int = 10, skip_limit: bool = False) -> Optional[List[Dict]]:
+def get_team_last_matches_stats(api_key: str, base_url: str, team_id: int, limit: int = 10, skip_limit: bool = False,
+                                as_of: Optional[int] = None) -> Optional[List[Dict]]:
     """
     Takımın son maçlarını çeker (sadece gol verileri).
     NOT: API-Football /fixtures endpoint'i statistics döndürmüyor,
     bu yüzden korner/kart verileri None kalır ve formül kullanılır.
+    Arşiv takımın API'deki son maçına kadar güncelse maçlar (ve arşivlenmiş korner/kart
+    verileri) arşivden okunur.
+    as_of (unix zamanı) verilirse sadece o andan önceki arşiv maçları kullanılır, API'ye gidilmez.
     """
-    params = {'team': team_id, 'last': limit, 'status': 'FT'}
-    matches, error = make_api_request(api_key, base_url, "fixtures", params, skip_limit=skip_limit)
-    if error or not matches:
-        return None
+    if as_of is not None:
+        matches = _archived_team_fixtures(team_id, limit, before=as_of)
+        if matches is None:
+            return None
+    else:
+        params = {'team': team_id, 'last': limit, 'status': 'FT'}
+        matches, error = make_api_request(api_key, base_url, "fixtures", params, skip_limit=skip_limit)
+        if error or not matches:
+            return None
+        latest = max((match.get('fixture') or {}).get('timestamp') or 0 for match in matches)
+        matches = _archived_team_fixtures(team_id, limit, latest=latest) or matches
     stats_list = []
     # API'den en yeni maçlar başta gelir, reversed() KULLANMA
     for match in matches:
@@ -586,16 +657,17 @@ def get_team_last_matches_stats(api_key: str, base_url: str, team_id: int, limit
             if score_for is None or score_against is None: 
                 continue
             
-            # Korner ve kart verileri - API'den gelmiyor, None bırak
-            # Formül kullanarak hesaplanacak
+            # Korner ve kart verileri - API'den gelmiyor, None bırak (formül kullanılır)
+            # Arşivden gelen maçlarda 'statistics' bulunur
+            own, opponent = _split_fixture_statistics(match.get('statistics'), team_id)
             stats_list.append({
                 'location': 'home' if is_home else 'away',
                 'goals_for': score_for,
                 'goals_against': score_against,
-                'corners_for': None,
-                'corners_against': None,
-                'yellow_cards': None,
-                'red_cards': None
+                'corners_for': own.get('Corner Kicks'),
+                'corners_against': opponent.get('Corner Kicks'),
+                'yellow_cards': own.get('Yellow Cards'),
+                'red_cards': own.get('Red Cards')
             })
         except (KeyError, TypeError):
             continue
@@ -603,10 +675,10 @@ def get_team_last_matches_stats(api_key: str, base_url: str, team_id: int, limit
     return stats_list
 
 @st.cache_data(ttl=3600)
-def get_fixture_odds(api_key: str, base_url: str, fixture_id: int) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+def get_fixture_odds(api_key: str, base_url: str, fixture_id: int, skip_limit: bool = False) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     """1X2 oranlarını (Match Winner) çeker"""
     params = {'fixture': fixture_id, 'bet': 1}
-    return make_api_request(api_key, base_url, "odds", params)
+    return make_api_request(api_key, base_url, "odds", params, skip_limit=skip_limit)
 
 @st.cache_data(ttl=3600)
 def get_fixture_detailed_odds(api_key: str, base_url: str, fixture_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
@@ -632,84 +704,13 @@ def get_fixture_detailed_odds(api_key: str, base_url: str, fixture_id: int) -> T
     if not response:
         return None, "Bu maç için hiçbir bahis oranı bulunamadı."
     
-    categorized_odds = {
-        'match_winner': [],
-        'over_under': [],
-        'btts': [],
-        'handicap': [],
-        'first_half': [],
-        'corners': [],
-        'cards': []
-    }
-    
     try:
         if not response[0].get('bookmakers'):
             return None, "Bahis şirketleri verisi bulunamadı."
         
-        bookmakers = response[0].get('bookmakers', [])
-        total_bets_found = 0
-        
-        for bookmaker in bookmakers:
-            bets = bookmaker.get('bets', [])
-            
-            for bet in bets:
-                bet_name = bet.get('name', '').lower()
-                total_bets_found += 1
-                
-                # Kategorizasyon (daha geniş pattern matching)
-                if 'match winner' in bet_name or ('winner' in bet_name and 'half' not in bet_name):
-                    categorized_odds['match_winner'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif ('over/under' in bet_name or 'goals over/under' in bet_name or 'total goals' in bet_name or 
-                      'goals o/u' in bet_name or 'match goals' in bet_name or 'o/u goals' in bet_name or
-                      'goal total' in bet_name or 'goals total' in bet_name):
-                    categorized_odds['over_under'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif 'both teams score' in bet_name or 'btts' in bet_name or 'gg/ng' in bet_name:
-                    categorized_odds['btts'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif 'handicap' in bet_name or 'spread' in bet_name or 'asian handicap' in bet_name:
-                    categorized_odds['handicap'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif '1st half' in bet_name or 'first half' in bet_name or 'half time' in bet_name or 'ht' in bet_name:
-                    categorized_odds['first_half'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif 'corner' in bet_name:
-                    categorized_odds['corners'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-                elif 'card' in bet_name or 'yellow' in bet_name or 'booking' in bet_name:
-                    categorized_odds['cards'].append({
-                        'bookmaker': bookmaker.get('name'),
-                        'bet_name': bet.get('name'),
-                        'values': bet.get('values', [])
-                    })
-        
-        # Debug bilgisi için
-        debug_msg = f"Toplam {total_bets_found} bahis türü bulundu. "
-        debug_msg += f"Kategoriler: "
-        for cat, data in categorized_odds.items():
-            if data:
-                debug_msg += f"{cat}({len(data)}), "
-        
-        return categorized_odds, None
+        # Yanıt tek seferde indekslenir; kategorize görünüm index'ten türetilir
+        odds_index = OddsIndex.from_response(response)
+        return odds_index.categorized(), None
     
     except (KeyError, IndexError, TypeError) as e:
         return None, f"Oran verisi işlenirken hata: {str(e)}"
@@ -766,10 +767,6 @@ def get_all_current_leagues(api_key: str, base_url: str) -> Tuple[List[Dict[str,
     leagues.sort(key=lambda l: (l.get('country') or '', l.get('name') or ''))
     return leagues, None
 
-@st.cache_data(ttl=86400)
-def get_h2h_matches(api_key: str, base_url: str, team_a_id: int, team_b_id: int, limit: int) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
-    return make_api_request(api_key, base_url, "fixtures/headtohead", {'h2h': f"{team_a_id}-{team_b_id}", 'last': limit})
-
 @st.cache_data(ttl=604800)
 def get_teams_by_league(api_key: str, base_url: str, league_id: int, season: int) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     return make_api_request(api_key, base_url, "teams", {'league': league_id, 'season': season})
@@ -917,35 +914,11 @@ def get_fixtures_by_date(api_key: str, base_url: str, selected_league_ids: List[
     date_str = selected_date.strftime('%Y-%m-%d')
     season = selected_date.year if selected_date.month > 6 else selected_date.year - 1
     
-    # Rate limit önleme: Çok fazla lig seçilmişse istekler arasında gecikme ekle
-    import time
+    # İstek hızı upstream_rate_limiter kovası ile sınırlanır (süreçler arası ortak)
     num_leagues = len(selected_league_ids)
-    
-    # Agresif gecikme stratejisi - API rate limit'ini aşmamak için
-    if num_leagues > 20:
-        delay_between_requests = 1.0  # 1 saniye (çok fazla lig için)
-    elif num_leagues > 15:
-        delay_between_requests = 0.7  # 0.7 saniye
-    elif num_leagues > 10:
-        delay_between_requests = 0.5  # 0.5 saniye
-    elif num_leagues > 5:
-        delay_between_requests = 0.2  # 0.2 saniye
-    else:
-        delay_between_requests = 0  # Gecikme yok
-    
     successful_leagues = 0
-    rate_limit_hit = False
     
-    for idx, league_id in enumerate(selected_league_ids):
-        # Rate limit önleme gecikmesi
-        if idx > 0 and delay_between_requests > 0:
-            time.sleep(delay_between_requests)
-        
-        # Eğer rate limit'e takıldıysak, daha uzun bekle
-        if rate_limit_hit:
-            time.sleep(2.0)  # 2 saniye bekle
-            rate_limit_hit = False
-        
+    for league_id in selected_league_ids:
         # Status filtresi kullanma - sadece tarih ve lig bazlı çek
         params = {'date': date_str, 'league': league_id, 'season': season}
         response, error = make_api_request(api_key, base_url, "fixtures", params, skip_limit=bypass_limit_check)
@@ -954,7 +927,6 @@ def get_fixtures_by_date(api_key: str, base_url: str, selected_league_ids: List[
             # Rate limit hatası mı kontrol et
             if 'rate limit' in error.lower() or 'too many requests' in error.lower():
                 error_messages.append(f"⚠️ API Rate Limit - Lig {league_id} atlandı")
-                rate_limit_hit = True
                 continue
             else:
                 error_messages.append(f"Lig ID {league_id}: {error}")
@@ -3234,6 +3206,26 @@ def get_league_standings(
     return standings, None
 
 
+def _archived_h2h_fixtures(team1_id: int, team2_id: int, last: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    H2H indeksinden son karşılaşmalar
+
+    Liste biçiminde eksik örnek işaretlenemez: arşiv güncel değilse, last karşılaşmayı
+    kapsamıyorsa veya last indeksin sakladığından (H2H_KEEP_MATCHES) büyükse None.
+    """
+    try:
+        import fixture_archive
+        from h2h_index import H2H_KEEP_MATCHES, get_h2h_index
+        if last > H2H_KEEP_MATCHES or not fixture_archive.get_archive().is_fresh():
+            return None
+        index = get_h2h_index()
+        if not index.covers(team1_id, team2_id, last):
+            return None
+        return index.fixtures(team1_id, team2_id, limit=last)
+    except Exception:
+        return None
+
+
 @st.cache_data(ttl=1800)  # 30 dakika cache
 def get_h2h_matches(
     api_key: str,
@@ -3245,7 +3237,13 @@ def get_h2h_matches(
 ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     """
     İki takım arasındaki karşılaşmaları getirir (head-to-head)
+
+    Maç arşivi güncelse ve arşivde en az last karşılaşma varsa H2H indeksinden okunur (ağ çağrısı yok).
     """
+    archived = _archived_h2h_fixtures(team1_id, team2_id, last)
+    if archived:
+        return archived, None
+
     response, error = make_api_request(
         api_key, base_url, "fixtures/headtohead",
         {'h2h': f"{team1_id}-{team2_id}", 'last': last},
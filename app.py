@@ -78,6 +78,28 @@ try:
         except Exception as e:
             st.error(f"Elo reyting güncellemesi sırasında hata: {e}")
             print(f"Elo reyting güncellemesi sırasında hata: {e}")
+
+        try:
+            import precompute_advanced_metrics
+            precompute_advanced_metrics.run_precompute()
+            st.write("Advanced metrics ön hesaplaması tamamlandı.")
+            print("Advanced metrics ön hesaplaması tamamlandı.")
+        except Exception as e:
+            st.error(f"Advanced metrics ön hesaplaması sırasında hata: {e}")
+            print(f"Advanced metrics ön hesaplaması sırasında hata: {e}")
+
+        try:
+            import prediction_board
+            from precompute_advanced_metrics import load_api_key
+            board_api_key = load_api_key()
+            if not board_api_key:
+                raise RuntimeError("API anahtarı bulunamadı")
+            prediction_board.build_board(board_api_key)
+            st.write("Günlük tahmin panosu hazırlandı.")
+            print("Günlük tahmin panosu hazırlandı.")
+        except Exception as e:
+            st.error(f"Günlük tahmin panosu hazırlanırken hata: {e}")
+            print(f"Günlük tahmin panosu hazırlanırken hata: {e}")
             
         st.success("Tüm görevler tamamlandı.")
         print("Tüm görevler tamamlandı.")
@@ -96,6 +118,8 @@ from yaml.loader import SafeLoader
 
 import api_utils
 import analysis_logic
+import prediction_board
+from odds_normalizer import OddsIndex
 from password_manager import change_password, change_email
 import base64
 import os
@@ -523,6 +547,22 @@ def get_ml_prediction(
         print(f"[ERROR] ML prediction failed: {e}")
         return None
 
+
+def log_ml_model_predictions(
+    prediction: Dict[str, Any],
+    home_team: str,
+    away_team: str,
+    fixture_context: Dict[str, Any]
+) -> None:
+    """Model bazlı olasılıkları tahmin defterine yaz (online ensemble sonuçlanınca bunlardan öğrenir)"""
+    try:
+        from ensemble_manager import get_online_ensemble
+        get_online_ensemble().log_predictions(
+            prediction['model_probabilities'], home_team=home_team, away_team=away_team, **fixture_context
+        )
+    except Exception as e:
+        print(f"[WARNING] ML model predictions could not be logged: {e}")
+
 # ============================================================================
 
 @st.cache_data(ttl=86400)
@@ -703,14 +743,14 @@ def display_best_bet_card(title: str, match_data: pd.Series, prediction_label: s
         st.metric(metric_label, metric_value)
 
         
-def display_summary_tab(analysis: Dict, team_names: Dict, odds_data: Optional[Dict], model_params: Dict, team_logos: Optional[Dict] = None, home_data: Optional[Dict] = None, away_data: Optional[Dict] = None, league_id: Optional[int] = None):
+def display_summary_tab(analysis: Dict, team_names: Dict, odds_data: Optional[Dict], model_params: Dict, team_logos: Optional[Dict] = None, home_data: Optional[Dict] = None, away_data: Optional[Dict] = None, league_id: Optional[int] = None, fixture_context: Optional[Dict] = None):
     name_a, name_b = team_names['a'], team_names['b']
     logo_a = team_logos.get('a', '') if team_logos else ''
     logo_b = team_logos.get('b', '') if team_logos else ''
     
     # ML Prediction Section (at the top)
     if home_data and away_data and league_id and ML_AVAILABLE:
-        display_ml_prediction_section(home_data, away_data, league_id, name_a, name_b)
+        display_ml_prediction_section(home_data, away_data, league_id, name_a, name_b, fixture_context)
         st.markdown("---")
     
     score_a, score_b, probs, confidence, diff = analysis['score_a'], analysis['score_b'], analysis['probs'], analysis['confidence'], analysis['diff']
@@ -1307,70 +1347,14 @@ def display_detailed_betting_tab(analysis: Dict, team_names: Dict, fixture_id: i
 
 def calculate_most_reliable_odds(bookmakers_data, analysis):
     """En güvenilir oranları hesapla"""
-    reliable_odds = {}
-    
-    # Model tahminleri
-    probs = analysis.get('probs', {})
-    
-    # Over/Under verilerini kontrol et
-    over_under_found = False
-    
-    for bookmaker in bookmakers_data:
-        bookmaker_name = bookmaker.get('name', 'Bilinmiyor')
-        bets = bookmaker.get('bets', [])
-        
-        for bet in bets:
-            bet_name = bet.get('name', '')
-            values = bet.get('values', [])
-            
-            # Over/Under bet türlerini tespit et (farklı isimlerle)
-            bet_key = bet_name
-            if any(keyword in bet_name.lower() for keyword in ['over/under', 'goals over/under', 'total goals', 'o/u goals', 'goal total']):
-                bet_key = 'Over/Under'  # Standart isimle kaydet
-                over_under_found = True
-            
-            # Bahis türü güvenilirlik skorunu hesapla
-            if bet_key not in reliable_odds:
-                reliable_odds[bet_key] = {
-                    'best_odds': {},
-                    'reliability_score': 0,
-                    'bookmaker_count': 0,
-                    'average_odds': {}
-                }
-            
-            reliable_odds[bet_key]['bookmaker_count'] += 1
-            
-            for value in values:
-                outcome = value.get('value', '')
-                odd = value.get('odd', 0)
-                
-                try:
-                    odd_float = float(odd)
-                    
-                    # Over/Under için standart outcome isimleri kullan
-                    if bet_key == 'Over/Under':
-                        if 'over' in outcome.lower() and '2.5' in outcome:
-                            outcome = 'Over 2.5'
-                        elif 'under' in outcome.lower() and '2.5' in outcome:
-                            outcome = 'Under 2.5'
-                    
-                    if outcome not in reliable_odds[bet_key]['best_odds']:
-                        reliable_odds[bet_key]['best_odds'][outcome] = {
-                            'odd': odd_float,
-                            'bookmaker': bookmaker_name,
-                            'implied_prob': round(100 / odd_float, 1) if odd_float > 0 else 0
-                        }
-                    elif odd_float > reliable_odds[bet_key]['best_odds'][outcome]['odd']:
-                        reliable_odds[bet_key]['best_odds'][outcome] = {
-                            'odd': odd_float,
-                            'bookmaker': bookmaker_name,
-                            'implied_prob': round(100 / odd_float, 1) if odd_float > 0 else 0
-                        }
-                except (ValueError, TypeError, ZeroDivisionError):
-                    continue
+    # Bookmaker listesi tek seferde indekslenir; Over/Under varyantları tek anahtarda birleşir
+    odds_index = OddsIndex(bookmakers_data)
+    reliable_odds = odds_index.best_by_bet(merge_categories={'over_under': 'Over/Under'})
     
     # Güvenilirlik skorunu hesapla
     for bet_name in reliable_odds:
+        reliable_odds[bet_name]['reliability_score'] = 0
+        reliable_odds[bet_name]['average_odds'] = {}
         bookmaker_count = reliable_odds[bet_name]['bookmaker_count']
         if bookmaker_count >= 3:
             reliable_odds[bet_name]['reliability_score'] = min(95, 60 + (bookmaker_count * 5))
@@ -2259,7 +2243,8 @@ def display_ml_prediction_section(
     away_data: Dict,
     league_id: int,
     team1_name: str,
-    team2_name: str
+    team2_name: str,
+    fixture_context: Optional[Dict] = None
 ):
     """Display ML prediction with confidence and model votes"""
     
@@ -2286,6 +2271,9 @@ def display_ml_prediction_section(
             st.warning("⚠️ ML tahmini oluşturulamadı. Model henüz eğitilmemiş olabilir.")
             return
         
+        if fixture_context and prediction.get('model_probabilities'):
+            log_ml_model_predictions(prediction, team1_name, team2_name, fixture_context)
+        
         # Display prediction
         col1, col2, col3, col4 = st.columns([2, 1, 1, 2])
         
@@ -2903,7 +2891,7 @@ def display_lstm_prediction_tab(analysis: Dict, team_names: Dict, team_ids: Dict
                     lstm_result = predict_match_with_lstm(
                         home_team_matches=home_matches,
                         away_team_matches=away_matches,
-                        lstm_model=None  # Yeni model oluştur
+                        lstm_model=None  # Süreç cache'indeki model
                     )
                 except Exception as lstm_error:
                     st.error(f"⚠️ LSTM model hatası: {str(lstm_error)}")
@@ -3637,115 +3625,10 @@ def analyze_fixture_summary(fixture: Dict, model_params: Dict) -> Optional[Dict]
     Bu fonksiyon maç panosu için kullanılır.
     """
     try:
-        # API formatından bilgileri çıkar
-        teams = fixture.get('teams', {})
-        home_team = teams.get('home', {})
-        away_team = teams.get('away', {})
-        fixture_info = fixture.get('fixture', {})
-        league_info_raw = fixture.get('league', {})
-        goals = fixture.get('goals', {})
-        
-        # Takım bilgilerini al
-        id_a = home_team.get('id')
-        name_a = home_team.get('name', '?')
-        id_b = away_team.get('id')
-        name_b = away_team.get('name', '?')
-        
-        # Maç bilgilerini al
-        match_id = fixture_info.get('id')
-        match_time = fixture_info.get('date', '')
-        league_id = league_info_raw.get('id')
-        league_name = league_info_raw.get('name', '')
-        season = league_info_raw.get('season')
-        
-        # Logo bilgileri
-        home_logo = home_team.get('logo', '')
-        away_logo = away_team.get('logo', '')
-        
-        # Saat formatı
-        try:
-            if match_time:
-                from datetime import datetime
-                dt = datetime.fromisoformat(match_time.replace('Z', '+00:00'))
-                time_str = dt.strftime('%H:%M')
-            else:
-                time_str = ''
-        except:
-            time_str = ''
-        
-        # Skor bilgisi
-        home_goals = goals.get('home')
-        away_goals = goals.get('away')
-        actual_score_str = f"{home_goals}-{away_goals}" if home_goals is not None and away_goals is not None else ""
-        
-        # Kazanan belirleme
-        winner_home = None
-        if home_goals is not None and away_goals is not None:
-            if home_goals > away_goals:
-                winner_home = True
-            elif away_goals > home_goals:
-                winner_home = False
-            else:
-                winner_home = None  # Berabere
-        
-        # ID kontrolü
-        if not id_a or not id_b or not match_id:
-            return None
-        
-        # HER ZAMAN skip_limit=True - sistem API'si
-        league_info = api_utils.get_team_league_info(API_KEY, BASE_URL, id_a, skip_limit=True)
-        # HER ZAMAN skip_limit=True - sistem API'si
-        league_info = api_utils.get_team_league_info(API_KEY, BASE_URL, id_a, skip_limit=True)
-        
-        # Eğer takımdan lig bilgisi alınamazsa, fixture'daki lig bilgisini kullan
-        if not league_info and league_id:
-            league_info = {
-                'league_id': league_id,
-                'season': season or (datetime.now().year if datetime.now().month > 6 else datetime.now().year - 1)
-            }
-        
-        if not league_info: 
-            st.warning(f"⚠️ {name_a} vs {name_b}: Lig bilgisi alınamadı")
-            return None
-        # HER ZAMAN skip_api_limit=True - sistem API'si
-        analysis = analysis_logic.run_core_analysis(API_KEY, BASE_URL, id_a, id_b, name_a, name_b, match_id, league_info, model_params, LIG_ORTALAMA_GOL, skip_api_limit=True)
-        if not analysis: 
-            st.warning(f"⚠️ {name_a} vs {name_b}: Analiz verisi oluşturulamadı")
-            return None
-        probs = analysis['probs']
-        max_prob_key = max(probs, key=lambda k: probs[k] if 'win' in k or 'draw' in k else -1)
-        decision = f"{name_a} K." if max_prob_key == 'win_a' else f"{name_b} K." if max_prob_key == 'win_b' else "Ber."
-        result_icon = ""
-        
-        if actual_score_str:
-            predicted_home_win = " K." in decision and name_a in decision
-            predicted_away_win = " K." in decision and name_b in decision
-            predicted_draw = "Ber." in decision
-            actual_winner = 'home' if winner_home is True else 'away' if winner_home is False else 'draw'
-            if (predicted_home_win and actual_winner == 'home') or (predicted_away_win and actual_winner == 'away') or (predicted_draw and actual_winner == 'draw'): 
-                result_icon = "✅"
-            else: 
-                result_icon = "❌"
-        
-        return {
-            "Saat": time_str, 
-            "Lig": league_name, 
-            "Ev Sahibi": name_a, 
-            "Deplasman": name_b, 
-            "Tahmin": decision, 
-            "Gerçekleşen Skor": actual_score_str, 
-            "Sonuç": result_icon, 
-            "AI Güven Puanı": analysis['confidence'], 
-            "2.5 ÜST (%)": probs['ust_2_5'], 
-            "KG VAR (%)": probs['kg_var'], 
-            "home_id": id_a, 
-            "away_id": id_b, 
-            "fixture_id": match_id,
-            "home_logo": home_logo,
-            "away_logo": away_logo,
-            "league_id": league_id,
-            "season": season
-        }
+        summary, warning = prediction_board.summarize_fixture(API_KEY, BASE_URL, fixture, model_params, LIG_ORTALAMA_GOL)
+        if warning:
+            st.warning(f"⚠️ {warning}")
+        return summary
     except Exception as e: 
         # Hata mesajını daha detaylı yap
         home_name = fixture.get('teams', {}).get('home', {}).get('name', '?')
@@ -4237,7 +4120,7 @@ def analyze_and_display(team_a_data: Dict, team_b_data: Dict, fixture_id: int, m
     if not analysis: st.error("Analiz verisi oluşturulamadı."); return
 
     with st.spinner("Ek veriler çekiliyor..."):
-        odds_response, _ = api_utils.get_fixture_odds(API_KEY, BASE_URL, fixture_id)
+        odds_response, _ = api_utils.get_fixture_odds(API_KEY, BASE_URL, fixture_id, skip_limit=True)
         processed_odds = analysis_logic.process_odds_data(odds_response)
         fixture_details, _ = api_utils.get_fixture_details(API_KEY, BASE_URL, fixture_id)
         processed_referee_stats = None
@@ -4253,10 +4136,29 @@ def analyze_and_display(team_a_data: Dict, team_b_data: Dict, fixture_id: int, m
                 processed_referee_stats = analysis_logic.process_referee_data(referee_data)
             elif referee_name_only:
                 processed_referee_stats = {"name": referee_name_only, "total_games": "N/A"}
-        h2h_matches, _ = api_utils.get_h2h_matches(API_KEY, BASE_URL, id_a, id_b, H2H_MATCH_LIMIT)
-        processed_h2h = analysis_logic.process_h2h_data(h2h_matches, id_a)
+        processed_h2h = analysis_logic.get_h2h_summary(API_KEY, BASE_URL, id_a, id_b, H2H_MATCH_LIMIT,
+                                                       league_info=league_info)
 
     team_names = {'a': name_a, 'b': name_b}; team_ids = {'a': id_a, 'b': id_b}
+    # Tahmin defteri anahtarları (maç, başlama saati, lig, takımlar)
+    fixture_context = {
+        'fixture_id': fixture_id,
+        'kickoff': (fixture_details or {}).get('fixture', {}).get('timestamp'),
+        'league_id': league_info.get('league_id'),
+        'season': league_info.get('season'),
+        'home_id': id_a,
+        'away_id': id_b,
+    }
+    try:
+        # Pano tahminleriyle aynı model sürümü: backtest iki yolu birlikte değerlendirir
+        from prediction_ledger import get_prediction_ledger
+        get_prediction_ledger().log_analysis(
+            analysis, home_team=name_a, away_team=name_b,
+            model_version=prediction_board.model_version(model_params),
+            league=(fixture_details or {}).get('league', {}).get('name', ''), **fixture_context
+        )
+    except Exception as e:
+        print(f"⚠️ Tahmin deftere yazılamadı: {e}")
     
     # Prepare data for ML prediction
     ml_home_data = {
@@ -4312,7 +4214,7 @@ def analyze_and_display(team_a_data: Dict, team_b_data: Dict, fixture_id: int, m
 
     team_logos = {'a': logo_a, 'b': logo_b}
     
-    with tab1: display_summary_tab(analysis, team_names, processed_odds, model_params, team_logos, ml_home_data, ml_away_data, ml_league_id)
+    with tab1: display_summary_tab(analysis, team_names, processed_odds, model_params, team_logos, ml_home_data, ml_away_data, ml_league_id, fixture_context)
     with tab2: display_stats_tab(analysis['stats'], team_names, team_ids, analysis.get('params'))
     with tab3: display_detailed_betting_tab(analysis, team_names, fixture_id, model_params)
     with tab4: display_injuries_tab(fixture_id, team_names, team_ids, league_info)
@@ -4375,9 +4277,18 @@ def analyze_and_display(team_a_data: Dict, team_b_data: Dict, fixture_id: int, m
             st.warning("⚠️ Detaylı Analiz modülü yüklü değil")
             st.info("📦 Shot Analysis, Passing Network ve Defensive Stats için sistem güncelleniyor...")
 
-@st.cache_data(ttl=3600, show_spinner=False)  # 1 saat cache - sık güncelleme
 def get_top_predictions_today(model_params: Dict, today_date: date, is_admin_user: bool, top_n: int = 5) -> List[Dict]:
     """Bugünün en yüksek güvenli tahminlerini getirir - API limiti tüketmez"""
+    # Arka plan worker'ının hazırladığı pano varsa maç analizi yapılmaz (sabit süre)
+    board = prediction_board.load_board(today_date)
+    if board:
+        league_filter = None if is_admin_user else [203, 39, 140, 135, 78, 61]
+        return prediction_board.get_top_predictions(board, top_n=top_n, league_ids=league_filter)
+    return _compute_top_predictions_today(model_params, today_date, is_admin_user, top_n)
+
+@st.cache_data(ttl=3600, show_spinner=False)  # 1 saat cache - sık güncelleme
+def _compute_top_predictions_today(model_params: Dict, today_date: date, is_admin_user: bool, top_n: int = 5) -> List[Dict]:
+    """Pano henüz hazır değilken günün maçlarını istek anında analiz eder"""
     
     if is_admin_user:
         # ADMIN: POPÜLER 100 LİG TARA (performans optimizasyonu)
@@ -4489,6 +4400,16 @@ def build_home_view(model_params):
     if LEAGUE_LOAD_ERROR:
         st.caption(f"⚠️ Lig listesi uyarısı: {LEAGUE_LOAD_ERROR}")
     
+    # Günün öne çıkan tahminleri - sadece hazır panodan (istek anında analiz yok)
+    top_predictions = prediction_board.get_top_predictions(prediction_board.load_board(), top_n=5)
+    if top_predictions:
+        st.subheader("🏆 Günün Öne Çıkan Tahminleri")
+        st.dataframe(
+            pd.DataFrame(top_predictions)[["Saat", "Lig", "Ev Sahibi", "Deplasman", "Tahmin", "AI Güven Puanı", "2.5 ÜST (%)", "KG VAR (%)"]],
+            use_container_width=True, hide_index=True
+        )
+        st.markdown("---")
+    
     # Ana sayfa - Sadece yaklaşan maçlar analizi
     st.success("⚽ **Yaklaşan Maçlar Analizi:** Herhangi bir takım yazın, yaklaşan maçını bulup analiz edelim!")
     
@@ -4641,35 +4562,45 @@ def build_dashboard_view(model_params: Dict):
         st.warning("Seçili ligler bulunamadı. Lütfen seçimlerinizi kontrol edin.")
         return
     
-    # MAÇ PANOSUNDA ARAMA - SİSTEM API HAKKI KULLAN (bypass_limit_check=True)
-    loading_msg = f"{len(selected_ids)} ligden maçlar getiriliyor..."
-    with st.spinner(loading_msg):
-        fixtures, error = api_utils.get_fixtures_by_date(API_KEY, BASE_URL, selected_ids, selected_date, bypass_limit_check=True)
-    
-    # Hata mesajını daha kullanıcı dostu göster
-    if error:
-        # Eğer başarılı sonuç varsa ve sadece rate limit uyarısıysa, warning olarak göster
-        if fixtures and ("✅" in error or "Rate Limit" in error):
-            st.warning(f"⚠️ Bazı ligler yüklenemedi:\n\n{error}")
-            st.info("💡 Yüklenen maçlarla devam ediliyor. Eksik ligler için daha sonra tekrar deneyin.")
-        else:
-            st.error(f"❌ Maçlar çekilirken hata oluştu:\n\n{error}")
-            if "rate limit" in error.lower() or "too many requests" in error.lower():
-                st.info("💡 **Çözüm Önerileri:**\n- Daha az lig seçin (maksimum 20-25)\n- Birkaç dakika bekleyip tekrar deneyin\n- Ligleri gruplar halinde analiz edin")
+    # Bugün için arka plan worker'ının panosu seçili ligleri kapsıyorsa maçlar yeniden analiz edilmez
+    board = prediction_board.load_board(selected_date) if selected_date == date.today() else None
+    if (board and set(selected_ids) <= set(board.get('league_ids', []))
+            and (not model_params or board.get('model_params') == model_params)):
+        analyzed_fixtures = [row for row in board['fixtures'] if row.get('league_id') in selected_ids]
+        st.caption(f"⚡ Günlük tahmin panosu - son güncelleme: {board.get('updated_at', '')[11:16]}")
+        if not analyzed_fixtures:
+            st.info(f"Seçtiğiniz tarih ve liglerde maç bulunamadı.")
             return
+    else:
+        # MAÇ PANOSUNDA ARAMA - SİSTEM API HAKKI KULLAN (bypass_limit_check=True)
+        loading_msg = f"{len(selected_ids)} ligden maçlar getiriliyor..."
+        with st.spinner(loading_msg):
+            fixtures, error = api_utils.get_fixtures_by_date(API_KEY, BASE_URL, selected_ids, selected_date, bypass_limit_check=True)
+    
+        # Hata mesajını daha kullanıcı dostu göster
+        if error:
+            # Eğer başarılı sonuç varsa ve sadece rate limit uyarısıysa, warning olarak göster
+            if fixtures and ("✅" in error or "Rate Limit" in error):
+                st.warning(f"⚠️ Bazı ligler yüklenemedi:\n\n{error}")
+                st.info("💡 Yüklenen maçlarla devam ediliyor. Eksik ligler için daha sonra tekrar deneyin.")
+            else:
+                st.error(f"❌ Maçlar çekilirken hata oluştu:\n\n{error}")
+                if "rate limit" in error.lower() or "too many requests" in error.lower():
+                    st.info("💡 **Çözüm Önerileri:**\n- Daha az lig seçin (maksimum 20-25)\n- Birkaç dakika bekleyip tekrar deneyin\n- Ligleri gruplar halinde analiz edin")
+                return
     
-    if not fixtures: 
-        st.info(f"Seçtiğiniz tarih ve liglerde maç bulunamadı.")
-        return
+        if not fixtures: 
+            st.info(f"Seçtiğiniz tarih ve liglerde maç bulunamadı.")
+            return
     
-    # Başarı mesajı
-    if len(fixtures) > 0:
-        st.success(f"✅ {len(fixtures)} maç bulundu, analiz ediliyor...")
+        # Başarı mesajı
+        if len(fixtures) > 0:
+            st.success(f"✅ {len(fixtures)} maç bulundu, analiz ediliyor...")
     
-    progress_bar = st.progress(0, text="Maçlar analiz ediliyor...")
-    # MAÇ PANOSUNDA ÖZET ANALİZ - SİSTEM API'Sİ KULLAN (use_system_api parametresi kaldırıldı, artık her zaman sistem API)
-    analyzed_fixtures = [summary for i, f in enumerate(fixtures) if (summary := analyze_fixture_summary(f, model_params)) and (progress_bar.progress((i + 1) / len(fixtures), f"Analiz: {f.get('teams', {}).get('home', {}).get('name', 'Maç')}", ))]
-    progress_bar.empty()
+        progress_bar = st.progress(0, text="Maçlar analiz ediliyor...")
+        # MAÇ PANOSUNDA ÖZET ANALİZ - SİSTEM API'Sİ KULLAN (use_system_api parametresi kaldırıldı, artık her zaman sistem API)
+        analyzed_fixtures = [summary for i, f in enumerate(fixtures) if (summary := analyze_fixture_summary(f, model_params)) and (progress_bar.progress((i + 1) / len(fixtures), f"Analiz: {f.get('teams', {}).get('home', {}).get('name', 'Maç')}", ))]
+        progress_bar.empty()
     if not analyzed_fixtures: st.error("Hiçbir maç analiz edilemedi."); return
     df = pd.DataFrame(analyzed_fixtures)
     if not df.empty and selected_date >= date.today():
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Backtest Runner
+===============
+run_core_analysis'i maç arşivindeki bitmiş maçlar üzerinde, her maç için sadece
+başlama anından önce bilinen veriyle (point-in-time) yeniden oynatır ve
+model_params kombinasyonlarını (form/sezon harmanı, Elo kademeleri, ev avantajı
+sınırları, sakatlık çarpanı, ...) doğruluk / log-loss / Brier ile karşılaştırır.
+
+- Girdiler: as_of öncesi son maçlar, lig gol ortalamaları ve H2H arşivden;
+  form vektörleri canlı analizdeki gibi form motorundan, tablo maç anına kadarki
+  maçlarla kurulur; Elo tablosu arşiv baştan oynatılarak maç anına kadar güncellenir
+  (elo_ratings.json, H2H indeksi ve ML ayarları bugünü içerir, kullanılmaz)
+- API'ye gidilmez: request_budget=0 ile kotalı gruplar varsayılana düşer, kaçak
+  bir çağrı olursa api_replay korpusundan okunur (ağ kullanılmaz, sayılır)
+- Lig-sezon başına bir görev; görevler süreç havuzunda (fork) paralel koşar
+- Parametre taraması: maçın girdileri bir kez toplanır, tüm kombinasyonlar
+  aynı girdilerle hesaplanır (run_core_analysis inputs=)
+
+Kullanım:
+    python backtest_runner.py -l 203 39 -s 2023 2024 \\
+        --grid '{"form_weight": [0.7, 0.8, 0.9], "home_advantage_max": [1.15, 1.2]}'
+
+    from backtest_runner import BacktestRunner, expand_grid
+
+    report = BacktestRunner().run([(203, 2024)], expand_grid({'form_weight': [0.7, 0.8]}))
+    report['results'][0]['params'], report['results'][0]['log_loss']
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import analysis_logic
+import api_replay
+import elo_utils
+import fixture_archive
+from prediction_ledger import EPSILON, binary_scores, calibration_table
+from request_planner import RECENT_FORM_LIMIT
+
+BASE_URL = "https://v3.football.api-sports.io"
+DEFAULT_LEAGUE_AVG_GOALS = 1.35
+
+
+def expand_grid(grid: Dict[str, Iterable[Any]]) -> List[Dict[str, Any]]:
+    """{'form_weight': [0.7, 0.8], ...} → tüm kombinasyonlar (model_params override listesi)"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(grid[name]) for name in names))]
+
+
+class PointInTimeElo:
+    """Arşivi zaman sırasıyla oynatarak verilen ana kadarki Elo tablosu (elo_utils biçiminde)"""
+
+    def __init__(self, table: Dict[str, np.ndarray]):
+        self.table = table
+        self.ratings: Dict[str, Dict[str, Any]] = {}
+        self._cursor = 0
+
+    def advance(self, until: int) -> Dict[str, Dict[str, Any]]:
+        """until'den önce biten tüm maçları işle"""
+        timestamps = self.table['timestamp']
+        end = int(np.searchsorted(timestamps, until, side='left'))
+        for position in range(self._cursor, max(self._cursor, end)):
+            home = str(int(self.table['home_id'][position]))
+            away = str(int(self.table['away_id'][position]))
+            rating_home = self.ratings.get(home, {}).get('rating', elo_utils.DEFAULT_RATING)
+            rating_away = self.ratings.get(away, {}).get('rating', elo_utils.DEFAULT_RATING)
+            new_home, new_away = elo_utils.calculate_new_ratings(
+                rating_home, rating_away,
+                int(self.table['home_goals'][position]), int(self.table['away_goals'][position]))
+            self.ratings[home] = {'rating': new_home}
+            self.ratings[away] = {'rating': new_away}
+        self._cursor = max(self._cursor, end)
+        return self.ratings
+
+
+def _probabilities(analysis: Dict[str, Any]) -> Tuple[List[float], float, float]:
+    """Yüzde olasılıklar → ([away, draw, home], 2.5 üst, KG var)"""
+    probs = analysis['probs']
+    return ([probs['win_b'] / 100.0, probs['draw'] / 100.0, probs['win_a'] / 100.0],
+            probs.get('ust_2_5', np.nan) / 100.0, probs.get('kg_var', np.nan) / 100.0)
+
+
+def replay_shard(league_id: int, season: int, param_sets: List[Dict[str, Any]],
+                 default_avg: float = DEFAULT_LEAGUE_AVG_GOALS, min_history: int = RECENT_FORM_LIMIT,
+                 limit: Optional[int] = None, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Bir lig-sezonun maçlarını tüm parametre kombinasyonlarıyla yeniden oynat
+
+    Args:
+        min_history: Her iki takımın maç anından önce arşivde en az bu kadar maçı yoksa
+                     maç atlanır (form girdisi olmadan analiz varsayılanlara düşer)
+        limit: Sezonun ilk N maçı (hızlı deneme)
+
+    Returns:
+        {'league_id', 'season', 'fixture_ids', 'outcomes', 'total_goals', 'btts',
+         'probabilities' (k, n, 3), 'p_over25' (k, n), 'p_btts' (k, n), 'skipped', 'api_calls', 'seconds'}
+    """
+    start = time.perf_counter()
+    archive = fixture_archive.get_archive()
+    table = archive.columns()
+    positions = np.flatnonzero((table['league_id'] == int(league_id)) & (table['season'] == int(season)))
+    if limit is not None:
+        positions = positions[:limit]
+
+    # inputs= verilen çağrılar Streamlit cache'ine girmez (maç başına değişen girdiler)
+    analyze = analysis_logic.run_core_analysis
+    elo = PointInTimeElo(table)
+    league_info = {'league_id': int(league_id), 'season': int(season)}
+    kept, probabilities, p_over25, p_btts = [], [], [], []
+    skipped = 0
+    with contextlib.ExitStack() as stack:
+        # Planlı çağrı yok; kaçak çağrı ağa değil korpusa gider ve sayılır
+        stack.enter_context(api_replay.configured(mode='replay'))
+        if not verbose:
+            sink = stack.enter_context(open(os.devnull, 'w'))
+            stack.enter_context(contextlib.redirect_stdout(sink))
+        for position in positions:
+            kickoff = int(table['timestamp'][position])
+            home_id, away_id = int(table['home_id'][position]), int(table['away_id'][position])
+            ratings = elo.advance(kickoff)
+            if min_history and any(len(archive.team_history(team_id, limit=min_history, before=kickoff)) < min_history
+                                   for team_id in (home_id, away_id)):
+                skipped += 1
+                continue
+
+            inputs = {'ratings': ratings}
+            rows = [[], [], []]
+            for params in param_sets:
+                analysis = analyze(
+                    '', BASE_URL, home_id, away_id, str(table['home_name'][position]),
+                    str(table['away_name'][position]), int(table['fixture_id'][position]), league_info,
+                    params, default_avg, skip_api_limit=True, request_budget=0, as_of=kickoff, inputs=inputs)
+                for target, value in zip(rows, _probabilities(analysis)):
+                    target.append(value)
+            kept.append(position)
+            probabilities.append(rows[0])
+            p_over25.append(rows[1])
+            p_btts.append(rows[2])
+        api_calls = api_replay.get_stats()['calls']
+
+    kept = np.asarray(kept, dtype=np.int64)
+    home_goals, away_goals = table['home_goals'][kept], table['away_goals'][kept]
+    n_params = len(param_sets)
+    return {
+        'league_id': int(league_id),
+        'season': int(season),
+        'fixture_ids': table['fixture_id'][kept],
+        'outcomes': np.sign(home_goals - away_goals).astype(np.int64) + 1,  # 0 away, 1 draw, 2 home
+        'total_goals': home_goals + away_goals,
+        'btts': (home_goals > 0) & (away_goals > 0),
+        'probabilities': np.asarray(probabilities, dtype=np.float64).reshape(-1, n_params, 3).transpose(1, 0, 2),
+        'p_over25': np.asarray(p_over25, dtype=np.float64).reshape(-1, n_params).T,
+        'p_btts': np.asarray(p_btts, dtype=np.float64).reshape(-1, n_params).T,
+        'skipped': skipped,
+        'api_calls': api_calls,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def score_predictions(probabilities: np.ndarray, outcomes: np.ndarray, p_over25: np.ndarray,
+                      over25: np.ndarray, p_btts: np.ndarray, btts: np.ndarray) -> Dict[str, Any]:
+    """Bir parametre kombinasyonunun 1X2 ve gol marketleri skorları (prediction_ledger.backtest ölçüleri)"""
+    n = len(outcomes)
+    if n == 0:
+        return {'fixtures': 0, 'accuracy': None, 'log_loss': None, 'brier': None, 'ece': None,
+                'over_2_5': None, 'btts': None}
+    rows = np.arange(n)
+    onehot = np.zeros_like(probabilities)
+    onehot[rows, outcomes] = 1.0
+    return {
+        'fixtures': int(n),
+        'accuracy': round(float(np.mean(np.argmax(probabilities, axis=1) == outcomes)), 4),
+        'log_loss': round(float(-np.mean(np.log(np.clip(probabilities[rows, outcomes], EPSILON, 1)))), 4),
+        'brier': round(float(np.mean(np.sum((probabilities - onehot) ** 2, axis=1))), 4),
+        'ece': calibration_table(probabilities, outcomes)['ece'],
+        'over_2_5': binary_scores(p_over25, over25),
+        'btts': binary_scores(p_btts, btts),
+    }
+
+
+class BacktestRunner:
+    """Lig-sezon görevlerini süreç havuzunda koşturup parametre kombinasyonlarını sıralar"""
+
+    def __init__(self, n_workers: Optional[int] = None, default_avg: float = DEFAULT_LEAGUE_AVG_GOALS,
+                 min_history: int = RECENT_FORM_LIMIT):
+        """
+        Args:
+            n_workers: Paralel lig-sezon görevi (None = çekirdek sayısı; 1 = aynı süreçte,
+                       fork olmayan platformlarda da varsayılan)
+        """
+        if n_workers is None:
+            n_workers = (os.cpu_count() or 1) if 'fork' in multiprocessing.get_all_start_methods() else 1
+        self.n_workers = max(1, int(n_workers))
+        self.default_avg = default_avg
+        self.min_history = min_history
+
+    def _shards(self, league_seasons: Iterable[Tuple[int, int]], limit: Optional[int]) -> List[Tuple[int, int]]:
+        """Büyük görevler önce (havuzun sonunda tek uzun görev kalmasın)"""
+        table = fixture_archive.get_archive().columns()
+        sizes = {}
+        for league_id, season in league_seasons:
+            size = int(np.count_nonzero((table['league_id'] == int(league_id)) & (table['season'] == int(season))))
+            sizes[(int(league_id), int(season))] = min(size, limit) if limit is not None else size
+        return sorted((shard for shard, size in sizes.items() if size), key=lambda shard: -sizes[shard])
+
+    def run(self, league_seasons: Iterable[Tuple[int, int]], param_sets: Optional[List[Dict[str, Any]]] = None,
+            base_params: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+            verbose: bool = False) -> Dict[str, Any]:
+        """
+        Args:
+            league_seasons: [(league_id, season), ...]
+            param_sets: model_params override'ları (None = sadece CORE_MODEL_DEFAULTS)
+            base_params: Her kombinasyonun altına konan sabit parametreler
+            limit: Lig-sezon başına ilk N maç
+
+        Returns:
+            {'results': log-loss'a göre sıralı [{'params', 'fixtures', 'accuracy', 'log_loss', ...}],
+             'shards': [...], 'param_sets', 'fixtures', 'api_calls', 'wall_time'}
+        """
+        start = time.perf_counter()
+        overrides = param_sets or [{}]
+        full_params = [{**(base_params or {}), **override} for override in overrides]
+        shards = self._shards(league_seasons, limit)
+        options = dict(default_avg=self.default_avg, min_history=self.min_history, limit=limit, verbose=verbose)
+
+        n_parallel = min(self.n_workers, len(shards))
+        if n_parallel <= 1:
+            replays = [replay_shard(league_id, season, full_params, **options) for league_id, season in shards]
+        else:
+            # Arşiv tablosu fork ile işçilere kopyalanmadan geçer
+            fixture_archive.get_archive().columns()
+            with ProcessPoolExecutor(max_workers=n_parallel,
+                                     mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [pool.submit(replay_shard, league_id, season, full_params, **options)
+                           for league_id, season in shards]
+                replays = [future.result() for future in futures]
+
+        outcomes = np.concatenate([r['outcomes'] for r in replays]) if replays else np.zeros(0, dtype=np.int64)
+        total_goals = np.concatenate([r['total_goals'] for r in replays]) if replays else np.zeros(0)
+        btts = np.concatenate([r['btts'] for r in replays]) if replays else np.zeros(0, dtype=bool)
+        results = []
+        for k, override in enumerate(overrides):
+            if replays:
+                probabilities = np.concatenate([r['probabilities'][k] for r in replays])
+                p_over25 = np.concatenate([r['p_over25'][k] for r in replays])
+                p_btts = np.concatenate([r['p_btts'][k] for r in replays])
+            else:
+                probabilities, p_over25, p_btts = np.zeros((0, 3)), np.zeros(0), np.zeros(0)
+            scores = score_predictions(probabilities, outcomes, p_over25, total_goals > 2, p_btts, btts)
+            results.append({'params': override, **scores})
+        results.sort(key=lambda result: (result['log_loss'] is None, result['log_loss'] or 0.0))
+
+        return {
+            'results': results,
+            'shards': [{key: r[key] for key in ('league_id', 'season', 'skipped', 'api_calls', 'seconds')}
+                       | {'fixtures': len(r['outcomes'])} for r in replays],
+            'param_sets': len(overrides),
+            'fixtures': int(len(outcomes)),
+            'api_calls': sum(r['api_calls'] for r in replays),
+            'wall_time': round(time.perf_counter() - start, 3),
+        }
+
+
+def format_report(report: Dict[str, Any], top: int = 10) -> str:
+    """En iyi kombinasyonlar: 1X2 log-loss / Brier / doğruluk / ECE, 2.5 üst Brier"""
+    lines = [f"{report['fixtures']} maç × {report['param_sets']} kombinasyon, "
+             f"{len(report['shards'])} lig-sezon, {report['wall_time']:.1f}s, API çağrısı: {report['api_calls']}"]
+    for rank, result in enumerate(report['results'][:top], 1):
+        if result['log_loss'] is None:
+            continue
+        over = result['over_2_5']['brier'] if result['over_2_5'] else float('nan')
+        lines.append(f"  {rank:>2}. log-loss {result['log_loss']:.4f}  brier {result['brier']:.4f}  "
+                     f"acc {result['accuracy']:.3f}  ece {result['ece']:.3f}  o2.5 brier {over:.4f}  "
+                     f"{json.dumps(result['params'], ensure_ascii=False)}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run_core_analysis geçmiş maç backtest'i (point-in-time)")
+    parser.add_argument('-l', '--leagues', type=int, nargs='+', required=True, help="Lig ID'leri")
+    parser.add_argument('-s', '--seasons', type=int, nargs='+', required=True, help="Sezonlar")
+    parser.add_argument('--grid', default='{}', help='Parametre ızgarası (JSON), ör. \'{"form_weight": [0.7, 0.8]}\'')
+    parser.add_argument('--base', default='{}', help="Tüm kombinasyonlarda sabit parametreler (JSON)")
+    parser.add_argument('-w', '--workers', type=int, help="Paralel süreç (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--limit', type=int, help="Lig-sezon başına ilk N maç")
+    parser.add_argument('--top', type=int, default=10, help="Yazdırılacak kombinasyon sayısı")
+    parser.add_argument('--output', help="Raporu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    grid = json.loads(args.grid)
+    runner = BacktestRunner(n_workers=args.workers)
+    report = runner.run([(league_id, season) for league_id in args.leagues for season in args.seasons],
+                        expand_grid(grid) if grid else None, base_params=json.loads(args.base), limit=args.limit)
+    print(format_report(report, top=args.top))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ Rapor kaydedildi: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
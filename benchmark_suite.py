@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-End Benchmark Suite
+==========================
+Kayıtlı API yanıtları (api_replay korpusu) üzerinde kritik yolları ölçer:
+
+- run_core_analysis (tek maç tam analiz)
+- get_top_predictions_today (pano okuma + pano hesaplama yolu)
+- get_team_id (ana sayfa takım arama)
+- olasılık motorları (Poisson matrisi, Monte Carlo, analysis_logic)
+- model çıkarımı (LSTM + kayıtlı ensemble modelleri)
+
+Her senaryo N kez çalışır; p50/p95 süre ve iterasyon başına API çağrısı
+BUDGETS ile karşılaştırılır. Bütçe aşımı veya korpusta olmayan istek
+(replay miss) varsa süreç 1 ile çıkar.
+
+Kullanım:
+    API_KEY=... python benchmark_suite.py --record           # canlı API'den korpusu kaydet
+    python benchmark_suite.py                                # replay + bütçe kontrolü
+    python benchmark_suite.py -n 20 --latency-ms 150 --jitter-ms 50 --json bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import api_replay
+
+BASE_URL = "https://v3.football.api-sports.io"
+SCENARIO_FILE = 'scenario.json'
+
+# Korpus kaydedilirken kullanılan maç; replay korpustaki scenario.json'ı okur
+DEFAULT_SCENARIO = {
+    'home_id': 645, 'home_name': 'Galatasaray',
+    'away_id': 611, 'away_name': 'Fenerbahce',
+    'league_id': 203, 'season': 2024,
+    'date': '2024-09-21',
+    'fixture_id': None,
+    'team_queries': ['Galatasaray', 'Samsunspor', 'Real Sociedad'],
+}
+DEFAULT_MODEL_PARAMS = {"injury_impact": 0.85, "max_goals": 2.5, "value_threshold": 5}
+DEFAULT_LEAGUE_AVG_GOALS = 1.35
+
+# Senaryo → (p95 ms, iterasyon başına en fazla API çağrısı)
+# Süre bütçeleri --latency-ms 0 içindir; yapay gecikmeyle çalışırken --latency-budget kullanın
+BUDGETS = {
+    'run_core_analysis': (1500.0, 25),
+    'top_predictions_board': (50.0, 0),
+    'top_predictions_compute': (20000.0, 400),
+    'get_team_id': (300.0, 6),
+    'probability_engines': (400.0, 0),
+    'model_inference': (250.0, 0),
+}
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    setup: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None  # None veya atlama nedeni
+
+
+# ----------------------------------------------------------------------
+# Ölçüm
+# ----------------------------------------------------------------------
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def measure(case: BenchmarkCase, ctx: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    """Senaryoyu çalıştır; süre ve API çağrı sayılarını topla"""
+    if case.setup:
+        skip_reason = case.setup(ctx)
+        if skip_reason:
+            return {'name': case.name, 'skipped': skip_reason}
+
+    timings, calls, misses, errors = [], [], 0, []
+    for _ in range(iterations):
+        api_replay.reset_stats()
+        start = time.perf_counter()
+        try:
+            case.run(ctx)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        timings.append((time.perf_counter() - start) * 1000.0)
+        stats = api_replay.get_stats()
+        calls.append(stats['calls'])
+        misses += stats['misses']
+
+    return {
+        'name': case.name,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'max_ms': round(max(timings), 2),
+        'api_calls_cold': calls[0],
+        'api_calls_max': max(calls),
+        'api_calls_warm': calls[-1],
+        'replay_misses': misses,
+        'errors': errors[:3],
+    }
+
+
+def check_budgets(results: List[Dict[str, Any]], budgets: Dict[str, tuple] = None,
+                  latency_budget_ms: float = 0.0) -> List[str]:
+    """
+    Bütçe ihlallerini döndür (boş liste = geçti)
+
+    Args:
+        latency_budget_ms: API çağrısı başına p95 bütçesine eklenecek pay (yapay gecikme için)
+    """
+    budgets = budgets or BUDGETS
+    violations = []
+    for result in results:
+        if 'skipped' in result or result['name'] not in budgets:
+            continue
+        max_p95, max_calls = budgets[result['name']]
+        allowed_p95 = max_p95 + latency_budget_ms * result['api_calls_max']
+        if result['p95_ms'] > allowed_p95:
+            violations.append(f"{result['name']}: p95 {result['p95_ms']:.1f}ms > {allowed_p95:.1f}ms")
+        if result['api_calls_max'] > max_calls:
+            violations.append(f"{result['name']}: {result['api_calls_max']} API çağrısı > {max_calls}")
+        if result['replay_misses']:
+            violations.append(f"{result['name']}: {result['replay_misses']} kayıtsız istek (korpusu yeniden kaydedin)")
+        if result['errors']:
+            violations.append(f"{result['name']}: hata - {result['errors'][0]}")
+    return violations
+
+
+# ----------------------------------------------------------------------
+# Senaryolar
+# ----------------------------------------------------------------------
+
+def _run_core_analysis(ctx):
+    import analysis_logic
+    s = ctx['scenario']
+    return analysis_logic.run_core_analysis(
+        ctx['api_key'], BASE_URL, s['home_id'], s['away_id'], s['home_name'], s['away_name'],
+        s['fixture_id'], {'league_id': s['league_id'], 'season': s['season']},
+        DEFAULT_MODEL_PARAMS, DEFAULT_LEAGUE_AVG_GOALS, skip_api_limit=True
+    )
+
+
+def _board_date(ctx) -> date:
+    return date.fromisoformat(ctx['scenario']['date'])
+
+
+def _compute_board(ctx):
+    import prediction_board
+    board = prediction_board.build_board(
+        ctx['api_key'], BASE_URL, _board_date(ctx), [ctx['scenario']['league_id']], DEFAULT_MODEL_PARAMS
+    )
+    return prediction_board.get_top_predictions(board, top_n=5)
+
+
+def _setup_board(ctx):
+    # app.get_top_predictions_today pano varsa sadece load_board + get_top_predictions yapar
+    _compute_board(ctx)
+
+
+def _read_board(ctx):
+    import prediction_board
+    board = prediction_board.load_board(_board_date(ctx))
+    return prediction_board.get_top_predictions(board, top_n=5, league_ids=[ctx['scenario']['league_id']])
+
+
+def _get_team_id(ctx):
+    import api_utils
+    return [api_utils.get_team_id(ctx['api_key'], BASE_URL, query, ctx['scenario']['season'])
+            for query in ctx['scenario']['team_queries']]
+
+
+def _probability_engines(ctx):
+    import analysis_logic
+    from poisson_simulator import MonteCarloSimulator, PoissonMatchSimulator
+
+    analysis_logic.calculate_match_probabilities(1.62, 1.08)
+    poisson = PoissonMatchSimulator(1.8, 0.9, 1.3, 1.2, league_avg_goals=2.7)
+    poisson.calculate_match_probabilities()
+    np.random.seed(0)
+    MonteCarloSimulator(poisson).run_simulation(10000)
+
+
+def _setup_models(ctx):
+    from lstm_predictor import get_lstm_model
+
+    rng = np.random.default_rng(0)
+    ctx['lstm'] = get_lstm_model()
+    ctx['team_matches'] = [
+        {'goals_scored': int(g), 'goals_conceded': int(c), 'result': 'W' if g > c else 'D' if g == c else 'L',
+         'is_home': bool(i % 2)}
+        for i, (g, c) in enumerate(rng.poisson(1.4, size=(15, 2)))
+    ]
+    ctx['ensemble'] = None
+    try:
+        from enhanced_ml_predictor import EnhancedMLPredictor
+        prefixes = sorted(f[:-len('_scaler.pkl')] for f in os.listdir('models') if f.endswith('_scaler.pkl'))
+        if prefixes:
+            predictor = EnhancedMLPredictor(model_dir='models')
+            predictor.load_models(prefixes[-1])
+            ctx['ensemble'] = predictor
+            ctx['features'] = rng.random((1, predictor.scaler.n_features_in_))
+    except Exception as e:
+        print(f"ℹ️ Ensemble modelleri ölçüme dahil edilmedi: {e}")
+
+
+def _model_inference(ctx):
+    ctx['lstm'].predict_batch([ctx['team_matches'], ctx['team_matches'][::-1]])
+    if ctx['ensemble'] is not None:
+        ctx['ensemble'].predict_ensemble(ctx['features'], return_probabilities=True)
+
+
+CASES = [
+    BenchmarkCase('run_core_analysis', _run_core_analysis),
+    BenchmarkCase('top_predictions_compute', _compute_board),
+    BenchmarkCase('top_predictions_board', _read_board, setup=_setup_board),
+    BenchmarkCase('get_team_id', _get_team_id),
+    BenchmarkCase('probability_engines', _probability_engines),
+    BenchmarkCase('model_inference', _model_inference, setup=_setup_models),
+]
+
+
+# ----------------------------------------------------------------------
+# Ortam
+# ----------------------------------------------------------------------
+
+def isolate_state(workdir: str, isolate_quota: bool = True):
+    """
+    Kalıcı cache / arşiv / pano yollarını geçici klasöre yönlendir
+
+    Her çalıştırma aynı soğuk durumdan başlar; api_cache.db, yerel arşiv ve
+    paylaşılan kota kovası API çağrı sayılarını etkilemez.
+    """
+    import analysis_logic  # noqa: F401 - import süresi ilk iterasyona yazılmasın
+    import cache_manager
+    import fixture_archive
+    import h2h_index
+    import opponent_strength
+    import poisson_simulator  # noqa: F401
+    import prediction_board
+    import team_profiles
+    import upstream_rate_limiter
+
+    cache_manager._cache_instance = cache_manager.CacheManager(db_path=os.path.join(workdir, 'cache.db'))
+    fixture_archive._archive = fixture_archive.FixtureArchive(os.path.join(workdir, 'archive'))
+    h2h_index._index = None
+    team_profiles._store = None
+    opponent_strength._service = None
+    prediction_board.BOARD_DIR = os.path.join(workdir, 'board')
+    if isolate_quota:
+        # Kayıt modunda gerçek istekler ortak kovadan geçmeye devam eder
+        upstream_rate_limiter._limiter = upstream_rate_limiter.UpstreamRateLimiter(os.path.join(workdir, 'rate.db'))
+
+
+def load_scenario(corpus_dir: str) -> Dict[str, Any]:
+    scenario = dict(DEFAULT_SCENARIO)
+    path = os.path.join(corpus_dir, SCENARIO_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            scenario.update(json.load(f))
+    return scenario
+
+
+def resolve_fixture_id(api_key: str, scenario: Dict[str, Any]) -> Optional[int]:
+    """Senaryo tarihinde ev sahibinin maçını bul (kayıt modunda bir kez)"""
+    import api_utils
+    fixtures, _ = api_utils.make_api_request(
+        api_key, BASE_URL, 'fixtures',
+        {'team': scenario['home_id'], 'date': scenario['date'], 'season': scenario['season']}, skip_limit=True
+    )
+    for fixture in fixtures or []:
+        return fixture.get('fixture', {}).get('id')
+    return None
+
+
+def run_suite(corpus_dir: str, mode: str = 'replay', iterations: int = 10, latency_ms: float = 0.0,
+              jitter_ms: float = 0.0, api_key: Optional[str] = None,
+              case_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    scenario = load_scenario(corpus_dir)
+    # Replay'de anahtar korpus anahtarına girmez; kayıtta gerçek anahtar gerekir
+    ctx = {'api_key': api_key or 'replay', 'scenario': scenario}
+    cases = [c for c in CASES if not case_names or c.name in case_names]
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            api_replay.configured(mode=mode, directory=corpus_dir, latency_ms=latency_ms, jitter_ms=jitter_ms, seed=0):
+        isolate_state(workdir, isolate_quota=mode != 'record')
+        if mode == 'record':
+            if not scenario.get('fixture_id'):
+                scenario['fixture_id'] = resolve_fixture_id(ctx['api_key'], scenario)
+            os.makedirs(corpus_dir, exist_ok=True)
+            with open(os.path.join(corpus_dir, SCENARIO_FILE), 'w', encoding='utf-8') as f:
+                json.dump(scenario, f, ensure_ascii=False, indent=2)
+            iterations = 1
+        return [measure(case, ctx, iterations) for case in cases]
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"\n{'Senaryo':<26}{'p50 ms':>10}{'p95 ms':>10}{'API (soğuk/sıcak)':>20}{'miss':>6}")
+    print("-" * 72)
+    for r in results:
+        if 'skipped' in r:
+            print(f"{r['name']:<26}  atlandı: {r['skipped']}")
+            continue
+        calls = f"{r['api_calls_cold']}/{r['api_calls_warm']}"
+        print(f"{r['name']:<26}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{calls:>20}{r['replay_misses']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Uçtan uca gecikme ve API çağrı bütçesi ölçümü')
+    parser.add_argument('--record', action='store_true', help='Canlı API yanıtlarını korpusa kaydet')
+    parser.add_argument('--corpus', default=api_replay.get_config()['directory'], help='Korpus klasörü')
+    parser.add_argument('--iterations', '-n', type=int, default=10, help='Senaryo başına tekrar')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Replay isteği başına gecikme')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Rastgele ek gecikme üst sınırı')
+    parser.add_argument('--latency-budget', action='store_true',
+                        help='p95 bütçesine çağrı başına --latency-ms + --jitter-ms ekle')
+    parser.add_argument('--case', '-c', action='append', help='Sadece bu senaryo(lar)')
+    parser.add_argument('--json', help='Sonuçları JSON olarak yaz')
+    args = parser.parse_args()
+
+    api_key = None
+    if args.record:
+        from precompute_advanced_metrics import load_api_key
+        api_key = load_api_key()
+        if not api_key:
+            return 1
+
+    results = run_suite(args.corpus, 'record' if args.record else 'replay', args.iterations,
+                        args.latency_ms, args.jitter_ms, api_key, args.case)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'budgets': BUDGETS}, f, ensure_ascii=False, indent=2)
+
+    if args.record:
+        print(f"\n💾 Korpus kaydedildi: {args.corpus}")
+        return 0
+
+    extra = args.latency_ms + args.jitter_ms if args.latency_budget else 0.0
+    violations = check_budgets(results, latency_budget_ms=extra)
+    if violations:
+        print("\n❌ Bütçe aşımı:")
+        for violation in violations:
+            print(f"   - {violation}")
+        return 1
+    print("\n✅ Tüm senaryolar bütçe içinde")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -226,9 +226,10 @@ def render_betting_page():
         )
     
     # Tabs
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "🔍 Tek Maç Analizi",
         "📊 Çoklu Bahisçi Karşılaştırma",
+        "🌐 Günün Taraması",
         "🎲 Value Bet Simulator",
         "📈 Bankroll Tracker"
     ])
@@ -241,12 +242,16 @@ def render_betting_page():
     with tab2:
         render_multiple_bookmaker_analysis(bankroll)
     
-    # TAB 3: Simulator
+    # TAB 3: Günün tüm maçları
     with tab3:
-        render_value_bet_simulator(bankroll, kelly_fraction)
+        render_daily_market_scan(min_value, min_ev, kelly_fraction)
     
-    # TAB 4: Bankroll Tracker
+    # TAB 4: Simulator
     with tab4:
+        render_value_bet_simulator(bankroll, kelly_fraction)
+    
+    # TAB 5: Bankroll Tracker
+    with tab5:
         render_bankroll_tracker(bankroll)
 
 
@@ -412,12 +417,14 @@ def render_multiple_bookmaker_analysis(bankroll):
             'away_win': max(all_odds['away_win'])
         }
         
-        # BettingOdds oluştur
-        best_odds = BettingOdds(**best_odds_dict)
+        # Her bahisçi için BettingOdds oluştur
+        odds_list = [
+            BettingOdds(home_win=h, draw=d, away_win=a, bookmaker=f"Bahisçi {i+1}")
+            for i, (h, d, a) in enumerate(zip(all_odds['home_win'], all_odds['draw'], all_odds['away_win']))
+        ]
         
         # Arbitrage analizi
-        detector = ArbitrageDetector()
-        arb_data = detector.detect_arbitrage(best_odds, total_stake=100.0)
+        arb_data = ArbitrageDetector.detect_arbitrage(odds_list)
         
         # Sonuç
         display_arbitrage_opportunity(arb_data)
@@ -441,6 +448,44 @@ def render_multiple_bookmaker_analysis(bankroll):
                      help=f"En düşük: {min(all_odds['away_win']):.2f}")
 
 
+def render_daily_market_scan(min_value, min_ev, kelly_fraction):
+    """Tahmin panosundaki tüm maçlar için value bet / arbitrage taraması"""
+    import pandas as pd
+    import prediction_board
+    
+    st.markdown("### 🌐 Günün Value Bet ve Arbitrage Taraması")
+    board = prediction_board.load_board()
+    if not board:
+        st.info("Bugünün tahmin panosu henüz hazır değil. Pano hesaplandığında tüm maçlar burada taranır.")
+        return
+    
+    scan = prediction_board.scan_markets(board, min_value=min_value / 100, min_ev=min_ev,
+                                         kelly_fraction=kelly_fraction)
+    st.caption(f"Pano güncellemesi: {board.get('updated_at', '-')} • 1X2 oranları, başlamamış maçlar")
+    
+    if scan['value_bets']:
+        st.dataframe(pd.DataFrame([{
+            'Maç': vb['match'],
+            'Bahis': vb['outcome'],
+            'Bahisçi': vb['bookmaker'],
+            'Oran': round(vb['odds'], 2),
+            'Model %': round(vb['true_probability'] * 100, 1),
+            'EV %': round(vb['expected_value'], 1),
+            'Kelly %': round(vb['kelly_stake'], 2),
+            'Risk': vb['risk_level'],
+        } for vb in scan['value_bets']]), hide_index=True, use_container_width=True)
+    else:
+        st.info("Seçilen eşiklerde value bet bulunamadı.")
+    
+    if scan['arbitrage']:
+        st.markdown("#### ⚖️ Arbitrage Fırsatları")
+        st.dataframe(pd.DataFrame([{
+            'Maç': arb['match'],
+            'Market': arb['market'],
+            'Kâr %': round(arb['profit_percentage'], 2),
+        } for arb in scan['arbitrage']]), hide_index=True, use_container_width=True)
+
+
 def render_value_bet_simulator(bankroll, kelly_fraction):
     """Value bet simülasyonu"""
     
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Cache Codec
+===========
+Cache değerleri için takılabilir serileştirme + sıkıştırma katmanı
+
+Blob biçimi (4 bayt başlık + payload):
+    [MAGIC 0xCA][FORMAT_VERSION][serializer id][compression id][payload...]
+
+- Serializer: orjson > msgpack > json (JSON uyumlu veri), pickle (Python nesneleri)
+- Sıkıştırma: zstd > zlib, sadece threshold'dan büyük payload'larda
+- Başlıksız eski kayıtlar (JSON metni / ham pickle) okunmaya devam eder
+
+Opsiyonel bağımlılıklar: orjson, msgpack, zstandard (yoksa stdlib'e düşer)
+"""
+
+import json
+import pickle
+import time
+import zlib
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+
+MAGIC = 0xCA
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+SERIALIZER_IDS = {'json': 0, 'orjson': 1, 'msgpack': 2, 'pickle': 3}
+COMPRESSION_IDS = {'none': 0, 'zlib': 1, 'zstd': 2}
+_SERIALIZER_NAMES = {v: k for k, v in SERIALIZER_IDS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in COMPRESSION_IDS.items()}
+
+
+def _default_serializer() -> str:
+    if ORJSON_AVAILABLE:
+        return 'orjson'
+    if MSGPACK_AVAILABLE:
+        return 'msgpack'
+    return 'json'
+
+
+def _default_compression() -> str:
+    return 'zstd' if ZSTD_AVAILABLE else 'zlib'
+
+
+class CacheCodec:
+    """Cache değerlerini bayt dizisine çevirir ve geri açar"""
+
+    def __init__(self,
+                 serializer: str = 'auto',
+                 compression: str = 'auto',
+                 compress_threshold: int = 1024,
+                 level: Optional[int] = None):
+        """
+        Args:
+            serializer: 'auto', 'orjson', 'msgpack', 'json' veya 'pickle'
+            compression: 'auto', 'zstd', 'zlib' veya 'none'
+            compress_threshold: Bu boyutun (bayt) altındaki payload'lar sıkıştırılmaz
+            level: Sıkıştırma seviyesi (None = zstd 3 / zlib 6)
+        """
+        self.serializer = _default_serializer() if serializer == 'auto' else serializer
+        self.compression = _default_compression() if compression == 'auto' else compression
+        if self.serializer == 'orjson' and not ORJSON_AVAILABLE:
+            raise ValueError("orjson kurulu değil")
+        if self.serializer == 'msgpack' and not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack kurulu değil")
+        if self.compression == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("zstandard kurulu değil")
+
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+
+        self.stats = {
+            'encoded': 0,
+            'compressed': 0,
+            'raw_bytes': 0,
+            'stored_bytes': 0,
+            'decoded': 0,
+            'legacy_decoded': 0,
+            'decode_seconds': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Serileştirme
+    # ------------------------------------------------------------------
+
+    def _dumps(self, value: Any, serializer: str) -> bytes:
+        if serializer == 'orjson':
+            try:
+                return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            except TypeError:
+                # orjson'un desteklemediği tipler: stdlib json ile aynı davranış
+                return json.dumps(value).encode('utf-8')
+        if serializer == 'msgpack':
+            return msgpack.packb(value, use_bin_type=True, strict_types=False)
+        if serializer == 'pickle':
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return json.dumps(value).encode('utf-8')
+
+    @staticmethod
+    def _loads(payload: bytes, serializer: str) -> Any:
+        if serializer == 'orjson':
+            return orjson.loads(payload)
+        if serializer == 'msgpack':
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if serializer == 'pickle':
+            return pickle.loads(payload)
+        return json.loads(payload)
+
+    def _compress(self, payload: bytes, compression: str) -> bytes:
+        if compression == 'zstd':
+            if self._zstd_compressor is None:
+                self._zstd_compressor = zstandard.ZstdCompressor(level=self.level or 3)
+            return self._zstd_compressor.compress(payload)
+        return zlib.compress(payload, self.level or 6)
+
+    def _decompress(self, payload: bytes, compression: str) -> bytes:
+        if compression == 'zstd':
+            if self._zstd_decompressor is None:
+                self._zstd_decompressor = zstandard.ZstdDecompressor()
+            return self._zstd_decompressor.decompress(payload)
+        if compression == 'zlib':
+            return zlib.decompress(payload)
+        return payload
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def encode(self, value: Any) -> bytes:
+        """Değeri başlıklı blob'a çevir"""
+        serializer = self.serializer
+        payload = self._dumps(value, serializer)
+
+        compression = 'none'
+        if self.compression != 'none' and len(payload) >= self.compress_threshold:
+            compressed = self._compress(payload, self.compression)
+            if len(compressed) < len(payload):
+                compression = self.compression
+                self.stats['compressed'] += 1
+                stored = compressed
+            else:
+                stored = payload
+        else:
+            stored = payload
+
+        self.stats['encoded'] += 1
+        self.stats['raw_bytes'] += len(payload)
+        self.stats['stored_bytes'] += len(stored) + HEADER_SIZE
+
+        header = bytes((MAGIC, FORMAT_VERSION, SERIALIZER_IDS[serializer], COMPRESSION_IDS[compression]))
+        return header + stored
+
+    def decode(self, blob: Union[bytes, str], legacy: str = 'json') -> Any:
+        """
+        Blob'u değere çevir
+
+        Args:
+            blob: encode çıktısı veya başlıksız eski kayıt
+            legacy: Başlıksız kayıtların biçimi ('json' veya 'pickle')
+        """
+        start = time.perf_counter()
+        try:
+            if isinstance(blob, str):
+                self.stats['legacy_decoded'] += 1
+                return json.loads(blob)
+
+            blob = bytes(blob)
+            if len(blob) < HEADER_SIZE or blob[0] != MAGIC:
+                self.stats['legacy_decoded'] += 1
+                return pickle.loads(blob) if legacy == 'pickle' else json.loads(blob)
+
+            version = blob[1]
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Desteklenmeyen cache format sürümü: {version}")
+
+            serializer = _SERIALIZER_NAMES[blob[2]]
+            compression = _COMPRESSION_NAMES[blob[3]]
+            payload = self._decompress(blob[HEADER_SIZE:], compression)
+            return self._loads(payload, serializer)
+        finally:
+            self.stats['decoded'] += 1
+            self.stats['decode_seconds'] += time.perf_counter() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sıkıştırma oranı ve decode süresi istatistikleri"""
+        stats = self.stats
+        ratio = (stats['raw_bytes'] / stats['stored_bytes']) if stats['stored_bytes'] else 1.0
+        avg_decode_us = (stats['decode_seconds'] / stats['decoded'] * 1e6) if stats['decoded'] else 0.0
+        return {
+            'serializer': self.serializer,
+            'compression': self.compression,
+            'compress_threshold': self.compress_threshold,
+            'encoded': stats['encoded'],
+            'compressed': stats['compressed'],
+            'raw_bytes': stats['raw_bytes'],
+            'stored_bytes': stats['stored_bytes'],
+            'compression_ratio': round(ratio, 2),
+            'decoded': stats['decoded'],
+            'legacy_decoded': stats['legacy_decoded'],
+            'avg_decode_us': round(avg_decode_us, 1)
+        }
@@ -8,15 +8,105 @@ SQLite tabanlı hızlı cache - API çağrılarını azaltır
 - Future matches: 24 hours
 - Past matches: 7 days
 - Static data (leagues, teams): 30 days
+
+🆕 Tag Invalidation:
+- Kayıtlar anahtar parametrelerinden türetilen etiketlerle (team:645, fixture:123,
+  league:203:2025) indekslenir; invalidate_tags ile sadece bağımlı kayıtlar silinir
+
+🆕 Stale-While-Revalidate:
+- Süresi dolmuş kayıt, kategori bazlı tolerans süresi içinde hemen sunulur
+- Yenileme arka plan worker'ında, en çok okunan (hit_count) kayıtlar önce yapılır
+
+🆕 Binary Payload:
+- Veriler cache_codec ile (orjson/msgpack + zstd/zlib) sıkıştırılmış blob olarak yazılır
+- Eski JSON metin kayıtları okunmaya devam eder
 """
 import sqlite3
 import json
 import time
+import heapq
+import itertools
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Any, Dict, Union
+from typing import Optional, Any, Dict, List, Union, Callable
 import hashlib
 import os
 
+from cache_codec import CacheCodec
+
+
+class RevalidationWorker:
+    """
+    Stale kayıtları arka planda yenileyen öncelikli kuyruk
+    
+    - Öncelik: hit_count (yüksek olan önce)
+    - Aynı anahtar kuyrukta/çalışırken tekrar eklenmez
+    """
+    
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = set()
+        self._active = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self.stats = {'scheduled': 0, 'completed': 0, 'errors': 0}
+    
+    def schedule(self, key: str, refresh: Callable[[], Any], priority: int = 0) -> bool:
+        """Yenileme işi ekle (anahtar zaten bekliyorsa False)"""
+        with self._cond:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            heapq.heappush(self._heap, (-priority, next(self._seq), key, refresh))
+            self.stats['scheduled'] += 1
+            self._ensure_threads()
+            self._cond.notify()
+        return True
+    
+    def _ensure_threads(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._run, name="cache-revalidate", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, key, refresh = heapq.heappop(self._heap)
+                self._active += 1
+            try:
+                refresh()
+                self.stats['completed'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️ Cache yenileme hatası [{key}]: {e}")
+            finally:
+                with self._cond:
+                    self._pending.discard(key)
+                    self._active -= 1
+                    self._cond.notify_all()
+    
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Kuyruk boşalana kadar bekle"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._heap or self._active:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+    
+    def queue_size(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+
 class CacheManager:
     """
     Akıllı cache sistemi - API yanıtlarını önbelleğe alır
@@ -34,9 +124,35 @@ class CacheManager:
     TTL_STATIC_DATA = 2592000        # 30 days - Lig/takım bilgileri
     TTL_DEFAULT = 1800               # 30 minutes - Varsayılan
     
-    def __init__(self, db_path: str = "api_cache.db"):
-        """Cache veritabanını başlat"""
+    # Stale-while-revalidate tolerans süreleri (saniye) - listede olmayan kategori: 0 (kapalı)
+    STALE_GRACE_PERIODS = {
+        'fixture': 120,        # Canlı maç: 30s TTL + 2 dk tolerans
+        'live': 120,
+        'odds': 600,
+        'predictions': 1800,
+        'standings': 3600,
+        'team': 86400,
+        'league': 86400,
+        'injuries': 3600,
+    }
+    
+    def __init__(self, db_path: str = "api_cache.db", stale_grace: Optional[Dict[str, int]] = None,
+                 codec: Optional[CacheCodec] = None):
+        """
+        Cache veritabanını başlat
+        
+        Args:
+            db_path: SQLite dosyası
+            stale_grace: Kategori bazlı stale tolerans süreleri (STALE_GRACE_PERIODS'u ezer)
+            codec: Veri encode/decode katmanı (None = varsayılan CacheCodec)
+        """
         self.db_path = db_path
+        self.codec = codec or CacheCodec()
+        self.stale_grace = dict(self.STALE_GRACE_PERIODS)
+        if stale_grace:
+            self.stale_grace.update(stale_grace)
+        self.revalidator = RevalidationWorker()
+        self.swr_stats = {'stale_served': 0}
         self._init_database()
     
     def _init_database(self):
@@ -67,6 +183,17 @@ class CacheManager:
             )
         """)
         
+        # Etiket indeksi (tag -> cache_key)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_tags (
+                tag TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                PRIMARY KEY (tag, cache_key)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags(cache_key)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_category ON cache(category)")
+        
         conn.commit()
         conn.close()
         
@@ -106,7 +233,7 @@ class CacheManager:
         result = cursor.fetchone()
         
         if result:
-            data_json, expires_at, hit_count = result
+            payload, expires_at, hit_count = result
             
             # Hit count güncelle
             cursor.execute("""
@@ -121,8 +248,8 @@ class CacheManager:
             conn.commit()
             conn.close()
             
-            # JSON'dan objeye çevir
-            data = json.loads(data_json)
+            # Blob'dan (veya eski JSON metninden) objeye çevir
+            data = self.codec.decode(payload)
             
             # Kalan süreyi hesapla
             remaining = int(expires_at - time.time())
@@ -136,7 +263,119 @@ class CacheManager:
             print(f"❌ Cache MISS [{category}] - API çağrısı yapılacak")
             return None
     
-    def set(self, category: str, data: Any, ttl_seconds: int = 1800, **kwargs):
+    def set_stale_grace(self, category: str, seconds: int):
+        """Kategori için stale tolerans süresini ayarla (0 = kapalı)"""
+        self.stale_grace[category] = seconds
+    
+    def get_or_revalidate(self, category: str, refresh: Callable[[], Any], **kwargs) -> Optional[Any]:
+        """
+        Stale-while-revalidate okuma
+        
+        - Taze kayıt: get() ile aynı
+        - Süresi dolmuş ama tolerans içinde: eski veri hemen döner, refresh
+          arka planda (hit_count önceliğiyle) çalıştırılır
+        - Tolerans dışı / yok: None (çağıran kendisi çeker)
+        
+        Args:
+            category: Veri kategorisi
+            refresh: Veriyi çekip cache'e yazan fonksiyon
+            **kwargs: Anahtar parametreleri
+        """
+        grace = self.stale_grace.get(category, 0)
+        if grace <= 0:
+            return self.get(category, **kwargs)
+        
+        cache_key = self._generate_key(category, **kwargs)
+        now = time.time()
+        
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT data, expires_at, hit_count
+            FROM cache
+            WHERE cache_key = ? AND expires_at + ? > ?
+        """, (cache_key, grace, now))
+        result = cursor.fetchone()
+        
+        if not result:
+            conn.close()
+            self._update_stats('miss')
+            print(f"❌ Cache MISS [{category}] - API çağrısı yapılacak")
+            return None
+        
+        payload, expires_at, hit_count = result
+        cursor.execute("UPDATE cache SET hit_count = hit_count + 1 WHERE cache_key = ?", (cache_key,))
+        self._update_stats('hit', conn)
+        conn.commit()
+        conn.close()
+        
+        if expires_at > now:
+            print(f"🎯 Cache HIT [{category}] - Kalan süre: {int(expires_at - now)}s")
+        else:
+            self.swr_stats['stale_served'] += 1
+            self.revalidator.schedule(cache_key, refresh, priority=hit_count + 1)
+            print(f"♻️ Cache STALE [{category}] - {int(now - expires_at)}s eski, arka planda yenileniyor")
+        
+        return self.codec.decode(payload)
+    
+    def peek(self, category: str, **kwargs) -> Optional[Any]:
+        """
+        Cache'e sessizce bak - hit_count ve istatistikler güncellenmez
+        
+        Single-flight bekleyicileri gibi sık yoklama yapan yerler için.
+        """
+        cache_key = self._generate_key(category, **kwargs)
+        
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            result = conn.execute("""
+                SELECT data FROM cache WHERE cache_key = ? AND expires_at > ?
+            """, (cache_key, time.time())).fetchone()
+        finally:
+            conn.close()
+        
+        return self.codec.decode(result[0]) if result else None
+    
+    @staticmethod
+    def derive_tags(**kwargs) -> List[str]:
+        """
+        Anahtar parametrelerinden etiket türet
+        
+        team_id/team/home_team_id/away_team_id -> team:<id>, fixture_id/fixture -> fixture:<id>,
+        league_id/league (+season) -> league:<id> ve league:<id>:<season>
+        """
+        tags = []
+        for param in ('team_id', 'team', 'home_team_id', 'away_team_id', 'team1_id', 'team2_id'):
+            if kwargs.get(param) is not None:
+                tags.append(f"team:{kwargs[param]}")
+        for param in ('fixture_id', 'fixture'):
+            if kwargs.get(param) is not None:
+                tags.append(f"fixture:{kwargs[param]}")
+        league = kwargs.get('league_id', kwargs.get('league'))
+        if league is not None:
+            tags.append(f"league:{league}")
+            if kwargs.get('season') is not None:
+                tags.append(f"league:{league}:{kwargs['season']}")
+        return tags
+    
+    @staticmethod
+    def tags_for_fixture(fixture: Dict) -> List[str]:
+        """Biten bir API fixture'ı için geçersiz kılınacak etiketler"""
+        tags = []
+        fixture_id = fixture.get('fixture', {}).get('id')
+        if fixture_id is not None:
+            tags.append(f"fixture:{fixture_id}")
+        for side in ('home', 'away'):
+            team_id = fixture.get('teams', {}).get(side, {}).get('id')
+            if team_id is not None:
+                tags.append(f"team:{team_id}")
+        league = fixture.get('league', {})
+        if league.get('id') is not None and league.get('season') is not None:
+            tags.append(f"league:{league['id']}:{league['season']}")
+        return tags
+    
+    def set(self, category: str, data: Any, ttl_seconds: int = 1800,
+            tags: Optional[List[str]] = None, **kwargs):
         """
         Cache'e veri kaydet
         
@@ -144,10 +383,12 @@ class CacheManager:
             category: Veri kategorisi
             data: Kaydedilecek veri
             ttl_seconds: Yaşam süresi (saniye)
+            tags: Ek etiketler (anahtar parametrelerinden türetilenlere eklenir)
             **kwargs: Anahtar parametreleri
         """
         cache_key = self._generate_key(category, **kwargs)
-        data_json = json.dumps(data)
+        all_tags = set(self.derive_tags(**kwargs)) | set(tags or [])
+        payload = self.codec.encode(data)
         
         now = time.time()
         expires_at = now + ttl_seconds
@@ -160,7 +401,13 @@ class CacheManager:
             INSERT OR REPLACE INTO cache 
             (cache_key, data, category, created_at, expires_at, hit_count)
             VALUES (?, ?, ?, ?, ?, 0)
-        """, (cache_key, data_json, category, now, expires_at))
+        """, (cache_key, payload, category, now, expires_at))
+        
+        cursor.execute("DELETE FROM cache_tags WHERE cache_key = ?", (cache_key,))
+        if all_tags:
+            cursor.executemany("""
+                INSERT OR IGNORE INTO cache_tags (tag, cache_key) VALUES (?, ?)
+            """, [(tag, cache_key) for tag in all_tags])
         
         conn.commit()
         conn.close()
@@ -257,6 +504,7 @@ class CacheManager:
         data: Any, 
         fixture_status: Optional[str] = None,
         fixture_date: Optional[Union[str, datetime]] = None,
+        tags: Optional[List[str]] = None,
         **kwargs
     ):
         """
@@ -267,6 +515,7 @@ class CacheManager:
             data: Kaydedilecek veri
             fixture_status: Maç durumu (optional)
             fixture_date: Maç tarihi (optional)
+            tags: Ek etiketler (optional)
             **kwargs: Anahtar parametreleri
         
         Example:
@@ -282,7 +531,7 @@ class CacheManager:
             **kwargs
         )
         
-        self.set(category, data, ttl_seconds=ttl, **kwargs)
+        self.set(category, data, ttl_seconds=ttl, tags=tags, **kwargs)
         
         # Log TTL reason
         if fixture_status in ['1H', '2H', 'ET', 'P', 'LIVE', 'HT']:
@@ -331,15 +580,26 @@ class CacheManager:
             conn.close()
     
     def clear_expired(self):
-        """Süresi dolmuş cache'leri temizle"""
+        """Süresi dolmuş cache'leri temizle (stale tolerans süresindekiler korunur)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        now = time.time()
         
-        cursor.execute("""
-            DELETE FROM cache WHERE expires_at < ?
-        """, (time.time(),))
-        
+        graced = {c: g for c, g in self.stale_grace.items() if g > 0}
+        placeholders = ','.join('?' * len(graced))
+        cursor.execute(f"""
+            DELETE FROM cache WHERE expires_at < ? AND category NOT IN ({placeholders})
+        """, (now, *graced))
         deleted = cursor.rowcount
+        
+        for category, grace in graced.items():
+            cursor.execute("""
+                DELETE FROM cache WHERE category = ? AND expires_at + ? < ?
+            """, (category, grace, now))
+            deleted += cursor.rowcount
+        
+        if deleted:
+            self._prune_tags(cursor)
         conn.commit()
         conn.close()
         
@@ -348,6 +608,72 @@ class CacheManager:
         
         return deleted
     
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        Etiketlere bağlı tüm kayıtları sil (etiket indeksi üzerinden)
+        
+        Example:
+            >>> cache.invalidate_tags(CacheManager.tags_for_fixture(finished_fixture))
+        """
+        if not tags:
+            return 0
+        
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(tags))
+        
+        cursor.execute(f"""
+            DELETE FROM cache WHERE cache_key IN (
+                SELECT cache_key FROM cache_tags WHERE tag IN ({placeholders})
+            )
+        """, tuple(tags))
+        deleted = cursor.rowcount
+        
+        cursor.execute(f"""
+            DELETE FROM cache_tags WHERE cache_key IN (
+                SELECT cache_key FROM cache_tags WHERE tag IN ({placeholders})
+            )
+        """, tuple(tags))
+        
+        conn.commit()
+        conn.close()
+        
+        print(f"🏷️ {', '.join(tags)} etiketlerinden {deleted} cache silindi")
+        return deleted
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Tek etikete bağlı kayıtları sil"""
+        return self.invalidate_tags([tag])
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        Kategorisi prefix ile başlayan kayıtları sil (örn. 'fixture' ->
+        fixture, fixture_events, fixture_odds). Kategori indeksinde aralık sorgusu.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        cursor = conn.cursor()
+        upper = prefix + '\uffff'
+        
+        cursor.execute("""
+            DELETE FROM cache_tags WHERE cache_key IN (
+                SELECT cache_key FROM cache WHERE category >= ? AND category < ?
+            )
+        """, (prefix, upper))
+        cursor.execute("DELETE FROM cache WHERE category >= ? AND category < ?", (prefix, upper))
+        deleted = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        
+        print(f"🧹 '{prefix}*' kategorilerinden {deleted} cache silindi")
+        return deleted
+    
+    def _prune_tags(self, cursor):
+        """Silinmiş kayıtlara ait etiket satırlarını temizle"""
+        cursor.execute("""
+            DELETE FROM cache_tags WHERE cache_key NOT IN (SELECT cache_key FROM cache)
+        """)
+    
     def clear_category(self, category: str):
         """Belirli bir kategorideki tüm cache'leri temizle"""
         conn = sqlite3.connect(self.db_path)
@@ -356,6 +682,7 @@ class CacheManager:
         cursor.execute("DELETE FROM cache WHERE category = ?", (category,))
         
         deleted = cursor.rowcount
+        self._prune_tags(cursor)
         conn.commit()
         conn.close()
         
@@ -370,6 +697,7 @@ class CacheManager:
         cursor.execute("DELETE FROM cache")
         
         deleted = cursor.rowcount
+        cursor.execute("DELETE FROM cache_tags")
         conn.commit()
         conn.close()
         
@@ -426,7 +754,15 @@ class CacheManager:
             'cache': {
                 'total_active': total_active,
                 'by_category': by_category
-            }
+            },
+            'revalidation': {
+                'stale_served': self.swr_stats['stale_served'],
+                'scheduled': self.revalidator.stats['scheduled'],
+                'completed': self.revalidator.stats['completed'],
+                'errors': self.revalidator.stats['errors'],
+                'queued': self.revalidator.queue_size()
+            },
+            'codec': self.codec.get_stats()
         }
     
     def print_stats(self):
@@ -451,6 +787,15 @@ class CacheManager:
             for category, count in stats['cache']['by_category'].items():
                 print(f"    • {category}: {count} kayıt")
         
+        print(f"\n♻️ STALE-WHILE-REVALIDATE:")
+        print(f"  📤 Stale sunulan: {stats['revalidation']['stale_served']}")
+        print(f"  🔄 Yenilenen: {stats['revalidation']['completed']}/{stats['revalidation']['scheduled']}")
+        
+        codec = stats['codec']
+        print(f"\n🗜️ PAYLOAD ({codec['serializer']} + {codec['compression']}):")
+        print(f"  📉 Sıkıştırma oranı: {codec['compression_ratio']}x ({codec['raw_bytes']} → {codec['stored_bytes']} bayt)")
+        print(f"  ⏱️ Ortalama decode: {codec['avg_decode_us']} µs")
+        
         print("\n" + "="*60)
 
 
@@ -426,8 +426,8 @@ async def comprehensive_match_analysis(home_team: str, away_team: str) -> Dict[s
             raise Exception("Analysis returned None")
         
         # H2H verilerini al
-        h2h_matches, h2h_error = api_utils.get_h2h_matches(api_key, base_url, home_team_id, away_team_id, 10)
-        h2h_data = analysis_logic.process_h2h_data(h2h_matches, home_team_id) if h2h_matches else None
+        h2h_data = analysis_logic.get_h2h_summary(api_key, base_url, home_team_id, away_team_id, 10,
+                                                  league_info=league_info)
         
         # Takım istatistiklerini al
         home_stats = analysis_logic.calculate_general_stats_v2(api_key, base_url, home_team_id, league_info['league_id'], league_info['season'], skip_api_limit=True)
@@ -5,9 +5,11 @@ Ana sistem için optimize edilmiş veri çekme
 import asyncio
 import aiohttp
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Tuple
 from cache_manager import get_cache
 from parallel_api import ParallelAPIClient
+from single_flight import get_single_flight, SQLiteLockStore
 
 
 class DataFetcher:
@@ -18,6 +20,21 @@ class DataFetcher:
     def __init__(self):
         self.cache = get_cache()
         self.api_client = ParallelAPIClient()
+        self.lock_store = SQLiteLockStore(self.cache.db_path)
+    
+    def _fetch_coalesced(self, category: str, cache_key: str, fetch):
+        """
+        Cache miss'te fetch'i single-flight ile çalıştır
+        
+        Aynı anahtar için eşzamanlı oturumlar (thread veya süreç) tek API
+        çağrısının sonucunu paylaşır; fetch sonucu cache'e yazmalıdır.
+        """
+        return get_single_flight().do(
+            f"{category}:{cache_key}",
+            fetch,
+            cache_lookup=lambda: self.cache.peek(category, key=cache_key),
+            lock_store=self.lock_store
+        )
     
     async def _fetch_all_team_data_async(self, session: aiohttp.ClientSession,
                                          team_id: int, league_id: int, 
@@ -49,18 +66,22 @@ class DataFetcher:
                     session, team_id, league_id, season
                 )
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            data = loop.run_until_complete(fetch())
+        def fetch_and_store():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
             
-            # Cache'e kaydet (30 dakika)
-            self.cache.set('team_data', data, 1800, key=cache_key)
-            
-            return data
-        finally:
-            loop.close()
+            try:
+                data = loop.run_until_complete(fetch())
+                
+                # Cache'e kaydet (30 dakika)
+                self.cache.set('team_data', data, 1800,
+                               tags=[f"team:{team_id}", f"league:{league_id}:{season}"], key=cache_key)
+                
+                return data
+            finally:
+                loop.close()
+        
+        return self._fetch_coalesced('team_data', cache_key, fetch_and_store)
     
     def get_match_analysis_data(self, team1_id: int, team2_id: int,
                                 league_id: int = 203, season: int = 2025) -> Dict:
@@ -76,58 +97,63 @@ class DataFetcher:
             print(f"🎯 Maç verileri cache'den alındı")
             return cached
         
-        print(f"🔄 Maç verileri API'den çekiliyor (PARALEL)...")
-        start = time.time()
-        
-        # Paralel veri çekimi
-        async def fetch_all():
-            async with aiohttp.ClientSession(
-                headers=self.api_client.headers
-            ) as session:
-                # 4 ana veri grubu paralel
-                tasks = [
-                    self._fetch_all_team_data_async(
-                        session, team1_id, league_id, season
-                    ),
-                    self._fetch_all_team_data_async(
-                        session, team2_id, league_id, season
-                    ),
-                    self.api_client.fetch(session, 'fixtures/headtohead', {
-                        'h2h': f'{team1_id}-{team2_id}',
-                        'last': 10
-                    }),
-                    self.api_client.fetch(session, 'fixtures', {
-                        'league': league_id,
-                        'season': season,
-                        'last': 50
-                    })
-                ]
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                return {
-                    'team1': results[0] if not isinstance(results[0], Exception) else None,
-                    'team2': results[1] if not isinstance(results[1], Exception) else None,
-                    'h2h': results[2] if not isinstance(results[2], Exception) else None,
-                    'league_fixtures': results[3] if not isinstance(results[3], Exception) else None
-                }
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            data = loop.run_until_complete(fetch_all())
-            elapsed = time.time() - start
+        def fetch_and_store():
+            print(f"🔄 Maç verileri API'den çekiliyor (PARALEL)...")
+            start = time.time()
             
-            print(f"✅ Paralel veri çekimi tamamlandı: {elapsed:.2f}s")
+            # Paralel veri çekimi
+            async def fetch_all():
+                async with aiohttp.ClientSession(
+                    headers=self.api_client.headers
+                ) as session:
+                    # 4 ana veri grubu paralel
+                    tasks = [
+                        self._fetch_all_team_data_async(
+                            session, team1_id, league_id, season
+                        ),
+                        self._fetch_all_team_data_async(
+                            session, team2_id, league_id, season
+                        ),
+                        self.api_client.fetch(session, 'fixtures/headtohead', {
+                            'h2h': f'{team1_id}-{team2_id}',
+                            'last': 10
+                        }),
+                        self.api_client.fetch(session, 'fixtures', {
+                            'league': league_id,
+                            'season': season,
+                            'last': 50
+                        })
+                    ]
+                    
+                    results = await asyncio.gather(*tasks, return_exceptions=True)
+                    
+                    return {
+                        'team1': results[0] if not isinstance(results[0], Exception) else None,
+                        'team2': results[1] if not isinstance(results[1], Exception) else None,
+                        'h2h': results[2] if not isinstance(results[2], Exception) else None,
+                        'league_fixtures': results[3] if not isinstance(results[3], Exception) else None
+                    }
             
-            # Cache'e kaydet (30 dakika)
-            self.cache.set('match_analysis', data, 1800, key=cache_key)
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
             
-            return data
+            try:
+                data = loop.run_until_complete(fetch_all())
+                elapsed = time.time() - start
+                
+                print(f"✅ Paralel veri çekimi tamamlandı: {elapsed:.2f}s")
+                
+                # Cache'e kaydet (30 dakika)
+                self.cache.set('match_analysis', data, 1800,
+                               tags=[f"team:{team1_id}", f"team:{team2_id}", f"league:{league_id}:{season}"],
+                               key=cache_key)
+                
+                return data
             
-        finally:
-            loop.close()
+            finally:
+                loop.close()
+        
+        return self._fetch_coalesced('match_analysis', cache_key, fetch_and_store)
     
     def fetch_teams_parallel(self, team_names: list) -> tuple:
         """
@@ -143,12 +169,13 @@ class DataFetcher:
         
         print(f"📡 {len(team_names)} takım verisi paralel çekiliyor...")
         
-        # Her takım için veri çek (senkron API fonksiyonunu kullan)
-        results = []
-        for team_name in team_names:
+        def fetch_one(team_name):
             print(f"   🔄 {team_name}...")
-            team_data = get_complete_team_data(team_name)
-            results.append(team_data)
+            return get_complete_team_data(team_name)
+        
+        # Senkron API fonksiyonu - her takım kendi thread'inde, sıra korunur
+        with ThreadPoolExecutor(max_workers=max(1, min(len(team_names), 8))) as executor:
+            results = list(executor.map(fetch_one, team_names))
         
         print(f"✅ {len(results)} takım verisi alındı")
         return tuple(results)
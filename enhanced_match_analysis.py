@@ -17,11 +17,12 @@ except ImportError:
 
 # Import advanced metrics manager
 try:
-    from advanced_metrics_manager import AdvancedMetricsManager
+    from advanced_metrics_manager import AdvancedMetricsManager, build_team_stats_from_location
     ADVANCED_METRICS_AVAILABLE = True
 except ImportError:
     ADVANCED_METRICS_AVAILABLE = False
     AdvancedMetricsManager = None
+    build_team_stats_from_location = None
 
 
 def get_enhanced_match_analysis(
@@ -113,7 +114,8 @@ def get_enhanced_match_analysis(
             
             # Get recent matches for form analysis - GERÇEK API VERİSİ
             import api_utils
-            from fixture_parser import parse_fixtures_to_matches, get_opponent_strengths_from_api
+            from fixture_parser import parse_fixtures_to_matches
+            from opponent_strength import get_opponent_strength_service
             
             print(f"📡 {home_team_name} için son maçlar çekiliyor...")
             home_recent_response, home_error = api_utils.make_api_request(
@@ -149,32 +151,14 @@ def get_enhanced_match_analysis(
             else:
                 print(f"⚠️ {away_team_name} fixtures hatası: {away_error}")
             
-            # Prepare data for advanced analysis
-            home_team_stats_dict = {
-                'shots_on_target': 5,  # TODO: API coverage expansion
-                'total_shots': 12,
-                'goals_scored': home_loc_stats.get('Ort. Gol ATILAN', 1.5),
-                'goals_conceded': home_loc_stats.get('Ort. Gol YENEN', 1.2),
-                'possession': 50,  # TODO
-                'total_passes': 450,  # TODO
-                'key_passes': 10,  # TODO
-                'assists': 1,  # TODO
-                'matches_played': 10,
-                'stability_score': home_loc_stats.get('Istikrar_Puani', 50.0)
-            }
+            # Rakip gücü: lig puan durumundan (lig başına günde tek istek)
+            strength_service = get_opponent_strength_service()
+            strength_service.annotate_matches(api_key, base_url, home_recent, league_id, season)
+            strength_service.annotate_matches(api_key, base_url, away_recent, league_id, season)
             
-            away_team_stats_dict = {
-                'shots_on_target': 5,
-                'total_shots': 12,
-                'goals_scored': away_loc_stats.get('Ort. Gol ATILAN', 1.5),
-                'goals_conceded': away_loc_stats.get('Ort. Gol YENEN', 1.2),
-                'possession': 50,
-                'total_passes': 450,
-                'key_passes': 10,
-                'assists': 1,
-                'matches_played': 10,
-                'stability_score': away_loc_stats.get('Istikrar_Puani', 45.0)
-            }
+            # Prepare data for advanced analysis
+            home_team_stats_dict = build_team_stats_from_location(home_loc_stats, stability_default=50.0)
+            away_team_stats_dict = build_team_stats_from_location(away_loc_stats, stability_default=45.0)
             
             # Home team advanced analysis
             home_advanced = metrics_manager.get_comprehensive_team_analysis(
@@ -183,8 +167,10 @@ def get_enhanced_match_analysis(
                 league_id=league_id,
                 team_stats=home_team_stats_dict,
                 opponent_stats=away_team_stats_dict,
+                opponent_id=away_team_id,
                 recent_matches=home_recent,
-                is_home=True
+                is_home=True,
+                season=season
             )
             
             # Away team advanced analysis
@@ -194,8 +180,10 @@ def get_enhanced_match_analysis(
                 league_id=league_id,
                 team_stats=away_team_stats_dict,
                 opponent_stats=home_team_stats_dict,
+                opponent_id=home_team_id,
                 recent_matches=away_recent,
-                is_home=False
+                is_home=False,
+                season=season
             )
             
             # Match prediction with advanced metrics
@@ -35,6 +35,8 @@ warnings.filterwarnings('ignore')
 
 # Feature engineering
 from feature_engineer import FeatureEngineer, FeatureNormalizer
+from parallel_trainer import TrainingOrchestrator, format_profile
+from ensemble_manager import get_online_ensemble
 
 print("[OK] Enhanced ML Predictor Module Loaded")
 
@@ -44,12 +46,30 @@ class EnhancedMLPredictor:
     Main ML prediction class with 5 models
     """
     
-    def __init__(self, model_dir: str = "models"):
+    # Model name → attribute / (log label, results key prefix)
+    MODEL_ATTRS = {
+        'xgboost': 'xgb_model',
+        'random_forest': 'rf_model',
+        'neural_network': 'nn_model',
+        'logistic': 'lr_model',
+        'poisson': 'poisson_model'
+    }
+    MODEL_LABELS = {
+        'xgboost': ('XGBoost', 'xgboost'),
+        'random_forest': ('RandomForest', 'rf'),
+        'neural_network': ('Neural Network', 'nn'),
+        'logistic': ('Logistic', 'lr'),
+        'poisson': ('Poisson', 'poisson')
+    }
+    
+    def __init__(self, model_dir: str = "models", online: Optional[Any] = None):
         """
         Initialize predictor
         
         Args:
             model_dir: Directory to save/load models
+            online: OnlineEnsemble for prediction weights / calibration
+                (None = global engine, False = fixed self.weights)
         """
         self.model_dir = model_dir
         os.makedirs(model_dir, exist_ok=True)
@@ -65,7 +85,10 @@ class EnhancedMLPredictor:
         self.lr_model = None
         self.poisson_model = None
         
-        # Model weights for ensemble
+        # Settled results keep these weights / calibration current
+        self.online = get_online_ensemble() if online is None else (online or None)
+        
+        # Model weights for ensemble (training validation, fallback)
         self.weights = {
             'xgboost': 0.35,
             'random_forest': 0.25,
@@ -77,6 +100,9 @@ class EnhancedMLPredictor:
         # Scaler for features
         self.scaler = StandardScaler()
         
+        # Last train_all_models run: model → wall_time / peak_memory_mb
+        self.training_profile = {}
+        
         print(f"[OK] Enhanced ML Predictor initialized")
         print(f"     Models: XGBoost (35%), RandomForest (25%), Neural (20%), Logistic (10%), Poisson (10%)")
     
@@ -188,19 +214,22 @@ class EnhancedMLPredictor:
         X_train: np.ndarray,
         y_train: np.ndarray,
         X_val: Optional[np.ndarray] = None,
-        y_val: Optional[np.ndarray] = None
+        y_val: Optional[np.ndarray] = None,
+        n_workers: Optional[int] = None
     ) -> Dict[str, float]:
         """
-        Train all 5 models
+        Train all 5 models (concurrently, see parallel_trainer)
         
         Args:
             X_train: Training features (n_samples, 86)
             y_train: Training labels (0=Away Win, 1=Draw, 2=Home Win)
             X_val: Validation features (optional)
             y_val: Validation labels (optional)
+            n_workers: Concurrent model fits (None = host cores, 1 = sequential)
             
         Returns:
             Dictionary with training scores
+            (per-model wall time / peak memory in self.training_profile)
         """
         print("\n" + "="*80)
         print("TRAINING ALL MODELS")
@@ -210,78 +239,41 @@ class EnhancedMLPredictor:
         
         # Scale features
         X_train_scaled = self.scaler.fit_transform(X_train)
-        if X_val is not None:
-            X_val_scaled = self.scaler.transform(X_val)
-        
-        # 1. Train XGBoost
-        print("\n[1/5] Training XGBoost...")
-        self.xgb_model = self._create_xgboost_model()
-        self.xgb_model.fit(X_train_scaled, y_train)
-        train_acc = accuracy_score(y_train, self.xgb_model.predict(X_train_scaled))
-        print(f"      XGBoost Training Accuracy: {train_acc:.3f}")
-        results['xgboost_train'] = train_acc
-        
-        if X_val is not None:
-            val_acc = accuracy_score(y_val, self.xgb_model.predict(X_val_scaled))
-            print(f"      XGBoost Validation Accuracy: {val_acc:.3f}")
-            results['xgboost_val'] = val_acc
-        
-        # 2. Train Random Forest
-        print("\n[2/5] Training Random Forest...")
-        self.rf_model = self._create_random_forest_model()
-        self.rf_model.fit(X_train_scaled, y_train)
-        train_acc = accuracy_score(y_train, self.rf_model.predict(X_train_scaled))
-        print(f"      RandomForest Training Accuracy: {train_acc:.3f}")
-        results['rf_train'] = train_acc
-        
-        if X_val is not None:
-            val_acc = accuracy_score(y_val, self.rf_model.predict(X_val_scaled))
-            print(f"      RandomForest Validation Accuracy: {val_acc:.3f}")
-            results['rf_val'] = val_acc
-        
-        # 3. Train Neural Network
-        print("\n[3/5] Training Neural Network...")
-        self.nn_model = self._create_neural_network_model()
-        self.nn_model.fit(X_train_scaled, y_train)
-        train_acc = accuracy_score(y_train, self.nn_model.predict(X_train_scaled))
-        print(f"      Neural Network Training Accuracy: {train_acc:.3f}")
-        results['nn_train'] = train_acc
-        
-        if X_val is not None:
-            val_acc = accuracy_score(y_val, self.nn_model.predict(X_val_scaled))
-            print(f"      Neural Network Validation Accuracy: {val_acc:.3f}")
-            results['nn_val'] = val_acc
-        
-        # 4. Train Logistic Regression
-        print("\n[4/5] Training Logistic Regression...")
-        self.lr_model = self._create_logistic_model()
-        self.lr_model.fit(X_train_scaled, y_train)
-        train_acc = accuracy_score(y_train, self.lr_model.predict(X_train_scaled))
-        print(f"      Logistic Training Accuracy: {train_acc:.3f}")
-        results['lr_train'] = train_acc
-        
-        if X_val is not None:
-            val_acc = accuracy_score(y_val, self.lr_model.predict(X_val_scaled))
-            print(f"      Logistic Validation Accuracy: {val_acc:.3f}")
-            results['lr_val'] = val_acc
-        
-        # 5. Train Poisson Model
-        print("\n[5/5] Training Poisson Model...")
-        self.poisson_model = self._create_poisson_model()
-        self.poisson_model.fit(X_train_scaled, y_train)
-        train_acc = accuracy_score(y_train, self.poisson_model.predict(X_train_scaled))
-        print(f"      Poisson Training Accuracy: {train_acc:.3f}")
-        results['poisson_train'] = train_acc
-        
-        if X_val is not None:
-            val_acc = accuracy_score(y_val, self.poisson_model.predict(X_val_scaled))
-            print(f"      Poisson Validation Accuracy: {val_acc:.3f}")
-            results['poisson_val'] = val_acc
+        X_val_scaled = self.scaler.transform(X_val) if X_val is not None else None
+        
+        # Independent models → fitted concurrently (shared-memory matrices)
+        models = {
+            'xgboost': self._create_xgboost_model(),
+            'random_forest': self._create_random_forest_model(),
+            'neural_network': self._create_neural_network_model(),
+            'logistic': self._create_logistic_model(),
+            'poisson': self._create_poisson_model()
+        }
+        orchestrator = TrainingOrchestrator(n_workers=n_workers)
+        print(f"\n[TRAINING] Training {len(models)} models ({min(orchestrator.n_workers, len(models))} parallel)...")
+        fitted = orchestrator.fit_all(models, X_train_scaled, y_train, X_val_scaled, y_val)
+        
+        for name, fit in fitted.items():
+            setattr(self, self.MODEL_ATTRS[name], fit.model)
+            label, key = self.MODEL_LABELS[name]
+            print(f"      {label} Training Accuracy: {fit.train_acc:.3f}")
+            results[f'{key}_train'] = fit.train_acc
+            if fit.val_acc is not None:
+                print(f"      {label} Validation Accuracy: {fit.val_acc:.3f}")
+                results[f'{key}_val'] = fit.val_acc
+        
+        self.training_profile = {
+            name: {'wall_time': fit.wall_time, 'peak_memory_mb': fit.peak_memory_mb}
+            for name, fit in fitted.items()
+        }
+        print("\n[PROFILE] Per-model wall time / peak memory:")
+        print(format_profile(fitted))
         
-        # Ensemble prediction
+        # Ensemble prediction (validation probabilities from the workers)
         if X_val is not None:
             print("\n[ENSEMBLE] Calculating weighted ensemble...")
-            ensemble_acc = self._calculate_ensemble_accuracy(X_val_scaled, y_val)
+            ensemble_proba = sum(fit.val_proba * self.weights[name] for name, fit in fitted.items())
+            ensemble_acc = accuracy_score(y_val, np.argmax(ensemble_proba, axis=1))
             print(f"           Ensemble Validation Accuracy: {ensemble_acc:.3f}")
             results['ensemble_val'] = ensemble_acc
         
@@ -302,6 +294,14 @@ class EnhancedMLPredictor:
     
     # ========== PREDICTION ==========
     
+    def predict_models(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-model probabilities {model_name: (n_samples, 3)}"""
+        X_scaled = self.scaler.transform(X)
+        return {
+            name: getattr(self, attr).predict_proba(X_scaled)
+            for name, attr in self.MODEL_ATTRS.items()
+        }
+    
     def predict_ensemble(
         self,
         X: np.ndarray,
@@ -317,17 +317,14 @@ class EnhancedMLPredictor:
         Returns:
             Predictions (0=Away, 1=Draw, 2=Home) or probabilities
         """
-        X_scaled = self.scaler.transform(X)
-        
-        # Get probabilities from each model
-        xgb_proba = self.xgb_model.predict_proba(X_scaled) * self.weights['xgboost']
-        rf_proba = self.rf_model.predict_proba(X_scaled) * self.weights['random_forest']
-        nn_proba = self.nn_model.predict_proba(X_scaled) * self.weights['neural_network']
-        lr_proba = self.lr_model.predict_proba(X_scaled) * self.weights['logistic']
-        poisson_proba = self.poisson_model.predict_proba(X_scaled) * self.weights['poisson']
+        model_proba = self.predict_models(X)
         
-        # Weighted average
-        ensemble_proba = xgb_proba + rf_proba + nn_proba + lr_proba + poisson_proba
+        if self.online is not None:
+            # Online weights and running calibration from settled results
+            ensemble_proba = self.online.combine(model_proba)
+        else:
+            # Weighted average
+            ensemble_proba = sum(proba * self.weights[name] for name, proba in model_proba.items())
         
         if return_probabilities:
             return ensemble_proba
@@ -416,14 +413,8 @@ class EnhancedMLPredictor:
         prediction = np.argmax(probabilities)
         
         # Get individual model votes
-        X_scaled = self.scaler.transform(X)
-        model_votes = {
-            'xgboost': np.argmax(self.xgb_model.predict_proba(X_scaled)[0]),
-            'random_forest': np.argmax(self.rf_model.predict_proba(X_scaled)[0]),
-            'neural_network': np.argmax(self.nn_model.predict_proba(X_scaled)[0]),
-            'logistic': np.argmax(self.lr_model.predict_proba(X_scaled)[0]),
-            'poisson': np.argmax(self.poisson_model.predict_proba(X_scaled)[0])
-        }
+        model_proba = {name: proba[0] for name, proba in self.predict_models(X).items()}
+        model_votes = {name: np.argmax(proba) for name, proba in model_proba.items()}
         
         # Convert to readable format
         outcome_map = {0: 'Away Win', 1: 'Draw', 2: 'Home Win'}
@@ -438,6 +429,8 @@ class EnhancedMLPredictor:
             },
             'confidence': float(np.max(probabilities)),
             'model_votes': {k: outcome_map[v] for k, v in model_votes.items()},
+            # [away, draw, home] per model (settlement, see OnlineEnsemble.log_predictions)
+            'model_probabilities': {k: v.tolist() for k, v in model_proba.items()},
             'feature_count': len(all_features)  # Should be 90
         }
         
@@ -7,19 +7,476 @@ Advanced ensemble techniques for ML model combination:
 - Dynamic weight adjustment based on performance
 - Probability calibration
 - Prediction confidence scoring
+- Online weights / calibration: every settled match updates exponentially
+  weighted log-loss / Brier, ring-buffer window metrics and running Platt
+  parameters in O(1), without batch recomputation or retraining
+- Settlement from per-model probabilities stored in the prediction ledger
+  before kick-off (OnlineEnsemble.log_predictions / settle_from_ledger)
+- Shared state file: readers reload it when another process (settlement
+  cron, API) replaced it; writes merge settled fixtures under a file lock
 
 Author: AI Football Analytics
 Date: 4 Kasım 2025
 """
 
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Optional, Any, Union
 from sklearn.calibration import CalibratedClassifierCV
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: no cross-process lock, atomic replace only
+    FCNTL_AVAILABLE = False
+
 print("[OK] Ensemble Manager Module Loaded")
 
+DEFAULT_WEIGHTS = {
+    'xgboost': 0.35,
+    'random_forest': 0.25,
+    'neural_network': 0.20,
+    'logistic': 0.10,
+    'poisson': 0.10
+}
+# Temperature applied before any result has settled (previous fixed calibration)
+DEFAULT_TEMPERATURE = 1.5
+# performance_history entries kept per model
+HISTORY_LIMIT = 500
+ONLINE_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'online_ensemble.json')
+# Prediction ledger rows holding per-model probabilities (model_name = model)
+LEDGER_MODEL_VERSION = 'online_ensemble'
+# Settlement looks back this far for finished fixtures (seconds)
+SETTLE_LOOKBACK = 30 * 86400
+
+_EPS = 1e-12
+
+
+class RunningPlatt:
+    """
+    Multiclass Platt / temperature scaling updated by one SGD step per result
+    
+    calibrated = softmax(a * log(p) + b); a=1/T, b=0 → plain temperature scaling
+    """
+    
+    def __init__(self, a: float = 1.0, b: Optional[List[float]] = None, learning_rate: float = 0.02):
+        self.a = float(a)
+        self.b = np.zeros(3) if b is None else np.asarray(b, dtype=float)
+        self.learning_rate = learning_rate
+    
+    def _logits(self, probabilities: np.ndarray) -> np.ndarray:
+        return self.a * np.log(np.clip(probabilities, _EPS, 1.0)) + self.b
+    
+    def transform(self, probabilities: np.ndarray) -> np.ndarray:
+        """(3,) veya (n, 3) olasılıkları kalibre et"""
+        z = self._logits(np.asarray(probabilities, dtype=float))
+        z = np.exp(z - z.max(axis=-1, keepdims=True))
+        return z / z.sum(axis=-1, keepdims=True)
+    
+    def update(self, probabilities: np.ndarray, outcome: int):
+        """Log-loss gradyanı ile tek adım"""
+        probabilities = np.asarray(probabilities, dtype=float)
+        residual = self.transform(probabilities)
+        residual[outcome] -= 1.0
+        self.a -= self.learning_rate * float(residual @ np.log(np.clip(probabilities, _EPS, 1.0)))
+        self.a = float(np.clip(self.a, 0.05, 5.0))
+        self.b -= self.learning_rate * residual
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'a': self.a, 'b': self.b.tolist()}
+
+
+class OnlineModelStats:
+    """Streaming metrics of one model: EW log-loss / Brier / accuracy + ring-buffer window"""
+    
+    def __init__(self, half_life: float = 50.0, window: int = 100):
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.window = window
+        self.count = 0
+        # Bias-corrected EW ortalamalar: toplam / ağırlık
+        self.ew_weight = 0.0
+        self.ew_sums = np.zeros(3)  # log_loss, brier, correct
+        # Ring buffer + running window sums
+        self.ring = np.zeros((window, 3))
+        self.ring_sums = np.zeros(3)
+        self.ring_pos = 0
+        self.ring_size = 0
+        self.calibrator = RunningPlatt()
+    
+    def update(self, probabilities: np.ndarray, outcome: int):
+        probabilities = np.asarray(probabilities, dtype=float)
+        onehot = np.zeros(3)
+        onehot[outcome] = 1.0
+        calibrated = self.calibrator.transform(probabilities)
+        metrics = np.array([
+            -np.log(max(calibrated[outcome], _EPS)),
+            float(np.sum((calibrated - onehot) ** 2)),
+            float(np.argmax(calibrated) == outcome)
+        ])
+        
+        self.ew_weight = self.ew_weight * self.decay + 1.0
+        self.ew_sums = self.ew_sums * self.decay + metrics
+        
+        if self.ring_size == self.window:
+            self.ring_sums -= self.ring[self.ring_pos]
+        else:
+            self.ring_size += 1
+        self.ring[self.ring_pos] = metrics
+        self.ring_sums += metrics
+        self.ring_pos = (self.ring_pos + 1) % self.window
+        
+        # Kalibrasyon, metrikler hesaplandıktan sonra öğrenir (out-of-sample skor)
+        self.calibrator.update(probabilities, outcome)
+        self.count += 1
+    
+    def ew_log_loss(self) -> Optional[float]:
+        return float(self.ew_sums[0] / self.ew_weight) if self.ew_weight else None
+    
+    def summary(self) -> Dict[str, Any]:
+        ew = (self.ew_sums / self.ew_weight).tolist() if self.ew_weight else [None] * 3
+        recent = (self.ring_sums / self.ring_size).tolist() if self.ring_size else [None] * 3
+        return {
+            'count': self.count,
+            'ew_log_loss': ew[0],
+            'ew_brier': ew[1],
+            'ew_accuracy': ew[2],
+            'window_size': self.ring_size,
+            'window_log_loss': recent[0],
+            'window_brier': recent[1],
+            'window_accuracy': recent[2],
+            'calibration': self.calibrator.to_dict()
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # Ring buffer kronolojik sırada saklanır
+        order = [(self.ring_pos - self.ring_size + i) % self.window for i in range(self.ring_size)]
+        return {
+            'count': self.count,
+            'ew_weight': self.ew_weight,
+            'ew_sums': self.ew_sums.tolist(),
+            'ring': self.ring[order].tolist(),
+            'calibration': self.calibrator.to_dict()
+        }
+    
+    def load_dict(self, state: Dict[str, Any]):
+        self.count = int(state['count'])
+        self.ew_weight = float(state['ew_weight'])
+        self.ew_sums = np.asarray(state['ew_sums'], dtype=float)
+        ring = np.asarray(state['ring'], dtype=float).reshape(-1, 3)[-self.window:]
+        self.ring[:] = 0.0
+        self.ring[:len(ring)] = ring
+        self.ring_size = len(ring)
+        self.ring_pos = self.ring_size % self.window
+        self.ring_sums = ring.sum(axis=0) if len(ring) else np.zeros(3)
+        self.calibrator.a = float(state['calibration']['a'])
+        self.calibrator.b = np.asarray(state['calibration']['b'], dtype=float)
+
+
+class OnlineEnsemble:
+    """
+    Settled results → current ensemble weights and calibration, O(models) per update
+    
+    Weights: softmax(-sharpness * EW log-loss), each model shrunk towards its
+    prior weight until about `prior_strength` of its results have settled.
+    """
+    
+    def __init__(
+        self,
+        prior_weights: Optional[Dict[str, float]] = None,
+        half_life: float = 50.0,
+        window: int = 100,
+        sharpness: float = 5.0,
+        prior_strength: float = 30.0,
+        state_path: Optional[str] = None
+    ):
+        """
+        Args:
+            prior_weights: Starting weights {model_name: weight}
+            half_life: EW metrics half-life (settled matches)
+            window: Ring buffer size for windowed metrics
+            sharpness: How strongly log-loss differences move the weights
+            prior_strength: Settled matches until data outweighs the prior
+            state_path: JSON file for persistence (None = in-memory)
+        """
+        self.prior_weights = dict(prior_weights or DEFAULT_WEIGHTS)
+        self.half_life = half_life
+        self.window = window
+        self.sharpness = sharpness
+        self.prior_strength = prior_strength
+        self.state_path = state_path
+        self._reset()
+        # (inode, mtime) of the state file last read or written by this instance
+        self._state_sig: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._refresh_unlocked()
+    
+    def _reset(self):
+        self.models = {name: OnlineModelStats(self.half_life, self.window) for name in self.prior_weights}
+        self.ensemble = OnlineModelStats(self.half_life, self.window)
+        self.ensemble.calibrator.a = 1.0 / DEFAULT_TEMPERATURE
+        # Fixtures already fed from the ledger: fixture_id -> kickoff
+        self.settled: Dict[int, int] = {}
+    
+    def _state_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.state_path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _refresh_unlocked(self):
+        """Reload the state file if another process replaced it since we last read/wrote it"""
+        if not self.state_path:
+            return
+        signature = self._state_signature()
+        if signature is not None and signature != self._state_sig:
+            self._load(signature)
+    
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Cross-process lock for read-modify-write of the state file"""
+        if not (self.state_path and FCNTL_AVAILABLE):
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(f"{self.state_path}.lock", 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+    
+    def _weights_unlocked(self) -> Dict[str, float]:
+        names = list(self.prior_weights)
+        observed = [self.models[name].ew_log_loss() for name in names]
+        if all(loss is None for loss in observed):
+            return dict(self.prior_weights)
+        # Henüz sonucu olmayan model en kötü gözlenen kayıpla başlar
+        worst = max(loss for loss in observed if loss is not None)
+        losses = np.array([worst if loss is None else loss for loss in observed])
+        learned = np.exp(-self.sharpness * (losses - losses.min()))
+        learned /= learned.sum()
+        prior = np.array([self.prior_weights[name] for name in names])
+        prior /= prior.sum()
+        counts = np.array([self.models[name].count for name in names], dtype=float)
+        mix = counts / (counts + self.prior_strength)
+        weights = mix * learned + (1 - mix) * prior
+        return {name: float(w) for name, w in zip(names, weights / weights.sum())}
+    
+    def get_weights(self) -> Dict[str, float]:
+        with self._lock:
+            self._refresh_unlocked()
+            return self._weights_unlocked()
+    
+    def combine(self, probabilities: Dict[str, np.ndarray], calibrate: bool = True) -> np.ndarray:
+        """Calibrated per-model probabilities → weighted, calibrated ensemble"""
+        with self._lock:
+            self._refresh_unlocked()
+            weights = self._weights_unlocked()
+            total = sum(weights[name] for name in probabilities if name in weights)
+            combined = sum(
+                self.models[name].calibrator.transform(proba) * weights[name]
+                for name, proba in probabilities.items() if name in weights
+            ) / max(total, _EPS)
+            return self.ensemble.calibrator.transform(combined) if calibrate else combined
+    
+    def update(self, probabilities: Dict[str, np.ndarray], outcome: int) -> Dict[str, float]:
+        """
+        Record one settled match
+        
+        Args:
+            probabilities: {model_name: [away, draw, home]} given before kick-off
+            outcome: 0=Away, 1=Draw, 2=Home
+            
+        Returns:
+            Updated weights
+        """
+        with self._lock:
+            weights = self._weights_unlocked()
+            total = sum(weights[name] for name in probabilities if name in weights)
+            combined = np.zeros(3)
+            for name, proba in probabilities.items():
+                if name not in self.models:
+                    continue
+                proba = np.asarray(proba, dtype=float).reshape(3)
+                combined += self.models[name].calibrator.transform(proba) * weights[name] / max(total, _EPS)
+                self.models[name].update(proba, outcome)
+            if total > 0:
+                self.ensemble.update(combined, outcome)
+            return self._weights_unlocked()
+    
+    def log_predictions(
+        self,
+        probabilities: Dict[str, np.ndarray],
+        fixture_id: int,
+        home_team: str,
+        away_team: str,
+        kickoff: Optional[int] = None,
+        ledger=None,
+        **context
+    ) -> List[int]:
+        """
+        Store per-model probabilities in the prediction ledger for settle_from_ledger
+        
+        Args:
+            probabilities: {model_name: [away, draw, home]}
+            kickoff: Match start (unix); predictions issued after it are never settled
+            ledger: PredictionLedger (None = global ledger)
+            context: league / league_id / season / home_id / away_id
+            
+        Returns:
+            Ledger prediction ids
+        """
+        if ledger is None:
+            from prediction_ledger import get_prediction_ledger
+            ledger = get_prediction_ledger()
+        ids = []
+        for name, proba in probabilities.items():
+            if name not in self.models:
+                continue
+            proba = np.asarray(proba, dtype=float).reshape(3)
+            ids.append(ledger.log_prediction(
+                home_team=home_team, away_team=away_team, prediction=int(np.argmax(proba)),
+                confidence=float(np.max(proba)), probabilities=proba.tolist(), model_name=name,
+                model_version=LEDGER_MODEL_VERSION, fixture_id=fixture_id, kickoff=kickoff, **context
+            ))
+        return ids
+    
+    def settle_from_ledger(self, ledger=None, now: Optional[float] = None) -> int:
+        """
+        Feed finished fixtures from the ledger into the weights, once per fixture
+        
+        Uses the last per-model prediction issued before kick-off and the result
+        from the fixture archive (or PredictionLedger.settle). Fixtures are fed in
+        kick-off order. Runs under the state file lock on the latest saved state,
+        so concurrent settlers (cron, API) never feed a fixture twice.
+        
+        Returns:
+            Number of fixtures settled
+        """
+        if ledger is None:
+            from prediction_ledger import get_prediction_ledger
+            ledger = get_prediction_ledger()
+        now = time.time() if now is None else now
+        since = now - SETTLE_LOOKBACK
+        positions = ledger.latest_before_kickoff(ledger.select(since=since, model_version=LEDGER_MODEL_VERSION))
+        if len(positions) == 0:
+            return 0
+        results = ledger.join_results(positions)
+        with self._file_lock():
+            with self._lock:
+                self._refresh_unlocked()
+            return self._settle(ledger, positions, results, since)
+    
+    def _settle(self, ledger, positions: np.ndarray, results: Dict[str, np.ndarray], since: float) -> int:
+        fixtures: Dict[int, Dict[str, Any]] = {}
+        for row, settled, outcome in zip(ledger.rows(positions), results['settled'], results['outcome']):
+            fixture_id = row['fixture_id']
+            # Without a kick-off time a prediction can't be shown to precede the result
+            if not settled or row['kickoff'] <= 0 or fixture_id in self.settled or row['model_name'] not in self.models:
+                continue
+            entry = fixtures.setdefault(fixture_id, {'kickoff': row['kickoff'], 'outcome': int(outcome), 'probabilities': {}})
+            entry['probabilities'][row['model_name']] = [row['p_away'], row['p_draw'], row['p_home']]
+        
+        for fixture_id, entry in sorted(fixtures.items(), key=lambda item: item[1]['kickoff']):
+            self.update(entry['probabilities'], entry['outcome'])
+            self.settled[fixture_id] = entry['kickoff']
+        # Fixtures older than the lookback are never selected again
+        self.settled = {fixture_id: kickoff for fixture_id, kickoff in self.settled.items() if kickoff >= since}
+        if fixtures:
+            self._write()
+        return len(fixtures)
+    
+    def calibrate(self, probabilities: np.ndarray) -> np.ndarray:
+        """Ensemble-level running calibration (temperature 1.5 until results settle)"""
+        with self._lock:
+            self._refresh_unlocked()
+            return self.ensemble.calibrator.transform(probabilities)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_unlocked()
+            return {
+                'weights': self._weights_unlocked(),
+                'models': {name: stats.summary() for name, stats in self.models.items()},
+                'ensemble': self.ensemble.summary()
+            }
+    
+    def save(self, path: Optional[str] = None):
+        """Write the state; fixtures settled by other processes since our last read are kept"""
+        if path and path != self.state_path:
+            self._write(path)
+            return
+        with self._file_lock():
+            self._write()
+    
+    def _write(self, path: Optional[str] = None):
+        """Atomic write (callers writing state_path hold the file lock)"""
+        path = path or self.state_path
+        if not path:
+            return
+        with self._lock:
+            if path == self.state_path and self._state_signature() not in (None, self._state_sig):
+                self.settled = {**self._read_settled(), **self.settled}
+            state = {
+                'prior_weights': self.prior_weights,
+                'models': {name: stats.to_dict() for name, stats in self.models.items()},
+                'ensemble': self.ensemble.to_dict(),
+                'settled': [[fixture_id, kickoff] for fixture_id, kickoff in self.settled.items()]
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+            if path == self.state_path:
+                self._state_sig = self._state_signature()
+    
+    def _read_settled(self) -> Dict[int, int]:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return {int(fixture_id): int(kickoff) for fixture_id, kickoff in json.load(f).get('settled', [])}
+        except Exception as e:
+            print(f"[WARNING] Online ensemble state could not be read: {e}")
+            return {}
+    
+    def _load(self, signature: Optional[Tuple[int, int]] = None):
+        self._state_sig = signature or self._state_signature()
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self._reset()
+            for name, model_state in state.get('models', {}).items():
+                if name in self.models:
+                    self.models[name].load_dict(model_state)
+            if 'ensemble' in state:
+                self.ensemble.load_dict(state['ensemble'])
+            self.settled = {int(fixture_id): int(kickoff) for fixture_id, kickoff in state.get('settled', [])}
+        except Exception as e:
+            print(f"[WARNING] Online ensemble state could not be loaded: {e}")
+
+
+# Global instance
+_online = None
+_online_lock = threading.Lock()
+
+
+def get_online_ensemble() -> OnlineEnsemble:
+    """Global OnlineEnsemble instance'ı getir (models/online_ensemble.json)"""
+    global _online
+    if _online is None:
+        with _online_lock:
+            if _online is None:
+                _online = OnlineEnsemble(state_path=ONLINE_STATE_PATH)
+    return _online
+
 
 class EnsembleManager:
     """
@@ -29,26 +486,32 @@ class EnsembleManager:
     def __init__(
         self,
         weights: Optional[Dict[str, float]] = None,
-        calibration: bool = True
+        calibration: bool = True,
+        online: Optional[Union[OnlineEnsemble, bool]] = None
     ):
         """
         Initialize ensemble manager
         
         Args:
-            weights: Model weights {model_name: weight}
+            weights: Fixed model weights {model_name: weight}
             calibration: Apply probability calibration
+            online: Online weight / calibration engine (see record_result);
+                None = global engine unless fixed weights are given, False = none
         """
+        if online is None and weights is None:
+            online = get_online_ensemble()
+        self.online = online or None
+        
         # Default weights (sum to 1.0)
-        self.weights = weights or {
-            'xgboost': 0.35,
-            'random_forest': 0.25,
-            'neural_network': 0.20,
-            'logistic': 0.10,
-            'poisson': 0.10
-        }
+        if weights:
+            self.weights = dict(weights)
+        elif self.online is not None:
+            self.weights = self.online.get_weights()
+        else:
+            self.weights = dict(DEFAULT_WEIGHTS)
         
         self.calibration = calibration
-        self.performance_history = {model: [] for model in self.weights.keys()}
+        self.performance_history = {model: deque(maxlen=HISTORY_LIMIT) for model in self.weights.keys()}
         
         print(f"[OK] Ensemble Manager initialized")
         print(f"     Weights: {self.weights}")
@@ -69,12 +532,17 @@ class EnsembleManager:
         Returns:
             Ensemble predictions
         """
-        # Weighted sum of probabilities
-        ensemble_proba = np.zeros_like(predictions['xgboost'])
-        
-        for model_name, proba in predictions.items():
-            weight = self.weights.get(model_name, 0.0)
-            ensemble_proba += proba * weight
+        if self.online is not None:
+            # Current online weights over per-model calibrated probabilities
+            self.weights = self.online.get_weights()
+            ensemble_proba = self.online.combine(predictions, calibrate=False)
+        else:
+            # Weighted sum of probabilities
+            ensemble_proba = np.zeros_like(predictions['xgboost'])
+            
+            for model_name, proba in predictions.items():
+                weight = self.weights.get(model_name, 0.0)
+                ensemble_proba += proba * weight
         
         if return_probabilities:
             return ensemble_proba
@@ -174,11 +642,13 @@ class EnsembleManager:
         Returns:
             Calibrated probabilities
         """
-        # For now, simple temperature scaling
-        # Can enhance with CalibratedClassifierCV later
+        # Running Platt parameters (settled results, see record_result);
+        # temperature 1.5 until the first result
+        if self.online is not None:
+            return self.online.calibrate(probabilities)
         
-        # Temperature parameter (can be learned)
-        temperature = 1.5
+        # Temperature parameter
+        temperature = DEFAULT_TEMPERATURE
         
         # Apply temperature scaling
         calibrated = probabilities ** (1.0 / temperature)
@@ -188,6 +658,26 @@ class EnsembleManager:
         
         return calibrated
     
+    def record_result(
+        self,
+        probabilities: Dict[str, np.ndarray],
+        outcome: int
+    ) -> Dict[str, float]:
+        """
+        Feed one settled match into the online engine and adopt its weights
+        
+        Args:
+            probabilities: {model_name: [away, draw, home]} given before the match
+            outcome: 0=Away, 1=Draw, 2=Home
+            
+        Returns:
+            Updated weights
+        """
+        if self.online is None:
+            self.online = OnlineEnsemble(prior_weights=self.weights)
+        self.weights = self.online.update(probabilities, outcome)
+        return self.weights
+    
     def consensus_prediction(
         self,
         predictions: Dict[str, int],
@@ -46,6 +46,10 @@ class ExpectedAssistsCalculator:
         'high_pressure': 0.65       # Yüksek baskı
     }
     
+    # Takım istatistiğinden tahmin: her key pass ortalama 0.15 xA
+    # (through ball / cutback ~0.25, orta ~0.10)
+    XA_PER_KEY_PASS = 0.15
+    
     def __init__(self):
         pass
     
@@ -97,7 +101,8 @@ class ExpectedAssistsCalculator:
     def estimate_team_xa_from_stats(
         self,
         team_stats: Dict,
-        match_count: int = 1
+        match_count: int = 1,
+        profile: Optional[Dict] = None
     ) -> Dict[str, float]:
         """
         Takım istatistiklerinden xA tahmini
@@ -105,6 +110,8 @@ class ExpectedAssistsCalculator:
         Args:
             team_stats: Takım istatistikleri
             match_count: Kaç maç
+            profile: team_profiles kaydı; verilirse maç başı key pass / xA lig profilinden
+                okunur (match_count=1) ve sonuca lig yüzdeliği eklenir
             
         Returns:
             {
@@ -115,6 +122,10 @@ class ExpectedAssistsCalculator:
                 'chance_quality': 75.5
             }
         """
+        if profile is not None:
+            team_stats = profile['team_stats']
+            match_count = 1
+        
         # Key passes
         key_passes = team_stats.get('key_passes', 0)
         
@@ -130,8 +141,10 @@ class ExpectedAssistsCalculator:
         # Crosses daha az değerli: 0.10
         
         # Basit tahmin: Key passes * ortalama xA
-        average_xa_per_key_pass = 0.15
-        estimated_xa = key_passes * average_xa_per_key_pass
+        if profile is not None:
+            estimated_xa = profile['metrics']['xa']
+        else:
+            estimated_xa = key_passes * self.XA_PER_KEY_PASS
         
         # xA per match
         xa_per_match = estimated_xa / match_count if match_count > 0 else estimated_xa
@@ -155,7 +168,7 @@ class ExpectedAssistsCalculator:
         else:
             over_performance = 0.0
         
-        return {
+        result = {
             'total_xA': round(estimated_xa, 2),
             'xA_per_match': round(xa_per_match, 2),
             'key_passes': key_passes,
@@ -166,6 +179,9 @@ class ExpectedAssistsCalculator:
             'over_performance': round(over_performance, 2),
             'interpretation': self._interpret_xa(xa_per_match)
         }
+        if profile is not None:
+            result['league_percentile'] = profile['percentiles']['xa']
+        return result
     
     def calculate_chance_creation_quality(
         self,
@@ -16,9 +16,12 @@ NOT: API'den detaylı şut verileri gelmediği için,
 takım istatistiklerinden tahminsel xG hesaplayacağız.
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Sequence
+from bisect import bisect_right
 import math
 
+import numpy as np
+
 class ExpectedGoalsCalculator:
     """Expected Goals (xG) hesaplayıcı"""
     
@@ -34,6 +37,10 @@ class ExpectedGoalsCalculator:
         (25, 100): 0.02  # Çok uzak
     }
     
+    # DISTANCE_XG_MAP'in sıralı kenar dizisi: [min, max) aralıkları, aralık dışı -> 0.02
+    DISTANCE_EDGES = np.array([0, 6, 11, 16, 25, 100], dtype=np.float64)
+    DISTANCE_VALUES = np.array([0.02, 0.45, 0.25, 0.12, 0.05, 0.02, 0.02])
+    
     # Angle multipliers
     ANGLE_MULTIPLIERS = {
         'central': 1.0,      # Orta (0-15 derece)
@@ -66,9 +73,28 @@ class ExpectedGoalsCalculator:
         'losing': 1.05     # Arkada oynuyorken daha riskli
     }
     
+    # Takım istatistiğinden şut başına xG: 0.08 + isabet oranı * 0.12 (0.08 - 0.20 arası)
+    SHOT_XG_BASE = 0.08
+    SHOT_XG_ACCURACY_WEIGHT = 0.12
+    DEFAULT_SHOT_ACCURACY = 0.33
+    
     def __init__(self):
         pass
     
+    @classmethod
+    def shot_quality(cls, shots_on_target, total_shots):
+        """
+        Şut başına tahmini xG (skaler veya numpy dizisi - team_profiles tüm ligi tek seferde hesaplar)
+        
+        Şut yoksa varsayılan isabet oranı kullanılır.
+        """
+        shots = np.asarray(total_shots, dtype=np.float64)
+        on_target = np.asarray(shots_on_target, dtype=np.float64)
+        accuracy = np.divide(on_target, shots, out=np.full(shots.shape, cls.DEFAULT_SHOT_ACCURACY),
+                             where=shots > 0)
+        quality = cls.SHOT_XG_BASE + accuracy * cls.SHOT_XG_ACCURACY_WEIGHT
+        return float(quality) if quality.ndim == 0 else quality
+    
     def calculate_xg_from_shot_data(
         self,
         shot_distance: float,
@@ -117,11 +143,57 @@ class ExpectedGoalsCalculator:
         # Clamp to [0.01, 0.99]
         return max(0.01, min(0.99, xg))
     
+    def calculate_xg_batch(
+        self,
+        shot_distances: Sequence[float],
+        shot_angles: Sequence[float],
+        body_parts: Optional[Sequence[str]] = None,
+        assist_types: Optional[Sequence[str]] = None,
+        game_states: Optional[Sequence[str]] = None,
+        defensive_pressure: Optional[Sequence[float]] = None
+    ) -> np.ndarray:
+        """
+        calculate_xg_from_shot_data'nın vektörel hali (N şut tek çağrıda)
+        
+        Mesafe ve açı kovaları np.searchsorted ile bulunur; verilmeyen
+        kolonlar varsayılan değerleri (right_foot/pass/drawing/0.5) kullanır.
+        
+        Returns:
+            xG dizisi (0.01 - 0.99)
+        """
+        distances = np.asarray(shot_distances, dtype=np.float64)
+        angles = np.asarray(shot_angles, dtype=np.float64)
+        n = len(distances)
+        
+        base_xg = self.DISTANCE_VALUES[np.searchsorted(self.DISTANCE_EDGES, distances, side='right')]
+        angle_values = np.array([self.ANGLE_MULTIPLIERS['central'],
+                                 self.ANGLE_MULTIPLIERS['wide'],
+                                 self.ANGLE_MULTIPLIERS['very_wide']])
+        angle_mult = angle_values[np.searchsorted([15, 30], angles, side='left')]
+        
+        def lookup(table, values, default_key):
+            if values is None:
+                return np.full(n, table.get(default_key, 1.0))
+            return np.array([table.get(v, 1.0) for v in values], dtype=np.float64)
+        
+        body_mult = lookup(self.BODY_PART_MULTIPLIERS, body_parts, 'right_foot')
+        assist_mult = lookup(self.ASSIST_TYPE_MULTIPLIERS, assist_types, 'pass')
+        state_mult = lookup(self.GAME_STATE_MULTIPLIERS, game_states, 'drawing')
+        pressure = (np.full(n, 0.5) if defensive_pressure is None
+                    else np.asarray(defensive_pressure, dtype=np.float64))
+        pressure_mult = 1.0 - (pressure * 0.3)
+        
+        xg = (base_xg * angle_mult * body_mult *
+              assist_mult * state_mult * pressure_mult)
+        return np.clip(xg, 0.01, 0.99)
+    
     def estimate_team_xg_from_stats(
         self,
         team_stats: Dict,
         opponent_stats: Dict,
-        is_home: bool = True
+        is_home: bool = True,
+        profile: Optional[Dict] = None,
+        opponent_profile: Optional[Dict] = None
     ) -> Dict[str, float]:
         """
         Takım istatistiklerinden tahmini xG hesapla
@@ -131,6 +203,8 @@ class ExpectedGoalsCalculator:
             team_stats: Takım istatistikleri
             opponent_stats: Rakip takım istatistikleri
             is_home: Ev sahibi mi?
+            profile / opponent_profile: team_profiles kaydı; verilirse istatistikler ve
+                şut bazlı xG önceden hesaplanmış lig profilinden okunur
             
         Returns:
             {
@@ -141,9 +215,10 @@ class ExpectedGoalsCalculator:
                 'components': {...}
             }
         """
-        # Şut istatistiklerinden xG tahmini
-        shots_on_target = team_stats.get('shots_on_target', 0)
-        total_shots = team_stats.get('total_shots', 0)
+        if profile is not None:
+            team_stats = profile['team_stats']
+        if opponent_profile is not None:
+            opponent_stats = opponent_profile['team_stats']
         
         # Opponent defensive strength
         opponent_goals_conceded = opponent_stats.get('goals_conceded', 0)
@@ -151,18 +226,14 @@ class ExpectedGoalsCalculator:
         opponent_defensive_strength = opponent_goals_conceded / opponent_matches if opponent_matches > 0 else 1.2
         
         # Base xG calculation
-        # Assumption: On target shots have higher xG
-        if total_shots > 0:
-            shot_accuracy = shots_on_target / total_shots
+        # Assumption: On target shots have higher xG (high accuracy = better shot quality)
+        if profile is not None:
+            xg_per_shot = profile['metrics']['shot_quality']
+            estimated_xg = profile['metrics']['xg']
         else:
-            shot_accuracy = 0.33  # Default
-        
-        # xG per shot (estimated)
-        # High accuracy = better shot quality
-        xg_per_shot = 0.08 + (shot_accuracy * 0.12)  # 0.08 - 0.20 arası
-        
-        # Total xG
-        estimated_xg = total_shots * xg_per_shot
+            total_shots = team_stats.get('total_shots', 0)
+            xg_per_shot = self.shot_quality(team_stats.get('shots_on_target', 0), total_shots)
+            estimated_xg = total_shots * xg_per_shot
         
         # Adjust for opponent strength
         opponent_adjustment = opponent_defensive_strength / 1.2  # Normalize
@@ -173,14 +244,13 @@ class ExpectedGoalsCalculator:
             estimated_xg *= 1.08
         
         # xG Against (tahmini)
-        opponent_shots = opponent_stats.get('total_shots', 0)
-        if opponent_shots > 0:
-            opponent_accuracy = opponent_stats.get('shots_on_target', 0) / opponent_shots
+        if opponent_profile is not None:
+            estimated_xga = opponent_profile['metrics']['xg']
         else:
-            opponent_accuracy = 0.33
-        
-        xg_per_opponent_shot = 0.08 + (opponent_accuracy * 0.12)
-        estimated_xga = opponent_shots * xg_per_opponent_shot
+            opponent_shots = opponent_stats.get('total_shots', 0)
+            estimated_xga = opponent_shots * self.shot_quality(
+                opponent_stats.get('shots_on_target', 0), opponent_shots
+            )
         
         # Team defensive strength adjustment
         team_goals_conceded = team_stats.get('goals_conceded', 0)
@@ -193,7 +263,7 @@ class ExpectedGoalsCalculator:
         actual_goals = team_stats.get('goals_scored', 0)
         over_performance = actual_goals - estimated_xg
         
-        return {
+        result = {
             'xG': round(estimated_xg, 2),
             'xGA': round(estimated_xga, 2),
             'xG_difference': round(estimated_xg - estimated_xga, 2),
@@ -204,16 +274,23 @@ class ExpectedGoalsCalculator:
                 'defensive_quality': round(team_defensive_strength, 2)
             }
         }
+        if profile is not None:
+            result['league_percentile'] = profile['percentiles']['xg']
+        return result
     
     def calculate_match_xg(
         self,
         home_team_stats: Dict,
         away_team_stats: Dict,
-        league_avg_goals: float = 2.7
+        league_avg_goals: float = 2.7,
+        home_profile: Optional[Dict] = None,
+        away_profile: Optional[Dict] = None
     ) -> Dict:
         """
         Maç için her iki takımın xG'sini hesapla
         
+        home_profile / away_profile: team_profiles kayıtları (varsa istatistik yerine kullanılır)
+        
         Returns:
             {
                 'home_xG': 1.85,
@@ -230,14 +307,18 @@ class ExpectedGoalsCalculator:
         home_xg_data = self.estimate_team_xg_from_stats(
             home_team_stats,
             away_team_stats,
-            is_home=True
+            is_home=True,
+            profile=home_profile,
+            opponent_profile=away_profile
         )
         
         # Away team xG
         away_xg_data = self.estimate_team_xg_from_stats(
             away_team_stats,
             home_team_stats,
-            is_home=False
+            is_home=False,
+            profile=away_profile,
+            opponent_profile=home_profile
         )
         
         home_xg = home_xg_data['xG']
@@ -273,10 +354,7 @@ class ExpectedGoalsCalculator:
     
     def _get_xg_from_distance(self, distance: float) -> float:
         """Mesafeden base xG değeri"""
-        for (min_dist, max_dist), xg_value in self.DISTANCE_XG_MAP.items():
-            if min_dist <= distance < max_dist:
-                return xg_value
-        return 0.02  # Very far
+        return float(self.DISTANCE_VALUES[bisect_right(self.DISTANCE_EDGES, distance)])
     
     def _get_angle_multiplier(self, angle: float) -> float:
         """Açıdan multiplier"""
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Factor Executor
+===============
+Maç analizindeki bağımsız faktör sağlayıcılarını (H2H, sakatlık, xG, hava durumu,
+hakem, oranlar...) eşzamanlı çalıştıran küçük bir yürütme grafiği.
+
+- Bağımlılığı olmayan faktörler aynı anda başlar (bloklayan çağrılar thread'de)
+- Her faktörün kendi timeout'u ve fallback değeri vardır; hata/timeout analizi düşürmez
+- Faktör başına süre ve durum kaydedilir (toplam süre ≈ en yavaş faktör)
+
+Usage:
+    from factor_executor import Factor, FactorExecutor
+
+    results, timings = await FactorExecutor().run([
+        Factor('h2h', get_h2h_data, args=(645, 611), timeout=5),
+        Factor('weather', calculate_weather_impact, args=('GS', 'FB'),
+               fallback={'available': False}),
+        Factor('summary', summarize, depends_on=('h2h',)),  # summarize(h2h=...)
+    ])
+"""
+
+import asyncio
+import copy
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Factor:
+    """Tek faktör sağlayıcısı"""
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[..., Any],
+                 args: Sequence[Any] = (),
+                 kwargs: Optional[Dict[str, Any]] = None,
+                 depends_on: Sequence[str] = (),
+                 timeout: float = 8.0,
+                 fallback: Any = None,
+                 enabled: bool = True):
+        """
+        Args:
+            name: Faktör adı (sonuç sözlüğündeki anahtar)
+            func: Bloklayan sağlayıcı fonksiyonu
+            args / kwargs: func'a geçilecek argümanlar
+            depends_on: Önce tamamlanması gereken faktörler; sonuçları aynı
+                isimle keyword argüman olarak func'a geçilir
+            timeout: Saniye cinsinden üst süre
+            fallback: Hata/timeout/devre dışı durumunda dönecek değer
+                (callable ise çağrılır)
+            enabled: False ise çalıştırılmaz, doğrudan fallback döner
+        """
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.fallback = fallback
+        self.enabled = enabled
+
+    def fallback_value(self) -> Any:
+        if callable(self.fallback):
+            return self.fallback()
+        # Paylaşılan varsayılan sözlükler çağıranlar tarafından değiştirilebilir
+        return copy.deepcopy(self.fallback)
+
+
+class FactorExecutor:
+    """Faktör grafiğini asyncio üzerinde eşzamanlı çalıştırır"""
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+
+    @staticmethod
+    def _validate(factors: List[Factor]):
+        """Tekrarlanan isim, bilinmeyen bağımlılık ve döngü kontrolü"""
+        by_name: Dict[str, Factor] = {}
+        for factor in factors:
+            if factor.name in by_name:
+                raise ValueError(f"Faktör iki kez tanımlandı: {factor.name}")
+            by_name[factor.name] = factor
+
+        for factor in factors:
+            for dep in factor.depends_on:
+                if dep not in by_name:
+                    raise ValueError(f"{factor.name}: bilinmeyen bağımlılık '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Faktör grafiğinde döngü var: {name}")
+            visiting.add(name)
+            for dep in by_name[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for factor in factors:
+            visit(factor.name)
+
+    async def _run_factor(self, factor: Factor, tasks: Dict[str, 'asyncio.Task'],
+                          timings: Dict[str, Dict[str, Any]]) -> Any:
+        deps = {}
+        for dep in factor.depends_on:
+            deps[dep] = await tasks[dep]
+
+        if not factor.enabled:
+            timings[factor.name] = {'status': 'skipped', 'elapsed_ms': 0.0}
+            return factor.fallback_value()
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(factor.func, *factor.args, **factor.kwargs, **deps),
+                timeout=factor.timeout
+            )
+            status = 'ok'
+        except asyncio.TimeoutError:
+            # Thread arka planda bitebilir; sonucu kullanılmaz
+            result = factor.fallback_value()
+            status = 'timeout'
+        except Exception as e:
+            result = factor.fallback_value()
+            status = 'error'
+            if self.verbose:
+                print(f"⚠️ Faktör hatası [{factor.name}]: {e}")
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        timings[factor.name] = {'status': status, 'elapsed_ms': elapsed_ms}
+        if self.verbose and status != 'ok':
+            print(f"⏱️ Faktör [{factor.name}] {status} ({elapsed_ms} ms) - fallback kullanıldı")
+        return result
+
+    async def run(self, factors: List[Factor]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Tüm faktörleri çalıştır
+
+        Returns:
+            (sonuçlar, süreler) - süreler: {faktör: {'status', 'elapsed_ms'}, '_total': {...}}
+        """
+        self._validate(factors)
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        start = time.perf_counter()
+        # Tüm task'lar ilk await'ten önce oluşturulur; bağımlılıklar task'ı bekler
+        for factor in factors:
+            tasks[factor.name] = asyncio.ensure_future(self._run_factor(factor, tasks, timings))
+        values = await asyncio.gather(*tasks.values())
+
+        results = dict(zip(tasks.keys(), values))
+        total_ms = round((time.perf_counter() - start) * 1000, 1)
+        timings['_total'] = {
+            'elapsed_ms': total_ms,
+            'serial_ms': round(sum(t['elapsed_ms'] for t in timings.values()), 1),
+            'slowest': max(((name, t['elapsed_ms']) for name, t in timings.items() if name != '_total'),
+                           key=lambda item: item[1], default=(None, 0.0))[0]
+        }
+        if self.verbose:
+            print(f"⚡ {len(factors)} faktör {total_ms} ms'de tamamlandı "
+                  f"(seri toplam {timings['_total']['serial_ms']} ms)")
+        return results, timings
@@ -0,0 +1,629 @@
+# -*- coding: utf-8 -*-
+"""
+Historical Fixture Archive
+==========================
+Bitmiş maçların (skor, istatistik, olay, kadro) yerel, sadece-ekleme (append-only)
+arşivi. Eğitim scriptleri, lig gol ortalamaları, Elo güncellemesi ve takım
+geçmişi sorguları API yerine bu arşivden okur.
+
+Düzen:
+    fixture_archive/
+        manifest.json                          # partition özetleri + high-water mark
+        league_203/season_2025/
+            seg_00001.npz                      # kolon bazlı skor tablosu (numpy)
+            seg_00001.details.json.gz          # statistics / events / lineups
+
+- Her ingest çalışması partition'a yeni bir segment ekler; eski segmentlere dokunulmaz
+- Ingest sadece high-water mark'tan (son arşivlenen maç zamanı) yeni maçları çeker;
+  detaylar /fixtures?ids= ile 20'şerli paketler halinde gelir
+- Okuyucu tüm segmentleri tek tabloya birleştirir ve takım → satır indeksini
+  manifest değişene kadar bellekte tutar
+- Yeni biten her maç için o maça, takımlara ve lig-sezona etiketli cache
+  kayıtları (puan durumu, takım istatistikleri, H2H) TTL beklenmeden silinir
+
+Kullanım:
+    python fixture_archive.py --ingest -l 203 39 -s 2024 2025
+    python fixture_archive.py --stats
+
+    from fixture_archive import get_archive
+    archive = get_archive()
+    archive.team_history(645, limit=10)
+    archive.league_window(203, 2025, last=250)
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+BASE_URL = "https://v3.football.api-sports.io"
+ARCHIVE_DIR = os.environ.get(
+    'FIXTURE_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixture_archive')
+)
+
+FINISHED_STATUSES = ('FT', 'AET', 'PEN')
+DETAILS_BATCH_SIZE = 20  # API-Football /fixtures?ids= üst sınırı
+MISSING = -1
+# Arşiv bu süreden eskiyse son maçlar eksik olabilir → tüketiciler API'ye döner
+ARCHIVE_MAX_AGE_SECONDS = 36 * 3600
+
+# Kolon adı → dtype (isim kolonları numpy unicode olarak yazılır, pickle gerekmez)
+NUMERIC_COLUMNS = {
+    'fixture_id': np.int64,
+    'timestamp': np.int64,
+    'league_id': np.int32,
+    'season': np.int16,
+    'home_id': np.int32,
+    'away_id': np.int32,
+    'home_goals': np.int16,
+    'away_goals': np.int16,
+    'ht_home': np.int16,
+    'ht_away': np.int16,
+    'segment': np.int32,
+}
+TEXT_COLUMNS = ('status', 'round', 'home_name', 'away_name')
+COLUMNS = tuple(NUMERIC_COLUMNS) + TEXT_COLUMNS
+
+
+def _score(value: Any) -> int:
+    return MISSING if value is None else int(value)
+
+
+def fixture_to_row(fixture: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """API /fixtures kaydını arşiv satırına çevir (bitmemiş veya skorsuz maç → None)"""
+    try:
+        info = fixture['fixture']
+        status = info['status']['short']
+        if status not in FINISHED_STATUSES:
+            return None
+        goals = fixture.get('goals') or {}
+        if goals.get('home') is None or goals.get('away') is None:
+            return None
+        halftime = (fixture.get('score') or {}).get('halftime') or {}
+        league = fixture.get('league') or {}
+        home, away = fixture['teams']['home'], fixture['teams']['away']
+        return {
+            'fixture_id': int(info['id']),
+            'timestamp': int(info.get('timestamp') or 0),
+            'league_id': int(league.get('id') or 0),
+            'season': int(league.get('season') or 0),
+            'home_id': int(home['id']),
+            'away_id': int(away['id']),
+            'home_goals': int(goals['home']),
+            'away_goals': int(goals['away']),
+            'ht_home': _score(halftime.get('home')),
+            'ht_away': _score(halftime.get('away')),
+            'status': status,
+            'round': league.get('round') or '',
+            'home_name': home.get('name') or '',
+            'away_name': away.get('name') or '',
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def row_to_fixture(row: Dict[str, Any], details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Arşiv satırını API /fixtures biçimine geri çevir
+
+    API çıktısını parse eden mevcut kod (eğitim scriptleri, fixture_parser) arşiv
+    verisiyle değişmeden çalışır (offline replay). details verilirse
+    /fixtures?ids= yanıtındaki gibi statistics / events / lineups eklenir.
+    """
+    home_goals, away_goals = row['home_goals'], row['away_goals']
+    halftime = {
+        'home': None if row['ht_home'] == MISSING else row['ht_home'],
+        'away': None if row['ht_away'] == MISSING else row['ht_away'],
+    }
+    fixture = {
+        'fixture': {
+            'id': row['fixture_id'],
+            'timestamp': row['timestamp'],
+            'date': datetime.fromtimestamp(row['timestamp'], tz=timezone.utc).isoformat(),
+            'status': {'short': row['status'], 'long': 'Match Finished'},
+        },
+        'league': {'id': row['league_id'], 'season': row['season'], 'round': row['round']},
+        'teams': {
+            'home': {'id': row['home_id'], 'name': row['home_name'], 'winner': home_goals > away_goals if home_goals != away_goals else None},
+            'away': {'id': row['away_id'], 'name': row['away_name'], 'winner': away_goals > home_goals if home_goals != away_goals else None},
+        },
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': halftime, 'fulltime': {'home': home_goals, 'away': away_goals}},
+    }
+    if details:
+        fixture.update(details)
+    return fixture
+
+
+def _empty_table() -> Dict[str, np.ndarray]:
+    table = {name: np.empty(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    table.update({name: np.empty(0, dtype='<U1') for name in TEXT_COLUMNS})
+    return table
+
+
+def _concat(tables: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not tables:
+        return _empty_table()
+    return {name: np.concatenate([t[name] for t in tables]) for name in COLUMNS}
+
+
+class FixtureArchive:
+    """Partition'lı (lig/sezon), kolon bazlı bitmiş maç arşivi"""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Arşiv dizini (None = ARCHIVE_DIR)
+        """
+        self.root = root or ARCHIVE_DIR
+        self._lock = threading.RLock()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_sig: Optional[Tuple[int, int]] = None
+        self._table: Optional[Dict[str, np.ndarray]] = None
+        self._team_index: Dict[int, np.ndarray] = {}
+        self._fixture_index: Dict[int, int] = {}
+        self._details_memo: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, 'manifest.json')
+
+    @staticmethod
+    def _partition_key(league_id: int, season: int) -> str:
+        return f"{int(league_id)}:{int(season)}"
+
+    def _partition_dir(self, league_id: int, season: int) -> str:
+        return os.path.join(self.root, f"league_{int(league_id)}", f"season_{int(season)}")
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def manifest(self) -> Dict[str, Any]:
+        """Manifest (başka bir süreç ingest yaptıysa yeniden okunur)"""
+        with self._lock:
+            signature = self._signature()
+            if signature is None:
+                self._manifest, self._manifest_sig = {'partitions': {}}, None
+            elif signature != self._manifest_sig:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+                self._manifest_sig = signature
+                self._table = None  # indeks yeniden kurulacak
+            return self._manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def partition_info(self, league_id: int, season: int) -> Optional[Dict[str, Any]]:
+        return self.manifest()['partitions'].get(self._partition_key(league_id, season))
+
+    def high_water_mark(self, league_id: int, season: int) -> int:
+        """Partition'daki en yeni maçın unix zamanı (boş partition → 0)"""
+        info = self.partition_info(league_id, season)
+        return int(info['high_water']) if info else 0
+
+    def is_fresh(self, league_id: Optional[int] = None, season: Optional[int] = None,
+                 max_age: float = ARCHIVE_MAX_AGE_SECONDS) -> bool:
+        """
+        Partition'ın son ingest'i max_age saniyeden yeni mi (değilse güncel maçlar eksik olabilir)
+
+        Lig verilmezse tüm partition'lar güncel olmalı; bir ligin ingest'i diğerlerini güncel yapmaz.
+        """
+        age = self.last_ingest_age(league_id, season)
+        return age is not None and age <= max_age
+
+    def last_ingest_age(self, league_id: Optional[int] = None, season: Optional[int] = None) -> Optional[float]:
+        """Partition'ın son ingest'inden bu yana geçen süre (lig verilmezse en eski partition; yoksa None)"""
+        partitions = self.manifest()['partitions']
+        if league_id is not None:
+            info = partitions.get(self._partition_key(league_id, season))
+            ingested = [info.get('ingested_at', 0)] if info else []
+        else:
+            ingested = [p.get('ingested_at', 0) for p in partitions.values()]
+        return time.time() - min(ingested) if ingested else None
+
+    # ------------------------------------------------------------------
+    # Yazma (append-only)
+    # ------------------------------------------------------------------
+
+    def append(self, league_id: int, season: int, fixtures: Iterable[Dict[str, Any]],
+               details: Optional[Dict[int, Dict[str, Any]]] = None) -> int:
+        """
+        Partition'a yeni bir segment ekle
+
+        Args:
+            fixtures: API /fixtures kayıtları (bitmemiş ve zaten arşivde olanlar atlanır)
+            details: {fixture_id: {'statistics', 'events', 'lineups'}}
+
+        Returns:
+            Eklenen maç sayısı
+        """
+        with self._lock:
+            manifest = self.manifest()
+            key = self._partition_key(league_id, season)
+            info = manifest['partitions'].get(key) or {
+                'league_id': int(league_id), 'season': int(season),
+                'segments': 0, 'rows': 0, 'high_water': 0
+            }
+            known = set(self._partition_fixture_ids(league_id, season, info['segments']))
+
+            rows = []
+            for fixture in fixtures:
+                row = fixture_to_row(fixture)
+                if row is None or row['fixture_id'] in known:
+                    continue
+                row['league_id'] = row['league_id'] or int(league_id)
+                row['season'] = row['season'] or int(season)
+                known.add(row['fixture_id'])
+                rows.append(row)
+
+            info['ingested_at'] = time.time()
+            if rows:
+                rows.sort(key=lambda r: r['timestamp'])
+                segment = info['segments'] + 1
+                for row in rows:
+                    row['segment'] = segment
+
+                part_dir = self._partition_dir(league_id, season)
+                os.makedirs(part_dir, exist_ok=True)
+                base = os.path.join(part_dir, f"seg_{segment:05d}")
+
+                columns = {name: np.array([r[name] for r in rows], dtype=dtype)
+                           for name, dtype in NUMERIC_COLUMNS.items()}
+                columns.update({name: np.array([r[name] for r in rows], dtype=str)
+                                for name in TEXT_COLUMNS})
+                tmp_path = f"{base}.{os.getpid()}.tmp.npz"
+                np.savez_compressed(tmp_path, **columns)
+                os.replace(tmp_path, f"{base}.npz")
+
+                segment_details = {str(r['fixture_id']): details[r['fixture_id']]
+                                   for r in rows if details and r['fixture_id'] in details}
+                if segment_details:
+                    tmp_path = f"{base}.{os.getpid()}.tmp.json.gz"
+                    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                        json.dump(segment_details, f, ensure_ascii=False)
+                    os.replace(tmp_path, f"{base}.details.json.gz")
+
+                info['segments'] = segment
+                info['rows'] += len(rows)
+                info['high_water'] = max(info['high_water'], rows[-1]['timestamp'])
+
+            # Manifest en son yazılır: yarım kalan ingest okuyuculara görünmez
+            manifest['partitions'][key] = info
+            manifest['updated_at'] = datetime.now().isoformat()
+            self._write_manifest(manifest)
+            self._table = None
+            return len(rows)
+
+    def _load_segment(self, league_id: int, season: int, segment: int) -> Dict[str, np.ndarray]:
+        path = os.path.join(self._partition_dir(league_id, season), f"seg_{segment:05d}.npz")
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in COLUMNS}
+
+    def _partition_fixture_ids(self, league_id: int, season: int, segments: int) -> List[int]:
+        ids: List[int] = []
+        for segment in range(1, segments + 1):
+            ids.extend(self._load_segment(league_id, season, segment)['fixture_id'].tolist())
+        return ids
+
+    # ------------------------------------------------------------------
+    # Okuma + indeks
+    # ------------------------------------------------------------------
+
+    def _ensure_table(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            manifest = self.manifest()
+            if self._table is not None:
+                return self._table
+
+            parts = []
+            for info in manifest['partitions'].values():
+                for segment in range(1, info['segments'] + 1):
+                    parts.append(self._load_segment(info['league_id'], info['season'], segment))
+            table = _concat(parts)
+
+            # Zaman sıralı tek tablo
+            order = np.argsort(table['timestamp'], kind='stable')
+            table = {name: column[order] for name, column in table.items()}
+
+            # Takım → satır indeksi (her takımın maçları zaman sıralı)
+            n = len(table['fixture_id'])
+            team_ids = np.concatenate([table['home_id'], table['away_id']])
+            positions = np.concatenate([np.arange(n), np.arange(n)])
+            by_team = np.lexsort((positions, team_ids))
+            team_ids, positions = team_ids[by_team], positions[by_team]
+            uniques, starts = np.unique(team_ids, return_index=True)
+            bounds = np.append(starts, len(team_ids))
+            self._team_index = {
+                int(team_id): positions[bounds[i]:bounds[i + 1]]
+                for i, team_id in enumerate(uniques)
+            }
+            self._fixture_index = {int(fid): i for i, fid in enumerate(table['fixture_id'])}
+            self._table = table
+            return table
+
+    def rows(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        """Tablo pozisyonlarındaki satırlar (sözlük listesi)"""
+        table = self._ensure_table()
+        columns = {name: table[name][positions].tolist() for name in COLUMNS}
+        return [dict(zip(COLUMNS, values)) for values in zip(*(columns[name] for name in COLUMNS))]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zaman sıralı birleşik kolon tablosu (salt okunur kullanın)"""
+        return self._ensure_table()
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        """Manifest imzası; her ingest sonrası değişir (arşiv yoksa None)"""
+        self.manifest()
+        return self._manifest_sig
+
+    def __len__(self) -> int:
+        return len(self._ensure_table()['fixture_id'])
+
+    def get_fixture(self, fixture_id: int) -> Optional[Dict[str, Any]]:
+        self._ensure_table()
+        position = self._fixture_index.get(int(fixture_id))
+        return None if position is None else self.rows(np.array([position]))[0]
+
+    def team_history(self, team_id: int, limit: Optional[int] = None, before: Optional[int] = None,
+                     league_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Takımın arşivdeki maçları (en yeni başta)
+
+        Args:
+            limit: En fazla kaç maç
+            before: Bu unix zamanından önceki maçlar (geçmişe dönük replay için)
+            league_id: Sadece bu ligdeki maçlar
+        """
+        table = self._ensure_table()
+        positions = self._team_index.get(int(team_id))
+        if positions is None:
+            return []
+        if before is not None:
+            positions = positions[table['timestamp'][positions] < before]
+        if league_id is not None:
+            positions = positions[table['league_id'][positions] == int(league_id)]
+        positions = positions[::-1]
+        if limit is not None:
+            positions = positions[:limit]
+        return self.rows(positions)
+
+    def head_to_head(self, team_a: int, team_b: int, limit: Optional[int] = None,
+                     before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """İki takım arasındaki maçlar (en yeni başta, ev/deplasman fark etmez)"""
+        self._ensure_table()
+        positions_a = self._team_index.get(int(team_a))
+        positions_b = self._team_index.get(int(team_b))
+        if positions_a is None or positions_b is None:
+            return []
+        positions = np.intersect1d(positions_a, positions_b, assume_unique=True)
+        if before is not None:
+            positions = positions[self._table['timestamp'][positions] < before]
+        positions = positions[::-1]
+        if limit is not None:
+            positions = positions[:limit]
+        return self.rows(positions)
+
+    def league_window(self, league_id: int, season: Optional[int] = None, last: Optional[int] = None,
+                      since: Optional[int] = None, until: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ligin zaman penceresindeki maçları (en yeni başta)
+
+        Args:
+            season: None = tüm sezonlar
+            last: Son N maç
+            since / until: Unix zaman aralığı [since, until)
+        """
+        table = self._ensure_table()
+        mask = table['league_id'] == int(league_id)
+        if season is not None:
+            mask &= table['season'] == int(season)
+        if since is not None:
+            mask &= table['timestamp'] >= since
+        if until is not None:
+            mask &= table['timestamp'] < until
+        positions = np.flatnonzero(mask)[::-1]
+        if last is not None:
+            positions = positions[:last]
+        return self.rows(positions)
+
+    def get_details(self, fixture_id: int) -> Optional[Dict[str, Any]]:
+        """Maçın statistics / events / lineups verisi (arşivlenmediyse None)"""
+        row = self.get_fixture(fixture_id)
+        if row is None:
+            return None
+        path = os.path.join(self._partition_dir(row['league_id'], row['season']),
+                            f"seg_{row['segment']:05d}.details.json.gz")
+        with self._lock:
+            details = self._details_memo.get(path)
+            if details is None:
+                if not os.path.exists(path):
+                    return None
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    details = json.load(f)
+                if len(self._details_memo) >= 32:
+                    self._details_memo.pop(next(iter(self._details_memo)))
+                self._details_memo[path] = details
+        return details.get(str(fixture_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        partitions = self.manifest()['partitions']
+        self._ensure_table()
+        return {
+            'partitions': len(partitions),
+            'fixtures': sum(p['rows'] for p in partitions.values()),
+            'segments': sum(p['segments'] for p in partitions.values()),
+            'teams': len(self._team_index),
+            'last_ingest_age_s': self.last_ingest_age(),
+        }
+
+
+# ----------------------------------------------------------------------
+# Ingest
+# ----------------------------------------------------------------------
+
+def fetch_fixture_details(api_key: str, base_url: str, fixture_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """statistics / events / lineups - /fixtures?ids= ile 20'şerli paketler"""
+    import api_utils
+
+    details: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(fixture_ids), DETAILS_BATCH_SIZE):
+        batch = fixture_ids[start:start + DETAILS_BATCH_SIZE]
+        response, error = api_utils.make_api_request(
+            api_key, base_url, "fixtures", {'ids': '-'.join(str(i) for i in batch)}, skip_limit=True
+        )
+        if error or not response:
+            print(f"⚠️ Maç detayları alınamadı ({len(batch)} maç): {error}")
+            continue
+        for item in response:
+            fixture_id = (item.get('fixture') or {}).get('id')
+            if fixture_id is not None:
+                details[int(fixture_id)] = {
+                    'statistics': item.get('statistics') or [],
+                    'events': item.get('events') or [],
+                    'lineups': item.get('lineups') or [],
+                }
+    return details
+
+
+def ingest_league(api_key: str, base_url: str, league_id: int, season: int,
+                  archive: Optional[FixtureArchive] = None, with_details: bool = True) -> int:
+    """
+    Partition'ın high-water mark'ından yeni bitmiş maçları arşive ekle
+
+    Returns:
+        Eklenen maç sayısı
+    """
+    import api_utils
+
+    archive = archive if archive is not None else get_archive()
+    high_water = archive.high_water_mark(league_id, season)
+    params: Dict[str, Any] = {'league': league_id, 'season': season, 'status': '-'.join(FINISHED_STATUSES)}
+    if high_water:
+        # Aynı gün oynanan geç maçlar da gelsin diye gün başından; tekrarlar append'de elenir
+        params['from'] = datetime.fromtimestamp(high_water, tz=timezone.utc).date().isoformat()
+        params['to'] = date.today().isoformat()
+
+    fixtures, error = api_utils.make_api_request(api_key, base_url, "fixtures", params, skip_limit=True)
+    if error:
+        print(f"❌ Lig {league_id}/{season} maçları alınamadı: {error}")
+        return 0
+
+    new_fixtures = [f for f in fixtures or []
+                    if (f.get('fixture') or {}).get('timestamp', 0) >= high_water
+                    and archive.get_fixture(f['fixture']['id']) is None]
+    details = None
+    if with_details and new_fixtures:
+        details = fetch_fixture_details(api_key, base_url, [f['fixture']['id'] for f in new_fixtures])
+
+    added = archive.append(league_id, season, new_fixtures, details)
+    print(f"📦 Lig {league_id}/{season}: {added} yeni maç arşivlendi")
+    if added:
+        invalidate_finished(new_fixtures)
+    return added
+
+
+def invalidate_finished(fixtures: Iterable[Dict[str, Any]], cache=None) -> int:
+    """Biten maçlara bağlı cache kayıtlarını sil (cache: CacheManager, None = global cache)"""
+    try:
+        from advanced_cache import CacheInvalidator
+        from cache_manager import get_cache
+    except ImportError:
+        return 0
+    cache = cache or get_cache()
+    deleted = 0
+    for fixture in fixtures:
+        try:
+            deleted += CacheInvalidator.fixture_finished(cache, fixture) or 0
+        except Exception as e:
+            print(f"⚠️ Maç {(fixture.get('fixture') or {}).get('id')} cache'i temizlenemedi: {e}")
+    return deleted
+
+
+def ingest(api_key: str, base_url: str, league_ids: Iterable[int], seasons: Iterable[int],
+           archive: Optional[FixtureArchive] = None, with_details: bool = True) -> int:
+    """Birden fazla lig/sezon için artımlı ingest"""
+    archive = archive if archive is not None else get_archive()
+    return sum(
+        ingest_league(api_key, base_url, league_id, season, archive, with_details)
+        for league_id in league_ids for season in seasons
+    )
+
+
+def current_season(today: Optional[date] = None) -> int:
+    today = today or date.today()
+    return today.year if today.month > 6 else today.year - 1
+
+
+# Global instance
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> FixtureArchive:
+    """Global FixtureArchive instance'ı getir"""
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = FixtureArchive()
+    return _archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bitmiş maç arşivi")
+    parser.add_argument('--ingest', action='store_true', help="Yeni bitmiş maçları arşive ekle")
+    parser.add_argument('--stats', action='store_true', help="Arşiv özetini yazdır")
+    parser.add_argument('-l', '--leagues', type=int, nargs='*', help="Lig ID'leri (varsayılan: takip edilen ligler)")
+    parser.add_argument('-s', '--seasons', type=int, nargs='*', help="Sezonlar (varsayılan: güncel sezon)")
+    parser.add_argument('--no-details', action='store_true', help="İstatistik/olay/kadro detaylarını çekme")
+    args = parser.parse_args()
+
+    if args.ingest:
+        from precompute_advanced_metrics import load_api_key
+        from update_elo import INTERESTING_LEAGUES
+
+        api_key = load_api_key()
+        if not api_key:
+            print("❌ API anahtarı bulunamadı")
+            return
+        league_ids = args.leagues or list(INTERESTING_LEAGUES)
+        seasons = args.seasons or [current_season()]
+        added = ingest(api_key, BASE_URL, league_ids, seasons, with_details=not args.no_details)
+        print(f"✅ Toplam {added} maç arşivlendi")
+        try:
+            # Yeni sonuçlar, defterdeki model bazlı tahminlerle online ensemble'a işlenir
+            from ensemble_manager import get_online_ensemble
+            print(f"⚖️ Online ensemble: {get_online_ensemble().settle_from_ledger()} maç işlendi")
+        except Exception as e:
+            print(f"⚠️ Online ensemble güncellenemedi: {e}")
+
+    if args.stats or not args.ingest:
+        for key, value in get_archive().get_stats().items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    from upstream_rate_limiter import PRIORITY_BATCH, request_priority
+    with request_priority(PRIORITY_BATCH):
+        main()
@@ -108,48 +108,21 @@ def get_opponent_strengths_from_api(
     """
     Rakip takımların güç seviyelerini API'den al
     
+    Rakip başına takım istatistiği çekmek yerine ligin puan durumu tek istekle
+    alınır ve OpponentStrengthService belleğinden yanıtlanır.
+    
     Returns:
         List of strength scores (0.0-1.0) for each opponent
     """
-    import api_utils
-    
-    strengths = []
-    
-    for opponent_id in opponent_ids:
-        try:
-            # Rakip istatistiklerini al
-            stats_data, error = api_utils.get_team_statistics(
-                api_key=api_key,
-                base_url=base_url,
-                team_id=opponent_id,
-                league_id=league_id,
-                season=season,
-                skip_limit=True
-            )
-            
-            if error or not stats_data:
-                # Varsayılan: ortalama güç
-                strengths.append(0.5)
-                continue
-            
-            # Basit güç hesabı: PPG (points per game)
-            fixtures_played = stats_data.get('fixtures', {}).get('played', {}).get('total', 0)
-            wins = stats_data.get('fixtures', {}).get('wins', {}).get('total', 0)
-            draws = stats_data.get('fixtures', {}).get('draws', {}).get('total', 0)
-            
-            if fixtures_played > 0:
-                ppg = (wins * 3 + draws) / fixtures_played
-                # Normalize to 0-1 (3 PPG = 1.0, 0 PPG = 0.0)
-                strength = ppg / 3.0
-                strengths.append(strength)
-            else:
-                strengths.append(0.5)
-                
-        except Exception as e:
-            print(f"⚠️ Opponent strength hesaplama hatası: {e}")
-            strengths.append(0.5)
+    from opponent_strength import get_opponent_strength_service
     
-    return strengths
+    try:
+        return get_opponent_strength_service().get_strengths(
+            api_key, base_url, opponent_ids, league_id, season
+        )
+    except Exception as e:
+        print(f"⚠️ Opponent strength hesaplama hatası: {e}")
+        return [0.5] * len(opponent_ids)
 
 
 # Test
@@ -29,6 +29,9 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import api_replay
+from upstream_rate_limiter import UpstreamRateLimited
+
 # Logger yapılandırması
 logger = logging.getLogger(__name__)
 
@@ -69,7 +72,7 @@ class APIFootballV3:
             
             logger.info(f"API Request: {endpoint} with params: {params}")
             
-            response = self.session.get(url, params=params or {}, timeout=30)
+            response = api_replay.http_get(self.session.get, url, endpoint, params=params or {}, timeout=30)
             
             # Rate limit bilgilerini yakala
             rate_limit_info = {
@@ -115,6 +118,8 @@ class APIFootballV3:
                 raw_response=data
             )
             
+        except UpstreamRateLimited as e:
+            return APIResponse(status=APIStatus.RATE_LIMIT, error=str(e))
         except requests.exceptions.Timeout:
             return APIResponse(status=APIStatus.ERROR, error="Request timeout")
         except requests.exceptions.ConnectionError:
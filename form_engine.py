@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+Form Engine
+===========
+Ligdeki tüm takımların güncel form vektörleri (ağırlıklı form, momentum,
+gol farkı trendi, rakip ayarlı skor) tek geçişte, numpy ile.
+
+- Her takım için son N maçın (tüm turnuvalar, en yeni başta) gol / yenilen gol /
+  iç saha / rakip gücü matrisleri maç arşivinden (fixture_archive) kurulur
+- Rakip gücü arşivdeki lig-sezon PPG / 3'tür (OpponentStrengthService ile aynı
+  ölçek); ligde olmayan rakipler lig ortalamasını alır
+- Formüller AdvancedFormCalculator, calculate_momentum_factor ve
+  calculate_weighted_stats ile aynıdır; tüm takımlar ve tüm konum filtreleri
+  (all / home / away) maskeli matris işlemleriyle birlikte hesaplanır
+- Tablo (lig, sezon, arşiv sürümü) anahtarıyla bellekte tutulur; maç günü
+  bitip arşive yeni maçlar eklenince sürüm değişir ve tablo yeniden kurulur
+
+Usage:
+    from form_engine import get_form_engine
+
+    form = get_form_engine().get_team_form(645, league_id=203, season=2025)
+    form['form']['home']['form_factor'], form['momentum'], form['goal_diff_trend']
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from advanced_form_calculator import AdvancedFormCalculator
+from fixture_archive import FixtureArchive, get_archive
+
+FORM_WINDOW = 6         # run_core_analysis: son 6 maç
+FORM_NUM_MATCHES = 10   # calculate_form_factor num_matches (güven paydası)
+MOMENTUM_MATCHES = 5
+MOMENTUM_MIN_MATCHES = 3
+TREND_MIN_MATCHES = 4
+
+# Konum filtresi → is_home değeri (None = tüm maçlar)
+LOCATIONS = {'all': None, 'home': 1.0, 'away': 0.0}
+
+# calculate_momentum_factor eşikleri: (son 5 maç |gol farkı|, pozitif çarpan, negatif çarpan)
+MOMENTUM_STEPS = ((10, 1.08, 0.92), (6, 1.04, 0.96))
+
+
+def _points(goals_for: np.ndarray, goals_against: np.ndarray) -> np.ndarray:
+    return np.where(goals_for > goals_against, AdvancedFormCalculator.RESULT_POINTS['win'],
+                    np.where(goals_for == goals_against, AdvancedFormCalculator.RESULT_POINTS['draw'],
+                             AdvancedFormCalculator.RESULT_POINTS['loss']))
+
+
+def _league_strengths(table: Dict[str, np.ndarray], in_league: np.ndarray,
+                      teams: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Lig-sezon maçlarından takım başına PPG / 3 ve lig ortalaması"""
+    home_goals, away_goals = table['home_goals'][in_league], table['away_goals'][in_league]
+    home_index = np.searchsorted(teams, table['home_id'][in_league])
+    away_index = np.searchsorted(teams, table['away_id'][in_league])
+    home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    size = len(teams)
+    points = (np.bincount(home_index, weights=home_points, minlength=size)
+              + np.bincount(away_index, weights=away_points, minlength=size))
+    played = np.bincount(home_index, minlength=size) + np.bincount(away_index, minlength=size)
+    strength = np.round(points / played / 3.0, 4)
+    return strength, round(float(strength.mean()), 4)
+
+
+def form_components(goals_for: np.ndarray, goals_against: np.ndarray, strength: np.ndarray,
+                    mask: np.ndarray, num_matches: int = FORM_NUM_MATCHES) -> Dict[str, np.ndarray]:
+    """
+    AdvancedFormCalculator bileşenleri, tüm takımlar için birlikte
+
+    Args:
+        goals_for, goals_against, strength: (takım, maç) matrisleri, en yeni maç başta
+        mask: Hesaba giren maçlar (konum filtresi); sıkıştırılmış sırada ilk num_matches alınır
+
+    Returns:
+        Yuvarlanmamış satır vektörleri: 'matches', 'result', 'opponent', 'goal_diff',
+        'trend_diff' (maç < 4 → NaN), 'goal_diff_trend'
+    """
+    order = np.cumsum(mask, axis=1) - 1
+    mask = mask & (order < num_matches)
+    n = mask.sum(axis=1)
+
+    points = np.where(mask, _points(goals_for, goals_against), 0.0)
+    goal_diff = np.where(mask, goals_for - goals_against, 0.0)
+    # Ağırlık: en yeni maç n, en eski 1
+    recency = np.where(mask, n[:, None] - order, 0).astype(np.float64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total_weight = recency.sum(axis=1)
+        result = (points * recency).sum(axis=1) / total_weight / 3.0 * 100
+
+        avg_strength = np.where(mask, strength, 0.0).sum(axis=1) / n
+        factor = np.clip(strength / avg_strength[:, None], 0.7, 1.3)
+        opponent = (np.where(mask, points * factor, 0.0) * recency).sum(axis=1) / total_weight / 3.0 * 100
+        opponent = np.where(avg_strength > 0, opponent, result)
+
+        clipped = np.clip(goal_diff, -5, 5)
+        goal_diff_score = ((clipped * recency).sum(axis=1) / total_weight + 5) / 10 * 100
+
+        # Trend: ilk yarı (en yeni) vs ikinci yarı
+        mid = (n // 2)[:, None]
+        recent = mask & (order < mid)
+        older = mask & (order >= mid) & (order < 2 * mid)
+        half = mid[:, 0]
+        trend_diff = (np.where(recent, points, 0.0).sum(axis=1) / half
+                      - np.where(older, points, 0.0).sum(axis=1) / half)
+        goal_diff_trend = (np.where(recent, goal_diff, 0.0).sum(axis=1) / half
+                           - np.where(older, goal_diff, 0.0).sum(axis=1) / half)
+    enough = n >= TREND_MIN_MATCHES
+    return {
+        'matches': n,
+        'result': result,
+        'opponent': opponent,
+        'goal_diff': goal_diff_score,
+        'trend_diff': np.where(enough, trend_diff, np.nan),
+        'goal_diff_trend': np.where(enough, goal_diff_trend, 0.0),
+    }
+
+
+def momentum_factors(goals_for: np.ndarray, goals_against: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """calculate_momentum_factor: son 5 maçın gol farkı toplamı → 0.92-1.08"""
+    recent = valid[:, :MOMENTUM_MATCHES]
+    total = np.where(recent, goals_for[:, :MOMENTUM_MATCHES] - goals_against[:, :MOMENTUM_MATCHES], 0.0).sum(axis=1)
+    momentum = np.ones(len(total))
+    for threshold, positive, negative in reversed(MOMENTUM_STEPS):
+        momentum = np.where(total >= threshold, positive, momentum)
+        momentum = np.where(total <= -threshold, negative, momentum)
+    return np.where(valid.sum(axis=1) >= MOMENTUM_MIN_MATCHES, momentum, 1.0)
+
+
+def weighted_goal_averages(goals_for: np.ndarray, goals_against: np.ndarray,
+                           mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """calculate_weighted_stats gol ortalamaları (liste sırasında i + 1 ağırlık, maç yoksa 0)"""
+    weights = np.where(mask, np.cumsum(mask, axis=1), 0).astype(np.float64)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scored = (np.where(mask, goals_for, 0.0) * weights).sum(axis=1) / total
+        conceded = (np.where(mask, goals_against, 0.0) * weights).sum(axis=1) / total
+    return np.where(total > 0, scored, 0.0), np.where(total > 0, conceded, 0.0)
+
+
+def _form_record(calculator: AdvancedFormCalculator, components: Dict[str, np.ndarray], i: int,
+                 form_string: str, num_matches: int) -> Dict[str, Any]:
+    """Satırı calculate_advanced_form çıktı biçimine getir (aynı yuvarlama)"""
+    n = int(components['matches'][i])
+    if n == 0:
+        return calculator._get_default_form()
+    result_score = round(float(components['result'][i]), 2)
+    opponent_score = round(float(components['opponent'][i]), 2)
+    goal_diff_score = round(float(components['goal_diff'][i]), 2)
+    trend_diff = float(components['trend_diff'][i])
+    if np.isnan(trend_diff):
+        trend_score, trend = 50.0, 'stable'
+    else:
+        trend = 'improving' if trend_diff > 0.5 else 'declining' if trend_diff < -0.5 else 'stable'
+        trend_score = round((max(-3, min(3, trend_diff)) + 3) / 6 * 100, 2)
+
+    weights = calculator.WEIGHTS
+    composite = (result_score * weights['result'] + opponent_score * weights['opponent']
+                 + goal_diff_score * weights['goal_diff'] + trend_score * weights['trend'])
+    return {
+        'form_factor': calculator._score_to_factor(composite),
+        'form_score': composite,
+        'form_string': form_string,
+        'trend': trend,
+        'confidence': min(1.0, n / num_matches),
+        'breakdown': {
+            'result_score': result_score,
+            'opponent_adjusted_score': opponent_score,
+            'goal_difference_score': goal_diff_score,
+            'trend_score': trend_score,
+            'matches_analyzed': n
+        }
+    }
+
+
+def _form_string(goals_for: np.ndarray, goals_against: np.ndarray, mask: np.ndarray, limit: int = 5) -> str:
+    chars = []
+    for gf, ga in zip(goals_for[mask][:limit], goals_against[mask][:limit]):
+        chars.append('W' if gf > ga else 'D' if gf == ga else 'L')
+    return ''.join(chars)
+
+
+def build_league_form(archive: FixtureArchive, league_id: int, season: int,
+                      window: int = FORM_WINDOW, num_matches: int = FORM_NUM_MATCHES,
+                      until: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Ligin tüm takımlarının form vektörleri (tek geçiş)
+
+    Args:
+        until: Sadece bu unix zamanından önceki maçlar (geçmiş maç replay'i)
+
+    Returns:
+        {team_id: {'matches', 'form_string', 'momentum', 'goal_diff_trend',
+                   'weighted': {'home'|'away': {'w_avg_goals_for', 'w_avg_goals_against'}},
+                   'form': {'all'|'home'|'away': calculate_advanced_form çıktısı}}}
+    """
+    table = archive.columns()
+    if until is not None:
+        # Tablo zaman sıralı: o ana kadarki önek (rakip gücü de o anki puan tablosundan)
+        stop = int(np.searchsorted(table['timestamp'], until, side='left'))
+        table = {name: column[:stop] for name, column in table.items()}
+    in_league = np.flatnonzero((table['league_id'] == int(league_id)) & (table['season'] == int(season)))
+    if len(in_league) == 0:
+        return {}
+    teams = np.unique(np.concatenate([table['home_id'][in_league], table['away_id'][in_league]]))
+    size = len(teams)
+    strength, league_average = _league_strengths(table, in_league, teams)
+
+    # Takım bakış açısı: arşivdeki her maç iki satır (lig dışı maçlar da forma girer)
+    n_rows = len(table['fixture_id'])
+    positions = np.concatenate([np.arange(n_rows), np.arange(n_rows)])
+    team_ids = np.concatenate([table['home_id'], table['away_id']])
+    opponent_ids = np.concatenate([table['away_id'], table['home_id']])
+    goals_for = np.concatenate([table['home_goals'], table['away_goals']]).astype(np.float64)
+    goals_against = np.concatenate([table['away_goals'], table['home_goals']]).astype(np.float64)
+    is_home = np.concatenate([np.ones(n_rows), np.zeros(n_rows)])
+
+    keep = np.isin(team_ids, teams)
+    index = np.searchsorted(teams, team_ids[keep])
+    # Takım içinde en yeni maç başta (tablo zaman sıralı: team_history ile aynı sıra)
+    order = np.lexsort((-positions[keep], index))
+    index = index[order]
+    rank = np.arange(len(index)) - np.searchsorted(index, index)
+    selected = rank < window
+    rows, columns = index[selected], rank[selected]
+
+    def matrix(values: np.ndarray) -> np.ndarray:
+        out = np.full((size, window), np.nan)
+        out[rows, columns] = values[keep][order][selected]
+        return out
+
+    gf, ga, home = matrix(goals_for), matrix(goals_against), matrix(is_home)
+    opponents = opponent_ids[keep][order][selected]
+    opponent_index = np.clip(np.searchsorted(teams, opponents), 0, size - 1)
+    opponent_strength = np.full((size, window), np.nan)
+    opponent_strength[rows, columns] = np.where(teams[opponent_index] == opponents,
+                                                strength[opponent_index], league_average)
+    valid = ~np.isnan(gf)
+
+    masks = {name: valid if flag is None else valid & (home == flag) for name, flag in LOCATIONS.items()}
+    components = {name: form_components(gf, ga, opponent_strength, mask, num_matches)
+                  for name, mask in masks.items()}
+    momentum = momentum_factors(gf, ga, valid)
+    weighted = {name: weighted_goal_averages(gf, ga, masks[name]) for name in ('home', 'away')}
+
+    calculator = AdvancedFormCalculator()
+    forms: Dict[int, Dict[str, Any]] = {}
+    for i, team_id in enumerate(teams.tolist()):
+        forms[int(team_id)] = {
+            'matches': int(valid[i].sum()),
+            'form_string': _form_string(gf[i], ga[i], valid[i]),
+            'momentum': float(momentum[i]),
+            'goal_diff_trend': round(float(components['all']['goal_diff_trend'][i]), 3),
+            'weighted': {
+                name: {'w_avg_goals_for': float(scored[i]), 'w_avg_goals_against': float(conceded[i])}
+                for name, (scored, conceded) in weighted.items()
+            },
+            'form': {
+                name: _form_record(calculator, components[name], i,
+                                   _form_string(gf[i], ga[i], masks[name][i]), num_matches)
+                for name in LOCATIONS
+            },
+        }
+    return forms
+
+
+class FormEngine:
+    """Lig form tabloları (bellekte, arşiv sürümüyle geçersizlenir)"""
+
+    def __init__(self, archive: Optional[FixtureArchive] = None, window: int = FORM_WINDOW):
+        """
+        Args:
+            archive: Kaynak arşiv (None = global arşiv)
+            window: Takım başına tutulan son maç sayısı
+        """
+        self._archive = archive
+        self.window = window
+        self._tables: Dict[Tuple[int, int], Tuple[Any, Dict[int, Dict[str, Any]]]] = {}
+        # Replay tabloları her maç anı için ayrı; sadece sonuncusu tutulur (iki takım aynı anı okur)
+        self._point_in_time: Optional[Tuple[Tuple[int, int, int], Any, Dict[int, Dict[str, Any]]]] = None
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'builds': 0}
+
+    @property
+    def archive(self) -> FixtureArchive:
+        return self._archive or get_archive()
+
+    def get_league_form(self, league_id: int, season: int, until: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Ligin form tablosu (arşivde partition yoksa boş)
+
+        Args:
+            until: Sadece bu unix zamanından önceki maçlar (geçmiş maç replay'i)
+        """
+        if not self.archive.partition_info(league_id, season):
+            return {}
+        key = (int(league_id), int(season))
+        # Lig dışı maçlar da forma girdiğinden tüm arşivin sürümü
+        version = self.archive.version()
+
+        if until is not None:
+            with self._lock:
+                memo = self._point_in_time
+                if memo is not None and memo[0] == key + (int(until),) and memo[1] == version:
+                    self.stats['memory_hits'] += 1
+                    return memo[2]
+                self.stats['builds'] += 1
+                forms = build_league_form(self.archive, league_id, season, window=self.window, until=until)
+                self._point_in_time = (key + (int(until),), version, forms)
+                return forms
+
+        memo = self._tables.get(key)
+        if memo is not None and memo[0] == version:
+            self.stats['memory_hits'] += 1
+            return memo[1]
+
+        with self._lock:
+            memo = self._tables.get(key)
+            if memo is not None and memo[0] == version:
+                self.stats['memory_hits'] += 1
+                return memo[1]
+            self.stats['builds'] += 1
+            forms = build_league_form(self.archive, league_id, season, window=self.window)
+            self._tables[key] = (version, forms)
+            return forms
+
+    def get_team_form(self, team_id: int, league_id: int, season: int,
+                      until: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Takımın form vektörü (arşivde pencere kadar maçı yoksa None → analiz maç listesinden hesaplar)"""
+        if team_id is None:
+            return None
+        form = self.get_league_form(league_id, season, until).get(int(team_id))
+        if form is None or form['matches'] < self.window:
+            return None
+        return form
+
+
+# Global instance
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_form_engine() -> FormEngine:
+    """Global FormEngine instance'ı getir"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = FormEngine()
+    return _engine
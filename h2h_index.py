@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Head-to-Head Index
+==================
+Maç arşivinden (fixture_archive) türetilen, sırasız takım çifti anahtarlı H2H indeksi.
+
+- Anahtar: (küçük_id, büyük_id) → ev/deplasman sırası fark etmez
+- Her çift için önceden toplanmış galibiyet/beraberlik/mağlubiyet ve gol toplamları
+  + son H2H_KEEP_MATCHES maç
+- Arşive yeni segment eklendiğinde sadece yeni maçlar indekse eklenir
+- summary() çıktısı analysis_logic.process_h2h_data ile aynı biçimdedir; arşivde istenenden
+  az karşılaşma varsa 'partial' True döner (arşiv çoğunlukla sadece güncel sezonları kapsar)
+- limit en fazla H2H_KEEP_MATCHES olabilir (daha büyük değerler buna indirilir)
+
+Usage:
+    from h2h_index import get_h2h_index
+
+    index = get_h2h_index()
+    h2h_data = index.summary(645, 611, limit=10)   # ağ çağrısı yok; h2h_data['partial'] eksik örnek
+    if index.covers(645, 611, 10):                 # en az 10 karşılaşma arşivde
+        fixtures = index.fixtures(645, 611, limit=10)  # API /fixtures/headtohead biçimi
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fixture_archive import FixtureArchive, get_archive, row_to_fixture
+
+H2H_KEEP_MATCHES = 20
+
+
+def clamp_limit(limit: int) -> int:
+    """Çift başına saklanan son maç sayısını aşan limit'i H2H_KEEP_MATCHES'e indir"""
+    return min(int(limit), H2H_KEEP_MATCHES)
+
+
+def pair_key(team_a: int, team_b: int) -> Tuple[int, int]:
+    """Sırasız takım çifti anahtarı"""
+    team_a, team_b = int(team_a), int(team_b)
+    return (team_a, team_b) if team_a <= team_b else (team_b, team_a)
+
+
+class H2HIndex:
+    """Sırasız takım çifti → önceden toplanmış H2H kaydı"""
+
+    def __init__(self, archive: Optional[FixtureArchive] = None):
+        """
+        Args:
+            archive: Kaynak arşiv (None = global arşiv)
+        """
+        self.archive = archive or get_archive()
+        self._pairs: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._seen = np.empty(0, dtype=np.int64)
+        self._manifest_sig = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Arşivde indekslenmemiş maçları ekle
+
+        Returns:
+            Eklenen maç sayısı
+        """
+        with self._lock:
+            signature = self.archive.version()
+            if signature is not None and signature == self._manifest_sig:
+                return 0
+
+            table = self.archive.columns()
+            fresh = np.flatnonzero(~np.isin(table['fixture_id'], self._seen))
+            if len(fresh):
+                self._add(table, fresh)
+                self._seen = np.union1d(self._seen, table['fixture_id'][fresh])
+            self._manifest_sig = signature
+            return len(fresh)
+
+    def _add(self, table: Dict[str, np.ndarray], positions: np.ndarray):
+        home, away = table['home_id'][positions].astype(np.int64), table['away_id'][positions].astype(np.int64)
+        home_goals, away_goals = table['home_goals'][positions], table['away_goals'][positions]
+        low = np.minimum(home, away)
+        high = np.maximum(home, away)
+        low_is_home = home == low
+        low_goals = np.where(low_is_home, home_goals, away_goals).astype(np.int64)
+        high_goals = np.where(low_is_home, away_goals, home_goals).astype(np.int64)
+
+        # Çift başına tek geçişte toplama
+        codes = (low << 32) | high
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        size = len(uniques)
+        played = np.bincount(inverse, minlength=size)
+        low_wins = np.bincount(inverse, weights=low_goals > high_goals, minlength=size)
+        high_wins = np.bincount(inverse, weights=high_goals > low_goals, minlength=size)
+        low_total = np.bincount(inverse, weights=low_goals, minlength=size)
+        high_total = np.bincount(inverse, weights=high_goals, minlength=size)
+
+        # Son maç listeleri: çift içinde en yeni başta
+        order = np.lexsort((-table['timestamp'][positions], inverse))
+        bounds = np.searchsorted(inverse[order], np.arange(size + 1))
+        rows = self.archive.rows(positions[order])
+
+        for i, code in enumerate(uniques.tolist()):
+            key = (code >> 32, code & 0xFFFFFFFF)
+            record = self._pairs.setdefault(key, {
+                'played': 0, 'low_wins': 0, 'draws': 0, 'high_wins': 0,
+                'low_goals': 0, 'high_goals': 0, 'matches': []
+            })
+            wins = int(low_wins[i]), int(high_wins[i])
+            record['played'] += int(played[i])
+            record['low_wins'] += wins[0]
+            record['high_wins'] += wins[1]
+            record['draws'] += int(played[i]) - wins[0] - wins[1]
+            record['low_goals'] += int(low_total[i])
+            record['high_goals'] += int(high_total[i])
+            matches = record['matches'] + rows[bounds[i]:bounds[i + 1]]
+            matches.sort(key=lambda row: row['timestamp'], reverse=True)
+            record['matches'] = matches[:H2H_KEEP_MATCHES]
+
+    def get_record(self, team_a: int, team_b: int) -> Optional[Dict[str, Any]]:
+        """Çiftin ham kaydı (arşivde karşılaşma yoksa None)"""
+        self.refresh()
+        return self._pairs.get(pair_key(team_a, team_b))
+
+    def covers(self, team_a: int, team_b: int, limit: int) -> bool:
+        """
+        Arşivde en az limit (en fazla H2H_KEEP_MATCHES) karşılaşma var mı
+
+        Arşiv sadece ingest edilmiş lig-sezonları (çoğunlukla güncel sezon) kapsar; daha az
+        karşılaşma eksik bir örnektir ve /fixtures/headtohead listesinin yerini tutmaz.
+        """
+        record = self.get_record(team_a, team_b)
+        return record is not None and record['played'] >= clamp_limit(limit)
+
+    def fixtures(self, team_a: int, team_b: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Son karşılaşmalar (API /fixtures/headtohead biçiminde, en yeni başta)"""
+        record = self.get_record(team_a, team_b)
+        if record is None:
+            return []
+        return [row_to_fixture(row) for row in record['matches'][:clamp_limit(limit)]]
+
+    def summary(self, team_a: int, team_b: int, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        team_a bakış açısından H2H özeti (process_h2h_data biçimi)
+
+        Args:
+            limit: Son N maç (en fazla H2H_KEEP_MATCHES; None veya kayıttaki maç sayısından
+                   büyükse tüm arşiv toplamları)
+
+        Returns:
+            Özet + 'partial' (arşivde limit'ten az karşılaşma var) veya None (karşılaşma yok)
+        """
+        record = self.get_record(team_a, team_b)
+        if record is None:
+            return None
+        if limit is not None:
+            limit = clamp_limit(limit)
+
+        team_a = int(team_a)
+        a_is_low = team_a == pair_key(team_a, team_b)[0]
+        if limit is None or limit >= record['played']:
+            total = record['played']
+            wins_low, wins_high, draws = record['low_wins'], record['high_wins'], record['draws']
+            goals_low, goals_high = record['low_goals'], record['high_goals']
+            matches = record['matches'][:limit] if limit else record['matches']
+        else:
+            # Son N maç saklanan listeden (en fazla H2H_KEEP_MATCHES satır)
+            matches = record['matches'][:limit]
+            total = len(matches)
+            wins_low = wins_high = draws = goals_low = goals_high = 0
+            for row in matches:
+                home_is_low = row['home_id'] <= row['away_id']
+                low_score = row['home_goals'] if home_is_low else row['away_goals']
+                high_score = row['away_goals'] if home_is_low else row['home_goals']
+                goals_low += low_score
+                goals_high += high_score
+                wins_low += low_score > high_score
+                wins_high += high_score > low_score
+                draws += low_score == high_score
+
+        wins_a, wins_b = (wins_low, wins_high) if a_is_low else (wins_high, wins_low)
+        goals_a, goals_b = (goals_low, goals_high) if a_is_low else (goals_high, goals_low)
+        return {
+            "summary": {"total_matches": total, "wins_a": int(wins_a), "draws": int(draws), "wins_b": int(wins_b)},
+            "goals": {"goals_a": int(goals_a), "goals_b": int(goals_b),
+                      "avg_goals_a": goals_a / total if total > 0 else 0,
+                      "avg_goals_b": goals_b / total if total > 0 else 0},
+            "recent_matches": [
+                {
+                    "Tarih": datetime.fromtimestamp(row['timestamp']).strftime('%d.%m.%Y'),
+                    "Ev Sahibi": row['home_name'],
+                    "Skor": f"{row['home_goals']} - {row['away_goals']}",
+                    "Deplasman": row['away_name']
+                }
+                for row in matches
+            ],
+            "source": "archive",
+            "partial": limit is not None and total < limit
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        self.refresh()
+        return {'pairs': len(self._pairs), 'indexed_fixtures': int(len(self._seen))}
+
+
+# Global instance
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_h2h_index() -> H2HIndex:
+    """Global H2HIndex instance'ı getir"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = H2HIndex()
+    return _index
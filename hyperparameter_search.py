@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Hyperparameter Search
+=====================
+Successive halving tuner used by ModelTrainer:
+- Candidates are scored on a small n_estimators budget first; only the best
+  1/eta survive to the next (eta x larger) budget
+- Fold evaluations run in a process pool (one estimator thread per worker)
+- XGBoost folds early-stop on a stratified slice of the training part; the
+  scored fold never influences the tree count
+- Every (dataset + split fingerprint, model, params, budget, fold) score is
+  cached in SQLite, so re-running on the same data and folds is free
+- Best configurations of previous runs are seeded into the next search, which
+  then samples far fewer fresh candidates (retraining after a matchday)
+
+Usage:
+    from hyperparameter_search import HalvingSearch
+
+    search = HalvingSearch('xgboost', cache_path='models/tuning_cache.db')
+    result = search.fit(X, y)
+    result['best_params'], result['best_score'], result['best_model']
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+
+# Resource (n_estimators) is tuned by the halving schedule, not sampled
+PARAM_SPACES = {
+    'xgboost': {
+        'max_depth': [4, 6, 8],
+        'learning_rate': [0.01, 0.05, 0.1],
+        'subsample': [0.7, 0.8, 0.9],
+        'colsample_bytree': [0.7, 0.8, 0.9]
+    },
+    'random_forest': {
+        'max_depth': [8, 10, 12],
+        'min_samples_split': [3, 5, 7],
+        'min_samples_leaf': [1, 2, 3]
+    }
+}
+MAX_RESOURCE = {'xgboost': 300, 'random_forest': 200}
+EARLY_STOPPING_ROUNDS = 20
+# Share of each training fold held back for XGBoost early stopping
+EARLY_STOPPING_FRACTION = 0.2
+
+
+def dataset_fingerprint(X: np.ndarray, y: np.ndarray) -> str:
+    """Stable hash of the training data (shape, dtype and values)"""
+    digest = hashlib.sha1()
+    for array in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def split_fingerprint(folds: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> str:
+    """Hash of the (fit, early-stopping, test) indices; differs with cv_folds / random_state"""
+    digest = hashlib.sha1()
+    for fold in folds:
+        for indices in fold:
+            digest.update(np.asarray(indices, dtype=np.int64).tobytes())
+            digest.update(b'|')
+    return digest.hexdigest()[:16]
+
+
+def _early_stopping_split(train_idx: np.ndarray, y: np.ndarray, random_state: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Carve the early-stopping set out of the training fold (stratified when possible)"""
+    try:
+        fit_idx, stop_idx = train_test_split(train_idx, test_size=EARLY_STOPPING_FRACTION,
+                                             stratify=y[train_idx], random_state=random_state)
+    except ValueError:  # a class with a single sample
+        fit_idx, stop_idx = train_test_split(train_idx, test_size=EARLY_STOPPING_FRACTION,
+                                             random_state=random_state)
+    return np.sort(fit_idx), np.sort(stop_idx)
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=float)
+
+
+def build_estimator(model_name: str, params: Dict[str, Any], n_estimators: int, random_state: int = 42):
+    """Estimator for one evaluation (single-threaded, the pool parallelizes)"""
+    if model_name == 'xgboost':
+        from xgboost import XGBClassifier
+        return XGBClassifier(
+            objective='multi:softprob',
+            num_class=3,
+            n_estimators=n_estimators,
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            eval_metric='mlogloss',
+            random_state=random_state,
+            n_jobs=1,
+            **params
+        )
+    if model_name == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=1, **params)
+    raise ValueError(f"Unknown model for tuning: {model_name}")
+
+
+# Worker state: the dataset is shipped once per worker, not once per task
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray):
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+
+
+def _evaluate(task: Tuple) -> Tuple[float, int]:
+    """Score one (params, budget, fold); returns (accuracy, trees actually used)"""
+    model_name, params, budget, train_idx, stop_idx, test_idx, random_state = task
+    X, y = _worker_data['X'], _worker_data['y']
+    model = build_estimator(model_name, params, budget, random_state)
+    if model_name == 'xgboost':
+        model.fit(X[train_idx], y[train_idx], eval_set=[(X[stop_idx], y[stop_idx])], verbose=False)
+        n_used = int(getattr(model, 'best_iteration', budget - 1)) + 1
+    else:
+        model.fit(X[train_idx], y[train_idx])
+        n_used = budget
+    return float(accuracy_score(y[test_idx], model.predict(X[test_idx]))), n_used
+
+
+class TuningCache:
+    """SQLite store of fold scores and best configurations per model"""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tuning_evaluations (
+                    fingerprint TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    budget INTEGER NOT NULL,
+                    fold INTEGER NOT NULL,
+                    score REAL NOT NULL,
+                    n_used INTEGER NOT NULL,
+                    PRIMARY KEY (fingerprint, model, params, budget, fold)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tuning_best (
+                    model TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, fingerprint, params)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def get_scores(self, fingerprint: str, model: str, budget: int) -> Dict[Tuple[str, int], Tuple[float, int]]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT params, fold, score, n_used FROM tuning_evaluations "
+                "WHERE fingerprint = ? AND model = ? AND budget = ?",
+                (fingerprint, model, budget)
+            ).fetchall()
+        return {(params, fold): (score, n_used) for params, fold, score, n_used in rows}
+
+    def put_scores(self, fingerprint: str, model: str, budget: int, rows: List[Tuple[str, int, float, int]]):
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tuning_evaluations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(fingerprint, model, params, budget, fold, score, n_used) for params, fold, score, n_used in rows]
+            )
+
+    def record_best(self, model: str, fingerprint: str, params: Dict[str, Any], score: float):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tuning_best VALUES (?, ?, ?, ?, ?)",
+                (model, fingerprint, _params_key(params), score, time.time())
+            )
+
+    def prior_best(self, model: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Most recent distinct best configurations (newest first)"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT params, MAX(created_at) AS last FROM tuning_best WHERE model = ? "
+                "GROUP BY params ORDER BY last DESC LIMIT ?",
+                (model, limit)
+            ).fetchall()
+        return [json.loads(params) for params, _ in rows]
+
+
+class HalvingSearch:
+    """Successive halving over n_estimators with a fold-level result cache"""
+
+    def __init__(
+        self,
+        model_name: str,
+        param_space: Optional[Dict[str, List[Any]]] = None,
+        n_candidates: int = 27,
+        eta: int = 3,
+        min_resource: Optional[int] = None,
+        max_resource: Optional[int] = None,
+        cv_folds: int = 3,
+        n_workers: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        warm_start: bool = True,
+        warm_fraction: float = 0.25,
+        random_state: int = 42
+    ):
+        """
+        Args:
+            model_name: 'xgboost' or 'random_forest'
+            param_space: Sampled parameters (defaults to PARAM_SPACES)
+            n_candidates: Fresh candidates on a cold start
+            eta: Keep 1/eta of candidates per rung, multiply budget by eta
+            min_resource / max_resource: n_estimators of the first / last rung
+            cv_folds: Stratified folds per evaluation
+            n_workers: Process pool size (1 = run in-process)
+            cache_path: SQLite cache (None = no caching / warm start)
+            warm_start: Seed the search with previous best configurations
+            warm_fraction: Share of n_candidates sampled when prior bests exist
+        """
+        self.model_name = model_name
+        self.param_space = param_space or PARAM_SPACES[model_name]
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.max_resource = max_resource or MAX_RESOURCE[model_name]
+        self.min_resource = min_resource or max(10, self.max_resource // eta ** 2)
+        self.cv_folds = cv_folds
+        self.n_workers = n_workers or max(1, min(os.cpu_count() or 1, 8))
+        self.cache = TuningCache(cache_path) if cache_path else None
+        self.warm_start = warm_start
+        self.warm_fraction = warm_fraction
+        self.random_state = random_state
+
+    def _candidates(self) -> Tuple[List[Dict[str, Any]], int]:
+        priors = self.cache.prior_best(self.model_name) if (self.cache and self.warm_start) else []
+        priors = [p for p in priors if set(p) == set(self.param_space)]
+        n_fresh = self.n_candidates
+        if priors:
+            n_fresh = max(self.eta, int(math.ceil(self.n_candidates * self.warm_fraction)))
+        sampled = ParameterSampler(self.param_space, n_iter=n_fresh, random_state=self.random_state)
+
+        candidates, seen = [], set()
+        for params in priors + [dict(p) for p in sampled]:
+            params = {k: (v.item() if hasattr(v, 'item') else v) for k, v in params.items()}
+            key = _params_key(params)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        return candidates, len(priors)
+
+    def _budgets(self) -> List[int]:
+        budgets, budget = [], self.min_resource
+        while budget < self.max_resource:
+            budgets.append(int(budget))
+            budget *= self.eta
+        budgets.append(self.max_resource)
+        return budgets
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """
+        Run the search and refit the best configuration on all data
+
+        Returns:
+            best_params, best_score, best_model, n_estimators, rungs,
+            evaluations (computed) and cache_hits
+        """
+        X, y = np.asarray(X), np.asarray(y)
+        fingerprint = dataset_fingerprint(X, y)
+        folds = []
+        for train_idx, test_idx in StratifiedKFold(self.cv_folds, shuffle=True,
+                                                   random_state=self.random_state).split(X, y):
+            if self.model_name == 'xgboost':
+                fit_idx, stop_idx = _early_stopping_split(train_idx, y, self.random_state)
+                folds.append((fit_idx, stop_idx, test_idx))
+            else:
+                folds.append((train_idx, train_idx[:0], test_idx))
+        # Fold scores are only reusable for the same data and the same split
+        evaluation_key = f"{fingerprint}:{split_fingerprint(folds)}"
+        candidates, n_priors = self._candidates()
+        print(f"\n[TUNING] {self.model_name}: {len(candidates)} candidates "
+              f"({n_priors} from previous runs), budgets {self._budgets()}")
+
+        stats = {'evaluations': 0, 'cache_hits': 0}
+        rungs = []
+        pool = None
+        if self.n_workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker, initargs=(X, y))
+        else:
+            _init_worker(X, y)
+        try:
+            scores: Dict[str, Tuple[float, int]] = {}
+            budgets = self._budgets()
+            for rung, budget in enumerate(budgets):
+                scores = self._run_rung(pool, evaluation_key, candidates, budget, folds, stats)
+                ranked = sorted(candidates, key=lambda p: -scores[_params_key(p)][0])
+                rungs.append({'budget': budget, 'candidates': len(candidates),
+                              'best_score': scores[_params_key(ranked[0])][0]})
+                print(f"     Rung {rung + 1}: n_estimators={budget}, {len(candidates)} candidates, "
+                      f"best={rungs[-1]['best_score']:.3f}")
+                if rung == len(budgets) - 1:
+                    candidates = ranked[:1]
+                    break
+                candidates = ranked[:max(1, len(ranked) // self.eta)]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best_params = candidates[0]
+        best_score, n_used = scores[_params_key(best_params)]
+        if self.cache:
+            self.cache.record_best(self.model_name, fingerprint, best_params, best_score)
+
+        best_model = build_estimator(self.model_name, best_params, n_used, self.random_state)
+        if self.model_name == 'xgboost':
+            # Early stopping already chose the tree count
+            best_model.set_params(early_stopping_rounds=None, n_jobs=-1)
+        else:
+            best_model.set_params(n_jobs=-1)
+        best_model.fit(X, y)
+
+        print(f"     Best parameters: {best_params} (n_estimators={n_used})")
+        print(f"     Best CV score: {best_score:.3f} "
+              f"({stats['evaluations']} fits, {stats['cache_hits']} cached)")
+        return {
+            'best_params': dict(best_params, n_estimators=n_used),
+            'best_score': float(best_score),
+            'best_model': best_model,
+            'n_estimators': n_used,
+            'rungs': rungs,
+            'fingerprint': fingerprint,
+            'evaluations': stats['evaluations'],
+            'cache_hits': stats['cache_hits']
+        }
+
+    def _run_rung(self, pool, fingerprint: str, candidates: List[Dict[str, Any]], budget: int,
+                  folds: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                  stats: Dict[str, int]) -> Dict[str, Tuple[float, int]]:
+        """Mean fold score per candidate at one budget (cached folds are skipped)"""
+        cached = self.cache.get_scores(fingerprint, self.model_name, budget) if self.cache else {}
+        results: Dict[Tuple[str, int], Tuple[float, int]] = {}
+        pending, tasks = [], []
+        for params in candidates:
+            key = _params_key(params)
+            for fold, (train_idx, stop_idx, test_idx) in enumerate(folds):
+                if (key, fold) in cached:
+                    results[(key, fold)] = cached[(key, fold)]
+                    stats['cache_hits'] += 1
+                else:
+                    pending.append((key, fold))
+                    tasks.append((self.model_name, params, budget, train_idx, stop_idx, test_idx, self.random_state))
+
+        computed = list(pool.map(_evaluate, tasks)) if pool is not None else [_evaluate(t) for t in tasks]
+        stats['evaluations'] += len(computed)
+        results.update(zip(pending, computed))
+        if self.cache and computed:
+            self.cache.put_scores(fingerprint, self.model_name, budget,
+                                  [(key, fold, score, n_used) for (key, fold), (score, n_used) in zip(pending, computed)])
+
+        return {
+            _params_key(params): (
+                float(np.mean([results[(_params_key(params), f)][0] for f in range(len(folds))])),
+                int(round(np.mean([results[(_params_key(params), f)][1] for f in range(len(folds))])))
+            )
+            for params in candidates
+        }
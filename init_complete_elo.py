@@ -6,7 +6,9 @@ import toml
 import os
 from datetime import datetime
 import requests
-import time
+
+import api_replay
+from upstream_rate_limiter import PRIORITY_BATCH, request_priority
 
 def get_api_credentials():
     """API anahtarını secrets.toml'dan oku"""
@@ -29,7 +31,7 @@ def fetch_all_countries(api_key, base_url):
     
     try:
         url = f"{base_url}/countries"
-        response = requests.get(url, headers=headers, timeout=30)
+        response = api_replay.http_get(requests.get, url, 'countries', headers=headers, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -62,7 +64,7 @@ def fetch_all_teams_from_country(api_key, base_url, country):
         url = f"{base_url}/teams"
         params = {'country': country}
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = api_replay.http_get(requests.get, url, 'teams', params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -154,9 +156,6 @@ def main():
             else:
                 print("⚠️ Takım yok")
             
-            # Rate limiting
-            time.sleep(0.3)
-            
             # Her 50 ülkede bir durum raporu
             if i % 50 == 0:
                 print(f"\n📊 İlerleme: {len(all_teams)} takım toplandı\n")
@@ -258,4 +257,6 @@ def main():
     print("\n✨ Şimdi Streamlit uygulamanızı yeniden başlatın!")
 
 if __name__ == '__main__':
-    main()
+    # Ortak API kovasında kullanıcı isteklerine öncelik ver
+    with request_priority(PRIORITY_BATCH):
+        main()
@@ -3,7 +3,7 @@ LSTM Model Streamlit Sayfası
 """
 
 import streamlit as st
-from lstm_predictor import LSTMMatchPredictor, predict_match_with_lstm
+from lstm_predictor import get_lstm_model, predict_match_with_lstm
 from lstm_display import (display_lstm_prediction, display_team_form_analysis,
                           display_lstm_comparison, display_training_history)
 from typing import Dict, List
@@ -177,8 +177,8 @@ def display_lstm_page():
                 is_home=False
             )
             
-            # LSTM model
-            lstm_model = LSTMMatchPredictor(sequence_length=10)
+            # LSTM model (süreç başına bir kez yüklenir)
+            lstm_model = get_lstm_model()
             
             # Tahmin
             prediction = predict_match_with_lstm(home_matches, away_matches, lstm_model)
@@ -237,8 +237,8 @@ def display_lstm_page():
         
         4. **Model Kaydetme:**
            ```python
-           # Model otomatik kaydedilir
-           # Yol: ./models/lstm_match_predictor.h5
+           # Model otomatik kaydedilir, ağırlıklar .npz olarak dışa aktarılır
+           # Yol: ./models/lstm_match_predictor.h5 (+ .npz, TensorFlow'suz servis için)
            ```
         
         5. **Tahmin:**
@@ -1,25 +1,122 @@
 """
 LSTM Tabanlı Maç Sonucu Tahmin Modülü
 Takım performansını zaman serisi olarak modelleyerek gelecek maç sonuçlarını tahmin eder.
+
+Servis tarafı TensorFlow'a ihtiyaç duymaz: eğitilen modelin LSTM /
+Bidirectional / Dense ağırlıkları .npz olarak dışa aktarılır ve
+NumpyLSTMRuntime ile saf NumPy forward pass yapılır. Model süreç başına bir
+kez yüklenir (get_lstm_model) ve iki takım tek batch'te skorlanır.
+
+Usage:
+    from lstm_predictor import get_lstm_model, predict_match_with_lstm
+
+    model = get_lstm_model()                  # models/lstm_match_predictor.npz
+    result = predict_match_with_lstm(home_matches, away_matches, model)
 """
 
+import importlib.util
+import os
+import threading
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 import json
 
-# TensorFlow/Keras import - opsiyonel (yüklü değilse basit model kullanılır)
-try:
-    from tensorflow import keras
-    from tensorflow.keras.models import Sequential, load_model, save_model
-    from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional
-    from tensorflow.keras.optimizers import Adam
-    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
-    KERAS_AVAILABLE = True
-except ImportError:
-    KERAS_AVAILABLE = False
-    print("⚠️ TensorFlow/Keras bulunamadı. LSTM modeli için basit tahmin kullanılacak.")
+# TensorFlow/Keras - opsiyonel ve sadece eğitim / .h5 yükleme sırasında import edilir
+# (yüklü değilse .npz ağırlıklarla NumPy veya basit istatistiksel model kullanılır)
+KERAS_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+if not KERAS_AVAILABLE:
+    print("⚠️ TensorFlow/Keras bulunamadı. LSTM modeli için .npz ağırlıkları veya basit tahmin kullanılacak.")
+
+DEFAULT_WEIGHTS_PATH = os.environ.get(
+    'LSTM_WEIGHTS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'lstm_match_predictor.npz')
+)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTMRuntime:
+    """
+    Dışa aktarılmış ağırlıklarla saf NumPy LSTM çıkarımı
+
+    Keras katman semantiği: kapı sırası i, f, c, o; recurrent aktivasyon
+    sigmoid; Bidirectional çıktısı [ileri, geri] birleştirmesi. Dense
+    katmanları relu, son katman softmax. Dropout çıkarımda etkisizdir.
+    """
+
+    def __init__(self, weights: Dict[str, np.ndarray]):
+        self.n_lstm = int(weights['n_lstm'])
+        self.n_dense = int(weights['n_dense'])
+        self.sequence_length = int(weights['sequence_length'])
+        self.lstm_layers = [
+            {
+                direction: tuple(np.asarray(weights[f'lstm{i}_{direction}_{name}'], dtype=np.float32)
+                                 for name in ('kernel', 'recurrent_kernel', 'bias'))
+                for direction in ('fw', 'bw')
+            }
+            for i in range(self.n_lstm)
+        ]
+        self.dense_layers = [
+            (np.asarray(weights[f'dense{i}_kernel'], dtype=np.float32),
+             np.asarray(weights[f'dense{i}_bias'], dtype=np.float32))
+            for i in range(self.n_dense)
+        ]
+
+    @classmethod
+    def from_npz(cls, path: str) -> 'NumpyLSTMRuntime':
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @staticmethod
+    def _run_lstm(X: np.ndarray, kernel: np.ndarray, recurrent_kernel: np.ndarray,
+                  bias: np.ndarray, return_sequences: bool) -> np.ndarray:
+        n, steps, _ = X.shape
+        units = recurrent_kernel.shape[0]
+        # Girdi projeksiyonu tüm zaman adımları için tek matmul
+        projected = X @ kernel + bias
+        h = np.zeros((n, units), dtype=np.float32)
+        c = np.zeros((n, units), dtype=np.float32)
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t, :] + h @ recurrent_kernel
+            i = _sigmoid(z[:, :units])
+            f = _sigmoid(z[:, units:2 * units])
+            g = np.tanh(z[:, 2 * units:3 * units])
+            o = _sigmoid(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            if return_sequences:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if return_sequences else h
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X: shape (n_sequences, sequence_length, n_features)
+
+        Returns:
+            shape (n_sequences, 3) - [win, draw, loss] olasılıkları
+        """
+        out = np.asarray(X, dtype=np.float32)
+        for index, layer in enumerate(self.lstm_layers):
+            return_sequences = index < self.n_lstm - 1
+            forward = self._run_lstm(out, *layer['fw'], return_sequences)
+            backward = self._run_lstm(out[:, ::-1, :], *layer['bw'], return_sequences)
+            if return_sequences:
+                backward = backward[:, ::-1, :]
+            out = np.concatenate([forward, backward], axis=-1)
+
+        for index, (kernel, bias) in enumerate(self.dense_layers):
+            out = out @ kernel + bias
+            if index < self.n_dense - 1:
+                out = np.maximum(out, 0.0)
+
+        out = np.exp(out - out.max(axis=-1, keepdims=True))
+        return out / out.sum(axis=-1, keepdims=True)
 
 
 class LSTMMatchPredictor:
@@ -37,11 +134,13 @@ class LSTMMatchPredictor:
         """
         Args:
             sequence_length: Kaç maçlık geçmiş kullanılacak (varsayılan: 10)
-            model_path: Eğitilmiş model dosya yolu (yoksa yeni model oluşturulur)
+            model_path: Eğitilmiş model dosya yolu (.npz = NumPy çıkarımı, .h5/.keras = Keras;
+                        yoksa yeni model oluşturulur)
         """
         self.sequence_length = sequence_length
         self.model_path = model_path
         self.model = None
+        self.runtime = None  # NumpyLSTMRuntime (.npz ağırlıklar)
         self.feature_scaler = None
         self.is_trained = False
         
@@ -52,7 +151,7 @@ class LSTMMatchPredictor:
             'is_home', 'opponent_strength', 'days_since_last_match'
         ]
         
-        if KERAS_AVAILABLE and model_path:
+        if model_path:
             self._load_model()
     
     def _create_model(self, input_shape: Tuple[int, int]) -> 'keras.Model':
@@ -60,6 +159,10 @@ class LSTMMatchPredictor:
         if not KERAS_AVAILABLE:
             return None
         
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional
+        from tensorflow.keras.optimizers import Adam
+        
         model = Sequential([
             # İlk LSTM katmanı (Bidirectional - hem ileri hem geri öğrenir)
             Bidirectional(LSTM(128, return_sequences=True, 
@@ -201,6 +304,7 @@ class LSTMMatchPredictor:
         self.model = self._create_model(input_shape=(X_train.shape[1], X_train.shape[2]))
         
         # Callbacks
+        from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
         callbacks = [
             EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
             ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=0.00001)
@@ -222,6 +326,7 @@ class LSTMMatchPredictor:
         if self.model_path:
             self.model.save(self.model_path)
             print(f"✅ Model kaydedildi: {self.model_path}")
+            self.export_weights(os.path.splitext(self.model_path)[0] + '.npz')
         
         # Eğitim metrikleri
         return {
@@ -232,6 +337,90 @@ class LSTMMatchPredictor:
             "epochs_trained": len(history.history['loss'])
         }
     
+    def export_weights(self, path: str) -> str:
+        """
+        Eğitilmiş Keras modelinin ağırlıklarını NumpyLSTMRuntime için .npz'ye yaz
+
+        Returns:
+            Yazılan dosya yolu
+        """
+        if self.model is None:
+            raise ValueError("Dışa aktarılacak eğitilmiş Keras modeli yok")
+        
+        from tensorflow.keras.layers import Bidirectional, Dense
+        
+        arrays = {'sequence_length': np.array(self.sequence_length)}
+        n_lstm = n_dense = 0
+        for layer in self.model.layers:
+            if isinstance(layer, Bidirectional):
+                for direction, sublayer in (('fw', layer.forward_layer), ('bw', layer.backward_layer)):
+                    kernel, recurrent_kernel, bias = sublayer.get_weights()
+                    arrays[f'lstm{n_lstm}_{direction}_kernel'] = kernel
+                    arrays[f'lstm{n_lstm}_{direction}_recurrent_kernel'] = recurrent_kernel
+                    arrays[f'lstm{n_lstm}_{direction}_bias'] = bias
+                n_lstm += 1
+            elif isinstance(layer, Dense):
+                kernel, bias = layer.get_weights()
+                arrays[f'dense{n_dense}_kernel'] = kernel
+                arrays[f'dense{n_dense}_bias'] = bias
+                n_dense += 1
+        arrays['n_lstm'] = np.array(n_lstm)
+        arrays['n_dense'] = np.array(n_dense)
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, **arrays)
+        print(f"✅ LSTM ağırlıkları dışa aktarıldı: {path}")
+        return path
+    
+    def _score(self, X: np.ndarray) -> Optional[np.ndarray]:
+        """Sequence batch'ini tek çağrıda skorla (model yoksa None)"""
+        if self.runtime is not None:
+            return self.runtime.predict_proba(X)
+        if KERAS_AVAILABLE and self.is_trained and self.model is not None:
+            return np.asarray(self.model.predict(X, verbose=0))
+        return None
+    
+    def predict_batch(self, teams_matches: List[List[Dict]]) -> List[Dict]:
+        """
+        Birden fazla takımın sonraki maç sonucunu tek batch'te tahmin et
+        
+        Args:
+            teams_matches: Her takım için son maçlar (kronolojik, en eski önce)
+        
+        Returns:
+            Takım sırasıyla tahmin sonuçları (predict() ile aynı format)
+        """
+        sequences, positions = [], []
+        for index, team_matches in enumerate(teams_matches):
+            X, _ = self.prepare_sequences(team_matches)
+            if X.shape[0] > 0:
+                # Son sequence'i al (en güncel)
+                sequences.append(X[-1])
+                positions.append(index)
+        
+        probabilities = self._score(np.stack(sequences)) if sequences else None
+        if probabilities is None:
+            return [self._simple_prediction(team_matches) for team_matches in teams_matches]
+        
+        scored = dict(zip(positions, probabilities))
+        results = []
+        for index, team_matches in enumerate(teams_matches):
+            if index not in scored:
+                results.append(self._simple_prediction(team_matches))
+                continue
+            prediction = scored[index]
+            # Trend analizi (son 5 maç)
+            trend = self._analyze_trend(team_matches[-5:] if len(team_matches) >= 5 else team_matches)
+            results.append({
+                'win_probability': float(prediction[0]),
+                'draw_probability': float(prediction[1]),
+                'loss_probability': float(prediction[2]),
+                'confidence': float(np.max(prediction)) * 100,
+                'trend': trend,
+                'prediction_method': 'LSTM'
+            })
+        return results
+    
     def predict(self, team_matches: List[Dict]) -> Dict:
         """
         Bir takımın sonraki maç sonucunu tahmin et
@@ -242,40 +431,7 @@ class LSTMMatchPredictor:
         Returns:
             Tahmin sonuçları: {win_prob, draw_prob, loss_prob, confidence, trend}
         """
-        # Basit tahmin (LSTM yoksa veya model eğitilmemişse)
-        if not KERAS_AVAILABLE or not self.is_trained or self.model is None:
-            return self._simple_prediction(team_matches)
-        
-        # LSTM ile tahmin
-        X, _ = self.prepare_sequences(team_matches)
-        
-        if X.shape[0] == 0:
-            return self._simple_prediction(team_matches)
-        
-        # Son sequence'i al (en güncel)
-        last_sequence = X[-1:, :, :]
-        
-        # Tahmin
-        prediction = self.model.predict(last_sequence, verbose=0)[0]
-        
-        win_prob = float(prediction[0])
-        draw_prob = float(prediction[1])
-        loss_prob = float(prediction[2])
-        
-        # Güven skoru
-        confidence = float(np.max(prediction)) * 100
-        
-        # Trend analizi (son 5 maç)
-        trend = self._analyze_trend(team_matches[-5:] if len(team_matches) >= 5 else team_matches)
-        
-        return {
-            'win_probability': win_prob,
-            'draw_probability': draw_prob,
-            'loss_probability': loss_prob,
-            'confidence': confidence,
-            'trend': trend,
-            'prediction_method': 'LSTM'
-        }
+        return self.predict_batch([team_matches])[0]
     
     def _simple_prediction(self, team_matches: List[Dict]) -> Dict:
         """
@@ -382,11 +538,23 @@ class LSTMMatchPredictor:
             return 'stable'
     
     def _load_model(self):
-        """Eğitilmiş modeli yükle"""
+        """Eğitilmiş modeli yükle (.npz → NumPy runtime, diğerleri → Keras)"""
+        if self.model_path.endswith('.npz'):
+            try:
+                self.runtime = NumpyLSTMRuntime.from_npz(self.model_path)
+                self.sequence_length = self.runtime.sequence_length
+                self.is_trained = True
+                print(f"✅ LSTM ağırlıkları yüklendi: {self.model_path}")
+            except Exception as e:
+                print(f"⚠️ LSTM ağırlıkları yüklenemedi: {e}")
+                self.is_trained = False
+            return
+        
         if not KERAS_AVAILABLE:
             return
         
         try:
+            from tensorflow.keras.models import load_model
             self.model = load_model(self.model_path)
             self.is_trained = True
             print(f"✅ Model yüklendi: {self.model_path}")
@@ -395,6 +563,29 @@ class LSTMMatchPredictor:
             self.is_trained = False
 
 
+# Süreç başına model cache'i (yol → predictor)
+_models: Dict[str, LSTMMatchPredictor] = {}
+_models_lock = threading.Lock()
+
+
+def get_lstm_model(model_path: Optional[str] = None) -> LSTMMatchPredictor:
+    """
+    Süreç genelinde paylaşılan LSTM predictor'ı getir
+    
+    Ağırlık dosyası yoksa istatistiksel tahmine düşen predictor cache'lenir.
+    """
+    path = model_path or DEFAULT_WEIGHTS_PATH
+    model = _models.get(path)
+    if model is None:
+        with _models_lock:
+            model = _models.get(path)
+            if model is None:
+                model = LSTMMatchPredictor(sequence_length=10,
+                                           model_path=path if os.path.exists(path) else None)
+                _models[path] = model
+    return model
+
+
 def predict_match_with_lstm(home_team_matches: List[Dict], 
                             away_team_matches: List[Dict],
                             lstm_model: Optional[LSTMMatchPredictor] = None) -> Dict:
@@ -404,17 +595,16 @@ def predict_match_with_lstm(home_team_matches: List[Dict],
     Args:
         home_team_matches: Ev sahibi takımın son maçları
         away_team_matches: Deplasman takımının son maçları
-        lstm_model: Eğitilmiş LSTM model (None ise yeni oluşturulur)
+        lstm_model: Eğitilmiş LSTM model (None ise süreç cache'indeki model)
     
     Returns:
         Detaylı tahmin sonuçları
     """
     if lstm_model is None:
-        lstm_model = LSTMMatchPredictor(sequence_length=10)
+        lstm_model = get_lstm_model()
     
-    # Her iki takım için tahmin
-    home_prediction = lstm_model.predict(home_team_matches)
-    away_prediction = lstm_model.predict(away_team_matches)
+    # Her iki takım için tek batch'te tahmin
+    home_prediction, away_prediction = lstm_model.predict_batch([home_team_matches, away_team_matches])
     
     # Ev sahibi avantajı (istatistiksel)
     home_advantage = 1.15
@@ -500,8 +690,8 @@ if __name__ == "__main__":
     print(f"   Metod: {prediction['prediction_method']}")
     
     print("\n" + "=" * 60)
-    if KERAS_AVAILABLE:
-        print("✅ TensorFlow/Keras kullanılabilir - LSTM modeli aktif")
+    if predictor.runtime is not None or KERAS_AVAILABLE:
+        print("✅ LSTM modeli aktif")
     else:
         print("⚠️ TensorFlow/Keras yok - İstatistiksel model kullanılıyor")
         print("   Yüklemek için: pip install tensorflow")
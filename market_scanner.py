@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized Market Scanner
+=========================
+Günün TÜM maçları için value bet ve arbitrage taraması - tek numpy geçişi
+
+ValueBetDetector/ArbitrageDetector tek bir BettingOdds nesnesi üzerinde çalışır.
+MarketScanner ise (fixture, outcome, bookmaker) üç boyutlu oran tensörü ve
+(fixture, outcome) model olasılık matrisi alır; edge, EV, Kelly stake ve
+arbitrage marjını tüm kombinasyonlar için aynı anda hesaplar.
+
+Usage:
+    from market_scanner import MarketTensor, MarketScanner
+
+    tensor = MarketTensor.from_fixtures([
+        {'fixture_id': 1, 'odds_index': index, 'probs': analysis['probs'], 'label': 'GS - FB'},
+        ...
+    ])
+    result = MarketScanner(min_value=0.05, min_ev=5.0).scan(tensor)
+    result['value_bets'][:10]
+
+    # Oranlar değişince sadece ilgili maçın dilimi güncellenir
+    tensor.update_odds(fixture_id=1, odds_index=new_index)
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from odds_normalizer import OddsIndex
+
+# (görünen ad, market, line, outcome, analiz probs anahtarı, arbitrage grubu)
+SCAN_OUTCOMES: Tuple[Tuple[str, str, Optional[float], str, str, str], ...] = (
+    ('Ev Sahibi Kazanır', 'match_winner', None, 'home', 'win_a', '1X2'),
+    ('Beraberlik', 'match_winner', None, 'draw', 'draw', '1X2'),
+    ('Deplasman Kazanır', 'match_winner', None, 'away', 'win_b', '1X2'),
+    ('2.5 Üst', 'over_under', 2.5, 'over', 'ust_2_5', 'O/U 2.5'),
+    ('2.5 Alt', 'over_under', 2.5, 'under', 'alt_2_5', 'O/U 2.5'),
+    ('KG Var', 'btts', None, 'yes', 'kg_var', 'BTTS'),
+    ('KG Yok', 'btts', None, 'no', 'kg_yok', 'BTTS'),
+)
+
+
+@dataclass
+class MarketTensor:
+    """
+    Tarama girdisi
+
+    - odds:  (F, O, B) decimal oranlar, fiyat yoksa 0
+    - probs: (F, O) model olasılıkları (0-1), yoksa 0
+    """
+    fixture_ids: List[Any]
+    labels: List[str]
+    bookmakers: List[str]
+    odds: np.ndarray
+    probs: np.ndarray
+    outcomes: Tuple = SCAN_OUTCOMES
+    _row: Dict[Any, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._row = {fid: i for i, fid in enumerate(self.fixture_ids)}
+
+    @classmethod
+    def from_fixtures(cls, fixtures: List[Dict[str, Any]],
+                      outcomes: Tuple = SCAN_OUTCOMES) -> 'MarketTensor':
+        """
+        Args:
+            fixtures: [{'fixture_id', 'odds_index' (OddsIndex veya /odds yanıtı),
+                        'probs' (analysis['probs'], 0-100), 'label' (opsiyonel)}]
+        """
+        indexes = []
+        bookmakers: Dict[str, int] = {}
+        for fx in fixtures:
+            index = fx.get('odds_index')
+            if not isinstance(index, OddsIndex):
+                index = OddsIndex.from_response(index)
+            indexes.append(index)
+            for book in index.bookmakers:
+                bookmakers.setdefault(book, len(bookmakers))
+
+        n_f, n_o, n_b = len(fixtures), len(outcomes), len(bookmakers)
+        odds = np.zeros((n_f, n_o, n_b), dtype=np.float64)
+        probs = np.zeros((n_f, n_o), dtype=np.float64)
+
+        for f, (fx, index) in enumerate(zip(fixtures, indexes)):
+            cls._fill_odds(odds[f], index, outcomes, bookmakers)
+            probs[f] = cls._probs_row(fx.get('probs') or {}, outcomes)
+
+        return cls(
+            fixture_ids=[fx.get('fixture_id') for fx in fixtures],
+            labels=[fx.get('label') or str(fx.get('fixture_id')) for fx in fixtures],
+            bookmakers=list(bookmakers),
+            odds=odds,
+            probs=probs,
+            outcomes=outcomes,
+        )
+
+    @staticmethod
+    def _fill_odds(target: np.ndarray, index: OddsIndex, outcomes: Tuple, bookmakers: Dict[str, int]):
+        for o, (_, market, line, outcome, _, _) in enumerate(outcomes):
+            # Ters sırada yaz -> bookmaker başına ilk fiyat kalır
+            for book, price in reversed(index.quotes(market, outcome, line)):
+                target[o, bookmakers[book]] = price
+
+    @staticmethod
+    def _probs_row(probs: Dict[str, float], outcomes: Tuple) -> np.ndarray:
+        return np.array([float(probs.get(key, 0) or 0) / 100.0 for *_, key, _ in outcomes])
+
+    def update_odds(self, fixture_id: Any, odds_index: OddsIndex):
+        """Tek maçın oranlarını yerinde güncelle (yeni bookmaker gelirse tensör genişler)"""
+        if not isinstance(odds_index, OddsIndex):
+            odds_index = OddsIndex.from_response(odds_index)
+        book_ids = {book: i for i, book in enumerate(self.bookmakers)}
+        new_books = [book for book in odds_index.bookmakers if book not in book_ids]
+        if new_books:
+            for book in new_books:
+                book_ids[book] = len(self.bookmakers)
+                self.bookmakers.append(book)
+            pad = np.zeros(self.odds.shape[:2] + (len(new_books),))
+            self.odds = np.concatenate([self.odds, pad], axis=2)
+
+        f = self._row[fixture_id]
+        self.odds[f] = 0.0
+        self._fill_odds(self.odds[f], odds_index, self.outcomes, book_ids)
+
+    def update_probs(self, fixture_id: Any, probs: Dict[str, float]):
+        """Tek maçın model olasılıklarını güncelle"""
+        self.probs[self._row[fixture_id]] = self._probs_row(probs, self.outcomes)
+
+
+class MarketScanner:
+    """
+    Tüm (fixture, outcome, bookmaker) kombinasyonları için value/arbitrage taraması
+    """
+
+    def __init__(self, min_value: float = 0.05, min_ev: float = 5.0, kelly_fraction: float = 0.25):
+        """
+        Args:
+            min_value: Minimum value yüzdesi (ValueBetDetector ile aynı anlam)
+            min_ev: Minimum Expected Value (%)
+            kelly_fraction: Fractional Kelly (0.25 = Quarter Kelly)
+        """
+        self.min_value = min_value
+        self.min_ev = min_ev
+        self.kelly_fraction = kelly_fraction
+
+    def compute(self, tensor: MarketTensor) -> Dict[str, np.ndarray]:
+        """
+        Ham metrik tensörleri (F, O, B)
+
+        Returns:
+            {'implied', 'edge', 'ev', 'kelly', 'is_value'}
+        """
+        odds = tensor.odds
+        probs = tensor.probs[:, :, None]
+        priced = odds > 1.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            implied = np.where(priced, 1.0 / odds, 0.0)
+            edge = np.where(priced, probs * odds - 1.0, -np.inf)
+            kelly_full = np.where(priced, edge / (odds - 1.0), 0.0)
+
+        ev = edge * 100
+        # value_percentage = (p - 1/o) / (1/o) * 100 = EV; eşikler ValueBetDetector ile aynı
+        is_value = priced & (probs > 0) & (ev >= self.min_ev) & (ev >= self.min_value * 100)
+        kelly = np.clip(kelly_full, 0.0, None) * self.kelly_fraction * 100
+
+        return {'implied': implied, 'edge': edge, 'ev': ev, 'kelly': kelly, 'is_value': is_value}
+
+    def arbitrage(self, tensor: MarketTensor) -> Dict[str, np.ndarray]:
+        """
+        Grup (1X2, O/U 2.5, BTTS) başına arbitrage marjı
+
+        Returns:
+            {group: (F,) dizisi, sum(1/best_odds); < 1 ise arbitrage}
+        """
+        best = tensor.odds.max(axis=2) if tensor.odds.shape[2] else np.zeros(tensor.odds.shape[:2])
+        groups: Dict[str, List[int]] = {}
+        for o, (*_, group) in enumerate(tensor.outcomes):
+            groups.setdefault(group, []).append(o)
+
+        margins = {}
+        with np.errstate(divide='ignore'):
+            inv = np.where(best > 1.0, 1.0 / best, np.inf)
+        for group, cols in groups.items():
+            margins[group] = inv[:, cols].sum(axis=1)
+        return margins
+
+    def scan(self, tensor: MarketTensor, top_n: Optional[int] = 50, best_only: bool = True) -> Dict[str, Any]:
+        """
+        Sıralı value bet ve arbitrage listesi
+
+        Args:
+            top_n: Döndürülecek maksimum value bet (None = hepsi)
+            best_only: Her (fixture, outcome) için sadece en iyi fiyatlı bookmaker
+
+        Returns:
+            {'value_bets': [...], 'arbitrage': [...]}
+        """
+        metrics = self.compute(tensor)
+        ev = metrics['ev']
+        mask = metrics['is_value']
+
+        if best_only and tensor.odds.shape[2]:
+            best_book = tensor.odds.argmax(axis=2)
+            best_mask = np.zeros_like(mask)
+            np.put_along_axis(best_mask, best_book[:, :, None], True, axis=2)
+            mask = mask & best_mask
+
+        f_idx, o_idx, b_idx = np.nonzero(mask)
+        scores = ev[f_idx, o_idx, b_idx]
+        order = np.argsort(-scores, kind='stable')
+        if top_n is not None and len(order) > top_n:
+            order = order[:top_n]
+
+        value_bets = []
+        for i in order:
+            f, o, b = f_idx[i], o_idx[i], b_idx[i]
+            kelly_pct = float(metrics['kelly'][f, o, b])
+            value_bets.append({
+                'fixture_id': tensor.fixture_ids[f],
+                'match': tensor.labels[f],
+                'outcome': tensor.outcomes[o][0],
+                'market': tensor.outcomes[o][5],
+                'bookmaker': tensor.bookmakers[b],
+                'odds': float(tensor.odds[f, o, b]),
+                'true_probability': float(tensor.probs[f, o]),
+                'implied_probability': float(metrics['implied'][f, o, b]),
+                'expected_value': float(ev[f, o, b]),
+                'value_percentage': float(ev[f, o, b]),
+                'kelly_stake': kelly_pct,
+                'recommendation': self._recommendation(kelly_pct / 100),
+                'risk_level': self._risk_level(kelly_pct / 100),
+            })
+
+        arbitrage = []
+        for group, margins in self.arbitrage(tensor).items():
+            for f in np.flatnonzero(margins < 1.0):
+                arbitrage.append({
+                    'fixture_id': tensor.fixture_ids[f],
+                    'match': tensor.labels[f],
+                    'market': group,
+                    'arb_percentage': float(margins[f]),
+                    'profit_percentage': float((1 / margins[f] - 1) * 100),
+                })
+        arbitrage.sort(key=lambda x: x['profit_percentage'], reverse=True)
+
+        return {'value_bets': value_bets, 'arbitrage': arbitrage}
+
+    # KellyCriterion.calculate ile aynı eşikler
+    @staticmethod
+    def _risk_level(kelly_adjusted: float) -> str:
+        if kelly_adjusted <= 0:
+            return 'N/A'
+        if kelly_adjusted > 0.1:
+            return 'Yüksek'
+        if kelly_adjusted > 0.05:
+            return 'Orta'
+        return 'Düşük'
+
+    @staticmethod
+    def _recommendation(kelly_adjusted: float) -> str:
+        if kelly_adjusted <= 0:
+            return 'Bahis yapma (Negatif value)'
+        if kelly_adjusted > 0.05:
+            return f"Bankroll'un %{kelly_adjusted*100:.1f}'ını bahse yatır"
+        if kelly_adjusted > 0.02:
+            return f"Küçük bahis (%{kelly_adjusted*100:.1f})"
+        return "Çok küçük value, atla"
+
+
+# Test fonksiyonu
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    n_fixtures, n_books = 300, 12
+    fair = rng.dirichlet([4, 3, 3], size=n_fixtures)
+    odds = np.zeros((n_fixtures, len(SCAN_OUTCOMES), n_books))
+    odds[:, :3, :] = 1 / (fair[:, :, None] * rng.uniform(1.02, 1.10, size=(n_fixtures, 3, n_books)))
+    probs = np.zeros((n_fixtures, len(SCAN_OUTCOMES)))
+    probs[:, :3] = fair * rng.uniform(0.9, 1.1, size=(n_fixtures, 3))
+
+    tensor = MarketTensor(
+        fixture_ids=list(range(n_fixtures)),
+        labels=[f"Maç {i}" for i in range(n_fixtures)],
+        bookmakers=[f"Book {b}" for b in range(n_books)],
+        odds=odds,
+        probs=probs,
+    )
+
+    start = time.perf_counter()
+    result = MarketScanner().scan(tensor)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print("🔍 MARKET SCANNER TEST")
+    print(f"   {n_fixtures} maç x {len(SCAN_OUTCOMES)} outcome x {n_books} bookmaker: {elapsed:.1f} ms")
+    print(f"   Value bet: {len(result['value_bets'])}, Arbitrage: {len(result['arbitrage'])}")
+    for vb in result['value_bets'][:5]:
+        print(f"   {vb['match']} - {vb['outcome']} @ {vb['odds']:.2f} ({vb['bookmaker']}) EV: {vb['expected_value']:.1f}%")
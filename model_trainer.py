@@ -4,7 +4,7 @@ Model Trainer
 =============
 Advanced training pipeline with:
 - Cross-validation
-- Hyperparameter tuning
+- Hyperparameter tuning (successive halving, cached per dataset fingerprint)
 - Model persistence
 - Training history tracking
 
@@ -31,6 +31,7 @@ from sklearn.metrics import (
     classification_report
 )
 import warnings
+from hyperparameter_search import HalvingSearch
 warnings.filterwarnings('ignore')
 
 print("[OK] Model Trainer Module Loaded")
@@ -45,7 +46,8 @@ class ModelTrainer:
         self,
         predictor,
         cv_folds: int = 5,
-        random_state: int = 42
+        random_state: int = 42,
+        tuning_workers: Optional[int] = None
     ):
         """
         Initialize model trainer
@@ -54,10 +56,13 @@ class ModelTrainer:
             predictor: EnhancedMLPredictor instance
             cv_folds: Number of cross-validation folds
             random_state: Random seed for reproducibility
+            tuning_workers: Process pool size for hyperparameter search
         """
         self.predictor = predictor
         self.cv_folds = cv_folds
         self.random_state = random_state
+        self.tuning_workers = tuning_workers
+        self.tuning_cache_path = os.path.join(predictor.model_dir, 'tuning_cache.db')
         
         # Training history
         self.training_history = {
@@ -126,7 +131,7 @@ class ModelTrainer:
         self,
         X: np.ndarray,
         y: np.ndarray,
-        method: str = 'grid'
+        method: str = 'halving'
     ) -> Dict[str, Any]:
         """
         Tune XGBoost hyperparameters
@@ -134,13 +139,16 @@ class ModelTrainer:
         Args:
             X: Features
             y: Labels
-            method: 'grid' or 'random'
+            method: 'halving' (cached, early stopping), 'grid' or 'random'
             
         Returns:
             Best parameters
         """
         print("\n[TUNING] XGBoost hyperparameter tuning...")
         
+        if method == 'halving':
+            return self._halving_search('xgboost', X, y)
+        
         # Parameter grid
         param_grid = {
             'max_depth': [4, 6, 8],
@@ -194,7 +202,8 @@ class ModelTrainer:
     def hyperparameter_tuning_rf(
         self,
         X: np.ndarray,
-        y: np.ndarray
+        y: np.ndarray,
+        method: str = 'halving'
     ) -> Dict[str, Any]:
         """
         Tune Random Forest hyperparameters
@@ -202,12 +211,16 @@ class ModelTrainer:
         Args:
             X: Features
             y: Labels
+            method: 'halving' (cached) or 'grid'
             
         Returns:
             Best parameters
         """
         print("\n[TUNING] Random Forest hyperparameter tuning...")
         
+        if method == 'halving':
+            return self._halving_search('random_forest', X, y)
+        
         from sklearn.ensemble import RandomForestClassifier
         
         param_grid = {
@@ -242,6 +255,17 @@ class ModelTrainer:
             'best_model': search.best_estimator_
         }
     
+    def _halving_search(self, model_name: str, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """Successive halving search, warm-started from previous runs"""
+        search = HalvingSearch(
+            model_name,
+            cv_folds=3,
+            n_workers=self.tuning_workers,
+            cache_path=self.tuning_cache_path,
+            random_state=self.random_state
+        )
+        return search.fit(X, y)
+    
     def train_with_validation(
         self,
         X_train: np.ndarray,
@@ -273,9 +297,7 @@ class ModelTrainer:
             print("-"*80)
             
             # Tune XGBoost
-            xgb_results = self.hyperparameter_tuning_xgboost(
-                X_train, y_train, method='random'
-            )
+            xgb_results = self.hyperparameter_tuning_xgboost(X_train, y_train)
             self.predictor.xgb_model = xgb_results['best_model']
             
             # Tune Random Forest
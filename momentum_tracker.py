@@ -8,10 +8,26 @@ Canlı maç momentum analizi ve trend tespiti
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime, timedelta
 from collections import deque
+from bisect import bisect_left, bisect_right
 import math
 
 class MomentumTracker:
-    """Maç içi momentum takip sistemi"""
+    """
+    Maç içi momentum takip sistemi
+    
+    Artımlı (streaming) hesaplama:
+    - Momentum penceresi deque'da tutulur, takım başına decay'li ağırlık toplamı
+      her olayda O(1) güncellenir (yeni olay eklenir, pencereden çıkanlar düşülür)
+    - Baskı endeksi için 10 dakikalık ayrı pencere ve takım toplamları
+    - Olay tipi indeksi (kritik anlar) ve dakikaya göre sıralı zaman çizelgesi
+      (bisect ile tetikleyici olay araması)
+    - Momentum değişimleri eşik başına önbellekte, sadece yeni kayıtlar işlenir
+    """
+    
+    PRESSURE_WINDOW = 10
+    SHIFT_TRIGGER_WINDOW = 5
+    ATTACKING_EVENTS = ('shot_on_target', 'shot_off_target', 'corner',
+                        'big_chance_created', 'key_pass', 'successful_dribble')
     
     def __init__(self, window_size: int = 10):
         """
@@ -48,6 +64,29 @@ class MomentumTracker:
             'substitution_attacking': 5,
             'substitution_defensive': -3,
         }
+        
+        self._tau = window_size / 2
+        self._clock = None  # Şu ana kadar görülen en büyük dakika
+        
+        # Momentum penceresi: (dakika, takım, ağırlık) + takım başına decay'li toplam (clock anına göre)
+        self._window = deque()
+        self._team_sums = {'home': 0.0, 'away': 0.0}
+        
+        # Baskı penceresi: (dakika, takım, baskı puanı) + takım toplamları
+        self._pressure_window = deque()
+        self._pressure_sums = {'home': 0.0, 'away': 0.0}
+        
+        # Dakikaya göre sıralı zaman çizelgesi (bisect aramaları için)
+        self._timeline_minutes = []
+        self._timeline_events = []
+        self._timeline_seq = []
+        self._in_order = True
+        
+        # Olay tipi indeksi
+        self._by_type = {}
+        
+        # threshold -> (işlenen history sayısı, [(index, from, to, change)])
+        self._shift_cache = {}
     
     def add_event(self, 
                   minute: int,
@@ -79,30 +118,93 @@ class MomentumTracker:
         }
         
         self.events.append(event)
+        self._index_event(event)
         
         # Momentum güncelle
         self._update_momentum(minute)
     
+    def _index_event(self, event: Dict):
+        """Olayı zaman çizelgesine, tip indeksine ve kayan pencerelere ekle"""
+        minute = event['minute']
+        
+        pos = bisect_right(self._timeline_minutes, minute)
+        if pos < len(self._timeline_minutes):
+            self._in_order = False
+        self._timeline_minutes.insert(pos, minute)
+        self._timeline_events.insert(pos, event)
+        self._timeline_seq.insert(pos, len(self.events) - 1)
+        
+        self._by_type.setdefault(event['type'], []).append(event)
+        
+        if self._clock is None or minute > self._clock:
+            self._advance_clock(minute)
+        
+        # Momentum penceresine ekle (geç gelen olaylar da pencere içindeyse sayılır)
+        if minute >= self._clock - self.window_size:
+            self._window_insert(self._window, (minute, event['team'], event['weight']))
+            decay = math.exp(-(self._clock - minute) / self._tau)
+            self._team_sums[event['team']] += event['weight'] * decay
+        
+        if event['type'] in self.ATTACKING_EVENTS and minute >= self._clock - self.PRESSURE_WINDOW:
+            points = self.event_weights.get(event['type'], 5)
+            self._window_insert(self._pressure_window, (minute, event['team'], points))
+            self._pressure_sums[event['team']] += points
+    
+    @staticmethod
+    def _window_insert(window: deque, item: Tuple):
+        """Pencereyi dakikaya göre sıralı tut (sıralı akışta O(1) append)"""
+        if not window or item[0] >= window[-1][0]:
+            window.append(item)
+        else:
+            window.insert(bisect_right([entry[0] for entry in window], item[0]), item)
+    
+    def _advance_clock(self, minute: int):
+        """Saati ilerlet: toplamları decay et, pencereden çıkan olayları düş"""
+        if self._clock is not None:
+            factor = math.exp(-(minute - self._clock) / self._tau)
+            for team in self._team_sums:
+                self._team_sums[team] *= factor
+        self._clock = minute
+        
+        cutoff = minute - self.window_size
+        while self._window and self._window[0][0] < cutoff:
+            old_minute, team, weight = self._window.popleft()
+            self._team_sums[team] -= weight * math.exp(-(minute - old_minute) / self._tau)
+        if not self._window:
+            # Birikmiş kayan nokta hatasını sıfırla
+            self._team_sums = {'home': 0.0, 'away': 0.0}
+        
+        cutoff = minute - self.PRESSURE_WINDOW
+        while self._pressure_window and self._pressure_window[0][0] < cutoff:
+            _, team, points = self._pressure_window.popleft()
+            self._pressure_sums[team] -= points
+        if not self._pressure_window:
+            self._pressure_sums = {'home': 0.0, 'away': 0.0}
+    
+    def _events_between(self, start_minute: float, end_minute: Optional[float] = None,
+                        insertion_order: bool = False) -> List[Dict]:
+        """start <= dakika <= end olan olaylar (sıralı zaman çizelgesinden bisect ile)"""
+        lo = bisect_left(self._timeline_minutes, start_minute)
+        hi = len(self._timeline_minutes) if end_minute is None else bisect_right(self._timeline_minutes, end_minute)
+        if insertion_order and not self._in_order:
+            order = sorted(range(lo, hi), key=self._timeline_seq.__getitem__)
+            return [self._timeline_events[i] for i in order]
+        return self._timeline_events[lo:hi]
+    
     def _update_momentum(self, current_minute: int):
         """Mevcut momentum'u hesapla"""
-        # Son N dakikalık olayları al
-        recent_events = [
-            e for e in self.events 
-            if current_minute - self.window_size <= e['minute'] <= current_minute
-        ]
-        
-        if not recent_events:
-            momentum = 0
+        if current_minute == self._clock:
+            # Sıralı akış: takım toplamları zaten bu dakikaya göre decay edilmiş
+            total_weight = self._team_sums['home'] + self._team_sums['away']
         else:
-            # Yakın geçmişteki olaylara daha fazla ağırlık ver (exponential decay)
+            # Geç gelen olay: sadece o dakikanın penceresi taranır
             total_weight = 0
-            for event in recent_events:
+            for event in self._events_between(current_minute - self.window_size, current_minute):
                 time_diff = current_minute - event['minute']
-                decay = math.exp(-time_diff / (self.window_size / 2))
-                total_weight += event['weight'] * decay
-            
-            # -100 ile +100 arasında normalize et
-            momentum = max(-100, min(100, total_weight))
+                total_weight += event['weight'] * math.exp(-time_diff / self._tau)
+        
+        # -100 ile +100 arasında normalize et
+        momentum = max(-100, min(100, total_weight))
         
         self.momentum_history.append({
             'minute': current_minute,
@@ -111,6 +213,10 @@ class MomentumTracker:
             'away_score': abs(momentum) if momentum < 0 else 0
         })
     
+    def get_team_pressure_sums(self) -> Dict[str, float]:
+        """Takım başına decay'li momentum katkısı (son olay anına göre)"""
+        return {team: round(value, 2) for team, value in self._team_sums.items()}
+    
     def get_current_momentum(self) -> Dict[str, Any]:
         """Mevcut momentum durumu"""
         if not self.momentum_history:
@@ -126,8 +232,7 @@ class MomentumTracker:
         
         # Trend analizi (son 5 dakika)
         if len(self.momentum_history) >= 5:
-            recent = [m['momentum'] for m in self.momentum_history[-5:]]
-            trend_slope = (recent[-1] - recent[0]) / 5
+            trend_slope = (self.momentum_history[-1]['momentum'] - self.momentum_history[-5]['momentum']) / 5
             
             if trend_slope > 5:
                 trend = 'rising_home'
@@ -167,6 +272,8 @@ class MomentumTracker:
         """
         Önemli momentum değişimlerini tespit et
         
+        Eşik başına önbelleklenir; her çağrıda sadece yeni momentum kayıtları işlenir.
+        
         Args:
             threshold: Değişim eşiği
             
@@ -176,33 +283,31 @@ class MomentumTracker:
         if len(self.momentum_history) < 2:
             return []
         
-        shifts = []
-        prev_momentum = self.momentum_history[0]['momentum']
-        
-        for i, current in enumerate(self.momentum_history[1:], 1):
-            momentum_change = current['momentum'] - prev_momentum
-            
+        processed, found = self._shift_cache.get(threshold, (1, []))
+        history = self.momentum_history
+        for i in range(processed, len(history)):
+            prev_momentum = history[i - 1]['momentum']
+            momentum_change = history[i]['momentum'] - prev_momentum
             if abs(momentum_change) >= threshold:
-                # Değişime sebep olan olayları bul
-                minute = current['minute']
-                recent_events = [
-                    e for e in self.events
-                    if minute - 5 <= e['minute'] <= minute
-                ]
-                
-                shifts.append({
-                    'minute': minute,
-                    'from': round(prev_momentum, 2),
-                    'to': round(current['momentum'], 2),
-                    'change': round(momentum_change, 2),
-                    'direction': 'home' if momentum_change > 0 else 'away',
-                    'trigger_events': recent_events[-3:] if recent_events else []
-                })
+                found.append((i, prev_momentum, history[i]['momentum'], momentum_change))
+        self._shift_cache[threshold] = (len(history), found)
+        
+        shifts = []
+        for i, prev_momentum, current_momentum, momentum_change in found:
+            minute = history[i]['minute']
+            # Değişime sebep olan olayları bul (ekleme sırasına göre son 3)
+            recent_events = self._events_between(minute - self.SHIFT_TRIGGER_WINDOW, minute, insertion_order=True)
             
-            prev_momentum = current['momentum']
+            shifts.append({
+                'minute': minute,
+                'from': round(prev_momentum, 2),
+                'to': round(current_momentum, 2),
+                'change': round(momentum_change, 2),
+                'direction': 'home' if momentum_change > 0 else 'away',
+                'trigger_events': recent_events[-3:] if recent_events else []
+            })
         
         return shifts
-    
     def predict_next_goal(self) -> Dict[str, Any]:
         """
         Momentum bazlı bir sonraki golü tahmin et
@@ -261,15 +366,16 @@ class MomentumTracker:
         
         # Son 10 dakikalık saldırı olayları
         recent_minute = self.events[-1]['minute']
-        attacking_events = ['shot_on_target', 'shot_off_target', 'corner', 
-                          'big_chance_created', 'key_pass', 'successful_dribble']
         
-        home_pressure = 0
-        away_pressure = 0
-        
-        for event in self.events:
-            if event['minute'] >= recent_minute - 10:
-                if event['type'] in attacking_events:
+        if recent_minute == self._clock:
+            # Sıralı akış: kayan pencere toplamları hazır
+            home_pressure = self._pressure_sums['home']
+            away_pressure = self._pressure_sums['away']
+        else:
+            home_pressure = 0
+            away_pressure = 0
+            for event in self._events_between(recent_minute - self.PRESSURE_WINDOW):
+                if event['type'] in self.ATTACKING_EVENTS:
                     if event['team'] == 'home':
                         home_pressure += self.event_weights.get(event['type'], 5)
                     else:
@@ -298,7 +404,7 @@ class MomentumTracker:
         critical = []
         
         # Gol anları
-        goals = [e for e in self.events if e['type'] == 'goal']
+        goals = self._by_type.get('goal', [])
         for goal in goals:
             critical.append({
                 'minute': goal['minute'],
@@ -309,7 +415,7 @@ class MomentumTracker:
             })
         
         # Büyük kaçan fırsatlar
-        missed_chances = [e for e in self.events if e['type'] == 'big_chance_missed']
+        missed_chances = self._by_type.get('big_chance_missed', [])
         for chance in missed_chances:
             critical.append({
                 'minute': chance['minute'],
@@ -320,7 +426,7 @@ class MomentumTracker:
             })
         
         # Kırmızı kartlar
-        red_cards = [e for e in self.events if e['type'] == 'red_card']
+        red_cards = self._by_type.get('red_card', [])
         for card in red_cards:
             critical.append({
                 'minute': card['minute'],
@@ -360,10 +466,7 @@ class MomentumTracker:
         critical = self.get_critical_moments()
         
         # İstatistikler
-        event_counts = {}
-        for event in self.events:
-            event_type = event['type']
-            event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        event_counts = {event_type: len(events) for event_type, events in self._by_type.items()}
         
         return {
             'current_momentum': current_momentum,
@@ -400,6 +503,127 @@ class MomentumTracker:
             return 'final_push'
 
 
+class MomentumService:
+    """
+    Çoklu canlı maç momentum servisi
+    
+    Her fixture için bir MomentumTracker tutar ve API-Football /fixtures/events
+    akışını doğrudan besler. Events endpoint'i her poll'da tüm listeyi döndürdüğü
+    için daha önce işlenen olaylar anahtar seti ile atlanır.
+    """
+    
+    # (API type, detail) -> tracker event tipi
+    API_EVENT_MAP = {
+        ('goal', 'normal goal'): 'goal',
+        ('goal', 'penalty'): 'penalty_goal',
+        ('goal', 'own goal'): 'goal',
+        ('goal', 'missed penalty'): 'missed_penalty',
+        ('card', 'yellow card'): 'yellow_card',
+        ('card', 'second yellow card'): 'red_card',
+        ('card', 'red card'): 'red_card',
+    }
+    
+    def __init__(self, window_size: int = 10):
+        self.window_size = window_size
+        self._trackers: Dict[Any, MomentumTracker] = {}
+        self._seen: Dict[Any, set] = {}
+    
+    def tracker(self, fixture_id: Any) -> MomentumTracker:
+        """Fixture'ın tracker'ı (yoksa oluşturulur)"""
+        if fixture_id not in self._trackers:
+            self._trackers[fixture_id] = MomentumTracker(window_size=self.window_size)
+            self._seen[fixture_id] = set()
+        return self._trackers[fixture_id]
+    
+    def add_event(self, fixture_id: Any, minute: int, team: str, event_type: str,
+                  details: Optional[Dict] = None):
+        self.tracker(fixture_id).add_event(minute, team, event_type, details)
+    
+    def ingest_api_events(self, fixture_id: Any, api_events: Optional[List[Dict]],
+                          home_team_id: int) -> int:
+        """
+        /fixtures/events yanıtını tracker'a aktar
+        
+        Args:
+            fixture_id: Maç ID
+            api_events: API olay listesi (kümülatif)
+            home_team_id: Ev sahibi takım ID
+        
+        Returns:
+            Yeni eklenen olay sayısı
+        """
+        tracker = self.tracker(fixture_id)
+        seen = self._seen[fixture_id]
+        added = 0
+        
+        for event in api_events or []:
+            time_info = event.get('time') or {}
+            team_id = (event.get('team') or {}).get('id')
+            event_key = (
+                time_info.get('elapsed'), time_info.get('extra'), team_id,
+                (event.get('player') or {}).get('id'), event.get('type'), event.get('detail')
+            )
+            if event_key in seen:
+                continue
+            seen.add(event_key)
+            
+            event_type = self.API_EVENT_MAP.get(
+                (str(event.get('type', '')).lower(), str(event.get('detail', '')).lower())
+            )
+            if event_type is None or time_info.get('elapsed') is None:
+                continue
+            
+            team = 'home' if team_id == home_team_id else 'away'
+            if str(event.get('detail', '')).lower() == 'own goal':
+                # Kendi kalesine gol: olay, golü atan oyuncunun takımına yazılır
+                team = 'away' if team == 'home' else 'home'
+            
+            minute = time_info['elapsed'] + (time_info.get('extra') or 0)
+            tracker.add_event(minute, team, event_type, details={
+                'player': (event.get('player') or {}).get('name'),
+                'detail': event.get('detail')
+            })
+            added += 1
+        
+        return added
+    
+    def poll(self, api_key: str, base_url: str, fixtures: Dict[Any, int]) -> Dict[Any, int]:
+        """
+        Canlı maçların olaylarını çekip tracker'lara aktar
+        
+        Args:
+            fixtures: {fixture_id: home_team_id}
+        
+        Returns:
+            {fixture_id: yeni olay sayısı}
+        """
+        import api_utils  # Streamlit/HTTP bağımlılığı sadece poll için gerekli
+        
+        results = {}
+        for fixture_id, home_team_id in fixtures.items():
+            # get_fixture_events 30 dk cache'li; canlı akış için doğrudan istek
+            events, error = api_utils.make_api_request(
+                api_key, base_url, "fixtures/events", {'fixture': fixture_id}, skip_limit=True
+            )
+            results[fixture_id] = 0 if error else self.ingest_api_events(fixture_id, events, home_team_id)
+        return results
+    
+    def snapshot(self) -> Dict[Any, Dict[str, Any]]:
+        """Tüm maçların anlık momentum durumu"""
+        return {fixture_id: tracker.get_current_momentum() for fixture_id, tracker in self._trackers.items()}
+    
+    def remove(self, fixture_id: Any):
+        """Biten maçı servisten çıkar"""
+        self._trackers.pop(fixture_id, None)
+        self._seen.pop(fixture_id, None)
+    
+    def __contains__(self, fixture_id: Any) -> bool:
+        return fixture_id in self._trackers
+    
+    def __len__(self) -> int:
+        return len(self._trackers)
+
+
 class MomentumVisualizer:
     """Momentum görselleştirme yardımcı sınıfı"""
     
@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+"""
+Odds Normalization Engine
+=========================
+API-Football /odds yanıtını TEK SEFERDE ayrıştırıp indekslenmiş bir yapıya çevirir.
+
+Önceden her tüketici (get_fixture_detailed_odds, process_odds_data,
+process_detailed_odds, calculate_most_reliable_odds, value/arbitrage dedektörleri)
+ham bookmaker listesini kendi iç içe döngüleriyle ve substring eşleştirmeyle
+yeniden geziyordu. OddsIndex bu işi bir kez yapar:
+
+    (market, line, outcome) -> bookmaker fiyat dizisi (numpy)
+
+ve her anahtar için implied probability, en iyi fiyat ve konsensüs (ortalama)
+fiyatı önceden hesaplar. Marjlar ve marjsız (fair) olasılıklar market/line
+bazında istenince hesaplanıp saklanır.
+
+Usage:
+    from odds_normalizer import OddsIndex
+
+    index = OddsIndex.from_response(odds_response)
+    index.best('over_under', 'over', 2.5)        # {'odd': 1.95, 'bookmaker': 'Bet365', ...}
+    index.consensus('match_winner', 'home')      # {'odd': 2.08, 'prob': 48.1, ...}
+    index.margins('match_winner', ('home', 'draw', 'away'))
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+
+import numpy as np
+
+# Legacy kategori sırası - get_fixture_detailed_odds ile birebir aynı
+CATEGORIES = (
+    'match_winner',
+    'over_under',
+    'btts',
+    'handicap',
+    'first_half',
+    'corners',
+    'cards',
+)
+
+OTHER_CATEGORY = 'other'
+
+_NUMBER_RE = re.compile(r'[-+]?\d+(?:\.\d+)?')
+# Avrupa handikapı başlangıç skoru: 'Home -0:1' (ev sahibi 0:1 geride başlar)
+_EUROPEAN_HANDICAP_RE = re.compile(r'^[-+]?(\d+):(\d+)$')
+# 'HT/FT' (ilk yarı / maç sonu) bir periyot eki değil, ayrı bir bahis tipi
+_FIRST_HALF_RE = re.compile(r'1st half|first half|half time|\bht\b(?!/)')
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_RESULT_BET_TYPES = ('result', 'match_result', '1x2', 'full_time_result')  # ilk yarı 1X2 adları
+_OUTCOME_PREFIXES = ('over', 'under', 'home', 'away', 'draw', 'yes', 'no')
+
+Key = Tuple[str, Optional[float], str]
+
+
+@lru_cache(maxsize=512)
+def classify_category(bet_name: str) -> str:
+    """
+    Bahis adını legacy kategoriye çevir.
+
+    Sıra: korner, kart, maç sonucu, gol alt/üst, KG, handikap, ilk yarı. Korner ve kart
+    adları da 'over/under' içerdiğinden önce bakılır; yoksa 'Cards Over/Under' gol
+    alt/üstüne karışır.
+
+    Sonuç bet adı başına önbelleğe alınır; aynı isim yüzlerce bookmaker'da tekrar ettiği için
+    substring taraması sadece bir kez yapılır.
+    """
+    name = (bet_name or '').lower()
+
+    if 'corner' in name:
+        return 'corners'
+    if 'card' in name or 'yellow' in name or 'booking' in name:
+        return 'cards'
+    if 'match winner' in name or ('winner' in name and 'half' not in name):
+        return 'match_winner'
+    if ('over/under' in name or 'goals over/under' in name or 'total goals' in name or
+            'goals o/u' in name or 'match goals' in name or 'o/u goals' in name or
+            'goal total' in name or 'goals total' in name):
+        return 'over_under'
+    if 'both teams score' in name or 'btts' in name or 'gg/ng' in name:
+        return 'btts'
+    if 'handicap' in name or 'spread' in name or 'asian handicap' in name:
+        return 'handicap'
+    if '1st half' in name or 'first half' in name or 'half time' in name or 'ht' in name:
+        return 'first_half'
+    return OTHER_CATEGORY
+
+
+@lru_cache(maxsize=512)
+def classify_market(bet_name: str) -> str:
+    """
+    Kanonik market adı: kategori + periyot eki.
+
+    'Goals Over/Under' -> 'over_under', 'Goals Over/Under First Half' -> 'over_under_1h'.
+    Böylece 2.5 gol çizgisi ilk yarı çizgileriyle karışmaz.
+
+    Legacy 'first_half' kategorisindeki bahisler tipine göre ayrılır: ilk yarı 1X2
+    ('First Half Winner', 'Match Winner 1st Half') -> 'first_half',
+    'Draw No Bet (1st Half)' -> 'first_half_draw_no_bet'.
+    """
+    category = classify_category(bet_name)
+    if category == OTHER_CATEGORY:
+        return category
+
+    name = (bet_name or '').lower()
+    if category == 'first_half' or (category == 'match_winner' and _FIRST_HALF_RE.search(name)):
+        bet_type = _SLUG_RE.sub('_', _FIRST_HALF_RE.sub(' ', name)).strip('_')
+        base = classify_category(bet_type.replace('_', ' ')) if bet_type else 'match_winner'
+        if base == 'match_winner' or bet_type in _RESULT_BET_TYPES:
+            return 'first_half'
+        return f"{base}_1h" if base not in ('first_half', OTHER_CATEGORY) else f"first_half_{bet_type}"
+    if 'first half' in name or '1st half' in name:
+        return f"{category}_1h"
+    if 'second half' in name or '2nd half' in name:
+        return f"{category}_2h"
+    return category
+
+
+@lru_cache(maxsize=2048)
+def parse_outcome(label: str, bet_name: str = '') -> Tuple[str, Optional[float]]:
+    """
+    Oran etiketini (outcome, line) çiftine ayır.
+
+    'Over 2.5' -> ('over', 2.5), 'Home -1.5' -> ('home', -1.5), 'Draw' -> ('draw', None).
+    Etikette sayı yoksa çizgi bahis adından alınır ('Corners 9.5' + 'Over' -> ('over', 9.5)).
+    Avrupa handikapının 'a:b' başlangıç skoru ev sahibi farkına çevrilir; üç sonuç da aynı
+    çizgiyi taşır ('Home -0:1' / 'Draw -0:1' -> ('home', -1.0) / ('draw', -1.0)).
+    """
+    text = str(label or '').strip().lower()
+    outcome = text
+    line = None
+
+    for prefix in _OUTCOME_PREFIXES:
+        if text == prefix or text.startswith(prefix + ' '):
+            outcome = prefix
+            remainder = text[len(prefix):].strip()
+            if remainder:
+                european = _EUROPEAN_HANDICAP_RE.match(remainder)
+                if european:
+                    line = float(european.group(1)) - float(european.group(2))
+                else:
+                    try:
+                        line = float(remainder)
+                    except ValueError:
+                        return text, None
+            break
+    else:
+        return text, None
+
+    if line is None and outcome in ('over', 'under'):
+        match = _NUMBER_RE.search(bet_name or '')
+        if match:
+            line = float(match.group())
+
+    return outcome, line
+
+
+def _to_price(odd: Any) -> float:
+    try:
+        price = float(odd)
+    except (TypeError, ValueError):
+        return 0.0
+    return price if price > 1.0 and math.isfinite(price) else 0.0
+
+
+def _line_key(line: Optional[float]) -> Optional[float]:
+    return None if line is None else round(float(line), 2)
+
+
+class OddsIndex:
+    """
+    Bookmaker oranlarının indekslenmiş, tipli temsili
+
+    Kolonlar (numpy, satır = tek bir bookmaker/outcome fiyatı):
+    - book:     bookmaker indeksi
+    - bet:      bahis adı indeksi
+    - price:    decimal oran
+    - implied:  1 / price
+
+    İndeksler:
+    - (market, line, outcome) -> satır dizisi
+    - bet adı -> satır dizisi
+    """
+
+    def __init__(self, bookmakers: Optional[List[Dict[str, Any]]] = None):
+        self.bookmakers: List[str] = []
+        self.bet_names: List[str] = []
+        self._raw_bets: Dict[str, List[Dict[str, Any]]] = {cat: [] for cat in CATEGORIES}
+
+        self._keys: Dict[Key, np.ndarray] = {}
+        self._by_bet: Dict[str, np.ndarray] = {}
+        self._labels: List[str] = []
+        self._bet_entries: Dict[str, int] = {}
+
+        self._stats: Dict[Key, Dict[str, Any]] = {}
+        self._margin_cache: Dict[Tuple, Tuple[List[str], np.ndarray]] = {}
+
+        self._build(bookmakers or [])
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_response(cls, odds_response: Optional[List[Dict[str, Any]]]) -> 'OddsIndex':
+        """/odds endpoint yanıtından (response listesi) index oluştur"""
+        if not odds_response:
+            return cls([])
+        return cls(odds_response[0].get('bookmakers') or [])
+
+    @classmethod
+    def from_categorized(cls, categorized_odds: Optional[Dict[str, List[Dict]]]) -> 'OddsIndex':
+        """get_fixture_detailed_odds çıktısından (legacy kategorize format) index oluştur"""
+        books: Dict[str, Dict[str, Any]] = {}
+        for bets in (categorized_odds or {}).values():
+            if not isinstance(bets, list):
+                continue
+            for bet in bets:
+                name = bet.get('bookmaker') or 'Unknown'
+                book = books.setdefault(name, {'name': name, 'bets': []})
+                book['bets'].append({'name': bet.get('bet_name', ''), 'values': bet.get('values', [])})
+        return cls(list(books.values()))
+
+    def _build(self, bookmakers: List[Dict[str, Any]]):
+        book_col: List[int] = []
+        bet_col: List[int] = []
+        price_col: List[float] = []
+        keys: Dict[Key, List[int]] = {}
+        by_bet: Dict[str, List[int]] = {}
+        bet_ids: Dict[str, int] = {}
+
+        for bookmaker in bookmakers:
+            book_idx = len(self.bookmakers)
+            self.bookmakers.append(bookmaker.get('name') or 'Unknown')
+
+            for bet in bookmaker.get('bets', []) or []:
+                bet_name = bet.get('name', '') or ''
+                values = bet.get('values', []) or []
+                category = classify_category(bet_name)
+                market = classify_market(bet_name)
+
+                if category != OTHER_CATEGORY:
+                    self._raw_bets[category].append({
+                        'bookmaker': bookmaker.get('name'),
+                        'bet_name': bet.get('name'),
+                        'values': values
+                    })
+                self._bet_entries[bet_name] = self._bet_entries.get(bet_name, 0) + 1
+
+                if bet_name not in bet_ids:
+                    bet_ids[bet_name] = len(self.bet_names)
+                    self.bet_names.append(bet_name)
+
+                for value in values:
+                    price = _to_price(value.get('odd'))
+                    if price <= 0:
+                        continue
+                    label = str(value.get('value', ''))
+                    outcome, line = parse_outcome(label, bet_name)
+
+                    row = len(price_col)
+                    book_col.append(book_idx)
+                    bet_col.append(bet_ids[bet_name])
+                    price_col.append(price)
+                    self._labels.append(label)
+
+                    keys.setdefault((market, _line_key(line), outcome), []).append(row)
+                    by_bet.setdefault(bet_name, []).append(row)
+
+        self.book = np.asarray(book_col, dtype=np.int32)
+        self.bet = np.asarray(bet_col, dtype=np.int32)
+        self.price = np.asarray(price_col, dtype=np.float64)
+        self.implied = 1.0 / self.price if len(self.price) else np.zeros(0)
+
+        self._keys = {key: np.asarray(rows, dtype=np.int64) for key, rows in keys.items()}
+        self._by_bet = {name: np.asarray(rows, dtype=np.int64) for name, rows in by_bet.items()}
+
+        # En iyi fiyat ve konsensüs tek geçişte önceden hesaplanır
+        for key, rows in self._keys.items():
+            prices = self.price[rows]
+            best_pos = int(np.argmax(prices))
+            mean_price = float(prices.mean())
+            self._stats[key] = {
+                'best_odd': float(prices[best_pos]),
+                'best_bookmaker': self.bookmakers[self.book[rows[best_pos]]],
+                'consensus_odd': mean_price,
+                'consensus_prob': 100.0 / mean_price,
+                'bookmaker_count': int(len(np.unique(self.book[rows]))),
+            }
+
+    # ---------------------------------------------------------------- queries
+
+    def __bool__(self) -> bool:
+        return len(self.price) > 0
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def keys(self) -> List[Key]:
+        return list(self._keys.keys())
+
+    def markets(self) -> List[str]:
+        return sorted({market for market, _, _ in self._keys})
+
+    def lines(self, market: str) -> List[float]:
+        """Bir market için mevcut çizgiler (ör. over_under -> [0.5, 1.5, 2.5, ...])"""
+        return sorted({line for m, line, _ in self._keys if m == market and line is not None})
+
+    def outcomes(self, market: str, line: Optional[float] = None) -> List[str]:
+        line = _line_key(line)
+        return sorted({o for m, l, o in self._keys if m == market and l == line})
+
+    def prices(self, market: str, outcome: str, line: Optional[float] = None) -> np.ndarray:
+        """(market, line, outcome) için tüm bookmaker fiyatları"""
+        rows = self._keys.get((market, _line_key(line), outcome))
+        return self.price[rows] if rows is not None else np.zeros(0)
+
+    def quotes(self, market: str, outcome: str, line: Optional[float] = None) -> List[Tuple[str, float]]:
+        """(bookmaker, fiyat) listesi"""
+        rows = self._keys.get((market, _line_key(line), outcome))
+        if rows is None:
+            return []
+        return [(self.bookmakers[b], float(p)) for b, p in zip(self.book[rows], self.price[rows])]
+
+    def best(self, market: str, outcome: str, line: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """En yüksek fiyat + bookmaker"""
+        stats = self._stats.get((market, _line_key(line), outcome))
+        if not stats:
+            return None
+        return {
+            'odd': stats['best_odd'],
+            'bookmaker': stats['best_bookmaker'],
+            'implied_prob': round(100.0 / stats['best_odd'], 1),
+        }
+
+    def consensus(self, market: str, outcome: str, line: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Bookmaker ortalama fiyatı (piyasa konsensüsü)"""
+        stats = self._stats.get((market, _line_key(line), outcome))
+        if not stats:
+            return None
+        return {
+            'odd': stats['consensus_odd'],
+            'prob': stats['consensus_prob'],
+            'bookmaker_count': stats['bookmaker_count'],
+        }
+
+    def book_matrix(self, market: str, outcomes: Iterable[str],
+                    line: Optional[float] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Tüm outcome'ları fiyatlayan bookmaker'lar için (n_books x n_outcomes) fiyat matrisi.
+
+        Bir bookmaker aynı outcome'u birden fazla bahiste veriyorsa ilk fiyat kullanılır.
+        """
+        outcomes = tuple(outcomes)
+        cache_key = (market, _line_key(line), outcomes)
+        cached = self._margin_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        n_books = len(self.bookmakers)
+        matrix = np.zeros((n_books, len(outcomes)), dtype=np.float64)
+        for col, outcome in enumerate(outcomes):
+            rows = self._keys.get((market, _line_key(line), outcome))
+            if rows is None:
+                result = ([], np.zeros((0, len(outcomes))))
+                self._margin_cache[cache_key] = result
+                return result
+            # Ters sırada yaz -> ilk görülen fiyat kazanır
+            matrix[self.book[rows[::-1]], col] = self.price[rows[::-1]]
+
+        complete = np.all(matrix > 0, axis=1)
+        result = ([self.bookmakers[i] for i in np.flatnonzero(complete)], matrix[complete])
+        self._margin_cache[cache_key] = result
+        return result
+
+    def margins(self, market: str, outcomes: Iterable[str],
+                line: Optional[float] = None) -> Dict[str, float]:
+        """Bookmaker başına marj (overround, %)"""
+        books, matrix = self.book_matrix(market, outcomes, line)
+        if not books:
+            return {}
+        overround = (1.0 / matrix).sum(axis=1) - 1.0
+        return {book: float(m * 100) for book, m in zip(books, overround)}
+
+    def fair_probabilities(self, market: str, outcomes: Iterable[str],
+                           line: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Marj çıkarılmış konsensüs olasılıkları (0-1).
+
+        Her bookmaker'ın implied olasılıkları kendi toplamına bölünür, sonra ortalaması alınır.
+        """
+        outcomes = tuple(outcomes)
+        books, matrix = self.book_matrix(market, outcomes, line)
+        if not books:
+            return None
+        implied = 1.0 / matrix
+        fair = (implied / implied.sum(axis=1, keepdims=True)).mean(axis=0)
+        return {outcome: float(p) for outcome, p in zip(outcomes, fair)}
+
+    # ------------------------------------------------------------ legacy views
+
+    def categorized(self) -> Dict[str, List[Dict[str, Any]]]:
+        """get_fixture_detailed_odds'un döndürdüğü kategorize format"""
+        return {cat: list(bets) for cat, bets in self._raw_bets.items()}
+
+    def best_by_bet(self, merge_categories: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Bahis adı başına, her etiket için en iyi fiyat.
+
+        Args:
+            merge_categories: {'over_under': 'Over/Under'} gibi; bu kategorideki tüm bahis
+                adları tek anahtar altında birleşir.
+
+        Returns:
+            {bet_key: {'bookmaker_count': n, 'best_odds': {label: {'odd', 'bookmaker', 'implied_prob'}}}}
+        """
+        merge_categories = merge_categories or {}
+        groups: Dict[str, List[str]] = {}
+        for bet_name in self.bet_names:
+            bet_key = merge_categories.get(classify_category(bet_name), bet_name)
+            groups.setdefault(bet_key, []).append(bet_name)
+
+        result = {}
+        for bet_key, names in groups.items():
+            rows = [self._by_bet[name] for name in names if name in self._by_bet]
+            entry = {
+                'bookmaker_count': sum(self._bet_entries.get(name, 0) for name in names),
+                'best_odds': {}
+            }
+            if rows:
+                best_rows: Dict[str, int] = {}
+                for row in np.sort(np.concatenate(rows)):
+                    label = self._labels[row]
+                    # Eşitlikte ilk görülen bookmaker korunur
+                    if label not in best_rows or self.price[row] > self.price[best_rows[label]]:
+                        best_rows[label] = row
+                for label, row in best_rows.items():
+                    odd = float(self.price[row])
+                    entry['best_odds'][label] = {
+                        'odd': odd,
+                        'bookmaker': self.bookmakers[self.book[row]],
+                        'implied_prob': round(100 / odd, 1)
+                    }
+            result[bet_key] = entry
+        return result
+
+
+def build_odds_index(odds_response: Optional[List[Dict[str, Any]]]) -> OddsIndex:
+    """Kısa yol: /odds yanıtından index"""
+    return OddsIndex.from_response(odds_response)
+
+
+# Test fonksiyonu
+if __name__ == "__main__":
+    sample = [{
+        'bookmakers': [
+            {'name': 'Bet365', 'bets': [
+                {'name': 'Match Winner', 'values': [
+                    {'value': 'Home', 'odd': '2.10'}, {'value': 'Draw', 'odd': '3.40'}, {'value': 'Away', 'odd': '3.60'}]},
+                {'name': 'Goals Over/Under', 'values': [
+                    {'value': 'Over 2.5', 'odd': '1.90'}, {'value': 'Under 2.5', 'odd': '1.95'}]},
+            ]},
+            {'name': '1xBet', 'bets': [
+                {'name': 'Match Winner', 'values': [
+                    {'value': 'Home', 'odd': '2.20'}, {'value': 'Draw', 'odd': '3.30'}, {'value': 'Away', 'odd': '3.50'}]},
+            ]},
+        ]
+    }]
+
+    index = OddsIndex.from_response(sample)
+    print("🧪 ODDS INDEX TEST")
+    print(f"   Marketler: {index.markets()}")
+    print(f"   En iyi ev sahibi: {index.best('match_winner', 'home')}")
+    print(f"   Konsensüs ev sahibi: {index.consensus('match_winner', 'home')}")
+    print(f"   Marjlar: {index.margins('match_winner', ('home', 'draw', 'away'))}")
+    print(f"   Fair: {index.fair_probabilities('match_winner', ('home', 'draw', 'away'))}")
+    print(f"   2.5 Üst: {index.best('over_under', 'over', 2.5)}")
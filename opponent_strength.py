@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Opponent Strength Service
+=========================
+Rakip gücünü lig puan durumundan türetir: tek standings isteği ile ligdeki tüm
+takımların PPG, averaj ve sıralaması çıkarılır.
+
+- Tablo (lig, sezon, hafta) anahtarıyla CacheManager'a yazılır (varsayılan hafta
+  işareti = bugünün tarihi → lig başına günde bir istek)
+- Aynı süreçte sonraki tüm sorgular bellekteki tablodan yanıtlanır
+- Güç skoru eski get_opponent_strengths_from_api ile aynı ölçekte: PPG / 3 (0.0-1.0)
+
+Usage:
+    from opponent_strength import get_opponent_strength_service
+
+    service = get_opponent_strength_service()
+    strengths = service.get_strengths(api_key, base_url, [611, 549], league_id=203, season=2025)
+    service.annotate_matches(api_key, base_url, recent_matches, league_id=203, season=2025)
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from cache_manager import CacheManager, get_cache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+    CacheManager = None
+    get_cache = None
+
+STRENGTH_CACHE_CATEGORY = 'opponent_strength'
+STRENGTH_CACHE_TTL = 86400  # 1 gün
+DEFAULT_STRENGTH = 0.5
+
+
+def build_strength_table(standings: List[Any]) -> Dict[int, Dict[str, Any]]:
+    """
+    Puan durumu satırlarından takım başına güç kaydı üret
+
+    Args:
+        standings: get_league_standings çıktısı (satır listesi veya grup listeleri)
+
+    Returns:
+        {team_id: {'rank', 'ppg', 'goal_diff', 'gd_per_game', 'played', 'strength'}}
+    """
+    rows: List[Dict] = []
+    for item in standings or []:
+        # Gruplu ligler (ve api_utils'in ikinci tanımı) satırları listeler halinde döner
+        if isinstance(item, list):
+            rows.extend(item)
+        elif isinstance(item, dict):
+            rows.append(item)
+
+    table: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        team_id = (row.get('team') or {}).get('id')
+        if team_id is None:
+            continue
+        overall = row.get('all') or {}
+        played = overall.get('played') or 0
+        points = row.get('points') or 0
+        goal_diff = row.get('goalsDiff') or 0
+
+        ppg = points / played if played > 0 else None
+        table[int(team_id)] = {
+            'rank': row.get('rank'),
+            'played': played,
+            'ppg': round(ppg, 3) if ppg is not None else None,
+            'goal_diff': goal_diff,
+            'gd_per_game': round(goal_diff / played, 3) if played > 0 else 0.0,
+            'strength': round(ppg / 3.0, 4) if ppg is not None else DEFAULT_STRENGTH
+        }
+    return table
+
+
+class OpponentStrengthService:
+    """Lig tablosu tabanlı rakip gücü sorguları (bellek + CacheManager)"""
+
+    def __init__(self, cache: Optional['CacheManager'] = None, use_cache: bool = True,
+                 ttl: int = STRENGTH_CACHE_TTL):
+        """
+        Args:
+            cache: Tablo cache'i (None = global cache)
+            use_cache: False ise sadece bellek içi tablo tutulur
+            ttl: Cache'teki tablonun yaşam süresi (saniye)
+        """
+        if cache is None and use_cache and CACHE_AVAILABLE:
+            cache = get_cache()
+        self.cache = cache if use_cache else None
+        self.ttl = ttl
+        self._tables: Dict[Tuple[int, int, str], Dict[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'cache_hits': 0, 'api_calls': 0}
+
+    @staticmethod
+    def _default_matchday() -> str:
+        return datetime.now().strftime('%Y-%m-%d')
+
+    def _fetch_standings(self, api_key: str, base_url: str, league_id: int, season: int):
+        import api_utils
+        return api_utils.get_league_standings(api_key, base_url, league_id, season, skip_limit=True)
+
+    def get_league_table(self, api_key: str, base_url: str, league_id: int, season: int,
+                         matchday: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Ligin güç tablosu (bellek → cache → tek standings isteği)
+
+        Args:
+            matchday: Hafta işareti (None = bugünün tarihi)
+        """
+        matchday = matchday or self._default_matchday()
+        key = (int(league_id), int(season), str(matchday))
+
+        table = self._tables.get(key)
+        if table is not None:
+            self.stats['memory_hits'] += 1
+            return table
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self.stats['memory_hits'] += 1
+                return table
+
+            if self.cache is not None:
+                cached = self.cache.get(STRENGTH_CACHE_CATEGORY, league_id=key[0],
+                                        season=key[1], matchday=key[2])
+                if cached is not None:
+                    # JSON anahtarları string döner
+                    table = {int(team_id): row for team_id, row in cached.items()}
+                    self.stats['cache_hits'] += 1
+
+            if table is None:
+                self.stats['api_calls'] += 1
+                try:
+                    standings, error = self._fetch_standings(api_key, base_url, league_id, season)
+                except Exception as e:
+                    standings, error = None, str(e)
+                if error or not standings:
+                    # Başarısız çekimi bellekte tutma; bir sonraki sorgu tekrar dener
+                    print(f"⚠️ Lig {league_id} puan durumu alınamadı: {error}")
+                    return {}
+
+                table = build_strength_table(standings)
+                if self.cache is not None and table:
+                    self.cache.set(STRENGTH_CACHE_CATEGORY, table, self.ttl,
+                                   tags=[f"league:{key[0]}:{key[1]}"],
+                                   league_id=key[0], season=key[1], matchday=key[2])
+
+            # Eski haftaların tabloları bellekte birikmesin
+            for old_key in [k for k in self._tables if k[:2] == key[:2]]:
+                del self._tables[old_key]
+            self._tables[key] = table
+            return table
+
+    @staticmethod
+    def _league_average(table: Dict[int, Dict[str, Any]]) -> float:
+        if not table:
+            return DEFAULT_STRENGTH
+        return sum(row['strength'] for row in table.values()) / len(table)
+
+    def get_team_strength(self, api_key: str, base_url: str, team_id: int, league_id: int,
+                          season: int, matchday: Optional[str] = None) -> Dict[str, Any]:
+        """Tek takımın tablo kaydı (tabloda yoksa lig ortalaması güç ile boş kayıt)"""
+        table = self.get_league_table(api_key, base_url, league_id, season, matchday)
+        row = table.get(int(team_id)) if team_id is not None else None
+        if row is not None:
+            return row
+        return {'rank': None, 'played': 0, 'ppg': None, 'goal_diff': 0,
+                'gd_per_game': 0.0, 'strength': round(self._league_average(table), 4)}
+
+    def get_strengths(self, api_key: str, base_url: str, opponent_ids: List[int],
+                      league_id: int, season: int, matchday: Optional[str] = None) -> List[float]:
+        """
+        Rakip güçleri (0.0-1.0) - tek tablo üzerinden
+
+        Ligde olmayan rakipler (kupa maçları vb.) lig ortalaması güç alır.
+        """
+        table = self.get_league_table(api_key, base_url, league_id, season, matchday)
+        if not table:
+            return [DEFAULT_STRENGTH] * len(opponent_ids)
+        default = round(self._league_average(table), 4)
+        return [
+            table[int(team_id)]['strength'] if team_id is not None and int(team_id) in table else default
+            for team_id in opponent_ids
+        ]
+
+    def annotate_matches(self, api_key: str, base_url: str, matches: List[Dict],
+                         league_id: int, season: int, matchday: Optional[str] = None) -> List[Dict]:
+        """
+        parse_fixtures_to_matches çıktısına 'opponent_strength' ekle (yerinde)
+
+        AdvancedFormCalculator bu alanı rakip ayarlı form için kullanır.
+        """
+        if not matches:
+            return matches
+        strengths = self.get_strengths(
+            api_key, base_url, [m.get('opponent_id') for m in matches], league_id, season, matchday
+        )
+        for match, strength in zip(matches, strengths):
+            match['opponent_strength'] = strength
+        return matches
+
+    def invalidate(self, league_id: Optional[int] = None):
+        """Bellekteki tabloları temizle (None = hepsi)"""
+        with self._lock:
+            if league_id is None:
+                self._tables.clear()
+            else:
+                for key in [k for k in self._tables if k[0] == int(league_id)]:
+                    del self._tables[key]
+
+
+# Global instance
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_opponent_strength_service() -> OpponentStrengthService:
+    """Global OpponentStrengthService instance'ı getir"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = OpponentStrengthService()
+    return _service
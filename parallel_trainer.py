@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel Trainer
+================
+Fits independent models concurrently for EnhancedMLPredictor:
+- One process per model (pool sized to the host), CPU threads split evenly
+- Scaled train / validation matrices live in shared memory; workers map them
+  instead of receiving a pickled copy per task
+- Train / validation accuracy and validation probabilities are computed in
+  the worker, right after fitting
+- Per-model wall time and worker peak RSS are reported
+
+Usage:
+    from parallel_trainer import TrainingOrchestrator
+
+    results = TrainingOrchestrator().fit_all(
+        {'random_forest': rf, 'logistic': lr}, X_train, y_train, X_val, y_val
+    )
+    results['random_forest'].model, results['random_forest'].wall_time
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+
+@dataclass
+class ModelFitResult:
+    name: str
+    model: Any
+    train_acc: float
+    val_acc: Optional[float]
+    val_proba: Optional[np.ndarray]
+    wall_time: float
+    peak_memory_mb: Optional[float]
+
+
+# (shared memory name, shape, dtype) - the only thing pickled per task
+ArrayHandle = Tuple[str, Tuple[int, ...], str]
+
+
+def _to_shared(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, ArrayHandle]:
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _fit_and_score(name: str, model, X_train: np.ndarray, y_train: np.ndarray,
+                   X_val: Optional[np.ndarray], y_val: Optional[np.ndarray]) -> ModelFitResult:
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_acc = float(accuracy_score(y_train, model.predict(X_train)))
+    val_acc = val_proba = None
+    if X_val is not None:
+        val_proba = model.predict_proba(X_val)
+        val_acc = float(accuracy_score(y_val, model.classes_[np.argmax(val_proba, axis=1)]))
+    return ModelFitResult(name, model, train_acc, val_acc, val_proba,
+                          time.perf_counter() - start, _peak_rss_mb())
+
+
+def _fit_in_worker(name: str, model, handles: Dict[str, Optional[ArrayHandle]]) -> ModelFitResult:
+    """Pool task: map the shared arrays (no copy), fit, score"""
+    segments, arrays = [], {}
+    try:
+        for key, handle in handles.items():
+            if handle is None:
+                arrays[key] = None
+                continue
+            shm_name, shape, dtype = handle
+            shm = shared_memory.SharedMemory(name=shm_name)
+            segments.append(shm)
+            arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        result = _fit_and_score(name, model, arrays['X_train'], arrays['y_train'],
+                                arrays['X_val'], arrays['y_val'])
+        arrays.clear()
+        return result
+    finally:
+        for shm in segments:
+            shm.close()
+
+
+def _set_threads(model, n_threads: Optional[int]) -> Optional[int]:
+    """Give each concurrently fitted model its share of the cores (returns the old value)"""
+    try:
+        params = model.get_params()
+        if 'n_jobs' in params:
+            model.set_params(n_jobs=n_threads)
+            return params['n_jobs']
+    except Exception:
+        pass
+    return None
+
+
+class TrainingOrchestrator:
+    """Fits a dict of independent estimators concurrently"""
+
+    def __init__(self, n_workers: Optional[int] = None):
+        """
+        Args:
+            n_workers: Concurrent model fits (None = host cores; 1 = in-process,
+                       also the default where fork is unavailable, e.g. Windows,
+                       since spawn would re-run unguarded training scripts)
+        """
+        if n_workers is None:
+            n_workers = (os.cpu_count() or 1) if 'fork' in multiprocessing.get_all_start_methods() else 1
+        self.n_workers = max(1, int(n_workers))
+
+    def fit_all(self, models: Dict[str, Any], X_train: np.ndarray, y_train: np.ndarray,
+                X_val: Optional[np.ndarray] = None, y_val: Optional[np.ndarray] = None) -> Dict[str, ModelFitResult]:
+        """
+        Fit every model on the same data
+
+        Returns:
+            name → ModelFitResult (in the order of `models`)
+        """
+        n_parallel = min(self.n_workers, len(models))
+        if n_parallel <= 1:
+            return {name: _fit_and_score(name, model, X_train, y_train, X_val, y_val)
+                    for name, model in models.items()}
+
+        n_threads = max(1, (os.cpu_count() or 1) // n_parallel)
+        n_jobs = {name: _set_threads(model, n_threads) for name, model in models.items()}
+
+        segments = []
+        try:
+            handles: Dict[str, Optional[ArrayHandle]] = {}
+            for key, array in (('X_train', X_train), ('y_train', y_train), ('X_val', X_val), ('y_val', y_val)):
+                if array is None:
+                    handles[key] = None
+                    continue
+                shm, handles[key] = _to_shared(np.asarray(array))
+                segments.append(shm)
+
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            with ProcessPoolExecutor(max_workers=n_parallel,
+                                     mp_context=multiprocessing.get_context(start_method)) as pool:
+                futures = {name: pool.submit(_fit_in_worker, name, model, handles)
+                           for name, model in models.items()}
+                results = {name: future.result() for name, future in futures.items()}
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+        # Inference uses the models' own thread settings again
+        for name, result in results.items():
+            _set_threads(result.model, n_jobs[name])
+        return results
+
+
+def format_profile(results: Dict[str, ModelFitResult]) -> str:
+    """One line per model: wall time and worker peak memory"""
+    lines = []
+    for name, result in results.items():
+        memory = f"{result.peak_memory_mb:.0f} MB" if result.peak_memory_mb is not None else "n/a"
+        lines.append(f"      {name:<16} {result.wall_time:6.2f}s   peak RSS {memory}")
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Advanced Metrics Nightly Precompute
+===================================
+Takip edilen liglerdeki tüm takımlar için rakipten bağımsız advanced metrics
+bağlamını (form, ev avantajı, progressive, xA) hesaplayıp cache'e yazar.
+Maç sayfaları bu kayıtları AdvancedMetricsManager üzerinden hazır okur.
+
+Kullanım:
+    python precompute_advanced_metrics.py                 # tüm takip edilen ligler
+    python precompute_advanced_metrics.py -l 203 -l 39    # sadece seçilen ligler
+"""
+
+from __future__ import annotations
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import toml
+
+import api_utils
+from analysis_logic import calculate_general_stats_v2
+from advanced_metrics_manager import (
+    AdvancedMetricsManager,
+    build_team_stats_from_location,
+    get_current_season,
+    get_matchday_marker
+)
+from fixture_parser import parse_fixtures_to_matches
+from opponent_strength import get_opponent_strength_service
+from update_elo import INTERESTING_LEAGUES
+from upstream_rate_limiter import PRIORITY_BATCH, request_priority
+
+BASE_URL = "https://v3.football.api-sports.io"
+
+
+def load_api_key() -> Optional[str]:
+    """API anahtarını environment variable veya secrets.toml'dan oku"""
+    api_key = os.environ.get('API_KEY')
+    if api_key:
+        return api_key
+    try:
+        secrets_path = os.path.join(os.path.dirname(__file__), '.streamlit', 'secrets.toml')
+        return toml.load(secrets_path)["API_KEY"]
+    except (FileNotFoundError, KeyError) as e:
+        print(f"Hata: API anahtarı okunamadı. Hata: {e}")
+        return None
+
+
+def precompute_team(manager: AdvancedMetricsManager, api_key: str, base_url: str,
+                    team_id: int, team_name: str, league_id: int, season: int) -> bool:
+    """Tek takım için ev ve deplasman bağlamını hesaplayıp cache'e yaz"""
+    stats_raw = calculate_general_stats_v2(api_key, base_url, team_id, league_id, season, skip_api_limit=True)
+
+    response, error = api_utils.make_api_request(
+        api_key, base_url, "fixtures",
+        {'team': team_id, 'last': 10, 'status': 'FT'},
+        skip_limit=True
+    )
+    if error:
+        print(f"⚠️ {team_name} fixtures hatası: {error}")
+        return False
+    recent = parse_fixtures_to_matches(response or [], team_id)
+    get_opponent_strength_service().annotate_matches(api_key, base_url, recent, league_id, season)
+    matchday = get_matchday_marker(recent)
+
+    for is_home, loc_key, stability_default in ((True, 'home', 50.0), (False, 'away', 45.0)):
+        manager.get_team_context(
+            team_id=team_id,
+            team_name=team_name,
+            league_id=league_id,
+            team_stats=build_team_stats_from_location(stats_raw.get(loc_key, {}), stability_default),
+            recent_matches=recent,
+            is_home=is_home,
+            season=season,
+            matchday=matchday
+        )
+    return True
+
+
+@request_priority(PRIORITY_BATCH)
+def run_precompute(league_ids: Optional[List[int]] = None, season: Optional[int] = None) -> Dict[int, int]:
+    """
+    Takip edilen liglerdeki tüm takımların bağlamını doldur
+
+    Returns:
+        {league_id: hazırlanan takım sayısı}
+    """
+    api_key = load_api_key()
+    if not api_key:
+        return {}
+
+    season = season or get_current_season()
+    league_ids = league_ids or list(INTERESTING_LEAGUES)
+    manager = AdvancedMetricsManager()
+    summary = {}
+
+    for league_id in league_ids:
+        teams, error = api_utils.make_api_request(
+            api_key, BASE_URL, "teams", {'league': league_id, 'season': season}, skip_limit=True
+        )
+        if error or not teams:
+            print(f"⚠️ Lig {league_id} takımları alınamadı: {error}")
+            continue
+
+        done = 0
+        for item in teams:
+            team = item.get('team', {})
+            try:
+                if precompute_team(manager, api_key, BASE_URL, team['id'], team.get('name', ''), league_id, season):
+                    done += 1
+            except Exception as e:
+                print(f"⚠️ {team.get('name')} bağlamı hesaplanamadı: {e}")
+
+        summary[league_id] = done
+        print(f"✅ Lig {league_id}: {done}/{len(teams)} takım hazır")
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Advanced metrics takım bağlamı ön hesaplama scripti')
+    parser.add_argument('--league', '-l', type=int, action='append', help='Lig ID (birden fazla verilebilir)')
+    parser.add_argument('--season', '-s', type=int, default=None, help='Sezon yılı (varsayılan: güncel sezon)')
+    args = parser.parse_args()
+    run_precompute(args.league, args.season)
+
+
+if __name__ == '__main__':
+    main()
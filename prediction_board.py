@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+Daily Prediction Board
+======================
+Günün tahmin panosunu (takip edilen tüm liglerdeki her maç için olasılıklar ve
+güven puanı) arka planda bir kez hesaplar ve JSON snapshot olarak yazar.
+Streamlit ana sayfa / maç panosu ve FastAPI sayfaları bu snapshot'ı okur;
+sayfa yükleme süresi maç sayısından bağımsızdır.
+
+- build: günün tüm maçlarını analiz et, snapshot'ı yaz
+- refresh: başlamamış ve başlama saati yaklaşan maçlarda kadro / 1X2 oranı
+  değiştiyse sadece o maçları yeniden analiz et
+- loop: build + periyodik refresh (worker)
+- scan_markets: panodaki maçların oranlarıyla günün value bet / arbitrage taraması
+
+Kullanım:
+    python prediction_board.py --build                # bugünün panosunu hesapla
+    python prediction_board.py --refresh              # kadro/oran değişikliklerini işle
+    python prediction_board.py --loop -i 900          # worker modu (15 dk'da bir refresh)
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from upstream_rate_limiter import PRIORITY_BATCH, request_priority
+
+BASE_URL = "https://v3.football.api-sports.io"
+BOARD_DIR = os.environ.get(
+    'PREDICTION_BOARD_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prediction_board')
+)
+
+# app.py'deki varsayılan model parametreleri ve lig gol ortalaması
+DEFAULT_MODEL_PARAMS = {"injury_impact": 0.85, "max_goals": 2.5, "value_threshold": 5}
+DEFAULT_LEAGUE_AVG_GOALS = 1.35
+
+# Kadrolar genelde maçtan ~1 saat önce açıklanır; oran hareketi de bu aralıkta yoğundur
+REFRESH_WINDOW_MINUTES = 120
+UNSTARTED_STATUSES = {'TBD', 'NS'}
+
+_board_memo: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+# ----------------------------------------------------------------------
+# Snapshot okuma / yazma
+# ----------------------------------------------------------------------
+
+def board_path(board_date: Optional[date] = None) -> str:
+    board_date = board_date or date.today()
+    return os.path.join(BOARD_DIR, f"board_{board_date.isoformat()}.json")
+
+
+def _json_default(value: Any):
+    # numpy skalerleri vb.
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def save_board(board: Dict[str, Any], board_date: Optional[date] = None) -> str:
+    """Snapshot'ı atomik olarak yaz (okuyucular yarım dosya görmez)"""
+    os.makedirs(BOARD_DIR, exist_ok=True)
+    path = board_path(board_date)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(board, f, ensure_ascii=False, default=_json_default)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_board(board_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Günün snapshot'ını oku (yoksa None)
+
+    Dosya değişmedikçe süreç içi kopya döner; sayfa başına disk okuma/parse yok.
+    """
+    path = board_path(board_date)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    # save_board her yazışta yeni inode oluşturur (os.replace); mtime çözünürlüğüne güvenilmez
+    version = (st.st_ino, st.st_mtime_ns)
+    memo = _board_memo.get(path)
+    if memo and memo[0] == version:
+        return memo[1]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            board = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Tahmin panosu okunamadı: {e}")
+        return None
+
+    _board_memo[path] = (version, board)
+    return board
+
+
+def get_top_predictions(board: Optional[Dict[str, Any]], top_n: int = 5,
+                        min_confidence: float = 40.0,
+                        league_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Snapshot'tan güven puanına göre en iyi N tahmin"""
+    if not board:
+        return []
+    allowed = set(league_ids) if league_ids else None
+    rows = [
+        row for row in board.get('fixtures', [])
+        if row.get('AI Güven Puanı', 0) >= min_confidence
+        and (allowed is None or row.get('league_id') in allowed)
+    ]
+    rows.sort(key=lambda row: row['AI Güven Puanı'], reverse=True)
+    return rows[:top_n]
+
+
+def scan_markets(board: Optional[Dict[str, Any]], min_value: float = 0.05, min_ev: float = 5.0,
+                 kelly_fraction: float = 0.25, top_n: Optional[int] = 50) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Panodaki başlamamış tüm maçlarda value bet / arbitrage taraması (tek numpy geçişi)
+
+    Returns:
+        MarketScanner.scan çıktısı: {'value_bets': [...], 'arbitrage': [...]}
+    """
+    from market_scanner import MarketScanner, MarketTensor
+    from odds_normalizer import OddsIndex
+
+    fixtures = [
+        {'fixture_id': row['fixture_id'], 'label': f"{row['Ev Sahibi']} - {row['Deplasman']}",
+         'probs': row.get('probs'), 'odds_index': OddsIndex(row['odds_bookmakers'])}
+        for row in (board or {}).get('fixtures', [])
+        if row.get('odds_bookmakers') and row.get('status') in UNSTARTED_STATUSES
+    ]
+    if not fixtures:
+        return {'value_bets': [], 'arbitrage': []}
+    scanner = MarketScanner(min_value=min_value, min_ev=min_ev, kelly_fraction=kelly_fraction)
+    return scanner.scan(MarketTensor.from_fixtures(fixtures), top_n=top_n)
+
+
+# ----------------------------------------------------------------------
+# Maç özeti
+# ----------------------------------------------------------------------
+
+def summarize_fixture(api_key: str, base_url: str, fixture: Dict, model_params: Dict,
+                      default_avg: float = DEFAULT_LEAGUE_AVG_GOALS) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Tek maçın pano satırı (sistem API'si, kullanıcı hakkı tüketmez)
+
+    Returns:
+        (satır, hata mesajı) - satır app.py maç panosu tablosunun kolonlarını taşır
+    """
+    import api_utils
+    import analysis_logic
+
+    teams = fixture.get('teams', {})
+    home_team = teams.get('home', {})
+    away_team = teams.get('away', {})
+    fixture_info = fixture.get('fixture', {})
+    league_info_raw = fixture.get('league', {})
+    goals = fixture.get('goals', {})
+
+    id_a, name_a = home_team.get('id'), home_team.get('name', '?')
+    id_b, name_b = away_team.get('id'), away_team.get('name', '?')
+    match_id = fixture_info.get('id')
+    match_time = fixture_info.get('date', '')
+    league_id = league_info_raw.get('id')
+    season = league_info_raw.get('season')
+
+    if not id_a or not id_b or not match_id:
+        return None, None
+
+    try:
+        time_str = datetime.fromisoformat(match_time.replace('Z', '+00:00')).strftime('%H:%M') if match_time else ''
+    except ValueError:
+        time_str = ''
+
+    home_goals, away_goals = goals.get('home'), goals.get('away')
+    actual_score_str = f"{home_goals}-{away_goals}" if home_goals is not None and away_goals is not None else ""
+
+    league_info = api_utils.get_team_league_info(api_key, base_url, id_a, skip_limit=True)
+    # Takımdan lig bilgisi alınamazsa fixture'daki lig bilgisini kullan
+    if not league_info and league_id:
+        now = datetime.now()
+        league_info = {'league_id': league_id, 'season': season or (now.year if now.month > 6 else now.year - 1)}
+    if not league_info:
+        return None, f"{name_a} vs {name_b}: Lig bilgisi alınamadı"
+
+    analysis = analysis_logic.run_core_analysis(
+        api_key, base_url, id_a, id_b, name_a, name_b, match_id,
+        league_info, model_params, default_avg, skip_api_limit=True
+    )
+    if not analysis:
+        return None, f"{name_a} vs {name_b}: Analiz verisi oluşturulamadı"
+    # Analizin çektiği 1X2 oranları (aynı st.cache_data anahtarı; batch kullanıcı kotasından düşmez)
+    odds_response = api_utils.get_fixture_odds(api_key, base_url, match_id, skip_limit=True)[0]
+
+    _log_prediction(analysis, fixture, league_info, model_params)
+
+    probs = analysis['probs']
+    max_prob_key = max(probs, key=lambda k: probs[k] if 'win' in k or 'draw' in k else -1)
+    decision = f"{name_a} K." if max_prob_key == 'win_a' else f"{name_b} K." if max_prob_key == 'win_b' else "Ber."
+
+    result_icon = ""
+    if actual_score_str:
+        actual = 'win_a' if home_goals > away_goals else 'win_b' if away_goals > home_goals else 'draw'
+        result_icon = "✅" if actual == max_prob_key else "❌"
+
+    return {
+        "Saat": time_str,
+        "Lig": league_info_raw.get('name', ''),
+        "Ev Sahibi": name_a,
+        "Deplasman": name_b,
+        "Tahmin": decision,
+        "Gerçekleşen Skor": actual_score_str,
+        "Sonuç": result_icon,
+        "AI Güven Puanı": analysis['confidence'],
+        "2.5 ÜST (%)": probs['ust_2_5'],
+        "KG VAR (%)": probs['kg_var'],
+        "home_id": id_a,
+        "away_id": id_b,
+        "fixture_id": match_id,
+        "home_logo": home_team.get('logo', ''),
+        "away_logo": away_team.get('logo', ''),
+        "league_id": league_id,
+        "season": season,
+        "kickoff": match_time,
+        "status": fixture_info.get('status', {}).get('short', ''),
+        "probs": probs,
+        # Bookmaker başına ham oranlar (market taraması, bkz. scan_markets)
+        "odds_bookmakers": (odds_response or [{}])[0].get('bookmakers') or []
+    }, None
+
+
+def _log_prediction(analysis: Dict[str, Any], fixture: Dict, league_info: Dict, model_params: Dict):
+    """Pano tahminini tahmin defterine yaz (model sürümü = parametre özeti)"""
+    try:
+        from prediction_ledger import get_prediction_ledger
+        teams = fixture.get('teams', {})
+        fixture_info = fixture.get('fixture', {})
+        kickoff = fixture_info.get('timestamp')
+        if not kickoff and fixture_info.get('date'):
+            kickoff = int(datetime.fromisoformat(fixture_info['date'].replace('Z', '+00:00')).timestamp())
+        get_prediction_ledger().log_analysis(
+            analysis, fixture_id=fixture_info.get('id'),
+            home_team=teams.get('home', {}).get('name', ''), away_team=teams.get('away', {}).get('name', ''),
+            model_version=model_version(model_params), league=fixture.get('league', {}).get('name', ''),
+            league_id=league_info.get('league_id'), season=league_info.get('season'),
+            kickoff=kickoff,
+            home_id=teams.get('home', {}).get('id'), away_id=teams.get('away', {}).get('id'),
+        )
+    except Exception as e:
+        print(f"⚠️ Tahmin deftere yazılamadı: {e}")
+
+
+# ----------------------------------------------------------------------
+# Kadro / oran değişiklik imzası
+# ----------------------------------------------------------------------
+
+def _digest(payload: Any) -> str:
+    return hashlib.md5(json.dumps(payload, sort_keys=True, default=_json_default).encode()).hexdigest()[:12]
+
+
+def model_version(model_params: Dict) -> str:
+    """Tahmin defterindeki model sürümü (parametre özeti; pano ve detaylı analiz aynı)"""
+    return _digest(model_params)
+
+
+def fetch_fixture_signature(api_key: str, base_url: str, fixture_id: int) -> Dict[str, Optional[str]]:
+    """İlk 11'ler ve 1X2 oranlarının özeti (değişiklik tespiti için)"""
+    import api_utils
+
+    signature: Dict[str, Optional[str]] = {'lineups': None, 'odds': None}
+
+    lineups, error = api_utils.make_api_request(
+        api_key, base_url, "fixtures/lineups", {'fixture': fixture_id}, skip_limit=True
+    )
+    if not error and lineups:
+        signature['lineups'] = _digest([
+            (team.get('team', {}).get('id'), team.get('formation'),
+             sorted(p.get('player', {}).get('id') or 0 for p in team.get('startXI') or []))
+            for team in lineups
+        ])
+
+    odds, error = api_utils.make_api_request(
+        api_key, base_url, "odds", {'fixture': fixture_id, 'bet': 1}, skip_limit=True
+    )
+    if not error and odds:
+        signature['odds'] = _odds_digest(odds[0].get('bookmakers'))
+
+    return signature
+
+
+def _odds_digest(bookmakers: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    """İlk 3 bookmaker'ın 1X2 fiyatlarının özeti (fiyat yoksa None)"""
+    if not bookmakers:
+        return None
+    values = []
+    for bookmaker in bookmakers[:3]:
+        for bet in bookmaker.get('bets') or []:
+            values.append((bookmaker.get('id'), [(v.get('value'), v.get('odd')) for v in bet.get('values') or []]))
+    return _digest(values)
+
+
+def _initial_signature(api_key: str, base_url: str, row: Dict[str, Any], now: datetime,
+                       window_minutes: int = REFRESH_WINDOW_MINUTES) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Kurulumdaki imza: ilk refresh sadece gerçekten değişen maçları yeniden analiz etsin
+
+    Pencere dışındaki maçlarda kadro henüz açıklanmamıştır; oran özeti analizin
+    çektiği oranlardan çıkarılır (ek API çağrısı yok).
+    """
+    if row.get('status') not in UNSTARTED_STATUSES:
+        return None
+    if _kickoff_within(row, now, window_minutes):
+        return fetch_fixture_signature(api_key, base_url, row['fixture_id'])
+    return {'lineups': None, 'odds': _odds_digest(row.get('odds_bookmakers'))}
+
+
+def _fixture_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Pano satırından summarize_fixture'ın beklediği API fixture biçimini kur"""
+    return {
+        'fixture': {'id': row['fixture_id'], 'date': row.get('kickoff', ''), 'status': {'short': row.get('status', '')}},
+        'league': {'id': row.get('league_id'), 'name': row.get('Lig', ''), 'season': row.get('season')},
+        'teams': {
+            'home': {'id': row['home_id'], 'name': row['Ev Sahibi'], 'logo': row.get('home_logo', '')},
+            'away': {'id': row['away_id'], 'name': row['Deplasman'], 'logo': row.get('away_logo', '')}
+        },
+        'goals': {'home': None, 'away': None}
+    }
+
+
+def _kickoff_within(row: Dict[str, Any], now: datetime, minutes: int) -> bool:
+    try:
+        kickoff = datetime.fromisoformat(row.get('kickoff', '').replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    return now <= kickoff <= now + timedelta(minutes=minutes)
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+
+def _followed_leagues() -> List[int]:
+    from update_elo import INTERESTING_LEAGUES
+    return list(INTERESTING_LEAGUES)
+
+
+@request_priority(PRIORITY_BATCH)
+def build_board(api_key: str, base_url: str = BASE_URL, board_date: Optional[date] = None,
+                league_ids: Optional[List[int]] = None,
+                model_params: Optional[Dict] = None) -> Dict[str, Any]:
+    """Günün tüm maçlarını analiz edip snapshot'ı yaz"""
+    import api_utils
+
+    board_date = board_date or date.today()
+    league_ids = league_ids or _followed_leagues()
+    model_params = model_params or DEFAULT_MODEL_PARAMS
+    start = time.time()
+
+    fixtures, error = api_utils.get_fixtures_by_date(api_key, base_url, league_ids, board_date, bypass_limit_check=True)
+    if error:
+        print(f"⚠️ Maç listesi uyarısı: {error}")
+
+    rows, failed = [], 0
+    for idx, fixture in enumerate(fixtures or [], 1):
+        try:
+            row, reason = summarize_fixture(api_key, base_url, fixture, model_params)
+        except Exception as e:
+            row, reason = None, str(e)
+        if row:
+            signature = _initial_signature(api_key, base_url, row, datetime.now(timezone.utc))
+            if signature is not None:
+                row['signature'] = signature
+            rows.append(row)
+        else:
+            failed += 1
+            if reason:
+                print(f"  ⚠️ {reason}")
+        if idx % 20 == 0:
+            print(f"  📊 {idx}/{len(fixtures)} maç analiz edildi")
+
+    now_iso = datetime.now().isoformat(timespec='seconds')
+    board = {
+        'date': board_date.isoformat(),
+        'generated_at': now_iso,
+        'updated_at': now_iso,
+        'league_ids': league_ids,
+        'model_params': model_params,
+        'fixtures': rows,
+        'stats': {
+            'fixtures': len(fixtures or []),
+            'analyzed': len(rows),
+            'failed': failed,
+            'elapsed_seconds': round(time.time() - start, 1),
+            'refreshed': 0
+        }
+    }
+    path = save_board(board, board_date)
+    print(f"✅ Tahmin panosu yazıldı: {len(rows)} maç ({board['stats']['elapsed_seconds']}s) → {path}")
+    return board
+
+
+@request_priority(PRIORITY_BATCH)
+def refresh_board(api_key: str, base_url: str = BASE_URL, board_date: Optional[date] = None,
+                  window_minutes: int = REFRESH_WINDOW_MINUTES) -> int:
+    """
+    Kadro veya oranı değişen, yaklaşan maçları yeniden analiz et
+
+    Returns:
+        Yeniden analiz edilen maç sayısı
+    """
+    board = load_board(board_date)
+    if not board:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    model_params = board.get('model_params') or DEFAULT_MODEL_PARAMS
+    changed = 0
+
+    for i, row in enumerate(board['fixtures']):
+        if row.get('status') not in UNSTARTED_STATUSES or not _kickoff_within(row, now, window_minutes):
+            continue
+
+        signature = fetch_fixture_signature(api_key, base_url, row['fixture_id'])
+        previous = row.get('signature')
+        row['signature'] = signature
+        if previous is None and signature == {'lineups': None, 'odds': None}:
+            continue
+        if previous == signature:
+            continue
+
+        try:
+            new_row, _ = summarize_fixture(api_key, base_url, _fixture_from_row(row), model_params)
+        except Exception as e:
+            print(f"⚠️ {row['Ev Sahibi']} vs {row['Deplasman']} yenilenemedi: {e}")
+            continue
+        if new_row:
+            new_row['signature'] = signature
+            board['fixtures'][i] = new_row
+            changed += 1
+            print(f"♻️ {new_row['Ev Sahibi']} vs {new_row['Deplasman']}: kadro/oran değişti, tahmin güncellendi")
+
+    board['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    board['stats']['refreshed'] = board['stats'].get('refreshed', 0) + changed
+    save_board(board, board_date)
+    return changed
+
+
+def run_board_worker(api_key: str, base_url: str = BASE_URL, refresh_interval: int = 900,
+                     league_ids: Optional[List[int]] = None):
+    """Gün değişince panoyu baştan kur, arada periyodik refresh yap"""
+    while True:
+        try:
+            if load_board() is None:
+                build_board(api_key, base_url, league_ids=league_ids)
+            else:
+                refresh_board(api_key, base_url)
+        except Exception as e:
+            print(f"⚠️ Tahmin panosu worker hatası: {e}")
+        time.sleep(refresh_interval)
+
+
+def main():
+    from precompute_advanced_metrics import load_api_key
+
+    parser = argparse.ArgumentParser(description='Günlük tahmin panosu worker')
+    parser.add_argument('--build', action='store_true', help='Günün panosunu baştan hesapla')
+    parser.add_argument('--refresh', action='store_true', help='Kadro/oran değişikliklerini işle')
+    parser.add_argument('--loop', action='store_true', help='Worker modu (build + periyodik refresh)')
+    parser.add_argument('--interval', '-i', type=int, default=900, help='Refresh aralığı (saniye)')
+    parser.add_argument('--league', '-l', type=int, action='append', help='Lig ID (birden fazla verilebilir)')
+    parser.add_argument('--date', '-d', type=date.fromisoformat, default=None, help='Tarih (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    api_key = load_api_key()
+    if not api_key:
+        return
+
+    if args.loop:
+        run_board_worker(api_key, refresh_interval=args.interval, league_ids=args.league)
+    elif args.refresh:
+        print(f"♻️ {refresh_board(api_key, board_date=args.date)} maç yenilendi")
+    else:
+        build_board(api_key, board_date=args.date, league_ids=args.league)
+
+
+if __name__ == '__main__':
+    main()
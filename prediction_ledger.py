@@ -0,0 +1,746 @@
+# -*- coding: utf-8 -*-
+"""
+Prediction Ledger
+=================
+Verilen her tahminin (maç, model sürümü, tüm market olasılıkları, faktörler)
+sadece-ekleme (append-only), kolon bazlı kaydı ve hızlı backtest sorguları.
+
+Düzen:
+    prediction_ledger/
+        manifest.json                   # segment sayısı / satır sayısı
+        seg_00001.npz                   # kolon bazlı tahmin tablosu (numpy)
+        seg_00001.factors.json.gz       # prediction_id → faktörler / notlar
+        journal.jsonl                   # henüz segmente yazılmamış tahminler
+        results.jsonl                   # elle işlenen sonuçlar (arşivde olmayan maçlar)
+
+- Tahminler önce journal'a tek satır olarak eklenir; FLUSH_ROWS satırda bir
+  journal yeni bir segmente dönüştürülür (eski segmentlere dokunulmaz)
+- Aynı (maç, model, sürüm) için olasılıklar değişmediyse yeni satır yazılmaz
+  (sayfa yenilemeleri defteri büyütmez)
+- Journal'a ekleme ve segment devri süreçler arası dosya kilidiyle yapılır
+  (Streamlit, FastAPI ve cron aynı segment numarasını alamaz)
+- Okuyucu segmentleri + journal'ı maç zamanına göre sıralı tek tabloya birleştirir;
+  tarih aralığı searchsorted ile, lig ve (model, sürüm) satır indeksleriyle seçilir
+- Sonuçlar maç arşivinden (fixture_archive) fixture_id ile otomatik eşlenir;
+  arşivde olmayan maçlar settle() ile işlenir
+- Backtest maç başına başlama saatinden önce verilen son tahmini kullanır;
+  log-loss, Brier, isabet, kalibrasyon ve oranlardan ROI tamamen vektörel hesaplanır
+
+Olasılık sırası API ile aynı: [away, draw, home], sonuç 0=Away 1=Draw 2=Home
+
+Usage:
+    from prediction_ledger import get_prediction_ledger
+
+    ledger = get_prediction_ledger()
+    ledger.log_prediction(home_team='GS', away_team='FB', prediction=2, confidence=0.55,
+                          probabilities=[0.2, 0.25, 0.55], model_name='xgb_v1', league='Süper Lig',
+                          fixture_id=1208021, league_id=203, kickoff=1735480800)
+    ledger.backtest(league_id=203, since=season_start, model_name='xgb_v1')
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: sadece süreç içi kilit
+    FCNTL_AVAILABLE = False
+
+LEDGER_DIR = os.environ.get(
+    'PREDICTION_LEDGER_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prediction_ledger')
+)
+
+FLUSH_ROWS = 500
+MISSING = -1
+EPSILON = 1e-15
+
+# Market olasılıkları (0-1, yoksa NaN) ve 1X2 ondalık oranları
+MARKET_COLUMNS = ('p_away', 'p_draw', 'p_home', 'p_over25', 'p_btts')
+ODDS_COLUMNS = ('odds_away', 'odds_draw', 'odds_home')
+
+NUMERIC_COLUMNS = {
+    'prediction_id': np.int64,
+    'issued_at': np.float64,
+    'kickoff': np.int64,
+    'fixture_id': np.int64,
+    'league_id': np.int32,
+    'season': np.int16,
+    'home_id': np.int32,
+    'away_id': np.int32,
+    'predicted': np.int8,
+    'confidence': np.float32,
+    **{name: np.float32 for name in MARKET_COLUMNS + ODDS_COLUMNS},
+}
+TEXT_COLUMNS = ('model_name', 'model_version', 'league', 'home_team', 'away_team')
+COLUMNS = tuple(NUMERIC_COLUMNS) + TEXT_COLUMNS
+
+
+def _empty_table() -> Dict[str, np.ndarray]:
+    table = {name: np.empty(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    table.update({name: np.empty(0, dtype='<U1') for name in TEXT_COLUMNS})
+    return table
+
+
+def _to_columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    if not rows:
+        return _empty_table()
+    columns = {name: np.array([r[name] for r in rows], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    columns.update({name: np.array([r[name] for r in rows], dtype=str) for name in TEXT_COLUMNS})
+    return columns
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value) if value is not None else MISSING
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _json_default(value: Any):
+    # numpy skalerleri vb.
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def calibration_table(probabilities: np.ndarray, outcomes: np.ndarray, bins: int = 10) -> Dict[str, Any]:
+    """
+    Tüm sınıflar birlikte (one-vs-rest) güvenilirlik tablosu
+
+    Args:
+        probabilities: (n, k) olasılıklar
+        outcomes: (n,) gerçekleşen sınıf
+
+    Returns:
+        {'bins': [{'lower', 'upper', 'count', 'mean_predicted', 'observed'}], 'ece'}
+    """
+    if len(outcomes) == 0:
+        return {'bins': [], 'ece': None}
+    predicted = probabilities.ravel()
+    observed = (np.arange(probabilities.shape[1])[None, :] == outcomes[:, None]).ravel().astype(np.float64)
+    index = np.minimum((predicted * bins).astype(int), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_predicted = np.bincount(index, weights=predicted, minlength=bins) / counts
+        frequency = np.bincount(index, weights=observed, minlength=bins) / counts
+    filled = counts > 0
+    ece = float(np.sum(counts[filled] * np.abs(mean_predicted[filled] - frequency[filled])) / counts.sum())
+    return {
+        'bins': [
+            {'lower': round(i / bins, 3), 'upper': round((i + 1) / bins, 3), 'count': int(counts[i]),
+             'mean_predicted': round(float(mean_predicted[i]), 4), 'observed': round(float(frequency[i]), 4)}
+            for i in np.flatnonzero(filled)
+        ],
+        'ece': round(ece, 4),
+    }
+
+
+def binary_scores(probability: np.ndarray, happened: np.ndarray) -> Optional[Dict[str, Any]]:
+    """Alt/Üst, KG gibi iki sonuçlu marketler için log-loss / Brier"""
+    known = ~np.isnan(probability)
+    if not known.any():
+        return None
+    p = np.clip(probability[known].astype(np.float64), EPSILON, 1 - EPSILON)
+    y = happened[known].astype(np.float64)
+    return {
+        'n': int(known.sum()),
+        'log_loss': round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4),
+        'brier': round(float(np.mean((p - y) ** 2)), 4),
+        'accuracy': round(float(np.mean((p >= 0.5) == (y == 1))), 4),
+    }
+
+
+class PredictionLedger:
+    """Kolon bazlı, sadece-ekleme tahmin defteri"""
+
+    def __init__(self, root: Optional[str] = None, flush_rows: int = FLUSH_ROWS, archive=None):
+        """
+        Args:
+            root: Defter dizini (None = LEDGER_DIR)
+            flush_rows: Journal bu kadar satıra ulaşınca segmente yazılır
+            archive: Sonuç kaynağı FixtureArchive (None = global arşiv, yoksa sadece settle())
+        """
+        self.root = root or LEDGER_DIR
+        self.flush_rows = flush_rows
+        self._archive = archive
+        self._lock = threading.RLock()
+        self._table: Optional[Dict[str, np.ndarray]] = None
+        self._table_sig: Optional[Tuple] = None
+        self._league_index: Dict[int, np.ndarray] = {}
+        self._model_index: Dict[Tuple[str, str], np.ndarray] = {}
+        self._factors_memo: Dict[str, Dict[str, Any]] = {}
+        self._journal_factors: Dict[str, Dict[str, Any]] = {}
+        self._next_id = 0
+        # (fixture_id, model_name, model_version) → son yazılan (prediction_id, olasılıklar)
+        self._latest_logged: Optional[Dict[Tuple[int, str, str], Tuple[int, Tuple]]] = None
+        self._file_lock_depth = 0
+
+    @property
+    def db_path(self) -> str:
+        return self.root
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, 'manifest.json')
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.root, 'journal.jsonl')
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.root, 'results.jsonl')
+
+    def _segment_base(self, segment: int) -> str:
+        return os.path.join(self.root, f"seg_{segment:05d}")
+
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'segments': 0, 'rows': 0}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Süreçler arası kilit (journal ekleme / devir, manifest); aynı thread'de iç içe alınabilir"""
+        with self._lock:
+            handle = None
+            if self._file_lock_depth == 0 and FCNTL_AVAILABLE:
+                os.makedirs(self.root, exist_ok=True)
+                handle = open(os.path.join(self.root, '.lock'), 'a')
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                if handle is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                    handle.close()
+
+    # ------------------------------------------------------------------
+    # Yazma (append-only)
+    # ------------------------------------------------------------------
+
+    def _new_id(self) -> int:
+        # Süreçler arası çakışmasın: mikro saniye zamanı + süreç içi sayaç
+        with self._lock:
+            self._next_id = max(self._next_id + 1, int(time.time() * 1e6))
+            return self._next_id
+
+    def log_prediction(self, home_team: str, away_team: str, prediction: int, confidence: float,
+                       probabilities: Iterable[float], model_name: str, league: str = '',
+                       model_version: str = '', features: Optional[Dict[str, Any]] = None,
+                       notes: Optional[str] = None, fixture_id: Optional[int] = None,
+                       league_id: Optional[int] = None, season: Optional[int] = None,
+                       kickoff: Optional[int] = None, home_id: Optional[int] = None,
+                       away_id: Optional[int] = None, markets: Optional[Dict[str, float]] = None,
+                       odds: Optional[Iterable[float]] = None) -> int:
+        """
+        Tahmini deftere ekle
+
+        Args:
+            prediction: Tahmin edilen sınıf (0=Away, 1=Draw, 2=Home)
+            probabilities: [away, draw, home] (0-1)
+            features: Tahmindeki faktörler (form, Elo, ...) - yan dosyada tutulur
+            kickoff: Maç başlama unix zamanı (backtest sadece öncesinde verilen tahmini kullanır)
+            markets: Ek market olasılıkları {'p_over25': 0.58, 'p_btts': 0.51}
+            odds: 1X2 ondalık oranları [away, draw, home] (ROI için)
+
+        Returns:
+            prediction_id (aynı maç / model / sürüm için olasılıklar değişmediyse önceki kaydınki)
+        """
+        probabilities = list(probabilities or [])
+        odds = list(odds or [])
+        row: Dict[str, Any] = {
+            'prediction_id': self._new_id(),
+            'issued_at': time.time(),
+            'kickoff': _int(kickoff),
+            'fixture_id': _int(fixture_id),
+            'league_id': _int(league_id),
+            'season': _int(season),
+            'home_id': _int(home_id),
+            'away_id': _int(away_id),
+            'predicted': _int(prediction),
+            'confidence': _float(confidence),
+            'model_name': str(model_name or ''),
+            'model_version': str(model_version or ''),
+            'league': str(league or ''),
+            'home_team': str(home_team or ''),
+            'away_team': str(away_team or ''),
+        }
+        for i, name in enumerate(MARKET_COLUMNS[:3]):
+            row[name] = _float(probabilities[i]) if i < len(probabilities) else np.nan
+        for name in MARKET_COLUMNS[3:]:
+            row[name] = _float((markets or {}).get(name))
+        for i, name in enumerate(ODDS_COLUMNS):
+            row[name] = _float(odds[i]) if i < len(odds) else np.nan
+        if features or notes:
+            row['factors'] = {'features': features or {}, 'notes': notes}
+
+        with self._file_lock():
+            key = self._dedupe_key(row)
+            if key is not None:
+                latest = self._refresh_latest_logged().get(key)
+                if latest is not None and latest[1] == self._probability_key(row):
+                    return latest[0]
+            os.makedirs(self.root, exist_ok=True)
+            # NaN JSON değil: eksik değerler null yazılır
+            line = json.dumps({key: None if isinstance(value, float) and np.isnan(value) else value
+                               for key, value in row.items()}, ensure_ascii=False, default=_json_default)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+            if key is not None:
+                self._latest_logged[key] = (row['prediction_id'], self._probability_key(row))
+            if self._journal_rows() >= self.flush_rows:
+                self.flush()
+        return row['prediction_id']
+
+    @staticmethod
+    def _dedupe_key(row: Dict[str, Any]) -> Optional[Tuple[int, str, str]]:
+        fixture_id = row.get('fixture_id')
+        if fixture_id is None or fixture_id == MISSING:
+            return None
+        return int(fixture_id), str(row['model_name']), str(row['model_version'])
+
+    @staticmethod
+    def _probability_key(row: Dict[str, Any]) -> Tuple:
+        # Segmentlerde float32 saklanır; journal ve segment satırları aynı anahtarı verir
+        values = (row.get(name) for name in MARKET_COLUMNS[:3])
+        return tuple(None if value is None or np.isnan(value) else round(float(np.float32(value)), 5)
+                     for value in values)
+
+    def _refresh_latest_logged(self) -> Dict[Tuple[int, str, str], Tuple[int, Tuple]]:
+        """Son yazılan olasılıklar (ilk çağrıda tüm defterden, sonra diğer süreçlerin journal satırlarından)"""
+        if self._latest_logged is None:
+            table = self._ensure_table()
+            self._latest_logged = {}
+            for position in np.argsort(table['issued_at'], kind='stable'):
+                row = {name: table[name][position] for name in ('fixture_id', 'model_name', 'model_version',
+                                                                 'prediction_id') + MARKET_COLUMNS[:3]}
+                key = self._dedupe_key(row)
+                if key is not None:
+                    self._latest_logged[key] = (int(row['prediction_id']), self._probability_key(row))
+            return self._latest_logged
+        for row in self._read_jsonl(self.journal_path):
+            key = self._dedupe_key(self._normalize(row))
+            if key is not None:
+                self._latest_logged[key] = (int(row['prediction_id']), self._probability_key(row))
+        return self._latest_logged
+
+    def log_analysis(self, analysis: Dict[str, Any], fixture_id: int, home_team: str, away_team: str,
+                     model_version: str = '', model_name: str = 'core_analysis', league: str = '',
+                     league_id: Optional[int] = None, season: Optional[int] = None,
+                     kickoff: Optional[int] = None, home_id: Optional[int] = None,
+                     away_id: Optional[int] = None) -> int:
+        """run_core_analysis çıktısını (yüzde olasılıklar, params faktörleri) deftere ekle"""
+        probs = analysis['probs']
+        probabilities = [probs['win_b'] / 100.0, probs['draw'] / 100.0, probs['win_a'] / 100.0]
+        odds = analysis.get('odds_1x2') or {}
+        factors = {key: value for key, value in (analysis.get('params') or {}).items()
+                   if isinstance(value, (int, float, str, bool)) or value is None}
+        return self.log_prediction(
+            home_team=home_team, away_team=away_team,
+            prediction=int(np.argmax(probabilities)), confidence=_float(analysis.get('confidence')),
+            probabilities=probabilities, model_name=model_name, league=league,
+            model_version=model_version, features=factors, fixture_id=fixture_id,
+            league_id=league_id, season=season, kickoff=kickoff, home_id=home_id, away_id=away_id,
+            markets={'p_over25': _float(probs.get('ust_2_5')) / 100.0, 'p_btts': _float(probs.get('kg_var')) / 100.0},
+            odds=[odds.get('away'), odds.get('draw'), odds.get('home')] if odds else None,
+        )
+
+    def settle(self, fixture_id: int, home_goals: int, away_goals: int):
+        """Arşivde olmayan maçın sonucunu işle (arşivdeki sonuçtan önceliklidir)"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.results_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'fixture_id': int(fixture_id), 'home_goals': int(home_goals),
+                                    'away_goals': int(away_goals), 'settled_at': time.time()}) + '\n')
+
+    def _journal_rows(self) -> int:
+        try:
+            with open(self.journal_path, 'rb') as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+        rows = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue  # yarım yazılmış son satır
+        except OSError:
+            pass
+        return rows
+
+    @staticmethod
+    def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+        # JSON null → NaN (float kolonlar)
+        for name, dtype in NUMERIC_COLUMNS.items():
+            if row.get(name) is None:
+                row[name] = np.nan if np.issubdtype(dtype, np.floating) else MISSING
+        return row
+
+    def flush(self) -> int:
+        """Journal'ı yeni bir segmente yaz (yazılan satır sayısı)"""
+        with self._file_lock():
+            if not os.path.exists(self.journal_path):
+                return 0
+            # Journal önce kenara alınır: flush sırasında gelen tahminler yeni journal'a düşer
+            pending_path = f"{self.journal_path}.{os.getpid()}.flushing"
+            os.replace(self.journal_path, pending_path)
+            rows = [self._normalize(row) for row in self._read_jsonl(pending_path)]
+            if not rows:
+                os.remove(pending_path)
+                return 0
+
+            manifest = self.manifest()
+            segment = manifest['segments'] + 1
+            base = self._segment_base(segment)
+            tmp_path = f"{base}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(tmp_path, **_to_columns(rows))
+            os.replace(tmp_path, f"{base}.npz")
+
+            factors = {str(row['prediction_id']): row['factors'] for row in rows if row.get('factors')}
+            if factors:
+                tmp_path = f"{base}.{os.getpid()}.tmp.json.gz"
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    json.dump(factors, f, ensure_ascii=False, default=_json_default)
+                os.replace(tmp_path, f"{base}.factors.json.gz")
+
+            # Manifest en son yazılır: yarım kalan flush okuyuculara görünmez
+            manifest.update({'segments': segment, 'rows': manifest['rows'] + len(rows),
+                             'updated_at': datetime.now().isoformat()})
+            self._write_manifest(manifest)
+            os.remove(pending_path)
+            return len(rows)
+
+    # ------------------------------------------------------------------
+    # Okuma + indeks
+    # ------------------------------------------------------------------
+
+    def _signature(self) -> Tuple:
+        signature = []
+        for path in (self.manifest_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _ensure_table(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            signature = self._signature()
+            if self._table is not None and signature == self._table_sig:
+                return self._table
+
+            parts = []
+            segment_of = []
+            for segment in range(1, self.manifest()['segments'] + 1):
+                with np.load(f"{self._segment_base(segment)}.npz", allow_pickle=False) as data:
+                    part = {name: data[name] for name in COLUMNS}
+                parts.append(part)
+                segment_of.append(np.full(len(part['prediction_id']), segment, dtype=np.int32))
+            journal = [self._normalize(row) for row in self._read_jsonl(self.journal_path)]
+            parts.append(_to_columns(journal))
+            segment_of.append(np.zeros(len(journal), dtype=np.int32))
+            table = {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+            table['segment'] = np.concatenate(segment_of)
+
+            # Maç zamanına göre sıralı (maç zamanı yoksa tahmin zamanı): tarih indeksi
+            table['event_time'] = np.where(table['kickoff'] > 0, table['kickoff'], table['issued_at'])
+            order = np.argsort(table['event_time'], kind='stable')
+            table = {name: column[order] for name, column in table.items()}
+
+            self._league_index = self._group_index(table['league_id'])
+            keys = np.char.add(np.char.add(table['model_name'], '\x1f'), table['model_version'])
+            self._model_index = {tuple(str(key).split('\x1f', 1)): positions
+                                 for key, positions in self._group_index(keys).items()}
+            self._journal_factors = {str(row['prediction_id']): row['factors'] for row in journal if row.get('factors')}
+            self._table, self._table_sig = table, signature
+            return table
+
+    @staticmethod
+    def _group_index(values: np.ndarray) -> Dict[Any, np.ndarray]:
+        """Değer → (sıralı) satır pozisyonları"""
+        order = np.argsort(values, kind='stable')
+        uniques, starts = np.unique(values[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        return {(v.item() if hasattr(v, 'item') else v): order[bounds[i]:bounds[i + 1]]
+                for i, v in enumerate(uniques)}
+
+    def __len__(self) -> int:
+        return len(self._ensure_table()['prediction_id'])
+
+    def select(self, since: Optional[float] = None, until: Optional[float] = None,
+               league_id: Optional[int] = None, model_name: Optional[str] = None,
+               model_version: Optional[str] = None) -> np.ndarray:
+        """
+        Filtreye uyan satır pozisyonları (maç zamanı sıralı)
+
+        Args:
+            since / until: Maç zamanı aralığı [since, until) (unix)
+        """
+        table = self._ensure_table()
+        times = table['event_time']
+        start = 0 if since is None else int(np.searchsorted(times, since, side='left'))
+        stop = len(times) if until is None else int(np.searchsorted(times, until, side='left'))
+        positions = np.arange(start, stop)
+
+        if league_id is not None:
+            positions = np.intersect1d(positions, self._league_index.get(int(league_id), np.empty(0, dtype=int)),
+                                       assume_unique=True)
+        if model_name is not None or model_version is not None:
+            matching = [index for (name, version), index in self._model_index.items()
+                        if (model_name is None or name == model_name)
+                        and (model_version is None or version == model_version)]
+            model_positions = np.concatenate(matching) if matching else np.empty(0, dtype=int)
+            positions = np.intersect1d(positions, model_positions)
+        return positions
+
+    def get_factors(self, prediction_id: int, segment: int) -> Optional[Dict[str, Any]]:
+        if segment == 0:
+            return self._journal_factors.get(str(prediction_id))
+        path = f"{self._segment_base(segment)}.factors.json.gz"
+        with self._lock:
+            factors = self._factors_memo.get(path)
+            if factors is None:
+                if not os.path.exists(path):
+                    return None
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    factors = json.load(f)
+                if len(self._factors_memo) >= 32:
+                    self._factors_memo.pop(next(iter(self._factors_memo)))
+                self._factors_memo[path] = factors
+        return factors.get(str(prediction_id))
+
+    def rows(self, positions: np.ndarray, with_factors: bool = False) -> List[Dict[str, Any]]:
+        table = self._ensure_table()
+        columns = {name: table[name][positions].tolist() for name in COLUMNS + ('segment',)}
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        for row in rows:
+            for name in MARKET_COLUMNS + ODDS_COLUMNS + ('confidence',):
+                if np.isnan(row[name]):
+                    row[name] = None
+                else:
+                    row[name] = round(row[name], 4)
+            if with_factors:
+                row['factors'] = self.get_factors(row['prediction_id'], row['segment'])
+            del row['segment']
+        return rows
+
+    # ------------------------------------------------------------------
+    # Sonuç eşleme + backtest
+    # ------------------------------------------------------------------
+
+    def _results(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sonuçlanan maçlar: (sıralı fixture_id, ev golü, deplasman golü)"""
+        ids, home, away = [], [], []
+        try:
+            archive = self._archive
+            if archive is None:
+                from fixture_archive import get_archive
+                archive = get_archive()
+            columns = archive.columns()
+            ids.append(columns['fixture_id'].astype(np.int64))
+            home.append(columns['home_goals'].astype(np.int16))
+            away.append(columns['away_goals'].astype(np.int16))
+        except Exception as e:
+            print(f"⚠️ Maç arşivi okunamadı, sadece elle işlenen sonuçlar: {e}")
+        manual = self._read_jsonl(self.results_path)
+        if manual:
+            # Elle işlenenler sona eklenir: aynı maçta son kayıt geçerli
+            ids.append(np.array([r['fixture_id'] for r in manual], dtype=np.int64))
+            home.append(np.array([r['home_goals'] for r in manual], dtype=np.int16))
+            away.append(np.array([r['away_goals'] for r in manual], dtype=np.int16))
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int16)
+        ids, home, away = np.concatenate(ids), np.concatenate(home), np.concatenate(away)
+        # Son kayıt kazanır: ters çevir, ilk görüleni al
+        ids, home, away = ids[::-1], home[::-1], away[::-1]
+        uniques, first = np.unique(ids, return_index=True)
+        return uniques, home[first], away[first]
+
+    def join_results(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """Satırların sonuçları (sonuçlanmamış → outcome -1)"""
+        table = self._ensure_table()
+        fixture_ids = table['fixture_id'][positions]
+        ids, home, away = self._results()
+        if len(ids) == 0:
+            ids, home, away = np.array([MISSING], dtype=np.int64), np.zeros(1, np.int16), np.zeros(1, np.int16)
+        index = np.clip(np.searchsorted(ids, fixture_ids), 0, len(ids) - 1)
+        found = (fixture_ids != MISSING) & (ids[index] == fixture_ids)
+        home_goals = np.where(found, home[index], MISSING)
+        away_goals = np.where(found, away[index], MISSING)
+        outcome = np.where(home_goals > away_goals, 2, np.where(home_goals == away_goals, 1, 0))
+        return {
+            'settled': found,
+            'home_goals': home_goals,
+            'away_goals': away_goals,
+            'outcome': np.where(found, outcome, MISSING),
+        }
+
+    def latest_before_kickoff(self, positions: np.ndarray) -> np.ndarray:
+        """(maç, model, sürüm) başına başlama saatinden önce verilen son tahmin"""
+        table = self._ensure_table()
+        kickoff = table['kickoff'][positions]
+        positions = positions[(kickoff <= 0) | (table['issued_at'][positions] < kickoff)]
+        fixture_ids = table['fixture_id'][positions]
+        keyed = fixture_ids != MISSING
+        unkeyed, positions = positions[~keyed], positions[keyed]
+        if len(positions) == 0:
+            return unkeyed
+        model = np.char.add(np.char.add(table['model_name'][positions], '\x1f'), table['model_version'][positions])
+        _, model_codes = np.unique(model, return_inverse=True)
+        order = np.lexsort((-table['issued_at'][positions], model_codes, table['fixture_id'][positions]))
+        ordered = positions[order]
+        keys = np.stack([table['fixture_id'][ordered], model_codes[order]], axis=1)
+        first = np.ones(len(ordered), dtype=bool)
+        first[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+        return np.sort(np.concatenate([ordered[first], unkeyed]))
+
+    def backtest(self, since: Optional[float] = None, until: Optional[float] = None,
+                 league_id: Optional[int] = None, model_name: Optional[str] = None,
+                 model_version: Optional[str] = None, bins: int = 10, min_edge: float = 0.0) -> Dict[str, Any]:
+        """
+        Sonuçlanan tahminler üzerinde log-loss, Brier, isabet, kalibrasyon ve ROI
+
+        ROI iki stratejiyle (1 birim sabit bahis, oranı olan maçlar):
+        - pick: modelin en olası sonucu
+        - value: beklenen değeri (p * oran - 1) min_edge'den büyük en iyi sonuç
+        """
+        table = self._ensure_table()
+        positions = self.latest_before_kickoff(self.select(since, until, league_id, model_name, model_version))
+        results = self.join_results(positions)
+        settled = results['settled']
+        positions, outcome = positions[settled], results['outcome'][settled]
+        total_goals = (results['home_goals'] + results['away_goals'])[settled]
+        btts = (results['home_goals'] > 0)[settled] & (results['away_goals'] > 0)[settled]
+
+        report: Dict[str, Any] = {'predictions': int(len(settled)), 'settled': int(settled.sum())}
+        probabilities = np.stack([table[name][positions] for name in MARKET_COLUMNS[:3]], axis=1).astype(np.float64)
+        has_1x2 = ~np.isnan(probabilities).any(axis=1)
+        probabilities, outcome_1x2 = probabilities[has_1x2], outcome[has_1x2]
+        if len(outcome_1x2) == 0:
+            report['match_result'] = None
+        else:
+            probabilities = probabilities / probabilities.sum(axis=1, keepdims=True)
+            rows = np.arange(len(outcome_1x2))
+            onehot = np.zeros_like(probabilities)
+            onehot[rows, outcome_1x2] = 1.0
+            picks = np.argmax(probabilities, axis=1)
+            report['match_result'] = {
+                'n': int(len(outcome_1x2)),
+                'accuracy': round(float(np.mean(picks == outcome_1x2)), 4),
+                'log_loss': round(float(-np.mean(np.log(np.clip(probabilities[rows, outcome_1x2], EPSILON, 1)))), 4),
+                'brier': round(float(np.mean(np.sum((probabilities - onehot) ** 2, axis=1))), 4),
+                'calibration': calibration_table(probabilities, outcome_1x2, bins),
+            }
+
+            odds = np.stack([table[name][positions] for name in ODDS_COLUMNS], axis=1).astype(np.float64)[has_1x2]
+            priced = ~np.isnan(odds).any(axis=1) & (odds > 1).all(axis=1)
+            roi = {}
+            stakes = {'pick': (priced, picks)}
+            edges = np.where(priced[:, None], probabilities * odds - 1.0, -np.inf)
+            value_picks = np.argmax(edges, axis=1)
+            stakes['value'] = (priced & (edges[rows, value_picks] > min_edge), value_picks)
+            for name, (bet, pick) in stakes.items():
+                won = pick == outcome_1x2
+                profit = np.where(won, odds[rows, pick] - 1.0, -1.0)[bet]
+                roi[name] = {
+                    'bets': int(bet.sum()),
+                    'profit': round(float(profit.sum()), 3),
+                    'roi': round(float(profit.mean()), 4) if bet.any() else None,
+                    'hit_rate': round(float(np.mean(won[bet])), 4) if bet.any() else None,
+                }
+            report['match_result']['roi'] = roi
+            report['match_result']['priced'] = int(priced.sum())
+
+        report['over_2_5'] = binary_scores(table['p_over25'][positions], total_goals > 2)
+        report['btts'] = binary_scores(table['p_btts'][positions], btts)
+        return report
+
+    # ------------------------------------------------------------------
+    # FastAPI /api/prediction-stats, /api/recent-predictions
+    # ------------------------------------------------------------------
+
+    def get_recent_predictions(self, limit: int = 10, model_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Son verilen tahminler (en yeni başta, sonuç eşlenmiş)"""
+        table = self._ensure_table()
+        positions = self.select(model_name=model_name) if model_name else np.arange(len(table['prediction_id']))
+        positions = positions[np.argsort(-table['issued_at'][positions], kind='stable')][:limit]
+        rows = self.rows(positions)
+        results = self.join_results(positions)
+        for i, row in enumerate(rows):
+            row['issued_at'] = datetime.fromtimestamp(row['issued_at']).isoformat(timespec='seconds')
+            if results['settled'][i]:
+                row['result'] = {'home_goals': int(results['home_goals'][i]), 'away_goals': int(results['away_goals'][i]),
+                                 'outcome': int(results['outcome'][i]),
+                                 'correct': bool(results['outcome'][i] == row['predicted'])}
+            else:
+                row['result'] = None
+        return rows
+
+    def get_all_models_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Model başına (tüm sürümler) tahmin sayısı ve sonuçlananlar üzerinde metrikler"""
+        self._ensure_table()
+        names = sorted({name for name, _ in self._model_index})
+        stats = {}
+        for name in names:
+            report = self.backtest(model_name=name)
+            match_result = report['match_result'] or {}
+            stats[name] = {
+                'versions': sorted(version for model, version in self._model_index if model == name),
+                'total_predictions': int(sum(len(index) for (model, _), index in self._model_index.items()
+                                             if model == name)),
+                'settled': report['settled'],
+                'accuracy': match_result.get('accuracy'),
+                'log_loss': match_result.get('log_loss'),
+                'brier': match_result.get('brier'),
+            }
+        return stats
+
+
+# Global instance
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_prediction_ledger() -> PredictionLedger:
+    """Global PredictionLedger instance'ı getir"""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = PredictionLedger()
+    return _ledger
@@ -16,6 +16,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import math
 
+import numpy as np
+
 class PressingMetricsCalculator:
     """Pressing ve defansif metrikler hesaplayıcı"""
     
@@ -39,9 +41,29 @@ class PressingMetricsCalculator:
         'attacking_third': 0.40     # Hücum 3'lüsü (high press)
     }
     
+    # İstatistikten PPDA tahmini: her takım maç başına ~450 pas, fauller %70 ağırlıklı
+    ESTIMATED_MATCH_PASSES = 450
+    FOUL_ACTION_WEIGHT = 0.7
+    DEFAULT_DEFENSIVE_ACTIONS = 15  # Defansif aksiyon verisi yoksa minimum varsayım
+    
     def __init__(self):
         pass
     
+    @classmethod
+    def estimate_ppda_inputs(cls, opponent_possession, tackles=0, interceptions=0, fouls=0):
+        """
+        (tahmini rakip pası, defansif aksiyon) - skaler veya numpy dizisi
+        
+        team_profiles tüm ligin PPDA değerini aynı formülle tek seferde hesaplar.
+        """
+        opponent_passes = np.floor(np.asarray(opponent_possession, dtype=np.float64) / 100 * cls.ESTIMATED_MATCH_PASSES)
+        actions = (np.asarray(tackles, dtype=np.float64) + np.asarray(interceptions, dtype=np.float64)
+                   + np.asarray(fouls, dtype=np.float64) * cls.FOUL_ACTION_WEIGHT)
+        actions = np.floor(np.where(actions == 0, cls.DEFAULT_DEFENSIVE_ACTIONS, actions))
+        if opponent_passes.ndim == 0 and actions.ndim == 0:
+            return int(opponent_passes), int(actions)
+        return opponent_passes, actions
+    
     def calculate_ppda(
         self,
         opponent_passes: int,
@@ -157,7 +179,9 @@ class PressingMetricsCalculator:
     def estimate_ppda_from_stats(
         self,
         team_stats: Dict,
-        opponent_stats: Dict
+        opponent_stats: Dict,
+        profile: Optional[Dict] = None,
+        opponent_profile: Optional[Dict] = None
     ) -> Dict[str, float]:
         """
         API istatistiklerinden PPDA tahmini yap
@@ -166,38 +190,40 @@ class PressingMetricsCalculator:
         Args:
             team_stats: Takım istatistikleri
             opponent_stats: Rakip istatistikleri
+            profile / opponent_profile: team_profiles kayıtları; verilirse istatistikler
+                lig profilinden okunur ve yüzdelik sabit eşikler yerine lig içi sıralamadır
             
         Returns:
             Estimated PPDA metrics
         """
-        # Tahminsel hesaplama
-        # Assumption: Her takım maç başına ~400-500 pas yapar
-        # Defansif aksiyonlar: tackles + interceptions + fouls
+        if profile is not None:
+            team_stats = profile['team_stats']
+        if opponent_profile is not None:
+            opponent_stats = opponent_profile['team_stats']
         
+        # Tahminsel hesaplama
         # Rakip pas tahmini (possession % bazlı)
-        opponent_possession = opponent_stats.get('possession', 50)
-        estimated_opponent_passes = (opponent_possession / 100) * 450  # Ortalama pas sayısı
-        
-        # Defansif aksiyonlar
-        tackles = team_stats.get('tackles', 0)
-        interceptions = team_stats.get('interceptions', 0)
-        fouls = team_stats.get('fouls', 0)
-        
-        defensive_actions = tackles + interceptions + (fouls * 0.7)  # Fauller %70 ağırlıklı
-        
-        if defensive_actions == 0:
-            defensive_actions = 15  # Minimum varsayım
+        # Defansif aksiyonlar: tackles + interceptions + fouls
+        opponent_passes, defensive_actions = self.estimate_ppda_inputs(
+            opponent_stats.get('possession', 50),
+            team_stats.get('tackles', 0),
+            team_stats.get('interceptions', 0),
+            team_stats.get('fouls', 0)
+        )
         
         # PPDA hesapla
         ppda_result = self.calculate_ppda(
-            opponent_passes=int(estimated_opponent_passes),
-            defensive_actions=int(defensive_actions),
+            opponent_passes=opponent_passes,
+            defensive_actions=defensive_actions,
             match_count=1
         )
         
         # Tahmin olduğunu belirt
         ppda_result['is_estimated'] = True
         ppda_result['confidence'] = 0.65  # Orta güven seviyesi
+        if profile is not None:
+            ppda_result['percentile'] = profile['percentiles']['ppda']
+            ppda_result['league_percentile'] = profile['percentiles']['ppda']
         
         return ppda_result
     
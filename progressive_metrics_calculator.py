@@ -16,6 +16,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import math
 
+import numpy as np
+
 class ProgressiveMetricsCalculator:
     """Progressive passing ve build-up metrikleri"""
     
@@ -43,9 +45,31 @@ class ProgressiveMetricsCalculator:
         'final_third': (70, 105)         # Son 3'lü
     }
     
+    # Toplam pastan tahmin: %40 ileri pas, %15 son 3'lüye pas;
+    # ileri pasların %60'ı + son 3'lü pasların tamamı progressive
+    FORWARD_PASS_SHARE = 0.40
+    FINAL_THIRD_PASS_SHARE = 0.15
+    PROGRESSIVE_FORWARD_SHARE = 0.60
+    
     def __init__(self):
         pass
     
+    @classmethod
+    def estimate_pass_split(cls, total_passes):
+        """(ileri pas, son 3'lü pas) tahmini - skaler veya numpy dizisi"""
+        total = np.asarray(total_passes, dtype=np.float64)
+        forward = np.floor(total * cls.FORWARD_PASS_SHARE)
+        final_third = np.floor(total * cls.FINAL_THIRD_PASS_SHARE)
+        if total.ndim == 0:
+            return int(forward), int(final_third)
+        return forward, final_third
+    
+    @classmethod
+    def estimate_progressive_passes(cls, total_passes):
+        """Toplam pastan maç başı progressive pas (team_profiles lig geneli vektörel kullanır)"""
+        forward, final_third = cls.estimate_pass_split(total_passes)
+        return forward * cls.PROGRESSIVE_FORWARD_SHARE + final_third
+    
     def calculate_progressive_passes(
         self,
         total_passes: int,
@@ -80,7 +104,7 @@ class ProgressiveMetricsCalculator:
         
         # Tahmini progressive pass sayısı
         # Varsayım: Forward passes'in %60'ı + Final third passes'in %100'ü progressive
-        estimated_progressive = (forward_passes * 0.60) + passes_into_final_third
+        estimated_progressive = (forward_passes * self.PROGRESSIVE_FORWARD_SHARE) + passes_into_final_third
         
         # Maç başına ortalama
         progressive_per_match = estimated_progressive / match_count if match_count > 0 else estimated_progressive
@@ -255,7 +279,8 @@ class ProgressiveMetricsCalculator:
     def estimate_progressive_metrics_from_stats(
         self,
         team_stats: Dict,
-        match_count: int = 1
+        match_count: int = 1,
+        profile: Optional[Dict] = None
     ) -> Dict[str, float]:
         """
         API istatistiklerinden progressive metrikleri tahmin et
@@ -263,19 +288,22 @@ class ProgressiveMetricsCalculator:
         Args:
             team_stats: Takım istatistikleri
             match_count: Kaç maç
+            profile: team_profiles kaydı; verilirse maç başı istatistikler lig profilinden
+                okunur (match_count=1) ve sonuca lig yüzdeliği eklenir
             
         Returns:
             Comprehensive progressive metrics
         """
+        if profile is not None:
+            team_stats = profile['team_stats']
+            match_count = 1
+        
         # Paslar
         total_passes = team_stats.get('total_passes', 0)
         pass_accuracy = team_stats.get('pass_accuracy', 75) / 100
         
-        # Tahmini forward passes (%40'ı forward)
-        forward_passes = int(total_passes * 0.40)
-        
-        # Final third passes tahmini (%15'i final third)
-        final_third_passes = int(total_passes * 0.15)
+        # Tahmini forward passes (%40) ve final third passes (%15)
+        forward_passes, final_third_passes = self.estimate_pass_split(total_passes)
         
         # Key passes
         key_passes = team_stats.get('key_passes', int(total_passes * 0.03))
@@ -345,13 +373,16 @@ class ProgressiveMetricsCalculator:
             shots=shots
         )
         
-        return {
+        result = {
             'progressive_passing': progressive_result,
             'field_tilt': field_tilt,
             'build_up_quality': build_up,
             'is_estimated': True,
             'confidence': 0.70
         }
+        if profile is not None:
+            result['league_percentile'] = profile['percentiles']['progressive_passes']
+        return result
     
     # Helper methods
     
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Request Budget Planner
+======================
+run_core_analysis başlamadan önce analizin API maliyetini (arşiv / cache
+durumuna göre) tahmin eder ve kalan kotaya sığan en değerli veri çekme
+alt kümesini seçer. Kota bolsa her şey çekilir; kota azsa lambda'lara etkisi
+en düşük faktörler (hakem, takım sakatlıkları, ...) varsayılana düşer ve
+analiz sonucunda 'request_plan' altında raporlanır.
+
+- Maliyet: gruptaki her çağrı 1 istek; arşivden karşılanan veya
+  Streamlit cache'inde (TTL içinde) olan çağrılar 0
+- Bütçe: kullanıcının kalan günlük/aylık hakkı ve sistemin upstream kotası
+  (upstream_rate_limiter) içinden küçük olanı
+- Seçim: sabit grup sayısı küçük olduğundan tüm alt kümeler denenir
+  (en yüksek toplam etki, eşitlikte en düşük maliyet)
+
+Usage:
+    from request_planner import plan_core_analysis
+
+    plan = plan_core_analysis(id_a, id_b, fixture_id, league_info)
+    if plan.allows('odds'):
+        odds, _ = api_utils.get_fixture_odds(...)
+    print(plan.to_dict()['degraded'])   # ['Hakem', 'Takım sakatlık/ceza']
+"""
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import api_utils
+
+
+@dataclass(frozen=True)
+class FetchGroup:
+    name: str
+    label: str
+    impact: float  # lambda'lara tipik göreli etki (iki takım toplamı)
+    ttl: int       # grubu karşılayan fonksiyonun st.cache_data süresi (api_utils / analysis_logic)
+
+
+# run_core_analysis'teki çarpan aralıklarından türetilmiş etki sırası:
+# form %80 harman + form/momentum/dinlenme çarpanları, sezon %20 harman + ev avantajı,
+# oran harmanı 1X2'nin %30'u, kilit oyuncu 0.85 çarpanı, H2H 0.88-1.12,
+# sakatlık 0.85-1.00, hakem 0.92-1.04
+FETCH_GROUPS: Tuple[FetchGroup, ...] = (
+    FetchGroup('recent_form', 'Güncel form (son 6 maç)', 0.40, 3600),
+    FetchGroup('season_stats', 'Sezon istatistikleri', 0.20, 86400),       # calculate_general_stats_v2
+    FetchGroup('league_baselines', 'Lig gol ortalamaları', 0.15, 86400),   # get_league_goal_baselines
+    FetchGroup('odds', 'Bahis oranı harmanı', 0.12, 3600),
+    FetchGroup('key_player_injuries', 'Kilit oyuncu sakatlıkları', 0.10, 86400),
+    FetchGroup('h2h', 'H2H', 0.08, 1800),
+    FetchGroup('team_injuries', 'Takım sakatlık/ceza', 0.08, 3600),
+    FetchGroup('referee', 'Hakem', 0.04, 86400),
+)
+GROUPS_BY_NAME = {group.name: group for group in FETCH_GROUPS}
+RECENT_FORM_LIMIT = 6
+H2H_LIMIT = 10
+
+
+class FetchLedger:
+    """
+    Bu süreçte çekilmiş (st.cache_data'da duran) çağrılar
+
+    Streamlit cache'i dışarıdan sorgulanamadığı için planın çalıştırdığı
+    çağrılar aynı TTL ile burada işaretlenir.
+    """
+
+    def __init__(self):
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def is_cached(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._expires.get(key, 0) > time.time()
+
+    def mark(self, keys: List[Hashable], ttl: int):
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key in keys:
+                self._expires[key] = expires_at
+
+
+_ledger = FetchLedger()
+
+
+@dataclass
+class RequestPlan:
+    budget: Optional[int]
+    costs: Dict[str, int]
+    selected: List[str]
+    call_keys: Dict[str, List[Hashable]] = field(default_factory=dict)
+
+    def allows(self, name: str) -> bool:
+        return name in self.selected
+
+    @property
+    def estimated_cost(self) -> int:
+        return sum(self.costs[name] for name in self.selected)
+
+    @property
+    def degraded(self) -> List[str]:
+        return [name for name in self.costs if name not in self.selected]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'budget': self.budget,
+            'estimated_cost': self.estimated_cost,
+            'full_cost': sum(self.costs.values()),
+            'fetched': list(self.selected),
+            'degraded': [GROUPS_BY_NAME[name].label for name in self.degraded],
+        }
+
+
+# ----------------------------------------------------------------------
+# Maliyet tahmini
+# ----------------------------------------------------------------------
+
+def _archive(league_info: Dict, as_of: Optional[int] = None):
+    """
+    Maçın ligi için güncel arşiv (partition ingest'i eskiyse None; geçmiş replay'inde as_of
+    öncesi zaten arşivde olduğundan tazelik aranmaz)
+    """
+    try:
+        import fixture_archive
+        archive = fixture_archive.get_archive()
+        fresh = as_of is not None or archive.is_fresh(league_info['league_id'], league_info['season'])
+        return archive if fresh else None
+    except Exception:
+        return None
+
+
+def _archive_covers_team(archive, team_id: int, limit: int, before: Optional[int] = None,
+                         league_info: Optional[Dict] = None) -> bool:
+    """league_info verilirse sadece o lig-sezondaki maçlar sayılır (form motoru tablosu)"""
+    if archive is None:
+        return False
+    if league_info is None:
+        return len(archive.team_history(team_id, limit=limit, before=before)) >= limit
+    rows = archive.team_history(team_id, before=before, league_id=league_info['league_id'])
+    return sum(1 for row in rows if row['season'] == int(league_info['season'])) >= limit
+
+
+def _archive_has_pair(team_a: int, team_b: int) -> bool:
+    """get_h2h_summary arşivdeki karşılaşmaları (eksik örnekse 'partial' ile) kullanır"""
+    try:
+        from h2h_index import get_h2h_index
+        return get_h2h_index().get_record(team_a, team_b) is not None
+    except Exception:
+        return False
+
+
+def _archive_covers_league(league_info: Dict, until: Optional[int] = None) -> bool:
+    try:
+        import analysis_logic
+        return bool(analysis_logic._archived_league_scores(league_info, last=250, until=until))
+    except Exception:
+        return False
+
+
+def call_keys(id_a: int, id_b: int, fixture_id: Optional[int], league_info: Dict) -> Dict[str, List[Hashable]]:
+    """Grup → run_core_analysis'in yapacağı API çağrılarının anahtarları"""
+    league_id, season = league_info['league_id'], league_info['season']
+    return {
+        'recent_form': [('last_matches', id_a), ('last_matches', id_b)],
+        'season_stats': [('team_statistics', id_a, league_id, season), ('team_statistics', id_b, league_id, season)],
+        'league_baselines': [('league_fixtures', league_id, season)],
+        'odds': [('odds', fixture_id)],
+        'key_player_injuries': [('fixture_injuries', fixture_id), ('players', id_a, season), ('players', id_b, season)],
+        'h2h': [('h2h', min(id_a, id_b), max(id_a, id_b))],
+        'team_injuries': [('team_injuries', id_a, fixture_id), ('team_injuries', id_b, fixture_id)],
+        'referee': [('fixture', fixture_id), ('referee', fixture_id)],
+    }
+
+
+def estimate_costs(id_a: int, id_b: int, fixture_id: Optional[int], league_info: Dict,
+                   ledger: Optional[FetchLedger] = None,
+                   as_of: Optional[int] = None) -> Tuple[Dict[str, int], Dict[str, List[Hashable]]]:
+    """
+    Grup başına tahmini API isteği (arşiv ve cache'ten karşılananlar düşülür)
+
+    as_of: Geçmiş maç replay'i; arşiv bu andan önceki maçlarla değerlendirilir,
+           Streamlit cache'i (bugünün verisi) sayılmaz
+    """
+    ledger = ledger or _ledger
+    keys = call_keys(id_a, id_b, fixture_id, league_info)
+    archive = _archive(league_info, as_of)
+    use_ledger = api_utils.STREAMLIT_AVAILABLE and as_of is None
+
+    def pending(group_keys):
+        return [key for key in group_keys if not (use_ledger and ledger.is_cached(key))]
+
+    costs = {name: len(pending(group_keys)) for name, group_keys in keys.items()}
+    # Canlıda form arşivden sadece ligin form motoru tablosuyla gelir (son maç listesi API'yle
+    # doğrulanır); replay'de as_of öncesi takım geçmişi yeterli
+    form_league = league_info if as_of is None else None
+    costs['recent_form'] = sum(
+        1 for key in pending(keys['recent_form'])
+        if not _archive_covers_team(archive, key[1], RECENT_FORM_LIMIT, before=as_of, league_info=form_league)
+    )
+    # Geçmiş replay'inde H2H sadece arşivden okunur; canlıda arşivde çiftin karşılaşması olmalı
+    if archive is not None and (as_of is not None or _archive_has_pair(id_a, id_b)):
+        costs['h2h'] = 0
+    if costs['league_baselines'] and _archive_covers_league(league_info, until=as_of):
+        costs['league_baselines'] = 0
+    return costs, keys
+
+
+# ----------------------------------------------------------------------
+# Bütçe ve seçim
+# ----------------------------------------------------------------------
+
+def remaining_request_budget(skip_api_limit: bool = False) -> Optional[int]:
+    """Kullanıcı hakkı ve sistem kotasından küçük olanı (None = sınırsız)"""
+    budgets = []
+    if not skip_api_limit:
+        user_remaining = api_utils.get_remaining_api_quota()
+        if user_remaining is not None:
+            budgets.append(user_remaining)
+    try:
+        from upstream_rate_limiter import get_rate_limiter
+        budgets.append(get_rate_limiter().remaining_today())
+    except Exception as e:
+        print(f"⚠️ Sistem kotası okunamadı: {e}")
+    return min(budgets) if budgets else None
+
+
+def choose_fetches(costs: Dict[str, int], budget: Optional[int]) -> List[str]:
+    """Bütçeye sığan, toplam etkisi en yüksek grup alt kümesi"""
+    free = [name for name, cost in costs.items() if cost == 0]
+    paid = [name for name, cost in costs.items() if cost > 0]
+    if budget is None or sum(costs[name] for name in paid) <= budget:
+        return list(costs)
+
+    best, best_key = (), (-1.0, 0)
+    for size in range(len(paid) + 1):
+        for subset in itertools.combinations(paid, size):
+            cost = sum(costs[name] for name in subset)
+            if cost > budget:
+                continue
+            key = (round(sum(GROUPS_BY_NAME[name].impact for name in subset), 6), -cost)
+            if key > best_key:
+                best, best_key = subset, key
+    return [name for name in costs if name in free or name in best]
+
+
+def plan_core_analysis(id_a: int, id_b: int, fixture_id: Optional[int], league_info: Dict,
+                       skip_api_limit: bool = False, budget: Optional[int] = None,
+                       ledger: Optional[FetchLedger] = None, as_of: Optional[int] = None) -> RequestPlan:
+    """
+    run_core_analysis için istek planı
+
+    Args:
+        budget: Kullanılabilir istek sayısı (None = kullanıcı/sistem kotasından hesapla)
+        as_of: Geçmiş maç replay'i için unix zamanı (bkz. estimate_costs)
+    """
+    costs, keys = estimate_costs(id_a, id_b, fixture_id, league_info, ledger, as_of)
+    if budget is None:
+        budget = remaining_request_budget(skip_api_limit)
+    plan = RequestPlan(budget=budget, costs=costs, selected=choose_fetches(costs, budget), call_keys=keys)
+    if plan.degraded:
+        print(f"⚠️ Kota planı ({plan.estimated_cost}/{budget} istek): "
+              f"{', '.join(plan.to_dict()['degraded'])} varsayılan değerlerle")
+    return plan
+
+
+def record_fetched(plan: RequestPlan, ledger: Optional[FetchLedger] = None):
+    """Plan çalıştırıldıktan sonra çekilen çağrıları cache'te say"""
+    if not api_utils.STREAMLIT_AVAILABLE:
+        return
+    ledger = ledger or _ledger
+    for name in plan.selected:
+        ledger.mark(plan.call_keys.get(name, []), GROUPS_BY_NAME[name].ttl)
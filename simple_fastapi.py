@@ -11,7 +11,7 @@ import asyncio
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-from real_time_data import get_complete_team_data, get_h2h_data
+from real_time_data import get_h2h_data
 from injuries_api import get_team_injuries, calculate_injury_impact
 from match_importance import calculate_match_importance
 from xg_analysis import compare_xg_teams
@@ -24,6 +24,8 @@ from squad_experience import compare_squad_experience
 from data_fetcher import get_fetcher  # ⚡ Paralel + Cache veri çekici (Phase 4.2)
 from cache_manager import get_cache  # 📊 Cache yöneticisi
 from factor_weights import get_weight_manager  # ⚖️ Faktör ağırlık yöneticisi (Phase 4.3)
+from factor_executor import Factor, FactorExecutor  # ⚡ Eşzamanlı faktör analizi
+from prediction_board import load_board, get_top_predictions  # 📋 Günlük tahmin panosu
 
 # Phase 8: API Security System
 try:
@@ -184,7 +186,7 @@ try:
     
     # Phase 7.D: Production Features
     phase7_d_modules = [
-        'prediction_logger.py',
+        'prediction_ledger.py',
         'result_checker.py',
         'performance_dashboard.py',
         'auto_retrain.py'
@@ -210,14 +212,11 @@ except Exception as e:
 
 # Phase 7: Production modüllerini import et
 try:
-    if PHASE7_PRODUCTION:
-        from prediction_logger import PredictionLogger
-        PREDICTION_LOGGER = PredictionLogger()
-        print("✅ Prediction Logger yüklendi")
-    else:
-        PREDICTION_LOGGER = None
+    from prediction_ledger import get_prediction_ledger
+    PREDICTION_LOGGER = get_prediction_ledger()
+    print("✅ Prediction Ledger yüklendi")
 except Exception as e:
-    print(f"⚠️ Prediction Logger yüklenemedi: {e}")
+    print(f"⚠️ Prediction Ledger yüklenemedi: {e}")
     PREDICTION_LOGGER = None
 
 # Phase 8.G: Global managers
@@ -303,8 +302,8 @@ async def lifespan(app: FastAPI):
         
         if PHASE7_PRODUCTION:
             print("   D Grubu (Production Features): ✅")
-            if os.path.exists('prediction_logger.py'):
-                print("      ✓ prediction_logger.py")
+            if os.path.exists('prediction_ledger.py'):
+                print("      ✓ prediction_ledger.py")
             if os.path.exists('result_checker.py'):
                 print("      ✓ result_checker.py")
             if os.path.exists('performance_dashboard.py'):
@@ -647,6 +646,24 @@ async def get_real_fixtures() -> List[Dict[str, Any]]:
         # Bugünün tarihi
         today = date.today()
         
+        # Arka plan worker'ının günlük tahmin panosu varsa API'ye gitme
+        board = load_board(today)
+        if board:
+            return [
+                {
+                    "id": row['fixture_id'],
+                    "home_team": row['Ev Sahibi'],
+                    "away_team": row['Deplasman'],
+                    "home_logo": row.get('home_logo') or "/static/images/default_team.svg",
+                    "away_logo": row.get('away_logo') or "/static/images/default_team.svg",
+                    "time": row.get('Saat', '00:00'),
+                    "date": today.strftime('%d %B %Y'),
+                    "league": row.get('Lig', 'Bilinmeyen'),
+                    "prediction": f"{row['Tahmin']} (%{row['AI Güven Puanı']:.0f})"
+                }
+                for row in get_top_predictions(board, top_n=10, min_confidence=0)
+            ]
+        
         # Majör liglerin ID'leri
         league_ids = [
             203,  # Süper Lig
@@ -817,6 +834,37 @@ async def dashboard_page(request: Request):
         "username": "Test User"
     })
 
+# Faktör sağlayıcısı hata verir / zaman aşımına uğrarsa kullanılacak nötr sonuçlar
+# (analysis_result bu alanlara doğrudan erişir; prediction_impact 0 = etkisiz)
+FACTOR_FALLBACKS = {
+    'importance': {
+        'importance_score': 50, 'category': 'NORMAL',
+        'team1_motivation': 100, 'team2_motivation': 100,
+        'motivation_advantage': 'Dengeli', 'factors': [],
+        'is_derby': False, 'is_relegation_battle': False, 'is_title_race': False
+    },
+    'weather': {'available': False},
+    'referee': {'available': False},
+    'betting': {'available': False},
+    'tactical': {
+        'available': False,
+        'home_tactics': {'formation': 'N/A', 'attack_style': 'N/A', 'possession': 50},
+        'away_tactics': {'formation': 'N/A', 'attack_style': 'N/A', 'possession': 50},
+        'matchup_score': 50, 'category': 'DENGELİ',
+        'advantages': [], 'disadvantages': [], 'prediction_impact': 0
+    },
+    'transfers': {
+        'home_transfer': {'total_transfers': 0, 'impact_score': 0},
+        'away_transfer': {'total_transfers': 0, 'impact_score': 0},
+        'advantage': 'Dengeli', 'prediction_impact': 0
+    },
+    'experience': {
+        'home_experience': {'avg_age': 0, 'category': 'N/A'},
+        'away_experience': {'avg_age': 0, 'category': 'N/A'},
+        'age_difference': 0, 'advantage': 'Dengeli', 'prediction_impact': 0
+    }
+}
+
 @app.post("/analyze")
 async def analyze_match(request: Request, team1: str = Form(...), team2: str = Form(...)):
     """🔥 ENSEMBLE ML + AI Hibrit Analiz Sistemi - Phase 4-6 Entegrasyonu"""
@@ -878,126 +926,71 @@ async def analyze_match(request: Request, team1: str = Form(...), team2: str = F
             'form': team2_data_raw.get('form', 50.0)
         }
         
-        # Takım verilerini API'den çek (YENİ OLMAYAN KODLAR İÇİN GERİYE DÖNÜK UYUMLULUK)
-        def get_team_data(team_name):
-            """Gerçek zamanlı API'den takım verilerini çek"""
-            print(f"🔄 API'den veri çekiliyor: {team_name}")
-            api_data = get_complete_team_data(team_name)
-            
-            if api_data:
-                print(f"✅ API verisi alındı: {api_data['name']}")
-                return {
-                    'value': api_data['value'],
-                    'elo': api_data['elo'],
-                    'league_pos': api_data['league_pos'],
-                    'points': api_data['points'],
-                    'played': api_data['played'],
-                    'wins': api_data['wins'],
-                    'draws': api_data['draws'],
-                    'losses': api_data['losses'],
-                    'league': api_data['league'],
-                    'country': api_data.get('league_country', api_data['country']),
-                    'goals_for': api_data.get('goals_for', 0),
-                    'goals_against': api_data.get('goals_against', 0),
-                    'form': api_data['form']
-                }
-            else:
-                print(f"⚠️ API'den veri alınamadı, varsayılan kullanılıyor: {team_name}")
-                # Varsayılan değerler
-                return {
-                    'value': 30,
-                    'elo': 1500,
-                    'league_pos': 10,
-                    'points': 10,
-                    'played': 10,
-                    'wins': 3,
-                    'draws': 1,
-                    'losses': 6,
-                    'league': 'Unknown League',
-                    'country': 'Unknown',
-                    'goals_for': 10,
-                    'goals_against': 15,
-                    'form': 50.0
-                }
-        
-        team1_data = get_team_data(team1)
-        team2_data = get_team_data(team2)
-        
-        # H2H (Kafa Kafaya) Gerçek Veriler
-        h2h_data = None
-        if team1_data.get('id') and team2_data.get('id'):
-            print(f"🔍 H2H verisi çekiliyor: {team1} vs {team2}")
-            h2h_data = get_h2h_data(team1_data['id'], team2_data['id'])
-            if h2h_data:
-                print(f"✅ H2H bulundu: {h2h_data['total_matches']} maç")
-        
-        # PHASE 1 MODÜLLER - Gelişmiş Analiz
-        
-        # 1. Sakatlık/Ceza Analizi
-        injury_analysis = None
-        if team1_data.get('id') and team2_data.get('id'):
-            print(f"🏥 Sakatlık analizi: {team1} vs {team2}")
-            injury_analysis = calculate_injury_impact(team1_data['id'], team2_data['id'], team1, team2)
-        
-        # 2. Maç Önem Derecesi
-        importance_analysis = calculate_match_importance(
-            team1, team2,
-            team1_data['league_pos'], team2_data['league_pos'],
-            team1_data['points'], team2_data['points'],
-            team1_data['league'],
-            total_teams=18 if 'Süper Lig' in team1_data['league'] else 20
-        )
-        print(f"🎯 Maç önemi: {importance_analysis['category']} ({importance_analysis['importance_score']}/100)")
-        
-        # 3. xG Analizi
-        xg_analysis = None
-        if team1_data.get('id') and team2_data.get('id'):
-            print(f"📊 xG analizi: {team1} vs {team2}")
-            xg_analysis = compare_xg_teams(team1_data['id'], team2_data['id'], team1, team2)
-        
-        # PHASE 2 MODÜLLER - Çevresel Faktörler
-        
-        # 4. Hava Durumu
-        print(f"🌤️ Hava durumu analizi: {team1} stadyumu")
-        weather_analysis = calculate_weather_impact(team1, team2)
-        
-        # 5. Hakem Analizi
-        print(f"⚖️ Hakem analizi: {team1_data['league']}")
-        referee_analysis = analyze_referee_impact(team1, team2, team1_data['league'])
-        
-        # 6. Bahis Oranları
-        print(f"💰 Bahis oranları analizi")
-        betting_analysis = analyze_betting_odds(
-            team1, team2,
-            team1_data['elo'], team2_data['elo'],
-            team1_data.get('id'), team2_data.get('id')
-        )
-        
-        # PHASE 3 MODÜLLER - Derin Analiz
-        
-        # 7. Taktiksel Uyum
-        print(f"⚔️ Taktiksel analiz: {team1} vs {team2}")
-        tactical_analysis = calculate_tactical_matchup(team1, team2)
+        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        # FAKTÖR ANALİZLERİ - Bağımsız sağlayıcılar eşzamanlı (timeout + fallback)
+        # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        has_ids = bool(team1_data.get('id') and team2_data.get('id'))
         
-        # 8. Transfer Etkisi
-        print(f"📋 Transfer analizi")
-        # Form değerlerini API'den al
-        team1_form_value = team1_data.get('form', 50.0) / 100.0  # 0-1 arası normalize
+        # Transfer analizi için form değerleri (0-1 arası normalize)
+        team1_form_value = team1_data.get('form', 50.0) / 100.0
         team2_form_value = team2_data.get('form', 50.0) / 100.0
         
-        transfer_analysis = compare_transfer_situations(
-            team1, team2,
-            team1_data.get('id'), team2_data.get('id'),
-            team1_form_value, team2_form_value
-        )
+        factors = [
+            # PHASE 1 MODÜLLER - Gelişmiş Analiz
+            Factor('h2h', get_h2h_data, args=(team1_data.get('id'), team2_data.get('id')),
+                   timeout=8.0, enabled=has_ids),
+            Factor('injuries', calculate_injury_impact,
+                   args=(team1_data.get('id'), team2_data.get('id'), team1, team2),
+                   timeout=8.0, enabled=has_ids),
+            Factor('importance', calculate_match_importance,
+                   args=(team1, team2,
+                         team1_data['league_pos'], team2_data['league_pos'],
+                         team1_data['points'], team2_data['points'],
+                         team1_data['league']),
+                   kwargs={'total_teams': 18 if 'Süper Lig' in team1_data['league'] else 20},
+                   timeout=3.0, fallback=FACTOR_FALLBACKS['importance']),
+            Factor('xg', compare_xg_teams,
+                   args=(team1_data.get('id'), team2_data.get('id'), team1, team2),
+                   timeout=10.0, enabled=has_ids),
+            # PHASE 2 MODÜLLER - Çevresel Faktörler
+            Factor('weather', calculate_weather_impact, args=(team1, team2),
+                   timeout=5.0, fallback=FACTOR_FALLBACKS['weather']),
+            Factor('referee', analyze_referee_impact, args=(team1, team2, team1_data['league']),
+                   timeout=5.0, fallback=FACTOR_FALLBACKS['referee']),
+            Factor('betting', analyze_betting_odds,
+                   args=(team1, team2, team1_data['elo'], team2_data['elo'],
+                         team1_data.get('id'), team2_data.get('id')),
+                   timeout=8.0, fallback=FACTOR_FALLBACKS['betting']),
+            # PHASE 3 MODÜLLER - Derin Analiz
+            Factor('tactical', calculate_tactical_matchup, args=(team1, team2),
+                   timeout=5.0, fallback=FACTOR_FALLBACKS['tactical']),
+            Factor('transfers', compare_transfer_situations,
+                   args=(team1, team2, team1_data.get('id'), team2_data.get('id'),
+                         team1_form_value, team2_form_value),
+                   timeout=8.0, fallback=FACTOR_FALLBACKS['transfers']),
+            Factor('experience', compare_squad_experience,
+                   args=(team1, team2, team1_data.get('id'), team2_data.get('id'),
+                         team1_data.get('league_pos', 10), team2_data.get('league_pos', 10)),
+                   timeout=8.0, fallback=FACTOR_FALLBACKS['experience']),
+        ]
         
-        # 9. Kadro Tecrübesi
-        print(f"👥 Kadro tecrübe analizi")
-        experience_analysis = compare_squad_experience(
-            team1, team2,
-            team1_data.get('id'), team2_data.get('id'),
-            team1_data.get('league_pos', 10), team2_data.get('league_pos', 10)
-        )
+        print(f"⚡ {len(factors)} faktör eşzamanlı çalıştırılıyor: {team1} vs {team2}")
+        factor_results, factor_timings = await FactorExecutor().run(factors)
+        
+        h2h_data = factor_results['h2h']
+        injury_analysis = factor_results['injuries']
+        importance_analysis = factor_results['importance']
+        xg_analysis = factor_results['xg']
+        weather_analysis = factor_results['weather']
+        referee_analysis = factor_results['referee']
+        betting_analysis = factor_results['betting']
+        tactical_analysis = factor_results['tactical']
+        transfer_analysis = factor_results['transfers']
+        experience_analysis = factor_results['experience']
+        
+        if h2h_data:
+            print(f"✅ H2H bulundu: {h2h_data['total_matches']} maç")
+        print(f"🎯 Maç önemi: {importance_analysis['category']} ({importance_analysis['importance_score']}/100)")
         
         # Form hesaplaması - API'den gelen form verisi kullanılacak
         def calculate_form_realistic(team_name, team_data):
@@ -1260,6 +1253,9 @@ async def analyze_match(request: Request, team1: str = Form(...), team2: str = F
                 }
             },
             
+            # Faktör başına süre/durum (ok, timeout, error, skipped)
+            'factor_timings': factor_timings,
+            
             # Diğer alanlar buraya eklenecek
         }
         
@@ -1707,6 +1703,27 @@ async def get_cache_stats():
             "error": str(e)
         }
 
+@app.get("/api/prediction-board")
+async def get_prediction_board(top_n: int = 0, league: Optional[int] = None):
+    """📋 Günlük tahmin panosu snapshot'ı (arka plan worker'ı üretir)"""
+    board = load_board()
+    if not board:
+        return {
+            "success": False,
+            "error": "Bugünün tahmin panosu henüz hazırlanmadı"
+        }
+    fixtures = board['fixtures']
+    if top_n or league:
+        fixtures = get_top_predictions(board, top_n=top_n or len(fixtures), min_confidence=0,
+                                       league_ids=[league] if league else None)
+    return {
+        "success": True,
+        "date": board['date'],
+        "updated_at": board['updated_at'],
+        "stats": board['stats'],
+        "fixtures": fixtures
+    }
+
 @app.get("/cache-stats", response_class=HTMLResponse)
 async def cache_stats_page(request: Request):
     """📊 Cache istatistikleri sayfası (Phase 4.2)"""
@@ -1824,7 +1841,10 @@ async def ml_predict_api(request: Dict[str, Any]):
                     probabilities=probabilities,
                     model_name=model_name,
                     league=league,
-                    features=team1_factors
+                    features=team1_factors,
+                    fixture_id=request.get('fixture_id'),
+                    league_id=request.get('league_id'),
+                    kickoff=request.get('kickoff')
                 )
             except Exception as log_error:
                 print(f"⚠️ Prediction logging hatası: {log_error}")
@@ -1885,7 +1905,10 @@ async def ensemble_predict_api(request: Dict[str, Any]):
                     model_name=f"Ensemble_{ensemble_method.capitalize()}",
                     league=league,
                     model_version="v1.0",
-                    notes=f"Match type: {match_type}"
+                    notes=f"Match type: {match_type}",
+                    fixture_id=request.get('fixture_id'),
+                    league_id=request.get('league_id'),
+                    kickoff=request.get('kickoff')
                 )
             except Exception as log_error:
                 print(f"⚠️ Prediction logging hatası: {log_error}")
@@ -2183,7 +2206,7 @@ async def get_prediction_stats():
         if not PREDICTION_LOGGER:
             return {
                 "success": False,
-                "error": "Prediction Logger aktif değil"
+                "error": "Prediction Ledger aktif değil"
             }
         
         # Tüm modellerin istatistiklerini getir
@@ -2208,7 +2231,7 @@ async def get_recent_predictions(limit: int = 10, model: str = None):
         if not PREDICTION_LOGGER:
             return {
                 "success": False,
-                "error": "Prediction Logger aktif değil"
+                "error": "Prediction Ledger aktif değil"
             }
         
         predictions = PREDICTION_LOGGER.get_recent_predictions(
@@ -2260,6 +2283,39 @@ async def check_results(request: Request):
             "error": str(e)
         }
 
+@app.post("/api/settle-result")
+async def settle_result(request: Request):
+    """⚖️ Sonuçlanan maçları defterdeki model tahminleriyle online ensemble'a işle"""
+    try:
+        from ensemble_manager import get_online_ensemble
+        data = await request.json()
+        if not PREDICTION_LOGGER:
+            return {"success": False, "error": "Prediction Ledger yüklü değil"}
+        # Arşive henüz girmemiş maçın skoru verildiyse önce deftere işlenir
+        if data.get('fixture_id') is not None and data.get('home_goals') is not None:
+            PREDICTION_LOGGER.settle(data['fixture_id'], data['home_goals'], data['away_goals'])
+        
+        online = get_online_ensemble()
+        settled = online.settle_from_ledger(PREDICTION_LOGGER)
+        return {"success": True, "settled": settled, "weights": online.get_weights()}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/ensemble-weights")
+async def get_ensemble_weights():
+    """⚖️ Güncel online ensemble ağırlıkları ve model metrikleri"""
+    try:
+        from ensemble_manager import get_online_ensemble
+        return {"success": True, **get_online_ensemble().get_stats()}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
 @app.post("/api/auto-retrain")
 async def trigger_auto_retrain(request: Request):
     """🔧 Otomatik re-training tetikle"""
@@ -2333,7 +2389,7 @@ async def get_system_status():
                         "compare_ensemble_methods": os.path.exists('compare_ensemble_methods.py')
                     },
                     "D_production": {
-                        "prediction_logger": os.path.exists('prediction_logger.py'),
+                        "prediction_ledger": os.path.exists('prediction_ledger.py'),
                         "result_checker": os.path.exists('result_checker.py'),
                         "performance_dashboard": os.path.exists('performance_dashboard.py'),
                         "auto_retrain": os.path.exists('auto_retrain.py')
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Single-Flight Request Coalescing
+================================
+Aynı cache anahtarı için eşzamanlı cache miss'leri tek bir upstream
+çağrısında birleştirir.
+
+- Süreç içi: aynı anahtarı isteyen thread'ler lider thread'in sonucunu bekler
+- Süreçler arası: paylaşılan SQLite dosyasındaki kilit satırı ile tek lider
+  seçilir; diğer süreçler cache'e sonuç düşene (veya kilit bırakılana) kadar bekler
+
+Usage:
+    from single_flight import get_single_flight, SQLiteLockStore
+
+    result = get_single_flight().do(
+        cache_key,
+        fetch=lambda: call_api_and_store(),
+        cache_lookup=lambda: cache.peek(category, **params),
+        lock_store=SQLiteLockStore(cache.db_path)
+    )
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+
+class SQLiteLockStore:
+    """Süreçler arası kilit satırları (paylaşılan SQLite dosyasında)"""
+
+    def __init__(self, db_path: str, lock_ttl: float = 60.0):
+        """
+        Args:
+            db_path: Paylaşılan SQLite dosyası (genelde cache veritabanı)
+            lock_ttl: Kilidin en uzun yaşam süresi (çöken süreçler için)
+        """
+        self.db_path = str(db_path)
+        self.lock_ttl = lock_ttl
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS inflight_locks (
+                lock_key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                acquired_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def acquire(self, key: str, owner: str) -> bool:
+        """Kilidi almayı dene (başka sahibi varsa False)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM inflight_locks WHERE lock_key = ? AND expires_at < ?", (key, now))
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO inflight_locks (lock_key, owner, acquired_at, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, owner, now, now + self.lock_ttl))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self, key: str, owner: str):
+        """Kilidi bırak (sadece sahibi bırakabilir)"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM inflight_locks WHERE lock_key = ? AND owner = ?", (key, owner))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def is_locked(self, key: str) -> bool:
+        """Anahtar için geçerli bir kilit var mı?"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM inflight_locks WHERE lock_key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            return row is not None
+        finally:
+            conn.close()
+
+
+class _Call:
+    """Süreç içi uçuştaki çağrı"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Anahtar başına tek upstream çağrısı"""
+
+    def __init__(self, wait_timeout: float = 30.0, poll_interval: float = 0.1):
+        """
+        Args:
+            wait_timeout: Başka sürecin sonucunu en fazla bekleme süresi
+            poll_interval: Süreçler arası beklemede cache kontrol aralığı
+        """
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {'leader_calls': 0, 'coalesced_threads': 0, 'coalesced_processes': 0}
+
+    def do(self,
+           key: str,
+           fetch: Callable[[], Any],
+           cache_lookup: Optional[Callable[[], Any]] = None,
+           lock_store: Optional[SQLiteLockStore] = None) -> Any:
+        """
+        Anahtar için fetch'i tek seferde çalıştır, eşzamanlı çağıranlar sonucu paylaşır
+
+        Args:
+            key: Cache anahtarı
+            fetch: Upstream çağrısı (sonucu cache'e yazmalı ki diğer süreçler görsün)
+            cache_lookup: Cache'e sessizce bakan fonksiyon (None = sonuç yok)
+            lock_store: Süreçler arası kilit deposu (None = sadece süreç içi)
+
+        Returns:
+            fetch sonucu (lider hata aldıysa aynı hata bekleyenlere de iletilir)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced_threads'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fetch, cache_lookup, lock_store)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _lead(self, key: str, fetch: Callable[[], Any],
+              cache_lookup: Optional[Callable[[], Any]],
+              lock_store: Optional[SQLiteLockStore]) -> Any:
+        """Süreç içi lider: gerekiyorsa süreçler arası kilidi de al"""
+        if lock_store is None:
+            self.stats['leader_calls'] += 1
+            return fetch()
+
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        deadline = time.time() + self.wait_timeout
+
+        while True:
+            if lock_store.acquire(key, owner):
+                try:
+                    # Kilidi alana kadar başka süreç sonucu yazmış olabilir
+                    if cache_lookup is not None:
+                        cached = cache_lookup()
+                        if cached is not None:
+                            self.stats['coalesced_processes'] += 1
+                            return cached
+                    self.stats['leader_calls'] += 1
+                    return fetch()
+                finally:
+                    lock_store.release(key, owner)
+
+            # Başka süreç çekiyor: sonucun cache'e düşmesini bekle
+            while lock_store.is_locked(key) and time.time() < deadline:
+                time.sleep(self.poll_interval)
+                if cache_lookup is not None:
+                    cached = cache_lookup()
+                    if cached is not None:
+                        self.stats['coalesced_processes'] += 1
+                        return cached
+
+            if time.time() >= deadline:
+                # Lider takıldı: kendi çağrımızı yap
+                self.stats['leader_calls'] += 1
+                return fetch()
+
+
+# Global instance
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Global SingleFlight instance'ı getir"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
@@ -17,10 +17,14 @@ from functools import wraps
 from typing import Callable, Optional, Any, Dict
 from datetime import datetime
 from cache_manager import CacheManager
+from single_flight import get_single_flight, SQLiteLockStore
 
 # Global cache instance
 _cache = CacheManager()
 
+# Süreçler arası single-flight kilitleri cache veritabanında tutulur
+_lock_store = SQLiteLockStore(_cache.db_path)
+
 
 def smart_cached_api(
     category: str,
@@ -69,41 +73,53 @@ def smart_cached_api(
                     if param not in cache_params and i < len(args):
                         cache_params[param] = args[i]
             
-            # Try to get from cache
-            cached_data = _cache.get(category, **cache_params)
-            if cached_data is not None:
-                return cached_data
-            
-            # Cache miss - call API
-            result = func(*args, **kwargs)
-            
-            if result is not None:
-                # Extract fixture status and date if extractors provided
-                fixture_status = None
-                fixture_date = None
+            # API çağrısı + smart TTL ile kaydet (miss ve arka plan yenilemesi için)
+            def fetch():
+                result = func(*args, **kwargs)
                 
-                if extract_status:
-                    try:
-                        fixture_status = extract_status(result)
-                    except:
-                        pass
+                if result is not None:
+                    # Extract fixture status and date if extractors provided
+                    fixture_status = None
+                    fixture_date = None
+                    
+                    if extract_status:
+                        try:
+                            fixture_status = extract_status(result)
+                        except:
+                            pass
+                    
+                    if extract_date:
+                        try:
+                            fixture_date = extract_date(result)
+                        except:
+                            pass
+                    
+                    # Save with smart TTL
+                    _cache.set_smart(
+                        category=category,
+                        data=result,
+                        fixture_status=fixture_status,
+                        fixture_date=fixture_date,
+                        **cache_params
+                    )
                 
-                if extract_date:
-                    try:
-                        fixture_date = extract_date(result)
-                    except:
-                        pass
-                
-                # Save with smart TTL
-                _cache.set_smart(
-                    category=category,
-                    data=result,
-                    fixture_status=fixture_status,
-                    fixture_date=fixture_date,
-                    **cache_params
+                return result
+            
+            # Aynı anahtar için eşzamanlı çağrılar tek API isteğinde birleşir
+            def fetch_coalesced():
+                return get_single_flight().do(
+                    _cache._generate_key(category, **cache_params),
+                    fetch,
+                    cache_lookup=lambda: _cache.peek(category, **cache_params),
+                    lock_store=_lock_store
                 )
             
-            return result
+            # Try to get from cache (stale kayıt varsa hemen döner, arka planda yenilenir)
+            cached_data = _cache.get_or_revalidate(category, fetch_coalesced, **cache_params)
+            if cached_data is not None:
+                return cached_data
+            
+            return fetch_coalesced()
         
         return wrapper
     return decorator
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Team Profile Store
+==================
+Ligdeki tüm takımlar için xG / xA / pressing / progressive profil tablosu.
+
+- Maç arşivindeki (fixture_archive) statistics verisinden tek geçişte, numpy ile
+  tüm takımlar birlikte hesaplanır (takım başına ayrı türetme yok)
+- Formüller hesaplayıcıların sınıf sabitleri/yardımcılarıyla aynıdır
+  (ExpectedGoalsCalculator.shot_quality, PressingMetricsCalculator.estimate_ppda_inputs, ...)
+- Lig yüzdelikleri ligin tüm takımlarına karşı hesaplanır (xGA ve PPDA'da düşük = iyi)
+- Tablo (lig, sezon, arşiv segment sayısı) anahtarıyla bellekte ve CacheManager'da tutulur;
+  arşive yeni maç eklenince yeniden hesaplanır
+
+Hesaplayıcılar profile= parametresiyle bu kayıtları okur:
+    from team_profiles import get_profile_store
+
+    profile = get_profile_store().get_profile(645, league_id=203, season=2025)
+    xa = ExpectedAssistsCalculator().estimate_team_xa_from_stats({}, profile=profile)
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from expected_assists_calculator import ExpectedAssistsCalculator
+from expected_goals_calculator import ExpectedGoalsCalculator
+from fixture_archive import FixtureArchive, get_archive
+from pressing_metrics_calculator import PressingMetricsCalculator
+from progressive_metrics_calculator import ProgressiveMetricsCalculator
+
+try:
+    from cache_manager import CacheManager, get_cache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+    CacheManager = None
+    get_cache = None
+
+PROFILE_CACHE_CATEGORY = 'team_profiles'
+PROFILE_CACHE_TTL = 604800  # 7 gün - anahtar arşiv güncellenince zaten değişir
+
+# API /fixtures statistics tipi → profil kolonu
+STAT_TYPES = {
+    'Shots on Goal': 'shots_on_target',
+    'Total Shots': 'total_shots',
+    'Ball Possession': 'possession',
+    'Total passes': 'total_passes',
+    'Passes %': 'pass_accuracy',
+}
+STAT_COLUMNS = tuple(STAT_TYPES.values())
+STAT_INDEX = {stat_type: STAT_COLUMNS.index(name) for stat_type, name in STAT_TYPES.items()}
+
+# İstatistiği olmayan takımlar için build_team_stats_from_location varsayılanları
+DEFAULT_STATS = {'shots_on_target': 5.0, 'total_shots': 12.0, 'possession': 50.0,
+                 'total_passes': 450.0, 'pass_accuracy': 75.0}
+
+# API key pass vermiyor: şutların ~3/4'ü bir pasla gelir
+KEY_PASS_SHOT_RATIO = 0.75
+
+# Yüzdelikte düşük değerin iyi olduğu metrikler
+LOWER_IS_BETTER = ('xga', 'ppda')
+
+
+def _parse_stat(value: Any) -> float:
+    """'55%' / '12' / None → float (yoksa NaN)"""
+    if value is None:
+        return np.nan
+    try:
+        return float(str(value).rstrip('%'))
+    except ValueError:
+        return np.nan
+
+
+def league_percentiles(values: np.ndarray, lower_is_better: bool = False) -> np.ndarray:
+    """
+    Değerlerin lig içi yüzdelikleri (0-100, eşit değerler aynı yüzdeliği alır)
+
+    Tüm popülasyona karşı hesaplanır: en iyi takım 100, en kötü 0.
+    """
+    n = len(values)
+    if n == 1:
+        return np.array([50.0])
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side='left')
+    not_above = np.searchsorted(ordered, values, side='right')
+    percentiles = (below + not_above - 1) / (2 * (n - 1)) * 100
+    return 100 - percentiles if lower_is_better else percentiles
+
+
+def _team_means(index: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """(satır, kolon) değerlerinin takım başına NaN-hariç ortalaması (veri yoksa NaN)"""
+    valid = ~np.isnan(values)
+    sums = np.zeros((size, values.shape[1]))
+    counts = np.zeros((size, values.shape[1]))
+    np.add.at(sums, index, np.where(valid, values, 0.0))
+    np.add.at(counts, index, valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def build_league_profiles(archive: FixtureArchive, league_id: int, season: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Ligin tüm takımlarının profilini tek geçişte hesapla
+
+    Returns:
+        {team_id: {'matches', 'stat_matches', 'team_stats', 'metrics', 'percentiles'}}
+        team_stats maç başı ortalamalardır (hesaplayıcı girdisi, matches_played=1)
+    """
+    table = archive.columns()
+    positions = np.flatnonzero((table['league_id'] == int(league_id)) & (table['season'] == int(season)))
+    if len(positions) == 0:
+        return {}
+
+    home, away = table['home_id'][positions], table['away_id'][positions]
+    home_goals = table['home_goals'][positions].astype(np.float64)
+    away_goals = table['away_goals'][positions].astype(np.float64)
+
+    # Maç x taraf x istatistik matrisi (eksikler NaN)
+    stats = np.full((len(positions), 2, len(STAT_COLUMNS)), np.nan)
+    for i, fixture_id in enumerate(table['fixture_id'][positions].tolist()):
+        details = archive.get_details(fixture_id) or {}
+        for block in details.get('statistics') or []:
+            team_id = (block.get('team') or {}).get('id')
+            side = 0 if team_id == home[i] else 1 if team_id == away[i] else None
+            if side is None:
+                continue
+            for item in block.get('statistics') or []:
+                column = STAT_INDEX.get(item.get('type'))
+                if column is not None:
+                    stats[i, side, column] = _parse_stat(item.get('value'))
+
+    # Takım bakış açısı: her maç iki satır (ev sahibi + deplasman)
+    team_ids = np.concatenate([home, away])
+    own = np.concatenate([stats[:, 0], stats[:, 1]])
+    opponent = np.concatenate([stats[:, 1], stats[:, 0]])
+    goals_for = np.concatenate([home_goals, away_goals])
+    goals_against = np.concatenate([away_goals, home_goals])
+
+    teams, index = np.unique(team_ids, return_inverse=True)
+    size = len(teams)
+    matches = np.bincount(index, minlength=size)
+    stat_matches = np.bincount(index, weights=~np.isnan(own).all(axis=1), minlength=size)
+    scored = np.bincount(index, weights=goals_for, minlength=size) / matches
+    conceded = np.bincount(index, weights=goals_against, minlength=size) / matches
+
+    own_mean = _team_means(index, own, size)
+    opp_mean = _team_means(index, opponent, size)
+    column = {name: own_mean[:, i] for i, name in enumerate(STAT_COLUMNS)}
+    opp_column = {name: opp_mean[:, i] for i, name in enumerate(STAT_COLUMNS)}
+    for name, default in DEFAULT_STATS.items():
+        column[name] = np.where(np.isnan(column[name]), default, column[name])
+    opp_column['possession'] = np.where(np.isnan(opp_column['possession']),
+                                        100 - column['possession'], opp_column['possession'])
+    for name, default in DEFAULT_STATS.items():
+        opp_column[name] = np.where(np.isnan(opp_column[name]), default, opp_column[name])
+
+    # Metrikler - hesaplayıcılarla aynı formüller, tüm lig için vektörel
+    shot_quality = ExpectedGoalsCalculator.shot_quality(column['shots_on_target'], column['total_shots'])
+    key_passes = column['total_shots'] * KEY_PASS_SHOT_RATIO
+    opponent_passes, defensive_actions = PressingMetricsCalculator.estimate_ppda_inputs(opp_column['possession'])
+    metrics = {
+        'shot_quality': shot_quality,
+        'xg': column['total_shots'] * shot_quality,
+        'xga': opp_column['total_shots'] * ExpectedGoalsCalculator.shot_quality(
+            opp_column['shots_on_target'], opp_column['total_shots']),
+        'key_passes': key_passes,
+        'xa': key_passes * ExpectedAssistsCalculator.XA_PER_KEY_PASS,
+        'ppda': opponent_passes / defensive_actions,
+        'progressive_passes': ProgressiveMetricsCalculator.estimate_progressive_passes(column['total_passes']),
+    }
+    percentiles = {name: league_percentiles(values, name in LOWER_IS_BETTER)
+                   for name, values in metrics.items() if name != 'shot_quality'}
+
+    profiles: Dict[int, Dict[str, Any]] = {}
+    for i, team_id in enumerate(teams.tolist()):
+        profiles[int(team_id)] = {
+            'matches': int(matches[i]),
+            'stat_matches': int(stat_matches[i]),
+            'team_stats': {
+                'shots_on_target': round(float(column['shots_on_target'][i]), 2),
+                'total_shots': round(float(column['total_shots'][i]), 2),
+                'shots_total': round(float(column['total_shots'][i]), 2),
+                'goals_scored': round(float(scored[i]), 3),
+                'goals_conceded': round(float(conceded[i]), 3),
+                'possession': round(float(column['possession'][i]), 1),
+                'total_passes': round(float(column['total_passes'][i]), 1),
+                'pass_accuracy': round(float(column['pass_accuracy'][i]), 1),
+                'key_passes': round(float(key_passes[i]), 2),
+                'assists': round(float(scored[i]) * KEY_PASS_SHOT_RATIO, 2),
+                'matches_played': 1,  # maç başı ortalamalar
+            },
+            'metrics': {name: round(float(values[i]), 4) for name, values in metrics.items()},
+            'percentiles': {name: int(round(float(values[i]))) for name, values in percentiles.items()},
+        }
+    return profiles
+
+
+class TeamProfileStore:
+    """Lig profil tabloları (bellek → CacheManager → arşivden tek geçiş)"""
+
+    def __init__(self, archive: Optional[FixtureArchive] = None, cache: Optional['CacheManager'] = None,
+                 use_cache: bool = True):
+        """
+        Args:
+            archive: Kaynak arşiv (None = global arşiv)
+            cache: Profil cache'i (None = global cache)
+            use_cache: False ise sadece bellek içi tablo tutulur
+        """
+        self.archive = archive or get_archive()
+        if cache is None and use_cache and CACHE_AVAILABLE:
+            cache = get_cache()
+        self.cache = cache if use_cache else None
+        self._tables: Dict[Tuple[int, int], Tuple[int, Dict[int, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'cache_hits': 0, 'builds': 0}
+
+    def get_league_profiles(self, league_id: int, season: int) -> Dict[int, Dict[str, Any]]:
+        """Ligin profil tablosu (arşivde partition yoksa boş)"""
+        info = self.archive.partition_info(league_id, season)
+        if not info:
+            return {}
+        key = (int(league_id), int(season))
+        version = info['segments']
+
+        memo = self._tables.get(key)
+        if memo is not None and memo[0] == version:
+            self.stats['memory_hits'] += 1
+            return memo[1]
+
+        with self._lock:
+            memo = self._tables.get(key)
+            if memo is not None and memo[0] == version:
+                self.stats['memory_hits'] += 1
+                return memo[1]
+
+            profiles = None
+            if self.cache is not None:
+                cached = self.cache.get(PROFILE_CACHE_CATEGORY, league_id=key[0], season=key[1], version=version)
+                if cached is not None:
+                    # JSON anahtarları string döner
+                    profiles = {int(team_id): row for team_id, row in cached.items()}
+                    self.stats['cache_hits'] += 1
+
+            if profiles is None:
+                self.stats['builds'] += 1
+                profiles = build_league_profiles(self.archive, league_id, season)
+                if self.cache is not None and profiles:
+                    self.cache.set(PROFILE_CACHE_CATEGORY, profiles, PROFILE_CACHE_TTL,
+                                   tags=[f"league:{key[0]}:{key[1]}"],
+                                   league_id=key[0], season=key[1], version=version)
+
+            self._tables[key] = (version, profiles)
+            return profiles
+
+    def get_profile(self, team_id: int, league_id: int, season: int) -> Optional[Dict[str, Any]]:
+        """Takımın profili (arşivde yoksa None → hesaplayıcılar ham istatistiğe döner)"""
+        if team_id is None:
+            return None
+        return self.get_league_profiles(league_id, season).get(int(team_id))
+
+
+# Global instance
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> TeamProfileStore:
+    """Global TeamProfileStore instance'ı getir"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TeamProfileStore()
+    return _store
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Advanced Metrics Team Context Cache Test
+========================================
+Takım bağlamı cache'inin sonucu değiştirmediğini, tekrar hesaplamayı
+önlediğini ve yeni bitmiş maçta geçersiz kılındığını test eder
+"""
+
+import os
+import tempfile
+
+from advanced_metrics_manager import AdvancedMetricsManager, get_matchday_marker
+from cache_manager import CacheManager
+
+TEAM_STATS = {
+    'shots_on_target': 6, 'total_shots': 15, 'goals_scored': 2, 'goals_conceded': 1,
+    'possession': 58, 'total_passes': 520, 'key_passes': 12, 'assists': 2, 'matches_played': 1
+}
+OPPONENT_STATS = {
+    'shots_on_target': 3, 'total_shots': 8, 'goals_scored': 1, 'goals_conceded': 2,
+    'possession': 42, 'total_passes': 380, 'matches_played': 1
+}
+RECENT = [
+    {'goals_for': 2, 'goals_against': 1, 'location': 'home', 'date': '2025-01-05'},
+    {'goals_for': 3, 'goals_against': 0, 'location': 'home', 'date': '2025-01-12'},
+    {'goals_for': 1, 'goals_against': 1, 'location': 'home', 'date': '2025-01-19'},
+]
+
+
+def _manager(tmpdir):
+    return AdvancedMetricsManager(cache=CacheManager(os.path.join(tmpdir, 'cache.db')))
+
+
+def _analysis(manager, recent=RECENT):
+    return manager.get_comprehensive_team_analysis(
+        team_id=645, team_name="Galatasaray", league_id=203,
+        team_stats=TEAM_STATS, opponent_stats=OPPONENT_STATS,
+        recent_matches=recent, is_home=True, season=2024
+    )
+
+
+def test_cached_analysis_matches_uncached():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        uncached = AdvancedMetricsManager(use_cache=False)
+        cached = _manager(tmpdir)
+        expected = _analysis(uncached)
+        assert _analysis(cached) == expected
+        assert _analysis(cached) == expected
+        assert list(_analysis(cached)) == list(expected)
+
+
+def test_context_is_reused_until_invalidated():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = _manager(tmpdir)
+        calls = []
+        original = manager._compute_team_context
+        manager._compute_team_context = lambda *a: calls.append(a) or original(*a)
+
+        _analysis(manager)
+        _analysis(manager)
+        assert len(calls) == 1
+
+        finished = [{'fixture': {'status': {'short': 'FT'}}, 'league': {'id': 203},
+                     'teams': {'home': {'id': 645}, 'away': {'id': 611}}},
+                    {'fixture': {'status': {'short': 'NS'}}, 'league': {'id': 203},
+                     'teams': {'home': {'id': 1}, 'away': {'id': 2}}}]
+        assert manager.on_fixtures_finished(finished) == 2
+        _analysis(manager)
+        assert len(calls) == 2
+
+
+def test_new_finished_match_changes_matchday():
+    newer = RECENT + [{'goals_for': 0, 'goals_against': 2, 'location': 'away', 'date': '2025-01-26'}]
+    assert get_matchday_marker(RECENT) != get_matchday_marker(newer)
+    assert get_matchday_marker([]) == 'none'
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+API Replay Test
+===============
+make_api_request / APIFootballV3 yanıtlarının korpusa kaydedilip ağsız tekrar
+oynatıldığını, yapay gecikmeyi, kayıtsız isteklerin bağlantı hatası olarak
+döndüğünü ve benchmark bütçe kontrolünü test eder
+"""
+
+import json
+import os
+import time
+
+import api_replay
+import api_utils
+import benchmark_suite
+import upstream_rate_limiter
+from football_api_v3 import APIFootballV3, APIStatus
+
+
+class _LiveResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+def test_record_then_replay_without_network(tmp_path, monkeypatch):
+    live_calls = []
+
+    def live_get(url, headers=None, params=None, timeout=None):
+        live_calls.append(params)
+        return _LiveResponse({'errors': [], 'response': [{'team': {'id': 645, 'name': 'Galatasaray'}}]},
+                             headers={'x-ratelimit-requests-remaining': '99'})
+
+    monkeypatch.setattr(api_utils.requests, 'get', live_get)
+    monkeypatch.setattr(upstream_rate_limiter, '_limiter',
+                        upstream_rate_limiter.UpstreamRateLimiter(str(tmp_path / 'rate.db')))
+    with api_replay.configured(mode='record', directory=str(tmp_path)):
+        recorded, error = api_utils.make_api_request('secret', 'u', 'teams', {'search': 'Gala'}, skip_limit=True)
+        assert api_replay.get_stats()['recorded'] == 1
+        path = api_replay.fixture_path('teams', {'search': 'Gala'})
+
+    with open(path, encoding='utf-8') as f:
+        stored = json.load(f)
+    assert 'secret' not in json.dumps(stored) and stored['headers'] == {'x-ratelimit-requests-remaining': '99'}
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("Replay modunda ağa çıkılmamalı")
+
+    monkeypatch.setattr(api_utils.requests, 'get', no_network)
+    with api_replay.configured(mode='replay', directory=str(tmp_path), latency_ms=30):
+        start = time.perf_counter()
+        replayed, replay_error = api_utils.make_api_request('other-key', 'u', 'teams', {'search': 'Gala'})
+        assert time.perf_counter() - start >= 0.03
+        assert (replayed, replay_error) == (recorded, error)
+
+        missing, miss_error = api_utils.make_api_request('k', 'u', 'teams', {'search': 'Fener'}, skip_limit=True)
+        assert missing is None and miss_error.startswith('Bağlantı Hatası')
+        assert api_replay.get_stats()['by_endpoint'] == {'teams': 2}
+        assert api_replay.get_stats()['misses'] == 1
+
+    assert len(live_calls) == 1 and api_replay.get_mode() == 'off'
+
+
+def test_v3_wrapper_replays_status_and_rate_limit_headers(tmp_path):
+    with api_replay.configured(mode='replay', directory=str(tmp_path)):
+        api_replay.save_response('fixtures', {'live': 'all'}, 429, {'errors': ['limit']},
+                                 {'x-ratelimit-requests-remaining': '0'})
+        api_replay.save_response('status', {}, 200, {'errors': [], 'response': {'requests': 5}})
+        client = APIFootballV3('k')
+
+        limited = client._make_request('fixtures', {'live': 'all'})
+        assert limited.status == APIStatus.RATE_LIMIT
+        assert limited.rate_limit_info['requests_remaining'] == '0'
+        assert client._make_request('status').data == {'requests': 5}
+        assert client._make_request('teams', {'id': 1}).status == APIStatus.ERROR
+        assert os.path.isdir(os.path.join(str(tmp_path), 'fixtures'))
+
+
+def test_budget_check_reports_latency_calls_and_misses():
+    results = [
+        {'name': 'get_team_id', 'p95_ms': 120.0, 'api_calls_max': 2, 'replay_misses': 0, 'errors': []},
+        {'name': 'run_core_analysis', 'p95_ms': 2400.0, 'api_calls_max': 30, 'replay_misses': 1, 'errors': []},
+        {'name': 'model_inference', 'skipped': 'model yok'},
+    ]
+    violations = benchmark_suite.check_budgets(results)
+    assert [v.split(':')[0] for v in violations] == ['run_core_analysis'] * 3
+
+    # Yapay gecikme payı: 30 çağrı x 50ms
+    relaxed = benchmark_suite.check_budgets(results, latency_budget_ms=50)
+    assert not any('p95' in v for v in relaxed)
+    assert benchmark_suite.percentile([10, 20, 30, 40], 50) == 25.0
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Backtest Runner Test
+====================
+Geçmiş maç replay'inin sadece maç anından önceki veriyi kullandığını (sonradan
+eklenen maçlar sonucu değiştirmez), parametre taramasında paylaşılan girdilerin
+tek tek çalıştırmayla aynı sonucu verdiğini ve süreç havuzunun aynı raporu
+ürettiğini, API'ye hiç gidilmeden test eder
+"""
+
+import random
+
+import numpy as np
+
+import analysis_logic
+import api_utils
+import fixture_archive
+from backtest_runner import BacktestRunner, expand_grid, replay_shard
+from fixture_archive import FixtureArchive
+
+T0 = 1_700_000_000
+DAY = 86400
+TEAMS = [645, 611, 549, 607, 1001, 3563]
+
+
+def _fixture(fixture_id, home_id, away_id, home_goals, away_goals, league_id=203, season=2025):
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': T0 + fixture_id * DAY, 'status': {'short': 'FT'}},
+        'league': {'id': league_id, 'season': season},
+        'teams': {'home': {'id': home_id, 'name': f'T{home_id}'}, 'away': {'id': away_id, 'name': f'T{away_id}'}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': None, 'away': None}},
+    }
+
+
+def _season(first_id, n_matches, rng, league_id=203, season=2025, teams=TEAMS):
+    fixtures = []
+    for fixture_id in range(first_id, first_id + n_matches):
+        home, away = rng.sample(teams, 2)
+        fixtures.append(_fixture(fixture_id, home, away, rng.randint(0, 4), rng.randint(0, 3), league_id, season))
+    return fixtures
+
+
+def _offline(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path / 'archive'))
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+    monkeypatch.setattr(analysis_logic, 'ML_AVAILABLE', True)  # replay'de yine de kullanılmamalı
+
+    def no_api(*args, **kwargs):
+        raise AssertionError("API çağrılmamalı")
+
+    monkeypatch.setattr(api_utils, 'make_api_request', no_api)
+    return archive
+
+
+def test_replay_is_point_in_time_and_sweep_shares_inputs(tmp_path, monkeypatch):
+    archive = _offline(tmp_path, monkeypatch)
+    rng = random.Random(3)
+    archive.append(203, 2025, _season(1, 60, rng))
+    sweep = expand_grid({'form_weight': [0.5, 0.8], 'elo_tiers': [[[10, 1.2, 0.8]], analysis_logic.CORE_MODEL_DEFAULTS['elo_tiers']]})
+    assert len(sweep) == 4
+
+    before = replay_shard(203, 2025, sweep)
+    assert before['api_calls'] == 0 and before['skipped'] > 0
+    assert before['probabilities'].shape == (4, len(before['outcomes']), 3)
+    assert np.allclose(before['probabilities'].sum(axis=2), 1.0, atol=0.02)
+    # Farklı parametreler farklı tahmin üretir
+    assert not np.allclose(before['probabilities'][0], before['probabilities'][3])
+
+    # Tek kombinasyonla (paylaşılmayan girdilerle) aynı sonuç
+    alone = replay_shard(203, 2025, [sweep[3]])
+    assert np.array_equal(alone['probabilities'][0], before['probabilities'][3])
+
+    # Sezonun devamı arşive eklense de geçmiş maçların tahmini değişmez
+    archive.append(203, 2025, _season(61, 30, rng))
+    after = replay_shard(203, 2025, sweep, limit=60)
+    assert np.array_equal(after['fixture_ids'], before['fixture_ids'])
+    assert np.array_equal(after['probabilities'], before['probabilities'])
+
+
+def test_runner_ranks_params_and_pool_matches_in_process(tmp_path, monkeypatch):
+    archive = _offline(tmp_path, monkeypatch)
+    rng = random.Random(11)
+    archive.append(203, 2025, _season(1, 40, rng))
+    archive.append(39, 2025, _season(41, 40, rng, league_id=39, teams=[33, 40, 42, 47, 49, 50]))
+    sweep = expand_grid({'form_weight': [0.6, 0.8], 'home_advantage_max': [1.1, 1.3]})
+
+    serial = BacktestRunner(n_workers=1).run([(203, 2025), (39, 2025), (140, 2025)], sweep)
+    pooled = BacktestRunner(n_workers=2).run([(203, 2025), (39, 2025)], sweep)
+
+    assert serial['param_sets'] == 4 and serial['api_calls'] == 0
+    assert len(serial['shards']) == 2  # arşivde olmayan lig-sezon atlanır
+    assert serial['fixtures'] == sum(shard['fixtures'] for shard in serial['shards'])
+    log_losses = [result['log_loss'] for result in serial['results']]
+    assert log_losses == sorted(log_losses)
+    for mine, theirs in zip(serial['results'], pooled['results']):
+        assert mine == theirs
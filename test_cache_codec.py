@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Cache Codec Test
+================
+Başlıklı binary payload'un (serializer + sıkıştırma) geri dönüşünü, eski
+JSON/pickle kayıtlarının okunmasını ve CacheManager / DiskCache entegrasyonunu test eder
+"""
+
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+
+from advanced_cache import DiskCache
+from cache_codec import CacheCodec, FORMAT_VERSION, MAGIC
+from cache_manager import CacheManager
+
+FIXTURES = {'response': [{'fixture': {'id': i, 'status': {'short': 'FT'}},
+                          'teams': {'home': {'name': 'Galatasaray'}, 'away': {'name': 'Fenerbahçe'}}}
+                         for i in range(200)]}
+
+
+def test_roundtrip_compresses_large_payloads_only():
+    codec = CacheCodec(compress_threshold=512)
+    small = codec.encode({'a': 1})
+    large = codec.encode(FIXTURES)
+
+    assert small[0] == MAGIC and small[1] == FORMAT_VERSION
+    assert small[3] == 0 and large[3] != 0
+    assert len(large) < len(json.dumps(FIXTURES).encode('utf-8')) / 5
+    assert codec.decode(small) == {'a': 1}
+    assert codec.decode(large) == FIXTURES
+
+    stats = codec.get_stats()
+    assert stats['compressed'] == 1 and stats['decoded'] == 2
+    assert stats['compression_ratio'] > 1
+
+
+def test_non_string_keys_match_stdlib_json():
+    codec = CacheCodec()
+    value = {645: {'ppg': 2.1}, 'rank': (1, 2)}
+    assert codec.decode(codec.encode(value)) == json.loads(json.dumps(value))
+
+
+def test_legacy_rows_still_decode():
+    codec = CacheCodec()
+    assert codec.decode(json.dumps({'x': [1, 2]})) == {'x': [1, 2]}
+    assert codec.decode(pickle.dumps({'x': {1, 2}}), legacy='pickle') == {'x': {1, 2}}
+    assert codec.get_stats()['legacy_decoded'] == 2
+
+
+def test_cache_manager_and_disk_cache_use_codec():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'cache.db')
+        cache = CacheManager(db_path=db_path)
+
+        # Eski sürümün yazdığı JSON metin kaydı
+        legacy_key = cache._generate_key('fixture', fixture_id=1)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO cache (cache_key, data, category, created_at, expires_at) VALUES (?, ?, ?, 0, 9e12)",
+                         (legacy_key, json.dumps({'old': True}), 'fixture'))
+
+        cache.set('fixture', FIXTURES, 600, fixture_id=2)
+        assert cache.get('fixture', fixture_id=1) == {'old': True}
+        assert cache.get('fixture', fixture_id=2) == FIXTURES
+        assert cache.peek('fixture', fixture_id=2) == FIXTURES
+        assert cache.get_stats()['codec']['compression_ratio'] > 1
+
+        disk = DiskCache(db_path=os.path.join(tmpdir, 'disk.db'))
+        disk.set('scores', {'teams': {645, 611}, 'rows': FIXTURES['response']})
+        assert disk.get('scores')['teams'] == {645, 611}
+        assert disk.get_stats()['codec']['serializer'] == 'pickle'
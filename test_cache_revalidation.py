@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Stale-While-Revalidate Test
+===========================
+Süresi dolmuş kayıtların tolerans içinde hemen sunulduğunu, arka planda
+yenilendiğini ve yenileme sırasının hit_count'a göre olduğunu test eder
+"""
+
+import os
+import tempfile
+import threading
+
+from cache_manager import CacheManager, RevalidationWorker
+
+
+def test_stale_entry_served_and_refreshed():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheManager(os.path.join(tmpdir, 'cache.db'), stale_grace={'fixture': 60})
+        cache.set('fixture', {'score': '0-0'}, ttl_seconds=-1, fixture_id=1)
+
+        def refresh():
+            cache.set('fixture', {'score': '1-0'}, ttl_seconds=30, fixture_id=1)
+
+        assert cache.get('fixture', fixture_id=1) is None
+        assert cache.get_or_revalidate('fixture', refresh, fixture_id=1) == {'score': '0-0'}
+        assert cache.revalidator.wait_idle(5)
+        assert cache.get_or_revalidate('fixture', refresh, fixture_id=1) == {'score': '1-0'}
+
+        stats = cache.get_stats()['revalidation']
+        assert stats['stale_served'] == 1 and stats['completed'] == 1
+
+
+def test_outside_grace_is_a_miss_and_cleanup_keeps_graced_rows():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheManager(os.path.join(tmpdir, 'cache.db'), stale_grace={'fixture': 60})
+        cache.set('fixture', {'a': 1}, ttl_seconds=-120, fixture_id=1)
+        cache.set('fixture', {'a': 2}, ttl_seconds=-1, fixture_id=2)
+        cache.set('transfers', {'a': 3}, ttl_seconds=-1, team_id=5)
+
+        assert cache.get_or_revalidate('fixture', lambda: None, fixture_id=1) is None
+        assert cache.clear_expired() == 2
+        assert cache.get_or_revalidate('fixture', lambda: None, fixture_id=2) == {'a': 2}
+
+
+def test_worker_refreshes_hottest_first_and_dedupes():
+    worker = RevalidationWorker(max_workers=1)
+    gate = threading.Event()
+    order = []
+
+    worker.schedule('blocker', gate.wait, priority=100)
+    for key, hits in [('cold', 1), ('hot', 50), ('warm', 10)]:
+        worker.schedule(key, lambda k=key: order.append(k), priority=hits)
+    assert not worker.schedule('hot', lambda: order.append('dup'), priority=99)
+
+    gate.set()
+    assert worker.wait_idle(5)
+    assert order == ['hot', 'warm', 'cold']
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Cache Tag & Prefix Invalidation Test
+====================================
+Etiket ve prefix bazlı geçersiz kılmanın hem bellek (L1) hem disk (L2)
+katmanında hem de CacheManager'da sadece bağımlı kayıtları sildiğini ve arşiv
+ingest'inin yeni biten maçların kayıtlarını temizlediğini test eder
+"""
+
+import os
+import tempfile
+
+from advanced_cache import MultiLayerCache, CacheInvalidator
+from cache_manager import CacheManager
+
+FINISHED = {'fixture': {'id': 123}, 'league': {'id': 203, 'season': 2025},
+            'teams': {'home': {'id': 645}, 'away': {'id': 611}}}
+
+
+def _layers(tmpdir):
+    cache = MultiLayerCache(disk_db_path=os.path.join(tmpdir, 'disk.db'))
+    cache.set('team:645:form', 'gs-form', tags=['team:645'])
+    cache.set('team:611:form', 'fb-form', tags=['team:611'])
+    cache.set('team:549:form', 'bjk-form', tags=['team:549'])
+    cache.set('standings:203:2025', 'table', tags=['league:203:2025'])
+    cache.set('standings:39:2025', 'pl-table', tags=['league:39:2025'])
+    return cache
+
+
+def test_fixture_finished_evicts_dependents_on_both_layers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _layers(tmpdir)
+        CacheInvalidator.fixture_finished(cache, FINISHED)
+
+        for key in ('team:645:form', 'team:611:form', 'standings:203:2025'):
+            assert cache.l1_cache.get(key) is None and cache.l2_cache.get(key) is None
+        assert cache.get('team:549:form') == 'bjk-form'
+        assert cache.get('standings:39:2025') == 'pl-table'
+
+
+def test_prefix_and_pattern_invalidation():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _layers(tmpdir)
+        assert cache.invalidate_prefix('team:') == 3
+        assert cache.l1_cache.keys_with_prefix('team:') == []
+        assert cache.get('standings:203:2025') == 'table'
+
+        cache.invalidate_pattern('standings:*:2025')
+        assert cache.get('standings:39:2025') is None
+
+        cache.set('live:1', 1)
+        cache.invalidate_pattern('live')
+        assert cache.get('live:1') is None
+
+
+def test_tags_survive_l2_promotion():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = _layers(tmpdir)
+        cache.l1_cache.clear()
+        assert cache.get('team:645:form') == 'gs-form'  # L2 -> L1
+        CacheInvalidator.tag_based(cache, 'team:645')
+        assert cache.l1_cache.get('team:645:form') is None
+
+
+def test_cache_manager_derived_tags():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheManager(os.path.join(tmpdir, 'cache.db'))
+        cache.set('team_statistics', {'x': 1}, 600, team_id=645, league_id=203, season=2025)
+        cache.set('standings', {'x': 2}, 600, league_id=203, season=2025)
+        cache.set('standings', {'x': 3}, 600, league_id=39, season=2025)
+        cache.set('fixture_events', {'x': 4}, 600, fixture_id=123)
+        cache.set('fixture_events', {'x': 5}, 600, fixture_id=999)
+
+        assert cache.invalidate_tags(CacheManager.tags_for_fixture(FINISHED)) == 3
+        assert cache.peek('standings', league_id=39, season=2025) == {'x': 3}
+        assert cache.peek('fixture_events', fixture_id=999) == {'x': 5}
+
+        assert cache.invalidate_prefix('fixture') == 1
+        assert cache.peek('fixture_events', fixture_id=999) is None
+
+
+def test_ingest_evicts_entries_of_newly_finished_fixtures(monkeypatch):
+    import api_utils
+    import cache_manager
+    import fixture_archive
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheManager(os.path.join(tmpdir, 'cache.db'))
+        monkeypatch.setattr(cache_manager, '_cache_instance', cache)
+        cache.set('standings', {'x': 1}, 600, league_id=203, season=2025)
+        cache.set('team_statistics', {'x': 2}, 600, team_id=645, league_id=39, season=2025)
+        cache.set('team_statistics', {'x': 3}, 600, team_id=549, league_id=39, season=2025)
+
+        finished = {**FINISHED, 'fixture': {'id': 123, 'timestamp': 1_700_000_000, 'status': {'short': 'FT'}},
+                    'goals': {'home': 1, 'away': 0}}
+        monkeypatch.setattr(api_utils, 'make_api_request', lambda *args, **kwargs: ([finished], None))
+        archive = fixture_archive.FixtureArchive(os.path.join(tmpdir, 'archive'))
+        assert fixture_archive.ingest_league('k', 'u', 203, 2025, archive=archive, with_details=False) == 1
+
+        assert cache.peek('standings', league_id=203, season=2025) is None
+        assert cache.peek('team_statistics', team_id=645, league_id=39, season=2025) is None
+        assert cache.peek('team_statistics', team_id=549, league_id=39, season=2025) == {'x': 3}
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Factor Executor Test
+====================
+Bağımsız faktörlerin eşzamanlı çalıştığını, timeout/hata durumunda fallback
+döndüğünü ve bağımlılık sırasına uyulduğunu test eder
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from factor_executor import Factor, FactorExecutor
+
+
+def _slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+def _boom():
+    raise RuntimeError("api down")
+
+
+def test_independent_factors_run_concurrently():
+    factors = [Factor(f'f{i}', _slow, args=(i,)) for i in range(5)]
+    start = time.perf_counter()
+    results, timings = asyncio.run(FactorExecutor(verbose=False).run(factors))
+    elapsed = time.perf_counter() - start
+
+    assert results == {f'f{i}': i for i in range(5)}
+    assert elapsed < 0.6  # seri çalışsa ~1.0s
+    assert timings['_total']['serial_ms'] > timings['_total']['elapsed_ms']
+    assert all(timings[f'f{i}']['status'] == 'ok' for i in range(5))
+
+
+def test_timeout_error_and_skipped_use_fallbacks():
+    fallback = {'available': False}
+    factors = [
+        Factor('slow', _slow, args=('late',), kwargs={'delay': 1.0}, timeout=0.1, fallback=fallback),
+        Factor('broken', _boom, fallback=fallback),
+        Factor('h2h', _slow, args=('h2h',), enabled=False),
+    ]
+    results, timings = asyncio.run(FactorExecutor(verbose=False).run(factors))
+
+    assert results == {'slow': fallback, 'broken': fallback, 'h2h': None}
+    assert results['slow'] is not fallback
+    assert [timings[n]['status'] for n in ('slow', 'broken', 'h2h')] == ['timeout', 'error', 'skipped']
+
+
+def test_dependencies_receive_results_and_cycles_are_rejected():
+    factors = [
+        Factor('teams', _slow, args=({'home': 645, 'away': 611},), kwargs={'delay': 0.05}),
+        Factor('h2h_key', lambda teams: f"{teams['home']}-{teams['away']}", depends_on=('teams',)),
+    ]
+    results, _ = asyncio.run(FactorExecutor(verbose=False).run(factors))
+    assert results['h2h_key'] == '645-611'
+
+    cyclic = [Factor('a', _slow, depends_on=('b',)), Factor('b', _slow, depends_on=('a',))]
+    with pytest.raises(ValueError):
+        asyncio.run(FactorExecutor(verbose=False).run(cyclic))
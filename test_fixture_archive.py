@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Fixture Archive Test
+====================
+Bitmiş maç arşivine segment eklemeyi (tekrarsız, append-only), takım / H2H /
+lig penceresi sorgularını ve high-water mark'tan artımlı ingest'i test eder
+"""
+
+import os
+
+import analysis_logic
+import api_utils
+import fixture_archive
+from fixture_archive import FixtureArchive
+
+DAY = 86400
+T0 = 1_700_000_000
+
+
+def _fixture(fixture_id, home_id, away_id, home_goals, away_goals, ts, status='FT', league_id=203):
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': ts, 'status': {'short': status}},
+        'league': {'id': league_id, 'season': 2025, 'round': 'Regular Season - 1'},
+        'teams': {'home': {'id': home_id, 'name': f'T{home_id}'}, 'away': {'id': away_id, 'name': f'T{away_id}'}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': 0, 'away': None}, 'fulltime': {'home': home_goals, 'away': away_goals}},
+    }
+
+
+def test_append_only_segments_and_indexed_queries(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    first = [_fixture(1, 645, 611, 2, 1, T0), _fixture(2, 549, 645, 0, 0, T0 + DAY),
+             _fixture(3, 611, 549, 1, 3, T0 + 2 * DAY, status='NS')]
+    stats = {1: {'statistics': [{'team': {'id': 645}, 'statistics': [{'type': 'Corner Kicks', 'value': 7}]}],
+                 'events': [], 'lineups': []}}
+    assert archive.append(203, 2025, first, stats) == 2  # NS maç arşivlenmez
+    assert archive.append(203, 2025, [_fixture(2, 549, 645, 0, 0, T0 + DAY),
+                                      _fixture(4, 611, 645, 1, 1, T0 + 3 * DAY)]) == 1
+    assert archive.partition_info(203, 2025)['segments'] == 2
+    assert archive.high_water_mark(203, 2025) == T0 + 3 * DAY
+
+    # Yeni süreç aynı arşivi manifest üzerinden okur
+    reader = FixtureArchive(str(tmp_path))
+    assert len(reader) == 3
+    assert [r['fixture_id'] for r in reader.team_history(645)] == [4, 2, 1]
+    assert [r['fixture_id'] for r in reader.team_history(645, limit=1, before=T0 + 2 * DAY)] == [2]
+    assert [r['fixture_id'] for r in reader.head_to_head(611, 645)] == [4, 1]
+    assert [r['fixture_id'] for r in reader.league_window(203, 2025, since=T0 + DAY)] == [4, 2]
+    assert reader.get_details(1)['statistics'][0]['team']['id'] == 645
+    assert reader.get_details(4) is None
+
+    fixture = fixture_archive.row_to_fixture(reader.get_fixture(1), reader.get_details(1))
+    assert fixture['score']['halftime'] == {'home': 0, 'away': None}
+    assert fixture['teams']['home']['winner'] is True and fixture['statistics']
+
+
+def test_ingest_pulls_only_fixtures_after_high_water_mark(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, [_fixture(1, 645, 611, 2, 1, T0)])
+    requests = []
+
+    def fake_request(api_key, base_url, endpoint, params, skip_limit=False):
+        requests.append(params)
+        if 'ids' in params:
+            return [{'fixture': {'id': int(i)}, 'statistics': [], 'events': [{'type': 'Goal'}], 'lineups': []}
+                    for i in params['ids'].split('-')], None
+        return [_fixture(1, 645, 611, 2, 1, T0), _fixture(2, 549, 645, 0, 0, T0 + DAY)], None
+
+    monkeypatch.setattr(api_utils, 'make_api_request', fake_request)
+    assert fixture_archive.ingest_league('k', 'u', 203, 2025, archive=archive) == 1
+
+    assert requests[0]['from'] == '2023-11-14' and requests[0]['status'] == 'FT-AET-PEN'
+    assert requests[1] == {'ids': '2'}  # detaylar sadece yeni maç için
+    assert archive.get_details(2)['events'] == [{'type': 'Goal'}]
+
+
+def test_consumers_read_history_from_archive(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, [_fixture(i, 645 + i % 2, 700 + i, i % 3, 1, T0 + i * DAY) for i in range(40)])
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+
+    def no_api(*args, **kwargs):
+        raise AssertionError("API çağrılmamalı")
+
+    monkeypatch.setattr(api_utils, 'make_api_request', no_api)
+
+    baselines = analysis_logic.get_league_goal_baselines('k', 'u', {'league_id': 203, 'season': 2025}, 1.35)
+    assert baselines['sample_size'] == 40
+    assert baselines['home_avg'] == sum(i % 3 for i in range(40)) / 40
+
+    assert os.path.exists(archive.manifest_path)
+
+
+def test_team_history_needs_archive_as_recent_as_api(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path))
+    corners = {38: {'statistics': [{'team': {'id': 645}, 'statistics': [{'type': 'Corner Kicks', 'value': 9}]}]}}
+    league = [_fixture(i, 645 + i % 2, 700 + i, i % 3, 1, T0 + i * DAY) for i in range(40)]
+    archive.append(203, 2025, league, corners)
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+    api_matches = [_fixture(i, 645, 700 + i, 1, 1, T0 + i * DAY) for i in (38, 36, 34, 32, 30)]
+    monkeypatch.setattr(api_utils, 'make_api_request', lambda *a, **k: (api_matches, None))
+
+    # Arşiv takımın son maçına kadar güncel: korner verisi arşivden gelir
+    recent = api_utils.get_team_last_matches_stats('k', 'u', 645, limit=5)
+    assert len(recent) == 5 and recent[0]['goals_for'] == 38 % 3 and recent[0]['corners_for'] == 9
+
+    # Arşivde olmayan kupa maçı daha yeni: API listesi kullanılır
+    api_matches.insert(0, _fixture(99, 645, 900, 4, 0, T0 + 39 * DAY, league_id=206))
+    assert api_utils.get_team_last_matches_stats('k', 'u', 645, limit=5)[0]['goals_for'] == 4
+
+
+def test_freshness_is_tracked_per_partition(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, [_fixture(1, 645, 611, 2, 1, T0)])
+    archive.append(204, 2025, [_fixture(2, 549, 612, 0, 0, T0, league_id=204)])
+    manifest = archive.manifest()
+    manifest['partitions']['203:2025']['ingested_at'] -= 3 * DAY
+    archive._write_manifest(manifest)
+
+    # Bir ligin yeni ingest'i diğer ligi güncel yapmaz
+    assert archive.is_fresh(204, 2025) and not archive.is_fresh(203, 2025)
+    assert not archive.is_fresh() and not archive.is_fresh(205, 2025)
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+    assert analysis_logic._archived_team_form(645, {'league_id': 203, 'season': 2025}) is None
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Form Engine Test
+================
+Lig form tablosunun arşivden tek geçişte, maç listesi tabanlı hesaplamalarla
+(AdvancedFormCalculator, calculate_momentum_factor, calculate_weighted_stats)
+aynı sonucu verdiğini, arşiv güncellenince yeniden kurulduğunu ve geçmiş bir
+ana kadar (until) kurulan tablonun sadece o anki arşivle aynı olduğunu test eder
+"""
+
+import os
+import random
+import tempfile
+
+import analysis_logic
+from advanced_form_calculator import AdvancedFormCalculator
+from fixture_archive import FixtureArchive
+from form_engine import FormEngine
+
+T0 = 1_700_000_000
+TEAMS = [645, 611, 549, 607, 1001, 3563]
+
+
+def _fixture(fixture_id, home_id, away_id, home_goals, away_goals, league_id=203):
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': T0 + fixture_id * 86400, 'status': {'short': 'FT'}},
+        'league': {'id': league_id, 'season': 2025},
+        'teams': {'home': {'id': home_id, 'name': f'T{home_id}'}, 'away': {'id': away_id, 'name': f'T{away_id}'}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': None, 'away': None}},
+    }
+
+
+def _archive(root, n_matches=40, seed=7):
+    rng = random.Random(seed)
+    fixtures = []
+    for fixture_id in range(1, n_matches + 1):
+        home, away = rng.sample(TEAMS, 2)
+        fixtures.append(_fixture(fixture_id, home, away, rng.randint(0, 4), rng.randint(0, 3)))
+    archive = FixtureArchive(root)
+    archive.append(203, 2025, fixtures)
+    # Kupa maçı: lig dışı rakip (lig ortalaması güç alır)
+    archive.append(206, 2025, [_fixture(n_matches + 1, 645, 9999, 5, 0, league_id=206)])
+    return archive
+
+
+def _strengths(archive):
+    """Lig tablosu PPG / 3 (OpponentStrengthService ölçeği)"""
+    points, played = {}, {}
+    for row in archive.league_window(203, 2025):
+        for team, gf, ga in ((row['home_id'], row['home_goals'], row['away_goals']),
+                             (row['away_id'], row['away_goals'], row['home_goals'])):
+            points[team] = points.get(team, 0) + (3 if gf > ga else 1 if gf == ga else 0)
+            played[team] = played.get(team, 0) + 1
+    table = {team: round(points[team] / played[team] / 3.0, 4) for team in points}
+    return table, round(sum(table.values()) / len(table), 4)
+
+
+def _matches(archive, team_id, limit):
+    matches = []
+    for row in archive.team_history(team_id, limit=limit):
+        is_home = row['home_id'] == team_id
+        matches.append({
+            'location': 'home' if is_home else 'away',
+            'goals_for': row['home_goals'] if is_home else row['away_goals'],
+            'goals_against': row['away_goals'] if is_home else row['home_goals'],
+            'opponent_id': row['away_id'] if is_home else row['home_id'],
+        })
+    return matches
+
+
+def test_league_form_matches_per_team_calculations():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive = _archive(os.path.join(tmpdir, 'archive'))
+        engine = FormEngine(archive, window=6)
+        forms = engine.get_league_form(203, 2025)
+        table, average = _strengths(archive)
+        calculator = AdvancedFormCalculator()
+
+        assert set(forms) == set(TEAMS)
+        for team_id in TEAMS:
+            matches = _matches(archive, team_id, 6)
+            for match in matches:
+                match['opponent_strength'] = table.get(match['opponent_id'], average)
+            form = forms[team_id]
+
+            for name, location in (('all', None), ('home', 'home'), ('away', 'away')):
+                expected = calculator.calculate_advanced_form(matches, location_filter=location, num_matches=10)
+                assert form['form'][name] == expected, (team_id, name)
+            assert form['momentum'] == analysis_logic.calculate_momentum_factor(matches)
+            assert form['form_string'] == analysis_logic.get_form_string(matches, limit=5)
+
+            weighted = analysis_logic.calculate_weighted_stats(matches)
+            for location in ('home', 'away'):
+                for key in ('w_avg_goals_for', 'w_avg_goals_against'):
+                    assert abs(form['weighted'][location][key] - weighted[location][key]) < 1e-12
+
+
+def test_team_lookup_and_rebuild_on_ingest():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive = _archive(os.path.join(tmpdir, 'archive'))
+        engine = FormEngine(archive, window=6)
+        before = engine.get_team_form(645, 203, 2025)
+        assert before['form']['all']['form_string'].startswith('W')  # 5-0 kupa maçı en yeni
+        assert engine.get_team_form(9999, 203, 2025) is None
+        engine.get_league_form(203, 2025)
+        assert engine.stats == {'memory_hits': 2, 'builds': 1}
+
+        # Maç günü bitti: yeni maçlar arşive eklenince tablo yeniden kurulur
+        archive.append(203, 2025, [_fixture(100, 611, 645, 4, 0)])
+        after = engine.get_team_form(645, 203, 2025)
+        assert engine.stats['builds'] == 2
+        assert after['form']['all']['form_string'].startswith('L')
+        assert after['form']['away']['form_string'].startswith('L')
+        assert after['momentum'] <= before['momentum']
+
+
+def test_point_in_time_form_ignores_later_matches():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive = _archive(os.path.join(tmpdir, 'full'))
+        until = T0 + 31 * 86400  # 1-30 numaralı maçlar
+        rng = random.Random(7)
+        early = FixtureArchive(os.path.join(tmpdir, 'early'))
+        early.append(203, 2025, [_fixture(fixture_id, *rng.sample(TEAMS, 2), rng.randint(0, 4), rng.randint(0, 3))
+                                 for fixture_id in range(1, 31)])
+
+        engine = FormEngine(archive, window=6)
+        assert engine.get_league_form(203, 2025, until=until) == FormEngine(early, window=6).get_league_form(203, 2025)
+        assert engine.get_team_form(645, 203, 2025, until=until) == engine.get_team_form(645, 203, 2025, until=until)
+        assert engine.stats == {'memory_hits': 2, 'builds': 1}
+        # Güncel tablo replay tablosundan ayrı tutulur
+        assert engine.get_league_form(203, 2025) != engine.get_league_form(203, 2025, until=until)
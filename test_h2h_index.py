@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+H2H Index Test
+==============
+Sırasız takım çifti indeksinin process_h2h_data ile aynı özeti ürettiğini,
+arşive eklenen yeni maçlarla artımlı güncellendiğini ve analizde API'ye
+gitmeden kullanıldığını test eder
+"""
+
+import analysis_logic
+import api_utils
+import fixture_archive
+from fixture_archive import FixtureArchive
+from h2h_index import H2H_KEEP_MATCHES, H2HIndex
+
+DAY = 86400
+T0 = 1_700_000_000
+
+
+def _fixture(fixture_id, home_id, away_id, home_goals, away_goals, ts):
+    winner_home = home_goals > away_goals if home_goals != away_goals else None
+    winner_away = away_goals > home_goals if home_goals != away_goals else None
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': ts, 'status': {'short': 'FT'}},
+        'league': {'id': 203, 'season': 2025, 'round': 'R'},
+        'teams': {'home': {'id': home_id, 'name': f'T{home_id}', 'winner': winner_home},
+                  'away': {'id': away_id, 'name': f'T{away_id}', 'winner': winner_away}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': None, 'away': None}, 'fulltime': {'home': home_goals, 'away': away_goals}},
+    }
+
+
+MEETINGS = [_fixture(1, 645, 611, 2, 1, T0), _fixture(2, 611, 645, 3, 0, T0 + DAY),
+            _fixture(3, 645, 611, 1, 1, T0 + 2 * DAY), _fixture(4, 645, 549, 4, 0, T0 + 3 * DAY)]
+
+
+def _strip_source(summary):
+    return {k: v for k, v in summary.items() if k not in ('source', 'partial')}
+
+
+def test_index_matches_process_h2h_data_for_both_orientations(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, MEETINGS)
+    index = H2HIndex(archive)
+
+    api_order = MEETINGS[2::-1]  # /headtohead en yeni maç başta döner
+    for team_a, team_b in ((645, 611), (611, 645)):
+        expected = analysis_logic.process_h2h_data(api_order, team_a)
+        assert _strip_source(index.summary(team_a, team_b)) == expected
+        assert _strip_source(index.summary(team_a, team_b, limit=2)) == \
+            analysis_logic.process_h2h_data(api_order[:2], team_a)
+
+    assert [f['fixture']['id'] for f in index.fixtures(611, 645, limit=2)] == [3, 2]
+    assert index.summary(611, 549) is None
+
+
+def test_index_picks_up_new_results_incrementally(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, MEETINGS[:2])
+    index = H2HIndex(archive)
+    assert index.summary(645, 611)['summary'] == {'total_matches': 2, 'wins_a': 1, 'draws': 0, 'wins_b': 1}
+    assert index.refresh() == 0  # arşiv değişmedi
+
+    archive.append(203, 2025, MEETINGS[2:])
+    assert index.refresh() == 2
+    assert index.summary(645, 611)['summary'] == {'total_matches': 3, 'wins_a': 1, 'draws': 1, 'wins_b': 1}
+    assert index.get_stats() == {'pairs': 2, 'indexed_fixtures': 4}
+
+
+def test_analysis_uses_index_without_network(tmp_path, monkeypatch):
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, MEETINGS)
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+    monkeypatch.setattr('h2h_index._index', H2HIndex(archive))
+
+    def no_api(*args, **kwargs):
+        raise AssertionError("API çağrılmamalı")
+
+    monkeypatch.setattr(api_utils, 'make_api_request', no_api)
+    summary = analysis_logic.get_h2h_summary('k', 'u', 611, 645, 3)
+    assert summary['source'] == 'archive' and summary['goals'] == {
+        'goals_a': 5, 'goals_b': 3, 'avg_goals_a': 5 / 3, 'avg_goals_b': 1.0}
+    matches, error = api_utils.get_h2h_matches('k', 'u', 645, 611, 3)
+    assert error is None and len(matches) == 3
+
+
+def test_partial_archive_is_served_with_flag(tmp_path, monkeypatch):
+    # Arşiv sadece güncel sezonu kapsıyor: 10 yerine 3 karşılaşma eksik örnek olarak işaretlenir
+    archive = FixtureArchive(str(tmp_path))
+    archive.append(203, 2025, MEETINGS)
+    monkeypatch.setattr(fixture_archive, '_archive', archive)
+    monkeypatch.setattr('h2h_index._index', H2HIndex(archive))
+    older = [_fixture(100 + i, 645, 611, 2, 0, T0 - (i + 1) * 30 * DAY) for i in range(7)]
+    requests = []
+
+    def fake_request(api_key, base_url, endpoint, params, skip_limit=False):
+        requests.append(endpoint)
+        return MEETINGS[2::-1] + older, None
+
+    monkeypatch.setattr(api_utils, 'make_api_request', fake_request)
+    assert not H2HIndex(archive).covers(645, 611, 10)
+
+    summary = analysis_logic.get_h2h_summary('k', 'u', 645, 611, 10)
+    assert summary['source'] == 'archive' and summary['partial'] is True
+    assert summary['summary'] == {'total_matches': 3, 'wins_a': 1, 'draws': 1, 'wins_b': 1}
+    assert analysis_logic.get_h2h_summary('k', 'u', 645, 611, 3)['partial'] is False
+    assert requests == []
+
+    # API biçimli liste eksik olduğunu belirtemez: /headtohead'e gider
+    matches, error = api_utils.get_h2h_matches('k', 'u', 645, 611, 10)
+    assert error is None and len(matches) == 10
+    assert requests == ['fixtures/headtohead']
+
+
+def test_limit_is_clamped_to_kept_matches(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    meetings = [_fixture(200 + i, 645, 611, 1, 0, T0 + i * DAY) for i in range(H2H_KEEP_MATCHES + 5)]
+    archive.append(203, 2025, meetings)
+    index = H2HIndex(archive)
+
+    summary = index.summary(645, 611, limit=H2H_KEEP_MATCHES + 2)
+    assert summary['summary']['total_matches'] == H2H_KEEP_MATCHES
+    assert len(summary['recent_matches']) == H2H_KEEP_MATCHES and summary['partial'] is False
+    assert index.covers(645, 611, 50)
+    assert len(index.fixtures(645, 611, limit=50)) == H2H_KEEP_MATCHES
+    assert index.summary(645, 611)['summary']['total_matches'] == H2H_KEEP_MATCHES + 5
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Hyperparameter Search Test
+==========================
+Successive halving'in bütçe basamaklarını, process pool ile aynı sonucu
+verdiğini, veri ve fold bölünmesi parmak izine göre fold sonuçlarının
+cache'lendiğini, early stopping'in skorlanan fold'u görmediğini ve önceki en iyi
+konfigürasyonlarla daha az adayla başladığını test eder
+"""
+
+import numpy as np
+
+from hyperparameter_search import HalvingSearch, _early_stopping_split, dataset_fingerprint
+
+SPACE = {'max_depth': [2, 4, 8], 'min_samples_leaf': [1, 3, 5]}
+
+
+def _data(seed=0, n=240):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 6))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1] + rng.normal(0, 0.5, n), [-0.5, 0.5])
+    return X, y
+
+
+def _search(tmp_path, **kwargs):
+    options = dict(param_space=SPACE, n_candidates=9, min_resource=5, max_resource=45,
+                   n_workers=1, cache_path=str(tmp_path / 'tuning.db'))
+    options.update(kwargs)
+    return HalvingSearch('random_forest', **options)
+
+
+def test_halving_schedule_and_pool_parity(tmp_path):
+    X, y = _data()
+    result = _search(tmp_path, cache_path=None).fit(X, y)
+
+    assert [r['budget'] for r in result['rungs']] == [5, 15, 45]
+    assert [r['candidates'] for r in result['rungs']] == [9, 3, 1]
+    assert result['evaluations'] == (9 + 3 + 1) * 3 and result['cache_hits'] == 0
+    assert result['best_params']['n_estimators'] == 45 and result['best_model'].n_estimators == 45
+    assert result['best_score'] > 0.5
+
+    pooled = _search(tmp_path, cache_path=None, n_workers=2).fit(X, y)
+    assert pooled['best_params'] == result['best_params'] and pooled['best_score'] == result['best_score']
+
+
+def test_rerun_on_same_data_is_served_from_cache(tmp_path):
+    X, y = _data()
+    first = _search(tmp_path).fit(X, y)
+    again = _search(tmp_path, warm_start=False).fit(X, y)
+
+    assert again['evaluations'] == 0 and again['cache_hits'] == first['evaluations']
+    assert again['best_params'] == first['best_params']
+    assert dataset_fingerprint(X, y) == first['fingerprint'] != dataset_fingerprint(X[:-1], y[:-1])
+
+    # Farklı fold sayısı / seed başka bir bölünme: aynı fold numarasının skoru kullanılmaz
+    assert _search(tmp_path, warm_start=False, cv_folds=4).fit(X, y)['cache_hits'] == 0
+    assert _search(tmp_path, warm_start=False, random_state=7).fit(X, y)['cache_hits'] == 0
+
+
+def test_early_stopping_set_comes_from_training_fold():
+    _, y = _data()
+    train_idx = np.arange(0, 240, 3)
+    fit_idx, stop_idx = _early_stopping_split(train_idx, y, 42)
+    assert np.array_equal(np.union1d(fit_idx, stop_idx), train_idx)
+    assert len(np.intersect1d(fit_idx, stop_idx)) == 0 and len(stop_idx) == 16
+    assert set(y[stop_idx]) == set(y[train_idx])
+
+
+def test_new_matchday_warm_starts_from_previous_best(tmp_path):
+    X, y = _data()
+    first = _search(tmp_path).fit(X, y)
+
+    X_new, y_new = _data(seed=1, n=30)
+    updated = _search(tmp_path).fit(np.vstack([X, X_new]), np.concatenate([y, y_new]))
+
+    assert updated['cache_hits'] == 0
+    assert updated['rungs'][0]['candidates'] < first['rungs'][0]['candidates']
+    assert updated['evaluations'] < first['evaluations']
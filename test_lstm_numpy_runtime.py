@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+LSTM NumPy Runtime Test
+=======================
+.npz ağırlıklardan saf NumPy forward pass'i (Keras LSTM kapı sırası ve
+Bidirectional birleştirme), süreç başına model cache'ini ve iki takımın tek
+batch'te skorlandığını test eder
+"""
+
+import numpy as np
+
+import lstm_predictor
+from lstm_predictor import LSTMMatchPredictor, NumpyLSTMRuntime, get_lstm_model, predict_match_with_lstm
+
+
+def _write_weights(path, seq_len=10, n_features=12, lstm_units=(8, 4), dense_units=(6, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    arrays = {'sequence_length': np.array(seq_len), 'n_lstm': np.array(len(lstm_units)),
+              'n_dense': np.array(len(dense_units))}
+    inputs = n_features
+    for i, units in enumerate(lstm_units):
+        for direction in ('fw', 'bw'):
+            arrays[f'lstm{i}_{direction}_kernel'] = rng.normal(0, 0.3, (inputs, 4 * units))
+            arrays[f'lstm{i}_{direction}_recurrent_kernel'] = rng.normal(0, 0.3, (units, 4 * units))
+            arrays[f'lstm{i}_{direction}_bias'] = rng.normal(0, 0.1, 4 * units)
+        inputs = 2 * units
+    for i, units in enumerate(dense_units):
+        arrays[f'dense{i}_kernel'] = rng.normal(0, 0.3, (inputs, units))
+        arrays[f'dense{i}_bias'] = rng.normal(0, 0.1, units)
+        inputs = units
+    np.savez(path, **arrays)
+    return arrays
+
+
+def _reference_lstm_step(x, h, c, kernel, recurrent_kernel, bias):
+    # Keras LSTMCell: z = x W + h U + b, kapılar [i, f, c, o]
+    i, f, g, o = np.split(x @ kernel + h @ recurrent_kernel + bias, 4)
+    sig = lambda v: 1 / (1 + np.exp(-v))
+    c = sig(f) * c + sig(i) * np.tanh(g)
+    return sig(o) * np.tanh(c), c
+
+
+def _matches(results):
+    return [{'goals_scored': 2 if r == 'W' else 0, 'goals_conceded': 0 if r == 'W' else 1, 'result': r,
+             'is_home': i % 2 == 0} for i, r in enumerate(results)]
+
+
+def test_runtime_matches_reference_forward_pass(tmp_path):
+    path = str(tmp_path / 'lstm.npz')
+    w = _write_weights(path, lstm_units=(3,), dense_units=(3,))
+    runtime = NumpyLSTMRuntime.from_npz(path)
+    X = np.random.default_rng(1).random((4, 10, 12)).astype(np.float32)
+
+    probs = runtime.predict_proba(X)
+    assert probs.shape == (4, 3) and np.allclose(probs.sum(axis=1), 1.0)
+
+    # Tek sequence için adım adım referans: ileri + ters sırada geri yön
+    outputs = []
+    for direction, steps in (('fw', X[0]), ('bw', X[0][::-1])):
+        h = c = np.zeros(3)
+        for x in steps:
+            h, c = _reference_lstm_step(x, h, c, w[f'lstm0_{direction}_kernel'],
+                                        w[f'lstm0_{direction}_recurrent_kernel'], w[f'lstm0_{direction}_bias'])
+        outputs.append(h)
+    logits = np.concatenate(outputs) @ w['dense0_kernel'] + w['dense0_bias']
+    expected = np.exp(logits) / np.exp(logits).sum()
+    assert np.allclose(probs[0], expected, atol=1e-5)
+
+    # Batch sonucu tek tek skorlamayla aynı
+    assert np.allclose(np.vstack([runtime.predict_proba(X[i:i + 1]) for i in range(4)]), probs, atol=1e-6)
+
+
+def test_cached_model_scores_both_teams_in_one_batch(tmp_path, monkeypatch):
+    path = str(tmp_path / 'lstm.npz')
+    _write_weights(path)
+    monkeypatch.setattr(lstm_predictor, '_models', {})
+    model = get_lstm_model(path)
+    assert model is get_lstm_model(path) and model.runtime is not None
+
+    batches = []
+    original = model.runtime.predict_proba
+
+    def counting(X):
+        batches.append(X.shape[0])
+        return original(X)
+
+    monkeypatch.setattr(model.runtime, 'predict_proba', counting)
+    home, away = _matches('WWDLWWWDWLWW'), _matches('LLDWLDLLWDLL')
+    result = predict_match_with_lstm(home, away, model)
+
+    assert batches == [2]
+    assert result['method'] == 'LSTM (LSTM)'
+    assert abs(result['home_win_probability'] + result['draw_probability'] + result['away_win_probability'] - 1) < 1e-9
+    assert model.predict(home) == result['home_team_form']
+
+    # Yetersiz geçmişi olan takım istatistiksel tahmine düşer, diğeri yine skorlanır
+    short, full = model.predict_batch([home[:4], away])
+    assert short['prediction_method'] == 'statistical' and full['prediction_method'] == 'LSTM'
+    assert batches[-1] == 1
+
+
+def test_missing_weights_fall_back_to_statistical(tmp_path, monkeypatch):
+    monkeypatch.setattr(lstm_predictor, '_models', {})
+    model = get_lstm_model(str(tmp_path / 'missing.npz'))
+    assert model.runtime is None and not model.is_trained
+    assert model.predict(_matches('WWDLWWWDWLWW'))['prediction_method'] == 'statistical'
+    assert LSTMMatchPredictor(model_path=str(tmp_path / 'missing.npz')).is_trained is False
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Market Scanner Test
+===================
+Vektörel tarayıcının ValueBetDetector/ArbitrageDetector ile aynı sonuçları
+ürettiğini ve oran güncellemelerini doğru uyguladığını test eder
+"""
+
+import numpy as np
+
+from market_scanner import MarketTensor, MarketScanner, SCAN_OUTCOMES
+from odds_normalizer import OddsIndex
+from value_bet_detector import BettingOdds, ValueBetDetector, ArbitrageDetector
+
+
+def _index(books):
+    return OddsIndex([
+        {'name': name, 'bets': [{'name': 'Match Winner', 'values': [
+            {'value': 'Home', 'odd': h}, {'value': 'Draw', 'odd': d}, {'value': 'Away', 'odd': a}]}]}
+        for name, (h, d, a) in books.items()
+    ])
+
+
+def _fixtures():
+    return [
+        {'fixture_id': 1, 'label': 'A - B', 'probs': {'win_a': 55, 'draw': 25, 'win_b': 20},
+         'odds_index': _index({'X': (2.10, 3.50, 3.80), 'Y': (2.00, 3.60, 3.90)})},
+        {'fixture_id': 2, 'label': 'C - D', 'probs': {'win_a': 30, 'draw': 30, 'win_b': 40},
+         'odds_index': _index({'X': (2.60, 3.10, 2.80)})},
+    ]
+
+
+def test_value_bets_match_single_detector():
+    tensor = MarketTensor.from_fixtures(_fixtures())
+    assert tensor.odds.shape == (2, len(SCAN_OUTCOMES), 2)
+
+    result = MarketScanner(min_value=0.05, min_ev=5.0).scan(tensor)
+    scanned = {(vb['fixture_id'], vb['outcome']): vb for vb in result['value_bets']}
+
+    detector = ValueBetDetector(min_value=0.05, min_ev=5.0)
+    reference = detector.find_value_bets(
+        BettingOdds(home_win=2.10, draw=3.50, away_win=3.90),
+        {'home_win': 0.55, 'draw': 0.25, 'away_win': 0.20}
+    )
+    for ref in reference:
+        vb = scanned[(1, ref['outcome'])]
+        assert abs(vb['expected_value'] - ref['expected_value']) < 1e-9
+        assert abs(vb['kelly_stake'] - ref['kelly_stake']) < 1e-9
+
+    evs = [vb['expected_value'] for vb in result['value_bets']]
+    assert evs == sorted(evs, reverse=True)
+
+
+def test_arbitrage_margin_matches_detector():
+    tensor = MarketTensor.from_fixtures([
+        {'fixture_id': 9, 'probs': {}, 'odds_index': _index({'X': (3.0, 3.8, 2.9), 'Y': (2.7, 4.2, 3.3)})},
+    ])
+    result = MarketScanner().scan(tensor)
+    arb = ArbitrageDetector.detect_arbitrage([
+        BettingOdds(3.0, 3.8, 2.9), BettingOdds(2.7, 4.2, 3.3)
+    ])
+    assert arb is not None
+    assert len(result['arbitrage']) == 1
+    assert abs(result['arbitrage'][0]['profit_percentage'] - arb['profit_percentage']) < 1e-9
+
+
+def test_update_odds_extends_bookmakers():
+    tensor = MarketTensor.from_fixtures(_fixtures())
+    tensor.update_odds(2, _index({'Z': (3.50, 3.10, 2.80)}))
+    assert 'Z' in tensor.bookmakers
+    z = tensor.bookmakers.index('Z')
+    assert tensor.odds[1, 0, z] == 3.50
+    # Eski bookmaker fiyatları temizlenmiş olmalı
+    assert np.all(tensor.odds[1, :, tensor.bookmakers.index('X')] == 0)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
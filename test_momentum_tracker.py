@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Momentum Tracker Streaming Test
+===============================
+Artımlı pencere hesaplarının tam tarama ile aynı sonucu verdiğini ve
+MomentumService'in API olay akışını tekrar işlemeden beslediğini test eder
+"""
+
+import math
+import random
+
+from momentum_tracker import MomentumTracker, MomentumService
+
+
+def _naive_momentum(events, minute, window_size):
+    total = 0
+    for e in events:
+        if minute - window_size <= e['minute'] <= minute:
+            total += e['weight'] * math.exp(-(minute - e['minute']) / (window_size / 2))
+    return round(max(-100, min(100, total)), 2)
+
+
+def test_incremental_momentum_matches_full_scan():
+    rng = random.Random(7)
+    tracker = MomentumTracker(window_size=10)
+    types = list(tracker.event_weights)
+    minute = 0
+    for _ in range(300):
+        minute += rng.choice([0, 0, 1, 2])
+        tracker.add_event(minute, rng.choice(['home', 'away']), rng.choice(types))
+        expected = _naive_momentum(tracker.events, minute, 10)
+        assert abs(tracker.momentum_history[-1]['momentum'] - expected) <= 0.01
+
+
+def test_late_event_uses_its_own_window():
+    tracker = MomentumTracker(window_size=10)
+    tracker.add_event(30, 'home', 'goal')
+    tracker.add_event(50, 'away', 'corner')
+    tracker.add_event(31, 'home', 'corner')  # geç gelen olay
+    assert tracker.momentum_history[-1]['minute'] == 31
+    assert tracker.momentum_history[-1]['momentum'] == _naive_momentum(tracker.events, 31, 10)
+
+
+def test_pressure_and_critical_moments():
+    tracker = MomentumTracker()
+    tracker.add_event(2, 'away', 'corner')
+    tracker.add_event(20, 'home', 'shot_on_target')
+    tracker.add_event(25, 'home', 'goal')
+    tracker.add_event(28, 'away', 'red_card')
+    tracker.add_event(29, 'home', 'corner')
+
+    pressure = tracker.get_pressure_index()
+    assert pressure['home'] == 100.0 and pressure['dominant'] == 'home'
+
+    kinds = [c['type'] for c in tracker.get_critical_moments()]
+    assert 'goal' in kinds and 'red_card' in kinds
+    assert tracker.get_match_report()['event_breakdown']['corner'] == 2
+
+
+def test_service_ingests_api_feed_once():
+    service = MomentumService()
+    feed = [
+        {'time': {'elapsed': 12, 'extra': None}, 'team': {'id': 1}, 'player': {'id': 9, 'name': 'A'},
+         'type': 'Goal', 'detail': 'Normal Goal'},
+        {'time': {'elapsed': 40, 'extra': None}, 'team': {'id': 2}, 'player': {'id': 5, 'name': 'B'},
+         'type': 'Card', 'detail': 'Yellow Card'},
+        {'time': {'elapsed': 45, 'extra': 2}, 'team': {'id': 2}, 'player': {'id': 6, 'name': 'C'},
+         'type': 'subst', 'detail': 'Substitution 1'},
+    ]
+    assert service.ingest_api_events(100, feed, home_team_id=1) == 2
+    assert service.ingest_api_events(100, feed, home_team_id=1) == 0
+
+    feed.append({'time': {'elapsed': 90, 'extra': 3}, 'team': {'id': 1}, 'player': {'id': 4, 'name': 'D'},
+                 'type': 'Goal', 'detail': 'Own Goal'})
+    assert service.ingest_api_events(100, feed, home_team_id=1) == 1
+
+    events = service.tracker(100).events
+    assert events[-1]['minute'] == 93 and events[-1]['team'] == 'away'
+    assert 100 in service and len(service.snapshot()) == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
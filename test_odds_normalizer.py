@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Odds Normalization Engine Test
+==============================
+OddsIndex ayrıştırma, konsensüs/marj hesapları ve legacy tüketicilerin
+index üzerinden aynı sonucu üretmesini test eder (API çağrısı yok)
+"""
+
+from odds_normalizer import OddsIndex, classify_category, classify_market, parse_outcome
+from value_bet_detector import BettingOdds, ArbitrageDetector
+
+SAMPLE_RESPONSE = [{
+    'bookmakers': [
+        {'name': 'Bet365', 'bets': [
+            {'name': 'Match Winner', 'values': [
+                {'value': 'Home', 'odd': '2.10'}, {'value': 'Draw', 'odd': '3.40'}, {'value': 'Away', 'odd': '3.60'}]},
+            {'name': 'Goals Over/Under', 'values': [
+                {'value': 'Over 2.5', 'odd': '1.90'}, {'value': 'Under 2.5', 'odd': '1.95'},
+                {'value': 'Over 1.5', 'odd': '1.30'}]},
+            {'name': 'Goals Over/Under First Half', 'values': [
+                {'value': 'Over 2.5', 'odd': '4.50'}]},
+            {'name': 'Both Teams Score', 'values': [
+                {'value': 'Yes', 'odd': '1.80'}, {'value': 'No', 'odd': '2.00'}]},
+            {'name': 'Asian Handicap', 'values': [
+                {'value': 'Home -0.5', 'odd': '2.05'}, {'value': 'Away +0.5', 'odd': '1.80'}]},
+        ]},
+        {'name': '1xBet', 'bets': [
+            {'name': 'Match Winner', 'values': [
+                {'value': 'Home', 'odd': '2.30'}, {'value': 'Draw', 'odd': '3.30'}, {'value': 'Away', 'odd': '3.50'}]},
+            {'name': 'Goals Over/Under', 'values': [
+                {'value': 'Over 2.5', 'odd': '2.00'}, {'value': 'Under 2.5', 'odd': '1.85'}]},
+        ]},
+        {'name': 'Pinnacle', 'bets': [
+            {'name': 'Match Winner', 'values': [
+                {'value': 'Home', 'odd': '2.20'}, {'value': 'Draw', 'odd': 'N/A'}]},
+        ]},
+    ]
+}]
+
+
+def test_classification_and_outcome_parsing():
+    assert classify_category('Goals Over/Under First Half') == 'over_under'
+    assert classify_market('Goals Over/Under First Half') == 'over_under_1h'
+    assert classify_market('Match Winner') == 'match_winner'
+    assert parse_outcome('Over 2.5') == ('over', 2.5)
+    assert parse_outcome('Home -1.5') == ('home', -1.5)
+    assert parse_outcome('Draw') == ('draw', None)
+    assert parse_outcome('Over', 'Corners 9.5') == ('over', 9.5)
+    # Avrupa handikapı 'a:b' başlangıç skoru: çizgi ev sahibi farkı
+    assert parse_outcome('Home -0:1') == ('home', -1.0)
+    assert parse_outcome('Draw +2:0') == ('draw', 2.0)
+    index = OddsIndex.from_response([{'bookmakers': [{'name': 'X', 'bets': [{'name': 'European Handicap', 'values': [
+        {'value': 'Home -0:1', 'odd': '3.60'}, {'value': 'Draw -0:1', 'odd': '3.50'}]}]}]}])
+    assert list(index.prices('handicap', 'home', -1.0)) == [3.60]
+    assert list(index.prices('handicap', 'draw', -1.0)) == [3.50]
+
+
+def test_corner_card_and_first_half_markets_stay_separate():
+    response = [{'bookmakers': [{'name': 'Bet365', 'bets': [
+        {'name': 'Goals Over/Under', 'values': [{'value': 'Over 2.5', 'odd': '1.90'}]},
+        {'name': 'Cards Over/Under', 'values': [{'value': 'Over 2.5', 'odd': '1.20'}]},
+        {'name': 'Corners Over Under', 'values': [{'value': 'Over 9.5', 'odd': '1.85'}]},
+        {'name': 'First Half Winner', 'values': [{'value': 'Home', 'odd': '2.90'}]},
+        {'name': 'Draw No Bet (1st Half)', 'values': [{'value': 'Home', 'odd': '1.70'}]},
+        {'name': 'Double Chance - First Half', 'values': [{'value': 'Home/Draw', 'odd': '1.15'}]},
+    ]}]}]
+    assert classify_category('Cards Over/Under') == 'cards'
+    assert classify_category('Corners Over Under') == 'corners'
+    assert classify_market('Match Winner 1st Half') == 'first_half'
+    assert classify_market('Draw No Bet (1st Half)') == 'first_half_draw_no_bet'
+
+    index = OddsIndex.from_response(response)
+    assert list(index.prices('over_under', 'over', 2.5)) == [1.90]
+    assert list(index.prices('cards', 'over', 2.5)) == [1.20]
+    assert index.consensus('first_half', 'home')['odd'] == 2.90
+    assert index.consensus('first_half_draw_no_bet', 'home')['odd'] == 1.70
+
+
+def test_best_consensus_and_margins():
+    index = OddsIndex.from_response(SAMPLE_RESPONSE)
+
+    best_home = index.best('match_winner', 'home')
+    assert best_home['odd'] == 2.30 and best_home['bookmaker'] == '1xBet'
+
+    consensus = index.consensus('match_winner', 'home')
+    assert abs(consensus['odd'] - (2.10 + 2.30 + 2.20) / 3) < 1e-9
+    assert consensus['bookmaker_count'] == 3
+
+    # İlk yarı çizgisi tam maç 2.5 çizgisine karışmamalı
+    assert list(index.prices('over_under', 'over', 2.5)) == [1.90, 2.00]
+    assert index.lines('over_under') == [1.5, 2.5]
+
+    # Pinnacle eksik fiyatladığı için marj hesabına girmez
+    margins = index.margins('match_winner', ('home', 'draw', 'away'))
+    assert set(margins) == {'Bet365', '1xBet'}
+    expected = (1 / 2.10 + 1 / 3.40 + 1 / 3.60 - 1) * 100
+    assert abs(margins['Bet365'] - expected) < 1e-9
+
+    fair = index.fair_probabilities('match_winner', ('home', 'draw', 'away'))
+    assert abs(sum(fair.values()) - 1.0) < 1e-9
+
+
+def test_legacy_categorized_roundtrip():
+    index = OddsIndex.from_response(SAMPLE_RESPONSE)
+    categorized = index.categorized()
+    assert len(categorized['match_winner']) == 3
+    assert len(categorized['over_under']) == 3
+    assert categorized['btts'][0]['bookmaker'] == 'Bet365'
+
+    rebuilt = OddsIndex.from_categorized(categorized)
+    assert rebuilt.best('match_winner', 'home') == index.best('match_winner', 'home')
+
+
+def test_best_by_bet_merges_over_under():
+    index = OddsIndex.from_response(SAMPLE_RESPONSE)
+    view = index.best_by_bet(merge_categories={'over_under': 'Over/Under'})
+    assert view['Match Winner']['bookmaker_count'] == 3
+    assert view['Match Winner']['best_odds']['Home']['bookmaker'] == '1xBet'
+    assert view['Over/Under']['best_odds']['Over 2.5']['odd'] == 4.50
+
+
+def test_betting_odds_and_arbitrage_from_index():
+    index = OddsIndex.from_response(SAMPLE_RESPONSE)
+    odds = BettingOdds.from_odds_index(index)
+    assert odds.home_win == 2.30 and odds.over_2_5 == 2.00
+
+    single = BettingOdds.from_odds_index(index, bookmaker='Bet365')
+    assert single.home_win == 2.10 and single.under_2_5 == 1.95
+
+    # 1/2.00 + 1/1.95 > 1 -> arbitrage yok
+    assert ArbitrageDetector.detect_arbitrage_from_index(index, 'over_under', ('over', 'under'), 2.5) is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Online Ensemble Test
+====================
+Sonuçlanan maçlarla ağırlıkların isabetli modele kaydığını, pencere
+metriklerinin ring buffer'la toplu hesapla aynı olduğunu, Platt
+kalibrasyonunun ilk sonuç öncesi eski sıcaklık ölçeklemesini verdiğini,
+durumun kaydedilip yüklendiğini, tahmin defterindeki model tahminlerinin
+maç başına bir kez işlendiğini ve sunucu sürecinin başka sürecin kaydettiği
+durumu okuyup işlenen maçları birleştirdiğini test eder
+"""
+
+import os
+import time
+
+import numpy as np
+
+from ensemble_manager import EnsembleManager, OnlineEnsemble, OnlineModelStats
+from fixture_archive import FixtureArchive
+from prediction_ledger import PredictionLedger
+
+PRIOR = {'sharp': 0.5, 'noisy': 0.5}
+
+
+def _stream(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        truth = rng.dirichlet([4, 3, 5])
+        outcome = int(rng.choice(3, p=truth))
+        yield {'sharp': truth, 'noisy': rng.dirichlet([1, 1, 1])}, outcome
+
+
+def test_weights_move_to_the_better_calibrated_model():
+    online = OnlineEnsemble(prior_weights=PRIOR, prior_strength=20)
+    assert online.get_weights() == PRIOR
+
+    for probabilities, outcome in _stream():
+        weights = online.update(probabilities, outcome)
+
+    assert weights['sharp'] > 0.6 and abs(sum(weights.values()) - 1) < 1e-9
+    stats = online.get_stats()
+    assert stats['models']['sharp']['ew_log_loss'] < stats['models']['noisy']['ew_log_loss']
+    # Rastgele modelin olasılıkları kalibrasyonla düzleşir
+    assert stats['models']['noisy']['calibration']['a'] < 0.5 < stats['models']['sharp']['calibration']['a']
+    assert stats['models']['sharp']['count'] == 200 and stats['ensemble']['count'] == 200
+
+
+def test_window_metrics_match_batch_recomputation():
+    stats = OnlineModelStats(window=25)
+    losses = []
+    for probabilities, outcome in _stream(n=60, seed=1):
+        p = stats.calibrator.transform(probabilities['noisy'])
+        losses.append(-np.log(p[outcome]))
+        stats.update(probabilities['noisy'], outcome)
+
+    summary = stats.summary()
+    assert summary['window_size'] == 25
+    assert np.isclose(summary['window_log_loss'], np.mean(losses[-25:]))
+
+    restored = OnlineModelStats(window=25)
+    restored.load_dict(stats.to_dict())
+    for key, value in restored.summary().items():
+        if isinstance(value, float):
+            assert np.isclose(value, summary[key])
+
+
+def test_manager_calibration_and_persistence(tmp_path):
+    path = str(tmp_path / 'online.json')
+    manager = EnsembleManager(weights=dict(PRIOR), online=OnlineEnsemble(prior_weights=PRIOR, state_path=path))
+    proba = np.array([[0.2, 0.3, 0.5]])
+
+    # İlk sonuçtan önce eski sabit sıcaklık (1.5) ölçeklemesi
+    expected = proba ** (1 / 1.5)
+    assert np.allclose(manager.calibrate_probabilities(proba, None), expected / expected.sum())
+
+    for probabilities, outcome in _stream(n=80, seed=2):
+        manager.record_result(probabilities, outcome)
+    assert manager.weights == manager.online.get_weights() and manager.weights != PRIOR
+    assert not np.allclose(manager.calibrate_probabilities(proba, None), expected / expected.sum())
+
+    manager.online.save()
+    reloaded = OnlineEnsemble(prior_weights=PRIOR, state_path=path)
+    assert reloaded.get_stats()['models']['sharp']['count'] == 80
+    assert np.allclose(list(reloaded.get_weights().values()), list(manager.weights.values()))
+    assert np.allclose(reloaded.combine({'sharp': proba[0], 'noisy': proba[0]}),
+                       manager.online.combine({'sharp': proba[0], 'noisy': proba[0]}))
+    assert len(manager.performance_history['sharp']) == 0
+
+
+def test_settles_once_per_fixture_from_ledger_predictions(tmp_path):
+    t0 = 1_700_000_000
+    archive = FixtureArchive(str(tmp_path / 'archive'))
+    archive.append(203, 2025, [{
+        'fixture': {'id': fixture_id, 'timestamp': t0 + fixture_id * 3600, 'status': {'short': 'FT'}},
+        'league': {'id': 203, 'season': 2025},
+        'teams': {'home': {'id': 1, 'name': 'A'}, 'away': {'id': 2, 'name': 'B'}},
+        'goals': {'home': 2, 'away': 0},
+        'score': {'halftime': {'home': None, 'away': None}},
+    } for fixture_id in (1, 2)])
+    ledger = PredictionLedger(str(tmp_path / 'ledger'), archive=archive)
+    path = str(tmp_path / 'online.json')
+    online = OnlineEnsemble(prior_weights=PRIOR, state_path=path)
+
+    # Maç 3 henüz oynanmadı; maç 2'nin tahmini başlama saatinden sonra verildi
+    now = time.time()
+    for fixture_id, kickoff in ((1, now + 3600), (3, now + 3600), (2, now - 60)):
+        online.log_predictions({'sharp': [0.1, 0.2, 0.7], 'noisy': [0.6, 0.2, 0.2], 'other': [0.3, 0.3, 0.4]},
+                               fixture_id, 'A', 'B', kickoff=kickoff, ledger=ledger, league_id=203)
+    assert len(ledger) == 6
+
+    now += 7200
+    assert online.settle_from_ledger(ledger, now=now) == 1
+    assert online.settle_from_ledger(ledger, now=now) == 0
+    stats = online.get_stats()['models']
+    assert stats['sharp']['count'] == 1 and stats['sharp']['ew_log_loss'] < stats['noisy']['ew_log_loss']
+    assert online.get_weights()['sharp'] > PRIOR['sharp']
+
+    # Kaydedilen durum işlenen maçları hatırlar
+    assert os.path.exists(path)
+    reloaded = OnlineEnsemble(prior_weights=PRIOR, state_path=path)
+    assert reloaded.settle_from_ledger(ledger, now=now) == 0
+    ledger.settle(3, 0, 1)
+    assert reloaded.settle_from_ledger(ledger, now=now) == 1
+    assert reloaded.get_stats()['models']['sharp']['count'] == 2
+
+
+def test_serving_instance_follows_settler_and_keeps_its_fixtures(tmp_path):
+    path = str(tmp_path / 'online.json')
+    serving = OnlineEnsemble(prior_weights=PRIOR, state_path=path)
+    settler = OnlineEnsemble(prior_weights=PRIOR, state_path=path)
+    for probabilities, outcome in _stream(n=40, seed=3):
+        settler.update(probabilities, outcome)
+    settler.settled[1] = int(time.time())
+    settler.save()
+
+    # Başlangıç ağırlıklarında kalmaz: dosya değişince yeniden okunur
+    assert serving.get_weights() == settler.get_weights() != PRIOR
+    assert serving.get_stats()['models']['sharp']['count'] == 40
+
+    # Başka sürecin işlediği maçlar kayıtta birleşir
+    settler.settled[2] = int(time.time())
+    settler.save()
+    serving.settled[3] = int(time.time())
+    serving.save()
+    assert set(OnlineEnsemble(prior_weights=PRIOR, state_path=path).settled) == {1, 2, 3}
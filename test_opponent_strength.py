@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Opponent Strength Service Test
+==============================
+Puan durumundan güç tablosu üretimini, lig başına tek standings isteğini
+(bellek + cache) ve form hesaplamasına rakip gücü aktarımını test eder
+"""
+
+import os
+import tempfile
+
+from advanced_form_calculator import AdvancedFormCalculator
+from cache_manager import CacheManager
+from opponent_strength import OpponentStrengthService, build_strength_table
+
+
+def _row(rank, team_id, points, played, goal_diff):
+    return {'rank': rank, 'team': {'id': team_id, 'name': f'T{team_id}'}, 'points': points,
+            'goalsDiff': goal_diff, 'all': {'played': played}}
+
+
+STANDINGS = [[_row(1, 645, 27, 10, 15), _row(2, 611, 24, 10, 12), _row(3, 549, 15, 10, 0),
+              _row(18, 3573, 3, 10, -18)]]
+
+
+class CountingService(OpponentStrengthService):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = 0
+
+    def _fetch_standings(self, api_key, base_url, league_id, season):
+        self.fetches += 1
+        return STANDINGS, None
+
+
+def test_build_strength_table_from_grouped_standings():
+    table = build_strength_table(STANDINGS)
+    assert table[645] == {'rank': 1, 'played': 10, 'ppg': 2.7, 'goal_diff': 15,
+                          'gd_per_game': 1.5, 'strength': 0.9}
+    assert table[3573]['strength'] == 0.1
+    # Tek seviyeli satır listesi de kabul edilir
+    assert build_strength_table(STANDINGS[0]) == table
+
+
+def test_one_standings_request_per_league_and_matchday():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheManager(db_path=os.path.join(tmpdir, 'cache.db'))
+        service = CountingService(cache=cache)
+
+        strengths = service.get_strengths('k', 'u', [611, 3573, 999], 203, 2025, matchday='md10')
+        service.get_strengths('k', 'u', [645, 549], 203, 2025, matchday='md10')
+        assert service.fetches == 1
+        assert strengths[:2] == [0.8, 0.1]
+        assert strengths[2] == round((0.9 + 0.8 + 0.5 + 0.1) / 4, 4)  # ligde yok → lig ortalaması
+
+        # Yeni süreç: tablo cache'ten gelir
+        fresh = CountingService(cache=cache)
+        assert fresh.get_team_strength('k', 'u', 645, 203, 2025, matchday='md10')['rank'] == 1
+        assert fresh.fetches == 0 and fresh.stats['cache_hits'] == 1
+
+        # Yeni hafta: tek yeni istek
+        service.get_strengths('k', 'u', [611], 203, 2025, matchday='md11')
+        assert service.fetches == 2
+
+
+def test_annotated_matches_feed_opponent_adjusted_form():
+    service = CountingService(use_cache=False)
+    matches = [{'goals_for': 1, 'goals_against': 0, 'location': 'home', 'opponent_id': 611},
+               {'goals_for': 1, 'goals_against': 0, 'location': 'home', 'opponent_id': 3573}]
+    service.annotate_matches('k', 'u', matches, 203, 2025, matchday='md10')
+    assert [m['opponent_strength'] for m in matches] == [0.8, 0.1]
+
+    calc = AdvancedFormCalculator()
+    adjusted = calc.calculate_advanced_form(matches)['breakdown']['opponent_adjusted_score']
+    plain = calc.calculate_advanced_form([{k: v for k, v in m.items() if k != 'opponent_strength'}
+                                          for m in matches])['breakdown']['opponent_adjusted_score']
+    assert adjusted != plain
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel Trainer Test
+=====================
+Bağımsız modellerin process pool'da paylaşılan bellekteki matrislerle
+eğitildiğini, sıralı eğitimle aynı sonucu verdiğini, model başına süre /
+bellek raporladığını ve paylaşılan bellek segmentlerinin temizlendiğini test eder
+"""
+
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+import parallel_trainer
+from parallel_trainer import TrainingOrchestrator, format_profile
+
+
+def _data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 8))
+    y = np.digitize(X[:, 0] - X[:, 2] + rng.normal(0, 0.6, n), [-0.4, 0.4])
+    return X[:240], y[:240], X[240:], y[240:]
+
+
+def _models():
+    return {
+        'random_forest': RandomForestClassifier(n_estimators=30, max_depth=5, random_state=0, n_jobs=-1),
+        'logistic': LogisticRegression(max_iter=300, random_state=0),
+        'poisson': LogisticRegression(max_iter=300, C=0.5, random_state=0),
+    }
+
+
+def test_parallel_fit_matches_sequential(monkeypatch):
+    X_train, y_train, X_val, y_val = _data()
+    created = []
+    original = parallel_trainer._to_shared
+
+    def tracking(array):
+        shm, handle = original(array)
+        created.append(shm.name)
+        return shm, handle
+
+    monkeypatch.setattr(parallel_trainer, '_to_shared', tracking)
+    parallel = TrainingOrchestrator(n_workers=3).fit_all(_models(), X_train, y_train, X_val, y_val)
+    sequential = TrainingOrchestrator(n_workers=1).fit_all(_models(), X_train, y_train, X_val, y_val)
+
+    assert list(parallel) == ['random_forest', 'logistic', 'poisson']
+    for name, result in parallel.items():
+        assert result.train_acc == sequential[name].train_acc
+        assert result.val_acc == sequential[name].val_acc
+        assert np.allclose(result.val_proba, sequential[name].val_proba)
+        assert np.allclose(result.model.predict_proba(X_val), result.val_proba)
+        assert result.wall_time > 0
+
+    # Eğitim sonrası modeller kendi thread ayarlarına döner
+    assert parallel['random_forest'].model.n_jobs == -1 and parallel['logistic'].model.n_jobs is None
+    # Matrisler tek sefer paylaşılan belleğe kondu ve temizlendi
+    assert len(created) == 4
+    assert not any(os.path.exists(f'/dev/shm/{name.lstrip("/")}') for name in created)
+
+
+def test_profile_reports_time_and_memory_without_validation():
+    X_train, y_train, _, _ = _data()
+    results = TrainingOrchestrator(n_workers=2).fit_all(_models(), X_train, y_train)
+
+    assert all(r.val_acc is None and r.val_proba is None for r in results.values())
+    if parallel_trainer.RESOURCE_AVAILABLE:
+        assert all(r.peak_memory_mb > 0 for r in results.values())
+    profile = format_profile(results)
+    assert len(profile.splitlines()) == 3 and 'random_forest' in profile and 'peak RSS' in profile
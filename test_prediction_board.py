@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Prediction Board Test
+=====================
+Günlük tahmin panosu snapshot'ının yazılıp okunmasını, en iyi tahmin
+seçimini, panodaki oranlarla market taramasını, sadece kadro/oran değişen
+maçların yenilenmesini ve kurulumda kaydedilen imzayla ilk refresh'in değişmeyen
+maçları yeniden analiz etmediğini (batch önceliğinde) test eder
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import api_utils
+import prediction_board
+from upstream_rate_limiter import PRIORITY_BATCH, current_priority
+
+
+def _row(fixture_id, confidence, league_id=203, kickoff=None, status='NS'):
+    return {
+        'Saat': '20:00', 'Lig': 'Süper Lig', 'Ev Sahibi': f'H{fixture_id}', 'Deplasman': f'A{fixture_id}',
+        'Tahmin': f'H{fixture_id} K.', 'AI Güven Puanı': confidence, '2.5 ÜST (%)': 55.0, 'KG VAR (%)': 50.0,
+        'home_id': fixture_id * 10, 'away_id': fixture_id * 10 + 1, 'fixture_id': fixture_id,
+        'league_id': league_id, 'season': 2025, 'status': status,
+        'kickoff': kickoff or (datetime.now(timezone.utc) + timedelta(minutes=45)).isoformat()
+    }
+
+
+def _board(rows):
+    return {'date': date.today().isoformat(), 'generated_at': 'x', 'updated_at': 'x', 'league_ids': [203, 39],
+            'model_params': prediction_board.DEFAULT_MODEL_PARAMS, 'fixtures': rows, 'stats': {'refreshed': 0}}
+
+
+def test_snapshot_roundtrip_and_top_predictions(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_board, 'BOARD_DIR', str(tmp_path))
+    assert prediction_board.load_board() is None
+
+    prediction_board.save_board(_board([_row(1, 62.0), _row(2, 35.0), _row(3, 80.0, league_id=39)]))
+    board = prediction_board.load_board()
+    assert board is prediction_board.load_board()  # değişmeyen dosya yeniden parse edilmez
+
+    top = prediction_board.get_top_predictions(board, top_n=5)
+    assert [r['fixture_id'] for r in top] == [3, 1]
+    assert [r['fixture_id'] for r in prediction_board.get_top_predictions(board, league_ids=[203])] == [1]
+    assert list(tmp_path.iterdir()) == [tmp_path / f"board_{date.today().isoformat()}.json"]
+
+
+def test_scan_markets_covers_unstarted_board_fixtures():
+    def books(home, draw, away):
+        return [{'name': 'X', 'bets': [{'name': 'Match Winner', 'values': [
+            {'value': 'Home', 'odd': home}, {'value': 'Draw', 'odd': draw}, {'value': 'Away', 'odd': away}]}]}]
+
+    rows = [_row(1, 60.0), _row(2, 50.0), _row(3, 50.0, status='FT'), _row(4, 50.0)]
+    for row, odds in zip(rows, [books(2.4, 3.4, 3.6), books(3.0, 3.5, 2.9), books(2.4, 3.4, 3.6), None]):
+        row['probs'] = {'win_a': 55, 'draw': 25, 'win_b': 20}
+        if odds:
+            row['odds_bookmakers'] = odds
+
+    scan = prediction_board.scan_markets(_board(rows))
+    # Bitmiş ve oranı olmayan maçlar taranmaz; en yüksek EV 2 numaralı maçta
+    assert {vb['fixture_id'] for vb in scan['value_bets']} == {1, 2}
+    best = scan['value_bets'][0]
+    assert (best['fixture_id'], best['outcome'], best['match']) == (2, 'Ev Sahibi Kazanır', 'H2 - A2')
+    assert abs(best['expected_value'] - 65.0) < 1e-9
+    assert prediction_board.scan_markets(None) == {'value_bets': [], 'arbitrage': []}
+
+
+def test_refresh_only_reanalyzes_changed_upcoming_fixtures(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_board, 'BOARD_DIR', str(tmp_path))
+    later = (datetime.now(timezone.utc) + timedelta(hours=6)).isoformat()
+    prediction_board.save_board(_board([_row(1, 50.0), _row(2, 50.0), _row(3, 50.0, kickoff=later),
+                                        _row(4, 50.0, status='1H')]))
+
+    signatures = {1: {'lineups': 'a', 'odds': 'x'}, 2: {'lineups': None, 'odds': None}}
+    checked, analyzed = [], []
+
+    def fake_signature(api_key, base_url, fixture_id):
+        checked.append(fixture_id)
+        return signatures[fixture_id]
+
+    def fake_summarize(api_key, base_url, fixture, model_params, default_avg=1.35):
+        fixture_id = fixture['fixture']['id']
+        analyzed.append(fixture_id)
+        row = _row(fixture_id, 70.0)
+        row['Ev Sahibi'] = fixture['teams']['home']['name']
+        return row, None
+
+    monkeypatch.setattr(prediction_board, 'fetch_fixture_signature', fake_signature)
+    monkeypatch.setattr(prediction_board, 'summarize_fixture', fake_summarize)
+
+    assert prediction_board.refresh_board('k') == 1
+    assert checked == [1, 2] and analyzed == [1]
+
+    # İmza değişmediyse ikinci refresh analiz yapmaz
+    assert prediction_board.refresh_board('k') == 0
+    signatures[1] = {'lineups': 'b', 'odds': 'x'}
+    assert prediction_board.refresh_board('k') == 1
+
+    board = prediction_board.load_board()
+    assert board['fixtures'][0]['AI Güven Puanı'] == 70.0 and board['fixtures'][0]['Ev Sahibi'] == 'H1'
+    assert board['stats']['refreshed'] == 2
+
+
+def test_build_saves_signatures_so_first_refresh_skips_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_board, 'BOARD_DIR', str(tmp_path))
+    later = (datetime.now(timezone.utc) + timedelta(hours=6)).isoformat()
+    books = [{'id': 8, 'name': 'X', 'bets': [{'name': 'Match Winner', 'values': [
+        {'value': 'Home', 'odd': '2.10'}, {'value': 'Draw', 'odd': '3.30'}, {'value': 'Away', 'odd': '3.60'}]}]}]
+    rows = {1: _row(1, 60.0), 2: _row(2, 55.0, kickoff=later), 3: _row(3, 50.0, status='FT')}
+    rows[2]['odds_bookmakers'] = books
+    checked, analyzed, priorities = [], [], []
+
+    def fake_signature(api_key, base_url, fixture_id):
+        checked.append(fixture_id)
+        priorities.append(current_priority())
+        return {'lineups': 'a', 'odds': 'x'}
+
+    def fake_summarize(api_key, base_url, fixture, model_params, default_avg=1.35):
+        analyzed.append(fixture['fixture']['id'])
+        return dict(rows[fixture['fixture']['id']]), None
+
+    monkeypatch.setattr(api_utils, 'get_fixtures_by_date', lambda *args, **kwargs: (
+        [{'fixture': {'id': fixture_id}} for fixture_id in rows], None))
+    monkeypatch.setattr(prediction_board, 'fetch_fixture_signature', fake_signature)
+    monkeypatch.setattr(prediction_board, 'summarize_fixture', fake_summarize)
+
+    board = prediction_board.build_board('k', league_ids=[203])
+    # Yaklaşan maçın imzası çekilir; uzaktaki maçınki analiz oranlarından, bitmiş maça imza yok
+    assert checked == [1]
+    signatures = {row['fixture_id']: row.get('signature') for row in board['fixtures']}
+    assert signatures[1] == {'lineups': 'a', 'odds': 'x'}
+    assert signatures[2] == {'lineups': None, 'odds': prediction_board._odds_digest(books)}
+    assert signatures[3] is None
+
+    analyzed.clear()
+    assert prediction_board.refresh_board('k') == 0
+    assert analyzed == [] and checked == [1, 1]
+    # run_tasks gibi CLI dışı çağrılar da batch önceliğinde çalışır
+    assert priorities == [PRIORITY_BATCH, PRIORITY_BATCH] and current_priority() != PRIORITY_BATCH
+
+
+def test_summarize_uses_shared_cache_path_and_system_quota(monkeypatch):
+    import analysis_logic
+
+    calls = {}
+
+    def fake_analysis(*args, **kwargs):
+        calls['inputs'] = kwargs.get('inputs')
+        return {'probs': {'win_a': 50.0, 'draw': 30.0, 'win_b': 20.0, 'ust_2_5': 55.0, 'kg_var': 50.0},
+                'confidence': 60.0}
+
+    def fake_odds(api_key, base_url, fixture_id, skip_limit=False):
+        calls['skip_limit'] = skip_limit
+        return [{'bookmakers': [{'name': 'X'}]}], None
+
+    monkeypatch.setattr(api_utils, 'get_team_league_info', lambda *a, **k: {'league_id': 203, 'season': 2025})
+    monkeypatch.setattr(api_utils, 'get_fixture_odds', fake_odds)
+    monkeypatch.setattr(analysis_logic, 'run_core_analysis', fake_analysis)
+    monkeypatch.setattr(prediction_board, '_log_prediction', lambda *args: None)
+    fixture = {'fixture': {'id': 7, 'date': '2025-01-01T18:00:00+00:00', 'status': {'short': 'NS'}},
+               'league': {'id': 203, 'season': 2025, 'name': 'Süper Lig'}, 'goals': {},
+               'teams': {'home': {'id': 1, 'name': 'A'}, 'away': {'id': 2, 'name': 'B'}}}
+
+    row, _ = prediction_board.summarize_fixture('k', 'u', fixture, prediction_board.DEFAULT_MODEL_PARAMS)
+    # inputs verilmez (paylaşılan cache yolu), oranlar batch olarak kullanıcı kotası dışında çekilir
+    assert calls == {'inputs': None, 'skip_limit': True}
+    assert row['odds_bookmakers'] == [{'name': 'X'}]
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Prediction Ledger Test
+======================
+Tahminlerin journal + segmentlere eklendiğini, lig / model sürümü / tarih
+filtrelerini, sonuçların arşivden ve settle() ile eşlendiğini, backtest
+metriklerinin (log-loss, Brier, ROI) satır satır hesapla aynı olduğunu, tekrarlanan
+tahminlerin tek satır yazıldığını ve eşzamanlı süreçlerin segmentleri ezmediğini test eder
+"""
+
+import math
+import os
+import tempfile
+
+from fixture_archive import FixtureArchive
+from prediction_ledger import PredictionLedger
+
+T0 = 1_700_000_000
+
+
+def _fixture(fixture_id, home_goals, away_goals):
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': T0 + fixture_id * 3600, 'status': {'short': 'FT'}},
+        'league': {'id': 203, 'season': 2025},
+        'teams': {'home': {'id': 1, 'name': 'A'}, 'away': {'id': 2, 'name': 'B'}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': None, 'away': None}},
+    }
+
+
+def _ledger(tmpdir, flush_rows=4):
+    archive = FixtureArchive(os.path.join(tmpdir, 'archive'))
+    archive.append(203, 2025, [_fixture(1, 2, 0), _fixture(2, 1, 1), _fixture(3, 0, 3)])
+    return PredictionLedger(os.path.join(tmpdir, 'ledger'), flush_rows=flush_rows, archive=archive)
+
+
+def _log(ledger, fixture_id, probabilities, odds=None, model_name='xgb_v1', model_version='v1', league_id=203):
+    return ledger.log_prediction(
+        home_team='A', away_team='B', prediction=max(range(3), key=lambda i: probabilities[i]),
+        confidence=max(probabilities), probabilities=probabilities, model_name=model_name,
+        model_version=model_version, league='Süper Lig', fixture_id=fixture_id, league_id=league_id,
+        kickoff=T0 + fixture_id * 3600 + 10**9, odds=odds, markets={'p_over25': 0.6},
+        features={'elo_diff': 42.0}
+    )
+
+
+def test_backtest_metrics_match_row_by_row_computation():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ledger = _ledger(tmpdir)
+        # [away, draw, home]; sonuçlar: 1 → home, 2 → draw, 3 → away, 4 → elle
+        _log(ledger, 1, [0.2, 0.3, 0.5], odds=[4.0, 3.4, 2.1])
+        _log(ledger, 2, [0.3, 0.4, 0.3], odds=[3.0, 2.8, 2.9])
+        _log(ledger, 3, [0.1, 0.2, 0.7], odds=[5.5, 3.8, 1.6])
+        _log(ledger, 4, [0.6, 0.2, 0.2])
+        _log(ledger, 5, [0.3, 0.3, 0.4])  # sonuçlanmadı
+        _log(ledger, 1, [0.3, 0.3, 0.4], model_name='core_analysis', league_id=39)
+        ledger.settle(4, 0, 1)
+
+        assert ledger.manifest()['segments'] == 1 and len(ledger) == 6
+
+        report = ledger.backtest(model_name='xgb_v1')
+        assert report['predictions'] == 5 and report['settled'] == 4
+        rows = [([0.2, 0.3, 0.5], 2), ([0.3, 0.4, 0.3], 1), ([0.1, 0.2, 0.7], 0), ([0.6, 0.2, 0.2], 0)]
+        log_loss = -sum(math.log(p[y]) for p, y in rows) / 4
+        brier = sum(sum((p[k] - (k == y)) ** 2 for k in range(3)) for p, y in rows) / 4
+        match_result = report['match_result']
+        assert match_result['accuracy'] == 0.75
+        assert abs(match_result['log_loss'] - log_loss) < 1e-4
+        assert abs(match_result['brier'] - brier) < 1e-4
+        assert sum(b['count'] for b in match_result['calibration']['bins']) == 12
+
+        # Model seçimi: 1 → kazandı (2.1), 2 → kazandı (2.8), 3 → kaybetti
+        pick = match_result['roi']['pick']
+        assert pick['bets'] == 3 and abs(pick['profit'] - (1.1 + 1.8 - 1.0)) < 1e-3
+        assert report['over_2_5']['n'] == 4
+
+        assert ledger.backtest(league_id=39)['predictions'] == 1
+        assert ledger.backtest(model_version='v2')['predictions'] == 0
+        since = T0 + 3 * 3600 + 10**9
+        assert ledger.backtest(since=since, model_name='xgb_v1')['predictions'] == 3
+
+
+def test_latest_prediction_before_kickoff_and_recent_queries():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ledger = _ledger(tmpdir, flush_rows=100)
+        _log(ledger, 1, [0.6, 0.2, 0.2])
+        _log(ledger, 1, [0.1, 0.2, 0.7])  # kadro açıklanınca güncellenen tahmin
+        # Maç başladıktan sonra verilen tahmin backtest'e girmez
+        ledger.log_prediction(home_team='A', away_team='B', prediction=2, confidence=0.9,
+                              probabilities=[0.0, 0.1, 0.9], model_name='xgb_v1', model_version='v1',
+                              fixture_id=1, kickoff=T0)
+
+        report = ledger.backtest()
+        assert report['predictions'] == 1 and report['match_result']['accuracy'] == 1.0
+
+        recent = ledger.get_recent_predictions(limit=2, model_name='xgb_v1')
+        assert [r['p_home'] for r in recent] == [0.9, 0.7]
+        assert recent[0]['result'] == {'home_goals': 2, 'away_goals': 0, 'outcome': 2, 'correct': True}
+
+        stats = ledger.get_all_models_statistics()
+        assert stats['xgb_v1']['total_predictions'] == 3 and stats['xgb_v1']['versions'] == ['v1']
+
+        ledger.flush()
+        position = ledger.select(model_name='xgb_v1')[-1]  # maç zamanı sıralı
+        row = ledger.rows([position], with_factors=True)[0]
+        assert row['factors']['features'] == {'elo_diff': 42.0}
+
+
+def test_repeated_logs_are_deduplicated():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ledger = _ledger(tmpdir, flush_rows=2)
+        first = _log(ledger, 1, [0.2, 0.3, 0.5])
+        # Sayfa yenilemesi: aynı maç / model / sürüm / olasılık yeni satır yazmaz (segmentteki satır dahil)
+        _log(ledger, 2, [0.3, 0.4, 0.3])
+        assert ledger.manifest()['segments'] == 1
+        assert _log(ledger, 1, [0.2, 0.3, 0.5]) == first
+        assert PredictionLedger(ledger.root, archive=ledger._archive).log_prediction(
+            home_team='A', away_team='B', prediction=2, confidence=0.5, probabilities=[0.2, 0.3, 0.5],
+            model_name='xgb_v1', model_version='v1', fixture_id=1) == first
+        assert len(ledger) == 2
+
+        _log(ledger, 1, [0.2, 0.3, 0.5], model_version='v2')
+        _log(ledger, 1, [0.1, 0.3, 0.6])
+        assert len(ledger) == 4
+
+
+def _log_many(root, start):
+    ledger = PredictionLedger(root, flush_rows=3)
+    for fixture_id in range(start, start + 30):
+        ledger.log_prediction(home_team='A', away_team='B', prediction=2, confidence=0.5,
+                              probabilities=[0.2, 0.3, 0.5], model_name='m', fixture_id=fixture_id)
+
+
+def test_concurrent_flushes_do_not_overwrite_segments():
+    import multiprocessing
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, 'ledger')
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_log_many, args=(root, start)) for start in (0, 1000, 2000)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        ledger = PredictionLedger(root)
+        assert len(ledger) == 90 == ledger.manifest()['rows'] + ledger._journal_rows()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Request Planner Test
+====================
+Analiz öncesi maliyet tahminini (arşivden karşılanan çağrılar ücretsiz),
+kalan kotaya sığan en yüksek etkili alt kümenin seçimini ve run_core_analysis'in
+plan dışı çağrıları yapmadan düşen faktörleri raporladığını test eder
+"""
+
+import analysis_logic
+import api_utils
+import fixture_archive
+import request_planner
+from fixture_archive import FixtureArchive
+
+LEAGUE = {'league_id': 203, 'season': 2025}
+
+
+def _isolated_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixture_archive, '_archive', FixtureArchive(str(tmp_path / 'archive')))
+
+
+def test_choose_fetches_maximizes_impact_within_budget():
+    costs = {'recent_form': 2, 'season_stats': 2, 'league_baselines': 0, 'odds': 1,
+             'key_player_injuries': 3, 'h2h': 1, 'team_injuries': 2, 'referee': 2}
+
+    assert request_planner.choose_fetches(costs, None) == list(costs)
+    assert set(request_planner.choose_fetches(costs, 13)) == set(costs)
+
+    chosen = request_planner.choose_fetches(costs, 5)
+    assert chosen == ['recent_form', 'season_stats', 'league_baselines', 'odds']
+    # Bütçe 0 iken sadece ücretsiz (arşiv/cache) gruplar kalır
+    assert request_planner.choose_fetches(costs, 0) == ['league_baselines']
+
+
+def test_costs_drop_for_archive_and_cache(tmp_path, monkeypatch):
+    _isolated_archive(tmp_path, monkeypatch)
+    costs, _ = request_planner.estimate_costs(645, 611, 99, LEAGUE, request_planner.FetchLedger())
+    assert costs == {'recent_form': 2, 'season_stats': 2, 'league_baselines': 1, 'odds': 1,
+                     'key_player_injuries': 3, 'h2h': 1, 'team_injuries': 2, 'referee': 2}
+
+    # Streamlit cache'inde duran çağrılar (ledger) ücretsizdir
+    ledger = request_planner.FetchLedger()
+    plan = request_planner.plan_core_analysis(645, 611, 99, LEAGUE, budget=100, ledger=ledger)
+    monkeypatch.setattr(api_utils, 'STREAMLIT_AVAILABLE', True)
+    request_planner.record_fetched(plan, ledger)
+    cached_costs, _ = request_planner.estimate_costs(645, 611, 99, LEAGUE, ledger)
+    assert sum(cached_costs.values()) == 0
+    assert request_planner.estimate_costs(645, 549, 99, LEAGUE, ledger)[0]['recent_form'] == 1
+
+
+def test_run_core_analysis_stays_within_budget_and_reports_degraded(tmp_path, monkeypatch):
+    _isolated_archive(tmp_path, monkeypatch)
+    calls = []
+
+    def fake_request(api_key, base_url, endpoint, params, skip_limit=False):
+        calls.append(endpoint)
+        return [], None
+
+    monkeypatch.setattr(api_utils, 'make_api_request', fake_request)
+    result = analysis_logic.run_core_analysis(
+        'k', 'u', 645, 611, 'GS', 'FB', 99, LEAGUE,
+        {'injury_impact': 0.85, 'max_goals': 2.5}, 1.35, skip_api_limit=True, request_budget=4
+    )
+
+    plan = result['request_plan']
+    assert len(calls) <= 4 and plan['estimated_cost'] == 4 and plan['budget'] == 4
+    assert plan['fetched'] == ['recent_form', 'league_baselines', 'odds']
+    assert 'Sezon istatistikleri' in plan['degraded'] and 'Hakem' in plan['degraded']
+    assert result['stats']['a'] == analysis_logic.default_general_stats()
+    assert 'injuries' not in calls and 'players' not in calls
+
+
+def test_plan_is_built_outside_shared_cache_and_keys_it(tmp_path, monkeypatch):
+    _isolated_archive(tmp_path, monkeypatch)
+    monkeypatch.setattr(api_utils, 'make_api_request', lambda *a, **k: ([], None))
+    keys = []
+
+    def fake_cached(*args):
+        keys.append(args[11])
+        return {'request_plan': None}
+
+    monkeypatch.setattr(analysis_logic, '_cached_core_analysis', fake_cached)
+    for budget in (4, 100):
+        result = analysis_logic.run_core_analysis(
+            'k', 'u', 645, 611, 'GS', 'FB', 99, LEAGUE, {}, 1.35, skip_api_limit=True, request_budget=budget)
+        assert result['request_plan']['budget'] == budget
+
+    # Kotası az kullanıcının eksik analizi farklı cache anahtarına düşer
+    assert keys[0] == frozenset({'recent_form', 'league_baselines', 'odds'})
+    assert keys[1] != keys[0] and keys[0] < keys[1]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Single-Flight Coalescing Test
+=============================
+Eşzamanlı cache miss'lerin tek upstream çağrısında birleştiğini
+(thread'ler ve süreçler arası kilit satırı) test eder
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from single_flight import SingleFlight, SQLiteLockStore
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        gate.wait(2)
+        return {'fixture': 123}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('fx:123', fetch))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{'fixture': 123}] * 8
+    assert flight.stats['coalesced_threads'] == 7
+
+
+def test_leader_error_propagates_and_key_is_released():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("api down")
+
+    try:
+        flight.do('k', boom)
+        assert False, "hata bekleniyordu"
+    except ValueError:
+        pass
+    assert flight.do('k', lambda: 5) == 5
+
+
+def test_cross_process_lock_waits_for_cached_result():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SQLiteLockStore(os.path.join(tmpdir, 'cache.db'))
+        cache = {}
+
+        # Başka bir süreç kilidi tutuyor ve birazdan sonucu yazacak
+        assert store.acquire('fx:9', 'other-process')
+        assert not store.acquire('fx:9', 'me')
+
+        def other_process_finishes():
+            time.sleep(0.2)
+            cache['fx:9'] = 'from-other'
+            store.release('fx:9', 'other-process')
+        threading.Thread(target=other_process_finishes).start()
+
+        flight = SingleFlight(poll_interval=0.02)
+        calls = []
+        result = flight.do('fx:9', lambda: calls.append(1) or 'mine',
+                           cache_lookup=lambda: cache.get('fx:9'), lock_store=store)
+        assert result == 'from-other' and calls == []
+        assert not store.is_locked('fx:9')
+
+
+def test_expired_lock_is_taken_over():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SQLiteLockStore(os.path.join(tmpdir, 'cache.db'), lock_ttl=0.05)
+        assert store.acquire('k', 'crashed')
+        time.sleep(0.1)
+        assert SingleFlight().do('k', lambda: 'fresh', lock_store=store) == 'fresh'
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Team Profile Store Test
+=======================
+Lig profil tablosunun arşiv istatistiklerinden tek geçişte hesaplandığını,
+lig yüzdeliklerini ve hesaplayıcıların profili ham istatistikle aynı formülle
+okuduğunu test eder
+"""
+
+import os
+import tempfile
+
+from cache_manager import CacheManager
+from expected_assists_calculator import ExpectedAssistsCalculator
+from expected_goals_calculator import ExpectedGoalsCalculator
+from fixture_archive import FixtureArchive
+from pressing_metrics_calculator import PressingMetricsCalculator
+from progressive_metrics_calculator import ProgressiveMetricsCalculator
+from team_profiles import TeamProfileStore, league_percentiles
+
+T0 = 1_700_000_000
+
+
+def _fixture(fixture_id, home_id, away_id, home_goals, away_goals):
+    return {
+        'fixture': {'id': fixture_id, 'timestamp': T0 + fixture_id * 86400, 'status': {'short': 'FT'}},
+        'league': {'id': 203, 'season': 2025},
+        'teams': {'home': {'id': home_id, 'name': f'T{home_id}'}, 'away': {'id': away_id, 'name': f'T{away_id}'}},
+        'goals': {'home': home_goals, 'away': away_goals},
+        'score': {'halftime': {'home': None, 'away': None}},
+    }
+
+
+def _block(team_id, shots, on_target, possession, passes):
+    return {'team': {'id': team_id}, 'statistics': [
+        {'type': 'Total Shots', 'value': shots}, {'type': 'Shots on Goal', 'value': on_target},
+        {'type': 'Ball Possession', 'value': f'{possession}%'}, {'type': 'Total passes', 'value': passes},
+        {'type': 'Passes %', 'value': '80%'}]}
+
+
+def _archive(root):
+    archive = FixtureArchive(root)
+    fixtures = [_fixture(1, 645, 611, 2, 0), _fixture(2, 611, 549, 1, 1), _fixture(3, 549, 645, 0, 3)]
+    details = {
+        1: {'statistics': [_block(645, 18, 8, 60, 520), _block(611, 8, 2, 40, 350)]},
+        2: {'statistics': [_block(611, 12, 4, 55, 480), _block(549, 10, 3, 45, 400)]},
+        # 3. maçın istatistiği yok: sadece gol ortalamasına girer
+    }
+    archive.append(203, 2025, fixtures, details)
+    return archive
+
+
+def test_league_profiles_in_one_pass_with_population_percentiles():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive = _archive(os.path.join(tmpdir, 'archive'))
+        store = TeamProfileStore(archive, cache=CacheManager(db_path=os.path.join(tmpdir, 'c.db')))
+        profiles = store.get_league_profiles(203, 2025)
+
+        galatasaray = profiles[645]
+        assert galatasaray['matches'] == 2 and galatasaray['stat_matches'] == 1
+        assert galatasaray['team_stats']['total_shots'] == 18.0
+        assert galatasaray['team_stats']['goals_scored'] == 2.5
+        assert galatasaray['metrics']['shot_quality'] == round(ExpectedGoalsCalculator.shot_quality(8, 18), 4)
+        assert galatasaray['percentiles']['xg'] == 100
+        assert galatasaray['percentiles']['xga'] == 100  # en az şut yiyen
+        assert profiles[611]['team_stats']['total_shots'] == 10.0  # iki maçın ortalaması
+
+        # Aynı arşiv sürümü: bellekten; yeni store: cache'ten
+        store.get_profile(611, 203, 2025)
+        fresh = TeamProfileStore(archive, cache=store.cache)
+        assert fresh.get_profile(645, 203, 2025) == galatasaray
+        assert store.stats['builds'] == 1 and fresh.stats == {'memory_hits': 0, 'cache_hits': 1, 'builds': 0}
+
+    assert list(league_percentiles([3.0, 1.0, 2.0, 2.0])) == [100.0, 0.0, 50.0, 50.0]
+    assert list(league_percentiles([3.0, 1.0], lower_is_better=True)) == [0.0, 100.0]
+
+
+def test_calculators_read_profiles_with_same_formulas():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = TeamProfileStore(_archive(tmpdir), use_cache=False)
+        home, away = store.get_profile(645, 203, 2025), store.get_profile(611, 203, 2025)
+
+    xg_calc = ExpectedGoalsCalculator()
+    from_profile = xg_calc.estimate_team_xg_from_stats({}, {}, True, profile=home, opponent_profile=away)
+    from_stats = xg_calc.estimate_team_xg_from_stats(home['team_stats'], away['team_stats'], True)
+    assert from_profile.pop('league_percentile') == home['percentiles']['xg']
+    assert from_profile == from_stats
+
+    xa = ExpectedAssistsCalculator().estimate_team_xa_from_stats({}, match_count=5, profile=home)
+    assert xa['total_xA'] == round(home['metrics']['xa'], 2) and xa['league_percentile'] == home['percentiles']['xa']
+
+    ppda = PressingMetricsCalculator().estimate_ppda_from_stats({}, {}, profile=away, opponent_profile=home)
+    assert ppda['percentile'] == away['percentiles']['ppda']
+    assert ppda['ppda'] == 18.0  # rakip %60 topla oynuyor → 270 pas / 15 aksiyon
+
+    progressive = ProgressiveMetricsCalculator().estimate_progressive_metrics_from_stats({}, profile=home)
+    assert progressive['progressive_passing']['progressive_passes_per_match'] == \
+        round(home['metrics']['progressive_passes'], 2)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Upstream Rate Limiter Test
+==========================
+Süreçler arası paylaşılan token bucket'ın öncelik paylarını, günlük kotayı,
+429 / x-ratelimit başlıklarıyla eşitlenmeyi ve make_api_request'in kota
+dolunca ağa çıkmadan hata döndürdüğünü test eder
+"""
+
+import time
+
+import api_utils
+import upstream_rate_limiter
+from upstream_rate_limiter import (PRIORITY_BATCH, PRIORITY_LIVE, PRIORITY_USER,
+                                   UpstreamRateLimiter, request_priority)
+
+
+def test_priorities_share_one_bucket_across_instances(tmp_path):
+    db_path = str(tmp_path / 'rate.db')
+    # 60/dk: 12 token burst, saniyede 0.8 dolum
+    app, worker = UpstreamRateLimiter(db_path, per_minute=60), UpstreamRateLimiter(db_path, per_minute=60)
+
+    granted = 0
+    while worker.try_acquire(PRIORITY_BATCH) == 0.0:
+        granted += 1
+    assert granted == 7  # kovanın %40'ı üst önceliklere ayrılmış
+
+    # Aynı dosyayı kullanan diğer "süreç" kalan payı görür
+    user_granted = 0
+    while app.try_acquire(PRIORITY_USER) == 0.0:
+        user_granted += 1
+    assert user_granted == 3  # 5 token kaldı, %10 (1.2) canlı isteklere ayrılmış
+    assert app.try_acquire(PRIORITY_LIVE) == 0.0
+    wait = worker.try_acquire(PRIORITY_BATCH)
+    assert 0 < wait < 10  # kör uyku yerine bir sonraki token'a kadar
+
+    start = time.time()
+    app.acquire(PRIORITY_LIVE, max_wait=5)
+    assert time.time() - start < 5
+    assert app.get_stats()['day_count'] == worker.get_stats()['day_count'] == granted + user_granted + 2
+
+
+def test_daily_quota_and_server_feedback(tmp_path):
+    limiter = UpstreamRateLimiter(str(tmp_path / 'rate.db'), per_minute=600, per_day=20)
+
+    for _ in range(16):
+        limiter.acquire(PRIORITY_BATCH, max_wait=0)
+    assert limiter.try_acquire(PRIORITY_BATCH) > 0  # UTC gün başına kadar
+    try:
+        limiter.acquire(PRIORITY_BATCH, max_wait=1)
+        raise AssertionError("Günlük batch payı dolmuş olmalı")
+    except upstream_rate_limiter.UpstreamRateLimited as e:
+        assert 'batch' in str(e)
+    assert limiter.try_acquire(PRIORITY_USER) == 0.0
+
+    # Sunucu tarafındaki günlük kullanım daha yüksekse sayaç ona çekilir
+    limiter.observe(200, {'x-ratelimit-requests-remaining': '1'})
+    assert limiter.get_stats()['day_remaining'] == 1
+    assert limiter.try_acquire(PRIORITY_USER) > 0 and limiter.try_acquire(PRIORITY_LIVE) == 0.0
+
+    other = UpstreamRateLimiter(str(tmp_path / 'other.db'), per_minute=600)
+    other.observe(429, {'Retry-After': '30'})
+    assert 25 < other.try_acquire(PRIORITY_LIVE) <= 30
+    assert other.get_stats()['tokens'] == 0
+
+
+def test_make_api_request_skips_network_when_quota_exhausted(tmp_path, monkeypatch):
+    limiter = UpstreamRateLimiter(str(tmp_path / 'rate.db'), per_minute=600, per_day=10)
+    limiter.observe(200, {'x-ratelimit-requests-remaining': '0'})
+    monkeypatch.setattr(upstream_rate_limiter, '_limiter', limiter)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("Kota doluyken istek gönderilmemeli")
+
+    monkeypatch.setattr(api_utils.requests, 'get', no_network)
+    with request_priority(PRIORITY_BATCH):
+        response, error = api_utils.make_api_request('k', 'u', 'fixtures', {'date': '2025-01-01'}, skip_limit=True)
+    assert response is None and 'rate limit' in error.lower()
+    assert upstream_rate_limiter.current_priority({'live': 'all'}) == PRIORITY_LIVE
+    assert upstream_rate_limiter.current_priority() == PRIORITY_USER
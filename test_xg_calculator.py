@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+xG Calculator Batch Test
+========================
+Vektörel şut xG hesabının tekil hesapla birebir aynı olduğunu ve dizi
+tabanlı LivexGTracker'ın önceki çıktı biçimini koruduğunu test eder
+"""
+
+import random
+
+import numpy as np
+
+from xg_calculator import xGCalculator, LivexGTracker
+from expected_goals_calculator import ExpectedGoalsCalculator
+
+
+def _random_shots(n, seed=3):
+    rng = random.Random(seed)
+    calc = xGCalculator()
+    situations = list(calc.situation_multipliers) + ['unknown_play']
+    return [{
+        'distance': rng.choice([6, 11, 16.5, 25]) if i % 5 == 0 else rng.uniform(1, 40),
+        'angle': rng.uniform(0, 80),
+        'situation': rng.choice(situations),
+        'is_header': rng.random() < 0.2,
+        'defender_count': rng.randint(0, 6),
+        'goalkeeper_position': rng.choice(['out', 'bad', 'normal', 'good', 'n/a']),
+        'foot': rng.choice(['strong', 'weak']),
+    } for i in range(n)]
+
+
+def test_batch_matches_scalar_shot_xg():
+    calc = xGCalculator()
+    shots = _random_shots(500)
+    batch = calc.calculate_shots_xg(**calc.shots_to_arrays(shots))
+    for shot, value in zip(shots, batch.tolist()):
+        assert round(value, 3) == calc.calculate_shot_xg(**shot)['xg_value']
+
+
+def test_match_xg_output_unchanged():
+    calc = xGCalculator()
+    shots = _random_shots(40, seed=11)
+    result = calc.calculate_match_xg(shots)
+    expected = [calc.calculate_shot_xg(**shot) for shot in shots]
+    assert result['shots'] == expected
+    assert result['total_xg'] == round(sum(s['xg_value'] for s in expected), 2)
+    assert result['best_chance'] == max(expected, key=lambda x: x['xg_value'])
+    assert calc.calculate_match_xg([])['best_chance'] is None
+
+
+def test_xg_table_aggregates_per_team():
+    calc = xGCalculator()
+    table = calc.calculate_xg_table([7, 8, 7, 7], [0.5, 0.1, 0.25, 0.05], goals=[1, 0, 0, 1])
+    assert table[7]['shots'] == 3 and table[7]['goals'] == 2
+    assert table[7]['xg'] == 0.8 and table[8]['xg'] == 0.1
+    assert table[7]['goals_minus_xg'] == 1.2
+
+
+def test_live_tracker_array_storage():
+    tracker = LivexGTracker()
+    shots = _random_shots(70, seed=5)
+    calc = xGCalculator()
+    for minute, shot in enumerate(shots[:40]):
+        tracker.add_shot('home', shot, minute, is_goal=(minute % 13 == 0))
+    tracker.add_shots('away', shots[40:], minutes=list(range(30)), is_goal=[m == 29 for m in range(30)])
+
+    state = tracker.get_current_state()
+    home_xg = 0.0
+    for shot in shots[:40]:
+        home_xg += calc.calculate_shot_xg(**shot)['xg_value']
+    assert state['home_xg'] == round(home_xg, 2)
+    assert state['home_goals'] == 4 and state['away_goals'] == 1
+    assert len(state['timeline']) == 70
+    assert state['timeline'][-1]['cumulative_home_xg'] == tracker.match_data['home']['xg']
+
+    summary = tracker.get_match_summary()
+    assert summary['total_shots'] == 70 and summary['final_score'] == '4 - 1'
+    assert abs(sum(tracker.get_xg_by_period()['away']) - state['away_xg']) < 0.05
+
+
+def test_expected_goals_distance_lookup():
+    calc = ExpectedGoalsCalculator()
+    for distance, expected in [(-1, 0.02), (0, 0.45), (5.99, 0.45), (6, 0.25), (16, 0.05),
+                               (24.9, 0.05), (25, 0.02), (100, 0.02), (250, 0.02)]:
+        assert calc._get_xg_from_distance(distance) == expected
+
+    rng = np.random.default_rng(1)
+    distances = rng.uniform(0, 40, 200)
+    angles = rng.uniform(0, 60, 200)
+    batch = calc.calculate_xg_batch(distances, angles, body_parts=['header'] * 200)
+    for d, a, value in zip(distances, angles, batch):
+        assert abs(value - calc.calculate_xg_from_shot_data(d, a, body_part='header')) < 1e-12
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -31,6 +31,7 @@ from enhanced_ml_predictor import EnhancedMLPredictor
 from model_trainer import ModelTrainer
 from ml_evaluator import MLEvaluator
 import api_utils
+import fixture_archive
 
 print("="*80)
 print("REAL DATA TRAINING SCRIPT")
@@ -78,6 +79,13 @@ def fetch_finished_fixtures(league_id: int, season: int, max_fixtures: int = 200
     """Fetch finished fixtures from a league/season"""
     print(f"\n[Fetching] League {league_id} - Season {season}")
     
+    # Archived seasons are replayed offline (python fixture_archive.py --ingest -l ... -s ...)
+    archive = fixture_archive.get_archive()
+    if archive.partition_info(league_id, season):
+        rows = archive.league_window(league_id, season)[::-1][:max_fixtures]
+        print(f"  ✓ Found {len(rows)} archived fixtures")
+        return [fixture_archive.row_to_fixture(row, archive.get_details(row['fixture_id'])) for row in rows]
+    
     params = {
         'league': league_id,
         'season': season,
@@ -271,9 +279,6 @@ def collect_training_data(target_matches: int) -> Tuple[List[Dict], List[int]]:
                 if match_data and label is not None:
                     league_matches.append(match_data)
                     league_labels.append(label)
-                
-                # Rate limiting (API has limits)
-                time.sleep(0.1)
         
         print(f"  ✓ Collected {len(league_matches)} matches from {league_name}")
         
@@ -536,4 +541,6 @@ def main():
     
 
 if __name__ == "__main__":
-    main()
+    from upstream_rate_limiter import PRIORITY_BATCH, request_priority
+    with request_priority(PRIORITY_BATCH):
+        main()
@@ -1,11 +1,12 @@
 # update_elo.py
 
 from datetime import date, timedelta
-import api_utils
 import elo_utils
+import fixture_archive
 import os
 import toml
-from datetime import datetime
+from datetime import datetime, timezone
+from upstream_rate_limiter import PRIORITY_BATCH, request_priority
 
 # GitHub Actions için app.py bağımlılığını kaldır
 INTERESTING_LEAGUES = {
@@ -18,6 +19,7 @@ INTERESTING_LEAGUES = {
     2: "🏆 UEFA Champions League", 3: "🏆 UEFA Europa League", 848: "🏆 UEFA Conference League",
 }
 
+@request_priority(PRIORITY_BATCH)
 def run_elo_update():
     """Elo reytinglerini güncelleyen ana fonksiyon."""
     print("Elo reyting güncelleme betiği başlatıldı...")
@@ -58,13 +60,19 @@ def run_elo_update():
     
     print(f"{yesterday} tarihindeki maçlar için Elo reytingleri güncelleniyor...")
     
-    # Dünün bitmiş maçlarını API'den çek (limit kontrolünü atlayarak)
-    fixtures, error = api_utils.get_fixtures_by_date(API_KEY, BASE_URL, league_ids, yesterday, bypass_limit_check=True)
-    
-    if error:
-        print(f"API'den maçlar çekilirken hata oluştu: {error}")
-        return
-        
+    # Yeni bitmiş maçları arşive al (sadece high-water mark sonrası), dünün maçlarını arşivden oku
+    archive = fixture_archive.get_archive()
+    season = fixture_archive.current_season(yesterday)
+    fixture_archive.ingest(API_KEY, BASE_URL, league_ids, [season], archive=archive)
+
+    day_start = int(datetime(yesterday.year, yesterday.month, yesterday.day, tzinfo=timezone.utc).timestamp())
+    fixtures = [
+        row for league_id in league_ids
+        for row in archive.league_window(league_id, since=day_start, until=day_start + 86400)
+    ]
+    # Elo sıraya duyarlı: maçları oynanış sırasıyla işle
+    fixtures.sort(key=lambda row: row['timestamp'])
+
     if not fixtures:
         print("Dün için güncellenecek maç bulunamadı.")
         return
@@ -72,15 +80,10 @@ def run_elo_update():
     updated_count = 0
     for match in fixtures:
         try:
-            # Sadece bitmiş ve skoru belli maçları işle
-            if 'actual_score' not in match:
-                continue
-
             home_id = match['home_id']
             away_id = match['away_id']
-            score_str = match['actual_score'].split(' - ')
-            score_home = int(score_str[0])
-            score_away = int(score_str[1])
+            score_home = match['home_goals']
+            score_away = match['away_goals']
 
             # Takımların mevcut reytinglerini al (yoksa varsayılan atanır)
             rating_home = elo_utils.get_team_rating(home_id, ratings)
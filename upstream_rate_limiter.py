@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Upstream Rate Limiter
+=====================
+API-Football planına (dakika + gün limiti) göre süreçler arası paylaşılan
+token bucket. Streamlit, FastAPI, Elo güncelleyici ve eğitim scriptleri aynı
+SQLite dosyasındaki kovayı kullanır; kör time.sleep yerine bir sonraki token'ın
+düşeceği ana kadar beklenir.
+
+- Dakika kovası: kapasite (burst) + sürekli dolum, kayan 60 saniyede en fazla
+  plan limiti kadar istek geçer
+- Gün sayacı: UTC gün başında sıfırlanır (API-Football kotası gibi)
+- Öncelik: live > user > batch. Düşük öncelik, kovanın / günlük kotanın
+  üst önceliklere ayrılan payına dokunamaz
+- 429 veya x-ratelimit başlıkları görüldüğünde kova sunucu durumuyla eşitlenir
+
+Plan limitleri ortamdan okunur:
+    API_FOOTBALL_PER_MINUTE   (varsayılan 300)
+    API_FOOTBALL_PER_DAY      (varsayılan 7500)
+    API_RATE_LIMIT_DB         paylaşılan SQLite dosyası
+
+Usage:
+    from upstream_rate_limiter import PRIORITY_BATCH, request_priority
+
+    with request_priority(PRIORITY_BATCH):       # arka plan işleri
+        api_utils.make_api_request(...)          # token yoksa bekler, kota yoksa hata döner
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+import requests
+
+PRIORITY_LIVE = 0
+PRIORITY_USER = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {PRIORITY_LIVE: 'live', PRIORITY_USER: 'user', PRIORITY_BATCH: 'batch'}
+
+# Öncelik → kovada / günlük kotada üst önceliklere bırakılan pay
+MINUTE_RESERVE = {PRIORITY_LIVE: 0.0, PRIORITY_USER: 0.10, PRIORITY_BATCH: 0.40}
+DAILY_RESERVE = {PRIORITY_LIVE: 0.0, PRIORITY_USER: 0.05, PRIORITY_BATCH: 0.20}
+
+# Kapasitenin bu kadarı anlık burst, kalanı dakikaya yayılmış dolum
+BURST_FRACTION = 0.2
+# Sunucu 429 döndürdü ve Retry-After yoksa tüm önceliklerin bekleyeceği süre
+RATE_LIMIT_BACKOFF_SECONDS = 15.0
+# acquire() varsayılan en uzun bekleme (saniye)
+DEFAULT_MAX_WAIT = {PRIORITY_LIVE: 10.0, PRIORITY_USER: 30.0, PRIORITY_BATCH: 300.0}
+
+_priority: ContextVar[int] = ContextVar('upstream_request_priority', default=PRIORITY_USER)
+
+
+class UpstreamRateLimited(requests.exceptions.RequestException):
+    """Kota doldu veya token bekleme süresi aşıldı (istek gönderilmedi)"""
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[int]:
+    """Blok içindeki API isteklerinin önceliği"""
+    token = _priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(params: Optional[Mapping[str, Any]] = None) -> int:
+    """Aktif öncelik (canlı maç istekleri her zaman live)"""
+    if params and 'live' in params:
+        return PRIORITY_LIVE
+    return _priority.get()
+
+
+def _utc_day(now: float) -> str:
+    return datetime.fromtimestamp(now, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _seconds_to_utc_midnight(now: float) -> float:
+    return 86400 - (now % 86400)
+
+
+class UpstreamRateLimiter:
+    """SQLite'ta tutulan, süreçler arası paylaşılan dakika kovası + gün sayacı"""
+
+    def __init__(self, db_path: str, per_minute: int = 300, per_day: int = 7500, name: str = 'api-football'):
+        """
+        Args:
+            db_path: Paylaşılan SQLite dosyası
+            per_minute: Plan dakika limiti
+            per_day: Plan gün limiti
+            name: Kova adı (aynı dosyada birden fazla upstream için)
+        """
+        self.db_path = str(db_path)
+        self.name = name
+        self.per_minute = int(per_minute)
+        self.per_day = int(per_day)
+        # capacity + rate * 60 = per_minute → kayan dakikada limit aşılmaz
+        self.capacity = max(1.0, self.per_minute * BURST_FRACTION)
+        self.rate = (self.per_minute - self.capacity) / 60.0
+        self._local = threading.Lock()
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    def _init_table(self):
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upstream_buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    day_count INTEGER NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0
+                )
+            """)
+            now = time.time()
+            conn.execute(
+                "INSERT OR IGNORE INTO upstream_buckets VALUES (?, ?, ?, ?, 0, 0)",
+                (self.name, self.capacity, now, _utc_day(now))
+            )
+        finally:
+            conn.close()
+
+    def _load(self, conn: sqlite3.Connection, now: float) -> Dict[str, Any]:
+        tokens, updated_at, day, day_count, blocked_until = conn.execute(
+            "SELECT tokens, updated_at, day, day_count, blocked_until FROM upstream_buckets WHERE name = ?",
+            (self.name,)
+        ).fetchone()
+        # 429 sonrası bekleme süresince kova dolmaz (bitince burst ile tekrar 429 yenmesin)
+        refill_from = max(updated_at, min(blocked_until, now))
+        tokens = min(self.capacity, tokens + max(0.0, now - refill_from) * self.rate)
+        if day != _utc_day(now):
+            day, day_count = _utc_day(now), 0
+        return {'tokens': tokens, 'day': day, 'day_count': day_count, 'blocked_until': blocked_until}
+
+    def _store(self, conn: sqlite3.Connection, state: Dict[str, Any], now: float):
+        conn.execute(
+            "UPDATE upstream_buckets SET tokens = ?, updated_at = ?, day = ?, day_count = ?, blocked_until = ? "
+            "WHERE name = ?",
+            (state['tokens'], now, state['day'], state['day_count'], state['blocked_until'], self.name)
+        )
+
+    def try_acquire(self, priority: int = PRIORITY_USER) -> float:
+        """
+        Token almayı dene
+
+        Returns:
+            0.0 = token alındı, >0 = bir sonraki denemeye kadar beklenecek saniye
+        """
+        now = time.time()
+        with self._local:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                state = self._load(conn, now)
+                floor = self.capacity * MINUTE_RESERVE[priority]
+                daily_cap = self.per_day * (1.0 - DAILY_RESERVE[priority])
+
+                if state['day_count'] + 1 > daily_cap:
+                    wait = _seconds_to_utc_midnight(now)
+                elif state['blocked_until'] > now:
+                    wait = state['blocked_until'] - now
+                elif state['tokens'] - 1.0 < floor:
+                    wait = max(1e-3, (floor + 1.0 - state['tokens']) / self.rate) if self.rate > 0 else 60.0
+                else:
+                    state['tokens'] -= 1.0
+                    state['day_count'] += 1
+                    wait = 0.0
+                self._store(conn, state, now)
+                conn.execute("COMMIT")
+                return wait
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def acquire(self, priority: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Token alınana kadar bekle
+
+        Raises:
+            UpstreamRateLimited: günlük kota doldu veya bekleme max_wait'i aşacak
+        """
+        priority = current_priority() if priority is None else priority
+        max_wait = DEFAULT_MAX_WAIT[priority] if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                return
+            if time.time() + wait > deadline:
+                raise UpstreamRateLimited(
+                    f"API rate limit: {PRIORITY_NAMES[priority]} önceliği için {wait:.1f}s sonra token var"
+                )
+            time.sleep(wait)
+
+    def observe(self, status_code: int, headers: Optional[Mapping[str, str]] = None):
+        """Yanıttaki 429 / x-ratelimit başlıklarıyla kovayı sunucu durumuna eşitle"""
+        headers = headers or {}
+        now = time.time()
+        minute_remaining = headers.get('X-RateLimit-Remaining')
+        day_remaining = headers.get('x-ratelimit-requests-remaining')
+        if status_code != 429 and minute_remaining is None and day_remaining is None:
+            return
+
+        with self._local:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                state = self._load(conn, now)
+                if status_code == 429:
+                    try:
+                        backoff = float(headers.get('Retry-After', RATE_LIMIT_BACKOFF_SECONDS))
+                    except (TypeError, ValueError):
+                        backoff = RATE_LIMIT_BACKOFF_SECONDS
+                    state['tokens'] = 0.0
+                    state['blocked_until'] = max(state['blocked_until'], now + backoff)
+                if minute_remaining is not None and str(minute_remaining).isdigit():
+                    state['tokens'] = min(state['tokens'], float(minute_remaining))
+                if day_remaining is not None and str(day_remaining).isdigit():
+                    state['day_count'] = max(state['day_count'], self.per_day - int(day_remaining))
+                self._store(conn, state, now)
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def remaining_today(self, priority: Optional[int] = None) -> int:
+        """Önceliğin bugün kullanabileceği kalan istek sayısı"""
+        priority = current_priority() if priority is None else priority
+        conn = self._connect()
+        try:
+            state = self._load(conn, time.time())
+        finally:
+            conn.close()
+        return max(0, int(self.per_day * (1.0 - DAILY_RESERVE[priority])) - state['day_count'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            state = self._load(conn, now)
+        finally:
+            conn.close()
+        return {
+            'per_minute': self.per_minute,
+            'per_day': self.per_day,
+            'tokens': round(state['tokens'], 2),
+            'capacity': self.capacity,
+            'day_count': state['day_count'],
+            'day_remaining': self.per_day - state['day_count'],
+            'blocked_for': round(max(0.0, state['blocked_until'] - now), 1),
+        }
+
+
+# Global instance
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> UpstreamRateLimiter:
+    """Global UpstreamRateLimiter instance'ı getir (plan limitleri ortamdan)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = UpstreamRateLimiter(
+                    os.environ.get(
+                        'API_RATE_LIMIT_DB',
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upstream_rate.db')
+                    ),
+                    per_minute=int(os.environ.get('API_FOOTBALL_PER_MINUTE', 300)),
+                    per_day=int(os.environ.get('API_FOOTBALL_PER_DAY', 7500)),
+                )
+    return _limiter
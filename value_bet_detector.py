@@ -8,6 +8,8 @@ import pandas as pd
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
+from odds_normalizer import OddsIndex
+
 
 @dataclass
 class BettingOdds:
@@ -50,6 +52,49 @@ class BettingOdds:
             'draw': total / implied['draw'] if implied['draw'] > 0 else 0,
             'away_win': total / implied['away_win'] if implied['away_win'] > 0 else 0
         }
+    
+    # OddsIndex (market, line, outcome) anahtarları -> BettingOdds alanları
+    INDEX_FIELDS = {
+        'home_win': ('match_winner', None, 'home'),
+        'draw': ('match_winner', None, 'draw'),
+        'away_win': ('match_winner', None, 'away'),
+        'ht_home_win': ('first_half', None, 'home'),
+        'ht_draw': ('first_half', None, 'draw'),
+        'ht_away_win': ('first_half', None, 'away'),
+        'over_2_5': ('over_under', 2.5, 'over'),
+        'under_2_5': ('over_under', 2.5, 'under'),
+    }
+    
+    @classmethod
+    def from_odds_index(cls, odds_index: OddsIndex, bookmaker: Optional[str] = None,
+                        source: str = 'best') -> Optional['BettingOdds']:
+        """
+        OddsIndex'ten BettingOdds oluştur
+        
+        Args:
+            odds_index: Normalize edilmiş oran index'i
+            bookmaker: Belirli bir bookmaker (None = tüm piyasa)
+            source: 'best' (en yüksek fiyat) veya 'consensus' (ortalama fiyat)
+        
+        Returns:
+            BettingOdds veya 1X2 oranı yoksa None
+        """
+        values = {}
+        for field, (market, line, outcome) in cls.INDEX_FIELDS.items():
+            if bookmaker is not None:
+                quotes = [price for book, price in odds_index.quotes(market, outcome, line) if book == bookmaker]
+                values[field] = quotes[0] if quotes else 0.0
+            elif source == 'consensus':
+                consensus = odds_index.consensus(market, outcome, line)
+                values[field] = consensus['odd'] if consensus else 0.0
+            else:
+                best = odds_index.best(market, outcome, line)
+                values[field] = best['odd'] if best else 0.0
+        
+        if not (values['home_win'] and values['draw'] and values['away_win']):
+            return None
+        
+        return cls(bookmaker=bookmaker or source, **values)
 
 
 class KellyCriterion:
@@ -299,6 +344,45 @@ class ArbitrageDetector:
             }
         
         return None
+    
+    @staticmethod
+    def detect_arbitrage_from_index(odds_index: OddsIndex, market: str = 'match_winner',
+                                    outcomes: Tuple[str, ...] = ('home', 'draw', 'away'),
+                                    line: Optional[float] = None) -> Optional[Dict]:
+        """
+        OddsIndex üzerinden arbitrage bul (herhangi bir market/çizgi için)
+        
+        Her outcome'un en iyi fiyatı index'te önceden hesaplanmış olduğundan
+        bookmaker listesi yeniden gezilmez.
+        """
+        best = {outcome: odds_index.best(market, outcome, line) for outcome in outcomes}
+        if any(entry is None for entry in best.values()):
+            return None
+        
+        best_odds = {outcome: entry['odd'] for outcome, entry in best.items()}
+        arb_percentage = sum(1 / odd for odd in best_odds.values())
+        
+        if arb_percentage < 1.0:
+            profit_percentage = ((1 / arb_percentage) - 1) * 100
+            total_stake = 100
+            stakes = {
+                outcome: (total_stake / odd) / arb_percentage
+                for outcome, odd in best_odds.items()
+            }
+            
+            return {
+                'is_arbitrage': True,
+                'market': market,
+                'line': line,
+                'profit_percentage': profit_percentage,
+                'best_odds': best_odds,
+                'bookmakers': {outcome: entry['bookmaker'] for outcome, entry in best.items()},
+                'stakes': stakes,
+                'total_stake': sum(stakes.values()),
+                'guaranteed_profit': profit_percentage
+            }
+        
+        return None
 
 
 class BankrollManager:
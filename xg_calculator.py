@@ -6,18 +6,41 @@ Pozisyon bazlı beklenen gol hesaplama motoru
 """
 
 import math
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Sequence, Union
 from datetime import datetime
 import json
 
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
 class xGCalculator:
     """Beklenen Gol (Expected Goals) Hesaplama Motoru"""
     
+    # Mesafe kovaları (metre, sağ kapalı): <=6, <=11, <=16.5, <=25, >25
+    DISTANCE_EDGES = np.array([6.0, 11.0, 16.5, 25.0])
+    DISTANCE_FACTORS = np.array([0.8, 0.5, 0.25, 0.1, 0.03])
+    
+    # Kaleci pozisyon çarpanları
+    GK_MULTIPLIERS = {
+        'out': 1.5,      # Kaleci oyun dışı
+        'bad': 1.3,      # Kötü pozisyon
+        'normal': 1.0,   # Normal
+        'good': 0.8,     # İyi pozisyon
+    }
+    
     def __init__(self):
         """xG hesaplayıcıyı başlat"""
         self.position_weights = self._initialize_position_weights()
         self.situation_multipliers = self._initialize_situation_multipliers()
         
+        # Dizi tabanlı hesaplama için durum/kaleci kodları (kod = listedeki sıra)
+        self.situation_codes = list(self.situation_multipliers)
+        self._situation_mult_array = np.array([self.situation_multipliers[s] for s in self.situation_codes] + [1.0])
+        self.gk_codes = list(self.GK_MULTIPLIERS)
+        self._gk_mult_array = np.array([self.GK_MULTIPLIERS[g] for g in self.gk_codes] + [1.0])
+        
     def _initialize_position_weights(self) -> Dict[str, float]:
         """Pozisyon bazlı temel xG değerleri"""
         return {
@@ -96,13 +119,7 @@ class xGCalculator:
         defense_mult = max(defense_mult, 0.3)  # Minimum %30
         
         # Kaleci pozisyon çarpanı
-        gk_multipliers = {
-            'out': 1.5,      # Kaleci oyun dışı
-            'bad': 1.3,      # Kötü pozisyon
-            'normal': 1.0,   # Normal
-            'good': 0.8,     # İyi pozisyon
-        }
-        gk_mult = gk_multipliers.get(goalkeeper_position, 1.0)
+        gk_mult = self.GK_MULTIPLIERS.get(goalkeeper_position, 1.0)
         
         # Ayak çarpanı
         foot_mult = 1.0 if foot == 'strong' else 0.75
@@ -160,6 +177,105 @@ class xGCalculator:
         
         return base_xg
     
+    def encode_situations(self, situations: Sequence[str]) -> np.ndarray:
+        """Durum adlarını kodlara çevir (bilinmeyen durum -> çarpan 1.0)"""
+        lookup = {name: code for code, name in enumerate(self.situation_codes)}
+        unknown = len(self.situation_codes)
+        return np.array([lookup.get(s, unknown) for s in situations], dtype=np.int16)
+    
+    def encode_goalkeeper_positions(self, positions: Sequence[str]) -> np.ndarray:
+        """Kaleci pozisyonlarını kodlara çevir (bilinmeyen -> çarpan 1.0)"""
+        lookup = {name: code for code, name in enumerate(self.gk_codes)}
+        unknown = len(self.gk_codes)
+        return np.array([lookup.get(g, unknown) for g in positions], dtype=np.int16)
+    
+    @staticmethod
+    def coordinates_to_distance_angle(x: ArrayLike, y: ArrayLike,
+                                      field_length: float = 105,
+                                      field_width: float = 68) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Şut koordinatlarından mesafe (metre) ve açı (derece, 0=düz) dizileri
+        
+        Args:
+            x: X koordinatları (0 = savunma, field_length = hücum)
+            y: Y koordinatları (0 = sol, field_width = sağ)
+        """
+        dx = field_length - np.asarray(x, dtype=np.float64)
+        dy = np.abs(np.asarray(y, dtype=np.float64) - field_width / 2)
+        distance = np.hypot(dx, dy)
+        angle = np.degrees(np.arctan2(dy, dx))
+        return distance, angle
+    
+    def calculate_shots_xg(self,
+                           distance: ArrayLike,
+                           angle: ArrayLike,
+                           situation_codes: Optional[ArrayLike] = None,
+                           is_header: Optional[ArrayLike] = None,
+                           defender_count: Optional[ArrayLike] = None,
+                           gk_codes: Optional[ArrayLike] = None,
+                           weak_foot: Optional[ArrayLike] = None) -> np.ndarray:
+        """
+        Vektörel xG: N şut için tek çağrıda xG dizisi
+        
+        calculate_shot_xg ile birebir aynı formül; mesafe kovası np.searchsorted
+        ile bulunur, durum/kaleci çarpanları kod dizisi üzerinden indekslenir.
+        
+        Args:
+            distance: Mesafe dizisi (metre)
+            angle: Açı dizisi (derece)
+            situation_codes: encode_situations çıktısı (None = open_play)
+            is_header: Kafa vuruşu bayrakları
+            defender_count: Araya giren defans sayıları
+            gk_codes: encode_goalkeeper_positions çıktısı (None = normal)
+            weak_foot: Zayıf ayak bayrakları
+            
+        Returns:
+            Yuvarlanmamış xG dizisi (0.01-0.99)
+        """
+        xg = self._calculate_base_xg_array(distance, angle)
+        
+        # Çarpanlar calculate_shot_xg ile aynı sırada uygulanır
+        multipliers = self._shot_multipliers(situation_codes, is_header, defender_count, gk_codes, weak_foot)
+        for values in multipliers.values():
+            xg = xg * values
+        
+        return np.clip(xg, 0.01, 0.99)
+    
+    def _calculate_base_xg_array(self, distance: ArrayLike, angle: ArrayLike) -> np.ndarray:
+        """_calculate_base_xg'nin dizi karşılığı (mesafe kovası np.searchsorted ile)"""
+        distance = np.asarray(distance, dtype=np.float64)
+        angle = np.asarray(angle, dtype=np.float64)
+        distance_factor = self.DISTANCE_FACTORS[np.searchsorted(self.DISTANCE_EDGES, distance, side='left')]
+        return distance_factor * np.cos(np.radians(angle)) ** 2
+    
+    def _shot_multipliers(self, situation_codes=None, is_header=None, defender_count=None,
+                          gk_codes=None, weak_foot=None) -> Dict[str, np.ndarray]:
+        """Verilen kolonlar için çarpan dizileri (verilmeyen kolon atlanır)"""
+        multipliers = {}
+        if situation_codes is not None:
+            multipliers['situation'] = self._situation_mult_array[np.asarray(situation_codes)]
+        if is_header is not None:
+            multipliers['header'] = np.where(np.asarray(is_header, dtype=bool), 0.7, 1.0)
+        if defender_count is not None:
+            multipliers['defense'] = np.maximum(1.0 - np.asarray(defender_count, dtype=np.float64) * 0.15, 0.3)
+        if gk_codes is not None:
+            multipliers['goalkeeper'] = self._gk_mult_array[np.asarray(gk_codes)]
+        if weak_foot is not None:
+            multipliers['foot'] = np.where(np.asarray(weak_foot, dtype=bool), 0.75, 1.0)
+        return multipliers
+    
+    def shots_to_arrays(self, shots: List[Dict]) -> Dict[str, np.ndarray]:
+        """calculate_shot_xg parametre sözlüklerini kolon dizilerine çevir"""
+        return {
+            'distance': np.array([s['distance'] for s in shots], dtype=np.float64),
+            'angle': np.array([s['angle'] for s in shots], dtype=np.float64),
+            'situation_codes': self.encode_situations([s.get('situation', 'open_play') for s in shots]),
+            'is_header': np.array([bool(s.get('is_header', False)) for s in shots]),
+            'defender_count': np.array([s.get('defender_count', 0) for s in shots], dtype=np.float64),
+            'gk_codes': self.encode_goalkeeper_positions([s.get('goalkeeper_position', 'normal') for s in shots]),
+            'weak_foot': np.array([s.get('foot', 'strong') != 'strong' for s in shots]),
+        }
+    
     def calculate_match_xg(self, shots: List[Dict]) -> Dict[str, Any]:
         """
         Bir maç için toplam xG hesapla
@@ -170,22 +286,75 @@ class xGCalculator:
         Returns:
             Maç xG özeti
         """
-        total_xg = 0.0
-        shot_xgs = []
+        if not shots:
+            return {'total_xg': 0.0, 'shot_count': 0, 'avg_xg_per_shot': 0, 'best_chance': None, 'shots': []}
+        
+        # Tüm şutlar tek vektörel çağrıda; detay sözlükleri dizilerden üretilir
+        columns = self.shots_to_arrays(shots)
+        base_xg = self._calculate_base_xg_array(columns.pop('distance'), columns.pop('angle'))
+        multipliers = self._shot_multipliers(**columns)
+        raw_xg = base_xg
+        for values in multipliers.values():
+            raw_xg = raw_xg * values
+        xg_values = [round(v, 3) for v in np.clip(raw_xg, 0.01, 0.99).tolist()]
+        total_xg = sum(xg_values)
         
-        for shot in shots:
-            xg_result = self.calculate_shot_xg(**shot)
-            shot_xgs.append(xg_result)
-            total_xg += xg_result['xg_value']
+        shot_xgs = []
+        for i, shot in enumerate(shots):
+            shot_xgs.append({
+                'xg_value': xg_values[i],
+                'base_xg': round(float(base_xg[i]), 3),
+                'multipliers': {name: float(values[i]) for name, values in multipliers.items()},
+                'factors': {
+                    'distance': shot['distance'],
+                    'angle': shot['angle'],
+                    'situation': shot.get('situation', 'open_play'),
+                    'is_header': shot.get('is_header', False),
+                    'defenders': shot.get('defender_count', 0)
+                }
+            })
         
         return {
             'total_xg': round(total_xg, 2),
             'shot_count': len(shots),
-            'avg_xg_per_shot': round(total_xg / len(shots), 3) if shots else 0,
-            'best_chance': max(shot_xgs, key=lambda x: x['xg_value']) if shot_xgs else None,
+            'avg_xg_per_shot': round(total_xg / len(shots), 3),
+            'best_chance': max(shot_xgs, key=lambda x: x['xg_value']),
             'shots': shot_xgs
         }
     
+    def calculate_xg_table(self,
+                           team_ids: ArrayLike,
+                           xg_values: ArrayLike,
+                           goals: Optional[ArrayLike] = None) -> Dict[Any, Dict[str, float]]:
+        """
+        Sezon/lig xG tablosu: takım başına toplam xG, şut ve gol (np.bincount ile)
+        
+        Args:
+            team_ids: Şut başına takım ID dizisi
+            xg_values: calculate_shots_xg çıktısı
+            goals: Şut başına gol bayrağı (opsiyonel)
+            
+        Returns:
+            {team_id: {'xg', 'shots', 'goals', 'xg_per_shot', 'goals_minus_xg'}}
+        """
+        teams, codes = np.unique(np.asarray(team_ids), return_inverse=True)
+        xg_values = np.asarray(xg_values, dtype=np.float64)
+        xg_sum = np.bincount(codes, weights=xg_values, minlength=len(teams))
+        shot_count = np.bincount(codes, minlength=len(teams))
+        goal_sum = (np.bincount(codes, weights=np.asarray(goals, dtype=np.float64), minlength=len(teams))
+                    if goals is not None else np.zeros(len(teams)))
+        
+        table = {}
+        for i, team in enumerate(teams.tolist()):
+            table[team] = {
+                'xg': round(float(xg_sum[i]), 2),
+                'shots': int(shot_count[i]),
+                'goals': int(goal_sum[i]),
+                'xg_per_shot': round(float(xg_sum[i] / shot_count[i]), 3) if shot_count[i] else 0.0,
+                'goals_minus_xg': round(float(goal_sum[i] - xg_sum[i]), 2)
+            }
+        return table
+    
     def calculate_team_xg(self, 
                          team_stats: Dict[str, Any],
                          opponent_stats: Dict[str, Any]) -> Dict[str, Any]:
@@ -345,43 +514,94 @@ class xGCalculator:
 
 
 class LivexGTracker:
-    """Canlı maç xG takibi"""
+    """
+    Canlı maç xG takibi
+    
+    Şutlar takım başına kompakt numpy dizilerinde tutulur (xG, dakika, gol bayrağı);
+    kapasite dolunca iki katına büyütülür, toplamlar artımlı güncellenir.
+    """
+    
+    INITIAL_CAPACITY = 32
     
     def __init__(self):
         self.calculator = xGCalculator()
-        self.match_data = {
-            'home': {'xg': 0.0, 'shots': [], 'goals': 0},
-            'away': {'xg': 0.0, 'shots': [], 'goals': 0}
-        }
+        self._xg = {team: np.zeros(self.INITIAL_CAPACITY) for team in ('home', 'away')}
+        self._minute = {team: np.zeros(self.INITIAL_CAPACITY, dtype=np.int16) for team in ('home', 'away')}
+        self._is_goal = {team: np.zeros(self.INITIAL_CAPACITY, dtype=bool) for team in ('home', 'away')}
+        self._count = {'home': 0, 'away': 0}
+        self._totals = {'home': 0.0, 'away': 0.0}
+        self._goals = {'home': 0, 'away': 0}
         self.timeline = []
     
+    @property
+    def match_data(self) -> Dict[str, Dict[str, Any]]:
+        """Takım başına xG, şut xG dizisi ve gol sayısı"""
+        return {
+            team: {'xg': self._totals[team], 'shots': self.get_shot_xgs(team), 'goals': self._goals[team]}
+            for team in ('home', 'away')
+        }
+    
+    def get_shot_xgs(self, team: str) -> np.ndarray:
+        """Takımın şut xG dizisi (kopya değil, görünüm)"""
+        return self._xg[team][:self._count[team]]
+    
+    def _ensure_capacity(self, team: str, extra: int):
+        needed = self._count[team] + extra
+        capacity = len(self._xg[team])
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for store in (self._xg, self._minute, self._is_goal):
+            grown = np.zeros(new_capacity, dtype=store[team].dtype)
+            grown[:capacity] = store[team]
+            store[team] = grown
+    
+    def _append(self, team: str, xg_values: np.ndarray, minutes: np.ndarray, goals: np.ndarray):
+        n = len(xg_values)
+        self._ensure_capacity(team, n)
+        start = self._count[team]
+        self._xg[team][start:start + n] = xg_values
+        self._minute[team][start:start + n] = minutes
+        self._is_goal[team][start:start + n] = goals
+        self._count[team] += n
+        
+        for xg_value, minute, is_goal in zip(xg_values.tolist(), minutes.tolist(), goals.tolist()):
+            self._totals[team] += xg_value
+            if is_goal:
+                self._goals[team] += 1
+            
+            # Zaman çizelgesine ekle
+            self.timeline.append({
+                'minute': minute,
+                'team': team,
+                'xg': xg_value,
+                'is_goal': is_goal,
+                'cumulative_home_xg': self._totals['home'],
+                'cumulative_away_xg': self._totals['away']
+            })
+    
     def add_shot(self, team: str, shot_data: Dict, minute: int, is_goal: bool = False):
         """Canlı maçta şut ekle"""
         xg_result = self.calculator.calculate_shot_xg(**shot_data)
-        
-        self.match_data[team]['shots'].append(xg_result)
-        self.match_data[team]['xg'] += xg_result['xg_value']
-        
-        if is_goal:
-            self.match_data[team]['goals'] += 1
-        
-        # Zaman çizelgesine ekle
-        self.timeline.append({
-            'minute': minute,
-            'team': team,
-            'xg': xg_result['xg_value'],
-            'is_goal': is_goal,
-            'cumulative_home_xg': self.match_data['home']['xg'],
-            'cumulative_away_xg': self.match_data['away']['xg']
-        })
+        self._append(team, np.array([xg_result['xg_value']]), np.array([minute]), np.array([is_goal]))
+    
+    def add_shots(self, team: str, shots: List[Dict], minutes: ArrayLike,
+                  is_goal: Optional[ArrayLike] = None):
+        """Birden fazla şutu tek vektörel xG çağrısıyla ekle"""
+        if not shots:
+            return
+        columns = self.calculator.shots_to_arrays(shots)
+        xg_values = np.array([round(v, 3) for v in self.calculator.calculate_shots_xg(**columns).tolist()])
+        goals = np.zeros(len(shots), dtype=bool) if is_goal is None else np.asarray(is_goal, dtype=bool)
+        self._append(team, xg_values, np.asarray(minutes), goals)
     
     def get_current_state(self) -> Dict[str, Any]:
         """Mevcut xG durumunu getir"""
         return {
-            'home_xg': round(self.match_data['home']['xg'], 2),
-            'away_xg': round(self.match_data['away']['xg'], 2),
-            'home_goals': self.match_data['home']['goals'],
-            'away_goals': self.match_data['away']['goals'],
+            'home_xg': round(self._totals['home'], 2),
+            'away_xg': round(self._totals['away'], 2),
+            'home_goals': self._goals['home'],
+            'away_goals': self._goals['away'],
             'home_efficiency': self._calculate_efficiency('home'),
             'away_efficiency': self._calculate_efficiency('away'),
             'timeline': self.timeline
@@ -389,30 +609,34 @@ class LivexGTracker:
     
     def _calculate_efficiency(self, team: str) -> float:
         """Takım bitiricilik oranı"""
-        xg = self.match_data[team]['xg']
-        goals = self.match_data[team]['goals']
+        xg = self._totals[team]
+        goals = self._goals[team]
         
         if xg > 0:
             return round((goals / xg) * 100, 1)
         return 0.0
     
+    def get_xg_by_period(self, period_length: int = 15) -> Dict[str, List[float]]:
+        """Periyot (varsayılan 15 dk) başına takım xG'si"""
+        result = {}
+        for team in ('home', 'away'):
+            n = self._count[team]
+            buckets = self._minute[team][:n] // period_length
+            sums = np.bincount(buckets, weights=self._xg[team][:n]) if n else np.zeros(0)
+            result[team] = [round(float(v), 2) for v in sums]
+        return result
+    
     def get_match_summary(self) -> Dict[str, Any]:
         """Maç sonu xG özeti"""
-        home_comp = self.calculator.compare_xg_vs_goals(
-            self.match_data['home']['xg'],
-            self.match_data['home']['goals']
-        )
-        away_comp = self.calculator.compare_xg_vs_goals(
-            self.match_data['away']['xg'],
-            self.match_data['away']['goals']
-        )
+        home_comp = self.calculator.compare_xg_vs_goals(self._totals['home'], self._goals['home'])
+        away_comp = self.calculator.compare_xg_vs_goals(self._totals['away'], self._goals['away'])
         
         return {
-            'final_score': f"{self.match_data['home']['goals']} - {self.match_data['away']['goals']}",
-            'final_xg': f"{round(self.match_data['home']['xg'], 2)} - {round(self.match_data['away']['xg'], 2)}",
+            'final_score': f"{self._goals['home']} - {self._goals['away']}",
+            'final_xg': f"{round(self._totals['home'], 2)} - {round(self._totals['away'], 2)}",
             'home_analysis': home_comp,
             'away_analysis': away_comp,
-            'total_shots': len(self.match_data['home']['shots']) + len(self.match_data['away']['shots']),
+            'total_shots': self._count['home'] + self._count['away'],
             'timeline': self.timeline
         }
 